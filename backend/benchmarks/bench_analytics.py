@@ -0,0 +1,220 @@
+# backend/benchmarks/bench_analytics.py
+"""Dashboard analytics: full GET /orders scan versus pre-aggregated GET /analytics.
+
+For every size in --sizes, synthetic orders are aggregated with the vectorized
+rebuild (aggregate_chunked, REBUILD_CHUNK_ORDERS per pass) and written to the analytics table, then GET
+/analytics is timed. The scan baseline pages through GET /orders?mode=scan and
+totals the orders the way the dashboard did in the browser; it is measured up
+to --scan-limit orders and extrapolated linearly (marked "measured": false)
+above that, since loading a million orders into moto is impractical.
+
+Before timing, a sample of orders is fed through the stream consumer as
+INSERT/MODIFY/REMOVE records (each batch delivered twice) and the resulting
+rows must equal a rebuild over the final orders, aggregated in small chunks
+so merging per-chunk rows is checked too.
+
+    python benchmarks/bench_analytics.py --sizes 10000,100000,1000000 --scan-limit 10000
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import random
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Any, List
+
+from common import local_aws, api_event, summarize, report, inject_latency, ANALYTICS_DIR, ANALYTICS_TABLE
+
+STATUSES = ('PENDING', 'PROCESSING', 'COMPLETED', 'CANCELLED')
+
+def load_analytics_app():
+    """Import functions/analytics/app.py without clashing with the order service's app module"""
+    spec = importlib.util.spec_from_file_location('analytics_app', os.path.join(ANALYTICS_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def synthetic_orders(count: int, seed: int = 7, fractional: bool = False) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    orders = []
+    for i in range(count):
+        items = []
+        for _ in range(rng.randint(1, 3)):
+            quantity = rng.randint(1, 5)
+            if fractional and rng.random() < 0.1:
+                # Quantities need only be positive numbers (e.g. 1.5 kg)
+                quantity = Decimal(quantity) + Decimal('0.5')
+            price = Decimal(rng.randint(100, 5000)) / 100
+            items.append({'product_id': f'PROD-{rng.randrange(200)}', 'quantity': quantity,
+                          'price': price, 'total': price * quantity})
+        orders.append({
+            'order_id': f'ORD-{i:07d}',
+            'customer_id': f'CUST-{rng.randrange(1000)}',
+            'status': rng.choice(STATUSES),
+            'created_at': (now - timedelta(seconds=rng.randrange(45 * 86400))).isoformat(),
+            'total_amount': sum(item['total'] for item in items),
+            'items': items
+        })
+    return orders
+
+def stream_record(event_id: str, name: str, old: Any = None, new: Any = None) -> Dict[str, Any]:
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+    images = {}
+    for key, image in (('OldImage', old), ('NewImage', new)):
+        if image is not None:
+            images[key] = {k: serializer.serialize(v) for k, v in image.items()}
+    return {'eventID': event_id, 'eventName': name, 'dynamodb': images}
+
+def nonzero_rows(rows: Dict[Any, Dict[str, Any]]) -> Dict[Any, Dict[str, Decimal]]:
+    result = {}
+    for key, row in rows.items():
+        counters = {name: Decimal(row[name]) for name in ('order_count', 'revenue', 'quantity')
+                    if name in row and Decimal(row[name]) != 0}
+        if counters:
+            result[key] = counters
+    return result
+
+def check_stream_consumer(table, sample: int) -> Dict[str, Any]:
+    """Apply INSERT/MODIFY/REMOVE records incrementally and compare with a rebuild"""
+    import stream
+    from rebuild import aggregate_chunked
+
+    orders = {o['order_id']: o for o in synthetic_orders(sample, seed=11)}
+    rng = random.Random(3)
+    records = [stream_record(f'{i}-insert', 'INSERT', new=o) for i, o in enumerate(orders.values())]
+    for i, order_id in enumerate(rng.sample(sorted(orders), sample // 4)):
+        old = orders[order_id]
+        new = dict(old, status=rng.choice(STATUSES))
+        records.append(stream_record(f'{i}-modify', 'MODIFY', old=old, new=new))
+        orders[order_id] = new
+    for i, order_id in enumerate(rng.sample(sorted(orders), sample // 10)):
+        records.append(stream_record(f'{i}-remove', 'REMOVE', old=orders.pop(order_id)))
+
+    stream._store = None
+    with redirect_stdout(io.StringIO()):
+        for start in range(0, len(records), 100):
+            event = {'Records': records[start:start + 100]}
+            stream.lambda_handler(event, None)
+            stream.lambda_handler(event, None)  # redelivered batch must not count twice
+
+    stored = {}
+    for item in table.scan()['Items']:
+        if item['dimension'] != '_batch':
+            stored[(item['dimension'], item['bucket'])] = item
+    incremental = nonzero_rows(stored)
+    rows: Dict[Any, Dict[str, Any]] = {}
+    aggregate_chunked(orders.values(), rows, chunk_size=max(1, sample // 7))
+    rebuilt = nonzero_rows(rows)
+    mismatched = sorted(str(key) for key in set(incremental) | set(rebuilt)
+                        if incremental.get(key) != rebuilt.get(key))
+    return {'records': len(records), 'rows': len(rebuilt), 'mismatched_rows': mismatched[:10],
+            'consistent': not mismatched}
+
+def time_scan_dashboard(app, count: int, requests: int) -> List[float]:
+    """Page through every order and total it, as the dashboard did client-side"""
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        totals: Dict[str, Any] = {'order_count': 0, 'revenue': 0.0, 'by_status': {}}
+        next_token = None
+        while True:
+            query = {'mode': 'scan', 'limit': '100'}
+            if next_token:
+                query['next_token'] = next_token
+            page = json.loads(app.lambda_handler(api_event('GET', '/orders', query=query), None)['body'])
+            for order in page['orders']:
+                totals['order_count'] += 1
+                totals['revenue'] += float(order['total_amount'])
+                totals['by_status'][order['status']] = totals['by_status'].get(order['status'], 0) + 1
+            next_token = page.get('next_token')
+            if not next_token:
+                break
+        assert totals['order_count'] == count
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def run(sizes: List[int], scan_limit: int, requests: int, latency_ms: float, sample: int) -> dict:
+    results: Dict[str, Any] = {}
+    with local_aws():
+        import boto3
+        import app
+        from aggregates import AnalyticsStore
+        from rebuild import aggregate_chunked
+
+        os.environ['ANALYTICS_TABLE'] = ANALYTICS_TABLE
+        os.environ['METRICS_ENABLED'] = 'false'
+        analytics_table = boto3.resource('dynamodb').Table(ANALYTICS_TABLE)
+        results['stream_consistency'] = check_stream_consumer(analytics_table, sample)
+        if not results['stream_consistency']['consistent']:
+            raise SystemExit(json.dumps(results, indent=2) + '\nSTREAM AGGREGATES DIVERGED FROM REBUILD')
+
+        analytics_app = load_analytics_app()
+        store = analytics_app.get_store()
+        store.dynamodb.meta.client.meta.events.register(
+            'before-call.dynamodb', lambda delay=latency_ms / 1000.0, **kwargs: time.sleep(delay)
+        )
+        app.reset_processor()
+        app.get_processor()
+        inject_latency({'dynamodb': latency_ms})
+        orders_table = boto3.resource('dynamodb').Table(os.environ['ORDERS_TABLE'])
+
+        loaded = 0
+        scan_ms_per_order = None
+        for count in sorted(sizes):
+            orders = synthetic_orders(count)
+            start = time.perf_counter()
+            rows = {}
+            aggregate_chunked(orders, rows)
+            rebuild_ms = (time.perf_counter() - start) * 1000
+            AnalyticsStore(ANALYTICS_TABLE).replace_all(rows.items())
+
+            analytics_samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = analytics_app.lambda_handler(api_event('GET', '/analytics'), None)
+                analytics_samples.append((time.perf_counter() - start) * 1000)
+            summary = json.loads(response['body'])
+            assert summary['totals']['order_count'] == count
+
+            entry: Dict[str, Any] = {
+                'aggregate_rows': len(rows),
+                'rebuild_ms': round(rebuild_ms, 1),
+                'rebuild_orders_per_second': round(count / (rebuild_ms / 1000)),
+                'analytics': summarize(analytics_samples)
+            }
+            if count <= scan_limit:
+                with orders_table.batch_writer() as batch:
+                    for order in orders[loaded:count]:
+                        batch.put_item(Item=order)
+                loaded = count
+                with redirect_stdout(io.StringIO()):
+                    scan_samples = time_scan_dashboard(app, count, max(1, requests // 10))
+                entry['scan'] = dict(summarize(scan_samples), measured=True)
+                scan_ms_per_order = entry['scan']['p50_ms'] / count
+            elif scan_ms_per_order is not None:
+                entry['scan'] = {'p50_ms': round(scan_ms_per_order * count, 1), 'measured': False}
+            if 'scan' in entry:
+                entry['speedup_p50'] = round(entry['scan']['p50_ms'] / max(entry['analytics']['p50_ms'], 1e-6), 1)
+            results[str(count)] = entry
+            del orders, rows
+        os.environ.pop('ANALYTICS_TABLE', None)
+    return dict(results, latency_ms=latency_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--scan-limit', type=int, default=10000, help='largest size scanned for real')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB latency')
+    parser.add_argument('--sample', type=int, default=400, help='orders replayed through the stream consumer')
+    args = parser.parse_args()
+    report('analytics', run([int(s) for s in args.sizes.split(',')], args.scan_limit,
+                            args.requests, args.latency_ms, args.sample))
@@ -0,0 +1,255 @@
+# backend/benchmarks/bench_archive.py
+"""Hot/cold tiering: the orders table before and after closed orders move to S3.
+
+Loads --orders orders straight into the table, --closed-pct of them COMPLETED
+or CANCELLED and backdated over the last --days days, plus --large orders
+created through the API with their items in the lines table. Then:
+
+  scan_hot_before  GET /orders?mode=scan over the whole table
+  sweep            order_management.archive moving orders closed more than
+                   --older-than-days ago, throughput and compression
+  scan_hot_after   the same listing once TTL has removed the archived orders
+                   (simulated by deleting every item whose expires_at passed)
+  get_hot          GET /orders/{orderId} of orders still in the table
+  get_archived     the same for archived orders: index lookup plus a ranged
+                   S3 GET of one gzip member
+
+An archived order must read back as it was before the sweep, a partition
+restore and a single-order restore must put the orders back, and the
+analytics stream must not count TTL removals or restores.
+
+    python benchmarks/bench_archive.py --orders 3000 --large 20
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Any, List, Tuple
+
+from common import local_aws, api_event, summarize, report, inject_latency, ARCHIVE_INDEX_TABLE, ORDER_LINES_TABLE
+
+PAGE_LIMIT = 100
+STATUSES = ('COMPLETED', 'CANCELLED')
+
+def call(app, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    response = app.lambda_handler(api_event(*args, **kwargs), None)
+    assert response['statusCode'] < 300, response['body']
+    return json.loads(response['body'])
+
+def get_order(app, order_id: str, **query: str) -> Dict[str, Any]:
+    return call(app, 'GET', f'/orders/{order_id}', query=query or None, path_parameters={'orderId': order_id})
+
+def all_items(app, order_id: str) -> List[Dict[str, Any]]:
+    items, next_token = [], None
+    while True:
+        page = get_order(app, order_id, include='items', **({'next_token': next_token} if next_token else {}))
+        items.extend(page['items'])
+        next_token = page['items_next_token']
+        if not next_token:
+            return items
+
+def synthetic_order(index: int, now: datetime, closed: bool, days: int) -> Dict[str, Any]:
+    created = now - timedelta(days=random.uniform(0, days), minutes=30) if closed else now
+    items = [{'product_id': f'PROD-{(index + i) % 40}', 'name': f'Product {(index + i) % 40}',
+              'quantity': 1 + i, 'price': Decimal('4.75'), 'total': Decimal('4.75') * (1 + i)}
+             for i in range(1 + index % 5)]
+    return {
+        'order_id': str(uuid.uuid4()),
+        'customer_id': f'CUST-{index % 50}',
+        'customer_name': 'Benchmark Customer',
+        'items': items,
+        'total_amount': sum(item['total'] for item in items),
+        'status': STATUSES[index % 2] if closed else 'PENDING',
+        'version': 2 if closed else 1,
+        'created_at': created.isoformat(),
+        'updated_at': (created + timedelta(minutes=10)).isoformat()
+    }
+
+def timed_scan(app) -> Tuple[float, int]:
+    start, next_token, listed = time.perf_counter(), None, 0
+    while True:
+        query = {'mode': 'scan', 'limit': str(PAGE_LIMIT), **({'next_token': next_token} if next_token else {})}
+        page = call(app, 'GET', '/orders', query=query)
+        listed += len(page['orders'])
+        next_token = page.get('next_token')
+        if not next_token:
+            return (time.perf_counter() - start) * 1000, listed
+
+def expire(table: Any, key_names: List[str]) -> int:
+    """What DynamoDB's TTL would do: delete every item whose expires_at has passed"""
+    from boto3.dynamodb.conditions import Attr
+
+    removed, kwargs = 0, {'FilterExpression': Attr('expires_at').lte(int(time.time()))}
+    with table.batch_writer() as batch:
+        while True:
+            response = table.scan(**kwargs)
+            for item in response['Items']:
+                batch.delete_item(Key={name: item[name] for name in key_names})
+                removed += 1
+            if 'LastEvaluatedKey' not in response:
+                return removed
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def comparable(order: Dict[str, Any]) -> Dict[str, Any]:
+    from order_management.archive import STORAGE_FIELDS
+
+    return {name: value for name, value in order.items() if name not in STORAGE_FIELDS + ('items', 'item_count')}
+
+def stream_checks(order: Dict[str, Any]) -> Dict[str, int]:
+    """Analytics deltas of a TTL removal and of the restore of the same order"""
+    from boto3.dynamodb.types import TypeSerializer
+    from stream import deltas_for
+
+    image = {name: TypeSerializer().serialize(value) for name, value in order.items()}
+    ttl_remove = {'eventName': 'REMOVE', 'dynamodb': {'OldImage': image},
+                  'userIdentity': {'type': 'Service', 'principalId': 'dynamodb.amazonaws.com'}}
+    restore_insert = {'eventName': 'INSERT', 'dynamodb': {'NewImage': dict(image, restored_at={'S': 'now'})}}
+    user_delete = {'eventName': 'REMOVE', 'dynamodb': {'OldImage': image}}
+    return {'ttl_remove': len(deltas_for([ttl_remove])), 'restore_insert': len(deltas_for([restore_insert])),
+            'user_delete': len(deltas_for([user_delete]))}
+
+def run(orders: int, closed_pct: float, days: int, older_than_days: float, large: int, lookups: int,
+        latency_ms: float, s3_latency_ms: float) -> Dict[str, Any]:
+    random.seed(7)
+    with local_aws() as env:
+        import app
+        from order_management import clients
+        from order_management.archive import OrderArchive, cutoff
+        from order_management.lines import LineStore
+
+        os.environ.update({'ORDER_CACHE_ENABLED': 'false', 'ARCHIVE_INDEX_TABLE': ARCHIVE_INDEX_TABLE,
+                           'ORDER_LINES_TABLE': ORDER_LINES_TABLE})
+        app.reset_processor()
+        dynamodb = clients.get_resource('dynamodb')
+        table = dynamodb.Table(env['ORDERS_TABLE'])
+        now = datetime.utcnow()
+        with redirect_stdout(io.StringIO()):
+            with table.batch_writer() as batch:
+                for i in range(orders):
+                    batch.put_item(Item=synthetic_order(i, now, random.random() * 100 < closed_pct, days))
+            # Large orders keep their items in the lines table; close and backdate them
+            large_ids = []
+            for i in range(large):
+                body = {'customer_id': f'CUST-{i}', 'customer_name': 'Benchmark Customer',
+                        'items': [{'product_id': f'PROD-{n % 90}', 'name': f'Product {n % 90}', 'quantity': 1,
+                                   'price': 2.5} for n in range(250)]}
+                order_id = call(app, 'POST', '/orders', body=body)['order_id']
+                closed = (now - timedelta(days=days)).isoformat()
+                table.update_item(Key={'order_id': order_id},
+                                  UpdateExpression='SET #status = :status, created_at = :at, updated_at = :at',
+                                  ExpressionAttributeNames={'#status': 'status'},
+                                  ExpressionAttributeValues={':status': 'COMPLETED', ':at': closed})
+                large_ids.append(order_id)
+
+            inject_latency({'dynamodb': latency_ms, 's3': s3_latency_ms})
+            scan_before, listed_before = timed_scan(app)
+
+            everything: Dict[str, Dict[str, Any]] = {}
+            kwargs: Dict[str, Any] = {}
+            while True:
+                response = table.scan(**kwargs)
+                everything.update((order['order_id'], order) for order in response['Items'])
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            closed_before = cutoff(older_than_days)
+            due = [order_id for order_id, order in everything.items()
+                   if order['status'] in STATUSES and order['updated_at'] < closed_before]
+            sample = random.sample(due, min(lookups, len(due)))
+            originals = {order_id: get_order(app, order_id) for order_id in sample + large_ids[:3]}
+            # Orders with line pages (the large ones, sampled or not) are compared page by page
+            original_items = {order_id: all_items(app, order_id) for order_id in originals
+                              if 'line_pages' in everything[order_id]}
+
+            lines = LineStore(ORDER_LINES_TABLE)
+            archive = OrderArchive(env['DOCUMENTS_BUCKET'], ARCHIVE_INDEX_TABLE, env['ORDERS_TABLE'], lines=lines)
+            start = time.perf_counter()
+            swept = archive.sweep(closed_before)
+            sweep_s = time.perf_counter() - start
+            if swept['archived'] != len(due):
+                raise SystemExit(f"Sweep archived {swept['archived']} of {len(due)} due orders: {swept}")
+
+            # Marked orders leave listings right away, before TTL removes them
+            _, listed_marked = timed_scan(app)
+            removed = expire(table, ['order_id']) + expire(lines.table, ['order_id', 'page'])
+            scan_after, listed_after = timed_scan(app)
+            if listed_marked != listed_after or listed_after != listed_before - len(due):
+                raise SystemExit(f"Listed {listed_before}, {listed_marked} marked, {listed_after} after TTL")
+
+            hot_ids = [order_id for order_id in everything if order_id not in set(due)][:lookups]
+            samples: Dict[str, List[float]] = {'get_hot': [], 'get_archived': []}
+            for name, ids in (('get_hot', hot_ids), ('get_archived', sample)):
+                for order_id in ids:
+                    start = time.perf_counter()
+                    get_order(app, order_id)
+                    samples[name].append((time.perf_counter() - start) * 1000)
+
+            for order_id, original in originals.items():
+                archived = get_order(app, order_id)
+                if comparable(archived) != comparable(original) or 'archived_at' not in archived:
+                    raise SystemExit(f"Archived copy of {order_id} differs from the order")
+                items = all_items(app, order_id) if order_id in original_items else archived['items']
+                if items != original_items.get(order_id, original.get('items')):
+                    raise SystemExit(f"Line items of archived order {order_id} differ")
+            status = app.lambda_handler(api_event('PATCH', f'/orders/{sample[0]}/status', body={'status': 'PENDING'},
+                                                  path_parameters={'orderId': sample[0]}), None)['statusCode']
+            if status not in (400, 409):
+                raise SystemExit(f"Status change of an archived order answered {status}")
+
+            # Restores: the partition of the first sampled order, then one large order by id
+            partition = OrderArchive.partition_for(originals[sample[0]])
+            start = time.perf_counter()
+            by_partition = archive.restore(partition=partition)
+            restore_ms = (time.perf_counter() - start) * 1000
+            by_id = archive.restore(order_ids=large_ids[:1])
+            restored = table.get_item(Key={'order_id': sample[0]}).get('Item')
+            if not restored or comparable(get_order(app, sample[0])) != comparable(originals[sample[0]]):
+                raise SystemExit(f"Partition restore did not bring {sample[0]} back")
+            if by_id['restored'] != 1 or all_items(app, large_ids[0]) != original_items[large_ids[0]]:
+                raise SystemExit(f"Restore of {large_ids[0]} lost line items: {by_id}")
+            if archive.index.get_item(Key={'order_id': sample[0]}).get('Item'):
+                raise SystemExit("Restored order still has an archive index entry")
+            again = archive.sweep(closed_before)
+            if again['archived']:
+                raise SystemExit(f"Sweep archived {again['archived']} restored orders again")
+            stream = stream_checks(restored)
+            if stream['ttl_remove'] or stream['restore_insert'] or not stream['user_delete']:
+                raise SystemExit(f"Analytics counts archive moves: {stream}")
+        for name in ('ORDER_CACHE_ENABLED', 'ARCHIVE_INDEX_TABLE', 'ORDER_LINES_TABLE'):
+            os.environ.pop(name, None)
+
+    results: Dict[str, Any] = {name: summarize(values) for name, values in samples.items()}
+    results['scan_hot_before'] = {'ms': round(scan_before, 3), 'orders_listed': listed_before}
+    results['scan_hot_after'] = {'ms': round(scan_after, 3), 'orders_listed': listed_after}
+    results['sweep'] = {
+        'orders': swept['archived'], 'files': swept['files'], 'partitions': len(swept['partitions']),
+        'seconds': round(sweep_s, 3), 'orders_per_s': round(swept['archived'] / sweep_s, 1) if sweep_s else 0.0,
+        'bytes': swept['bytes'], 'raw_bytes': swept['raw_bytes'],
+        'compression_ratio': round(swept['raw_bytes'] / swept['bytes'], 2) if swept['bytes'] else 0.0,
+        'ttl_removed_items': removed
+    }
+    results['restore'] = {'partition': partition, 'partition_ms': round(restore_ms, 3), **by_partition,
+                          'by_id': by_id, 're_swept': again['archived']}
+    return dict(results, orders=orders + large, closed_before=closed_before, latency_ms=latency_ms,
+                s3_latency_ms=s3_latency_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=3000)
+    parser.add_argument('--closed-pct', type=float, default=80.0, help='share of orders COMPLETED or CANCELLED')
+    parser.add_argument('--days', type=int, default=30, help='closed orders are spread over this many days')
+    parser.add_argument('--older-than-days', type=float, default=7.0, help='archive orders closed this long ago')
+    parser.add_argument('--large', type=int, default=20, help='closed orders with 250 items in the lines table')
+    parser.add_argument('--lookups', type=int, default=100, help='GETs per tier')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB latency')
+    parser.add_argument('--s3-latency-ms', type=float, default=15.0, help='injected per-call S3 latency')
+    args = parser.parse_args()
+    report('archive', run(args.orders, args.closed_pct, args.days, args.older_than_days, args.large,
+                          args.lookups, args.latency_ms, args.s3_latency_ms))
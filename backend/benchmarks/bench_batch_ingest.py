@@ -0,0 +1,55 @@
+# backend/benchmarks/bench_batch_ingest.py
+"""Ingestion throughput (orders/sec) of POST /orders/batch by batch size.
+
+Batch size 1 through POST /orders is the per-order path EDI feeds used before.
+
+    python benchmarks/bench_batch_ingest.py --orders 1000 --latency-ms 10
+"""
+
+import argparse
+import io
+import json
+import time
+from contextlib import redirect_stdout
+
+from common import local_aws, api_event, sample_order, report, inject_latency
+
+BATCH_SIZES = (25, 100, 500)
+
+def run(orders: int, latency_ms: float) -> dict:
+    results = {}
+    with local_aws():
+        import app
+
+        app.reset_processor()
+        app.get_processor()
+        inject_latency({'dynamodb': latency_ms, 's3': latency_ms, 'sns': latency_ms})
+
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for _ in range(orders):
+                app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)
+        results['single'] = {'orders_per_second': round(orders / (time.perf_counter() - start), 1)}
+
+        for batch_size in BATCH_SIZES:
+            created = 0
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                for offset in range(0, orders, batch_size):
+                    count = min(batch_size, orders - offset)
+                    body = {'orders': [sample_order() for _ in range(count)]}
+                    response = app.lambda_handler(api_event('POST', '/orders/batch', body=body), None)
+                    created += json.loads(response['body'])['created']
+            elapsed = time.perf_counter() - start
+            results[f'batch_{batch_size}'] = {
+                'created': created,
+                'orders_per_second': round(created / elapsed, 1)
+            }
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--latency-ms', type=float, default=10.0)
+    args = parser.parse_args()
+    report('batch_ingest', run(args.orders, args.latency_ms))
@@ -0,0 +1,160 @@
+# backend/benchmarks/bench_changes.py
+"""Dashboard refresh: re-reading every order versus reading the change feed.
+
+For each table size in --orders, loads that many orders, takes a change feed
+cursor and reads the full list once (what a dashboard does on open). Then
+--refreshes times: --changes random creates, status updates and deletes go
+through the API, and the dashboard refreshes both ways:
+
+  scan      paging through GET /orders?mode=scan, as App.js did after every
+            action
+  changes   GET /orders/changes?since=<cursor>, applying the deltas to the
+            list and fetching each created order with GET /orders/{orderId}
+
+DynamoDB calls and time are counted per refresh. The list rebuilt from the
+deltas must equal the scanned one after every refresh. Change cost should
+not grow with the table.
+
+    python benchmarks/bench_changes.py --orders 1000,10000 --changes 10 --refreshes 5
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import threading
+import time
+from contextlib import redirect_stdout
+from typing import Dict, Any, List
+
+from common import local_aws, api_event, sample_order, summarize, report, inject_latency, CHANGES_TABLE
+
+SETTLE_MS = 50  # CHANGES_SETTLE_MS for the run; moto commits as soon as it answers
+
+class DynamoDBCalls:
+    def __init__(self, client: Any):
+        self.calls = 0
+        self._lock = threading.Lock()
+        client.meta.events.register('before-call.dynamodb', self._count)
+
+    def _count(self, **kwargs: Any) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def take(self) -> int:
+        with self._lock:
+            calls, self.calls = self.calls, 0
+        return calls
+
+def call(app, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    response = app.lambda_handler(api_event(*args, **kwargs), None)
+    assert response['statusCode'] < 300, response['body']
+    return json.loads(response['body'])
+
+def scan_all(app) -> Dict[str, Dict[str, Any]]:
+    orders, next_token = {}, None
+    while True:
+        query = {'mode': 'scan', 'limit': '100', **({'next_token': next_token} if next_token else {})}
+        page = call(app, 'GET', '/orders', query=query)
+        orders.update((order['order_id'], order) for order in page['orders'])
+        next_token = page.get('next_token')
+        if not next_token:
+            return orders
+
+def apply_changes(app, orders: Dict[str, Dict[str, Any]], cursor: str) -> str:
+    """Bring the dashboard's list up to date; returns the new cursor"""
+    while True:
+        page = call(app, 'GET', '/orders/changes', query={'since': cursor})
+        for change in page['changes']:
+            order_id = change['order_id']
+            if change['event'] == 'ORDER_CREATED':
+                orders[order_id] = call(app, 'GET', f'/orders/{order_id}', path_parameters={'orderId': order_id})
+            elif change['event'] == 'ORDER_DELETED':
+                orders.pop(order_id, None)
+            elif order_id in orders:
+                orders[order_id].update(status=change['status'], version=change.get('version'),
+                                        previous_status=change.get('previous_status'), updated_at=change['at'])
+        cursor = page['cursor']
+        if not page['has_more']:
+            return cursor
+
+def mutate(app, rng: random.Random, live: List[str], statuses: Dict[str, str], count: int) -> None:
+    for _ in range(count):
+        action = rng.choice(('create', 'update', 'update', 'delete')) if live else 'create'
+        if action == 'create':
+            order_id = call(app, 'POST', '/orders', body=sample_order(item_count=rng.randint(1, 5)))['order_id']
+            live.append(order_id)
+            statuses[order_id] = 'PENDING'
+            continue
+        order_id = rng.choice(live)
+        path = {'orderId': order_id}
+        if action == 'delete':
+            call(app, 'DELETE', f'/orders/{order_id}', path_parameters=path)
+            live.remove(order_id)
+        else:
+            status = {'PENDING': 'PROCESSING', 'PROCESSING': 'COMPLETED'}.get(statuses[order_id], 'CANCELLED')
+            if statuses[order_id] == 'CANCELLED':
+                continue
+            call(app, 'PATCH', f'/orders/{order_id}/status', body={'status': status}, path_parameters=path)
+            statuses[order_id] = status
+
+def comparable(orders: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {order_id: (order['status'], order.get('version')) for order_id, order in orders.items()}
+
+def run_size(size: int, changes: int, refreshes: int, latency_ms: float) -> Dict[str, Any]:
+    with local_aws():
+        import app
+        from order_management import clients
+
+        os.environ.update(CHANGES_TABLE=CHANGES_TABLE, CHANGES_SETTLE_MS=str(SETTLE_MS), ORDER_CACHE_ENABLED='false')
+        app.reset_processor()
+        rng = random.Random(size)
+        with redirect_stdout(io.StringIO()):
+            live: List[str] = []
+            for start in range(0, size, 500):
+                body = {'orders': [sample_order(item_count=1 + i % 3) for i in range(min(500, size - start))]}
+                live.extend(result['order_id'] for result in call(app, 'POST', '/orders/batch', body=body)['results'])
+            statuses = {order_id: 'PENDING' for order_id in live}
+            time.sleep(SETTLE_MS / 1000)
+
+            inject_latency({'dynamodb': latency_ms})
+            calls = DynamoDBCalls(clients.get_resource('dynamodb').meta.client)
+            cursor = call(app, 'GET', '/orders/changes')['cursor']
+            dashboard = scan_all(app)
+
+            samples: Dict[str, Dict[str, List[float]]] = {'scan': {'ms': [], 'calls': []},
+                                                         'changes': {'ms': [], 'calls': []}}
+            for _ in range(refreshes):
+                mutate(app, rng, live, statuses, changes)
+                time.sleep(SETTLE_MS / 1000)
+                calls.take()
+                start = time.perf_counter()
+                scanned = scan_all(app)
+                samples['scan']['ms'].append((time.perf_counter() - start) * 1000)
+                samples['scan']['calls'].append(calls.take())
+                start = time.perf_counter()
+                cursor = apply_changes(app, dashboard, cursor)
+                samples['changes']['ms'].append((time.perf_counter() - start) * 1000)
+                samples['changes']['calls'].append(calls.take())
+                if comparable(dashboard) != comparable(scanned):
+                    raise SystemExit(f"Dashboard built from changes diverged from the table ({size} orders)")
+        for name in ('CHANGES_TABLE', 'CHANGES_SETTLE_MS', 'ORDER_CACHE_ENABLED'):
+            os.environ.pop(name, None)
+    return {
+        way: dict(summarize(values['ms']), dynamodb_calls_per_refresh=sum(values['calls']) / refreshes)
+        for way, values in samples.items()
+    }
+
+def run(sizes: List[int], changes: int, refreshes: int, latency_ms: float) -> dict:
+    results: Dict[str, Any] = {f'{size}_orders': run_size(size, changes, refreshes, latency_ms) for size in sizes}
+    return dict(results, changes_per_refresh=changes, refreshes=refreshes, latency_ms=latency_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', default='1000,10000', help='comma-separated table sizes')
+    parser.add_argument('--changes', type=int, default=10, help='order mutations between refreshes')
+    parser.add_argument('--refreshes', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB latency')
+    args = parser.parse_args()
+    report('changes', run([int(n) for n in args.orders.split(',')], args.changes, args.refreshes, args.latency_ms))
@@ -0,0 +1,114 @@
+# backend/benchmarks/bench_cold_start.py
+"""Cold-start budget for the order service.
+
+Imports app.py in fresh interpreters under `python -X importtime` and answers
+a CORS preflight, then checks:
+
+  * the median import time of `app` stays within --budget-ms
+  * neither the import nor the preflight loads boto3/botocore
+  * each route creates only the AWS clients it uses (GET by id: DynamoDB only)
+
+Exits non-zero when any check fails; tests/test_cold_start.py runs the same
+checks under pytest:
+
+    python benchmarks/bench_cold_start.py --runs 15 --budget-ms 40
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List
+
+from common import local_aws, api_event, sample_order, report, ORDER_SERVICE_DIR
+
+# Run in a fresh interpreter: import the handler, answer a preflight, list heavy modules
+PROBE = """
+import json, sys
+import app
+response = app.lambda_handler({'httpMethod': 'OPTIONS', 'path': '/orders', 'headers': {}}, None)
+heavy = sorted(m for m in ('boto3', 'botocore', 's3transfer', 'urllib3') if m in sys.modules)
+print(json.dumps({'status': response['statusCode'], 'heavy_modules': heavy}))
+"""
+
+def import_probe() -> Dict[str, Any]:
+    env = dict(os.environ, METRICS_ENABLED='false', LOG_LEVEL='WARNING')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=ORDER_SERVICE_DIR,
+                            env=env, capture_output=True, text=True, check=True)
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    # "import time: self [us] | cumulative | imported package"; top-level modules have no indent
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and line.rstrip().endswith('| app'):
+            probe['import_ms'] = int(fields[1]) / 1000
+    return probe
+
+def route_clients() -> Dict[str, List[str]]:
+    """AWS clients created by the first request to each route after a reset"""
+    with local_aws():
+        import app
+        from order_management import clients
+
+        os.environ['METRICS_ENABLED'] = 'false'
+        for name in ('OUTBOX_TABLE', 'INVENTORY_TABLE', 'CUSTOMERS_TABLE', 'CHANGES_TABLE', 'ORDER_LINES_TABLE',
+                     'ARCHIVE_INDEX_TABLE'):
+            os.environ.pop(name, None)
+        app.reset_processor()
+        order_id = json.loads(app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)['body'])['order_id']
+
+        routes = {
+            'OPTIONS /orders': api_event('OPTIONS', '/orders'),
+            'GET /orders/{orderId}': api_event('GET', f'/orders/{order_id}', path_parameters={'orderId': order_id}),
+            'GET /orders': api_event('GET', '/orders', query={'status': 'PENDING'}),
+            'POST /orders': api_event('POST', '/orders', body=sample_order())
+        }
+        created = {}
+        for route, event in routes.items():
+            app.reset_processor()
+            app.lambda_handler(event, None)
+            created[route] = sorted(f"{kind}:{service}" for kind, service in clients._clients)
+        return created
+
+EXPECTED_CLIENTS = {
+    'OPTIONS /orders': [],
+    'GET /orders/{orderId}': ['resource:dynamodb'],
+    'GET /orders': ['resource:dynamodb'],
+    'POST /orders': ['client:dynamodb', 'client:s3', 'client:sns']
+}
+
+def run(runs: int, budget_ms: float) -> dict:
+    probes = [import_probe() for _ in range(runs)]
+    import_ms = statistics.median(p['import_ms'] for p in probes)
+    heavy = sorted({m for p in probes for m in p['heavy_modules']})
+    created = route_clients()
+
+    failures = []
+    if import_ms > budget_ms:
+        failures.append(f"import of app took {import_ms:.1f} ms (budget {budget_ms} ms)")
+    if heavy:
+        failures.append(f"import + preflight loaded {', '.join(heavy)}")
+    for route, expected in EXPECTED_CLIENTS.items():
+        if created[route] != expected:
+            failures.append(f"{route} created {created[route]}, expected {expected}")
+
+    result = {
+        'runs': runs,
+        'import_ms_median': round(import_ms, 2),
+        'import_ms_max': round(max(p['import_ms'] for p in probes), 2),
+        'budget_ms': budget_ms,
+        'preflight_heavy_modules': heavy,
+        'clients_per_route': created,
+        'failures': failures
+    }
+    if failures:
+        raise SystemExit(json.dumps(result, indent=2) + '\nCOLD START BUDGET EXCEEDED')
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=40.0, help='median import time allowed for app.py')
+    args = parser.parse_args()
+    report('cold_start', run(args.runs, args.budget_ms))
@@ -0,0 +1,177 @@
+# backend/benchmarks/bench_customers.py
+"""Customer views: filtering the full GET /orders scan versus the customer routes.
+
+Loads --orders orders spread over --customers customers, plus one large
+customer with --large-orders orders, through POST /orders/batch. Then, for a
+small and the large customer, times and counts DynamoDB calls for:
+
+  scan      paging through GET /orders?mode=scan and keeping the customer's
+            orders (what the customer views did client-side)
+  orders    GET /customers/{customerId}/orders (first page)
+  summary   GET /customers/{customerId}/summary
+
+The customer routes should cost the same for both customers. Before timing,
+single creates, cancels and deletes run through the API, and every customer's
+summary must equal the totals recomputed from a scan of the orders table.
+
+    python benchmarks/bench_customers.py --orders 5000 --customers 200 --large-orders 3000
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import threading
+import time
+from contextlib import redirect_stdout
+from decimal import Decimal
+from typing import Dict, Any, List
+
+from common import local_aws, api_event, sample_order, summarize, report, inject_latency, CUSTOMERS_TABLE
+
+LARGE_CUSTOMER = 'CUST-LARGE'
+
+class DynamoDBCalls:
+    def __init__(self, client: Any):
+        self.calls = 0
+        self._lock = threading.Lock()
+        client.meta.events.register('before-call.dynamodb', self._count)
+
+    def _count(self, **kwargs: Any) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def take(self) -> int:
+        with self._lock:
+            calls, self.calls = self.calls, 0
+        return calls
+
+def load_orders(app, customer_ids: List[str]) -> None:
+    for start in range(0, len(customer_ids), 500):
+        orders = [sample_order(item_count=1 + i % 3, customer_id=customer_id)
+                  for i, customer_id in enumerate(customer_ids[start:start + 500])]
+        response = app.lambda_handler(api_event('POST', '/orders/batch', body={'orders': orders}), None)
+        assert response['statusCode'] == 201, response['body']
+
+def mutate(app, customer_ids: List[str], count: int) -> None:
+    """Single creates, cancels and deletes through the API"""
+    rng = random.Random(5)
+    for customer_id in rng.sample(customer_ids, count):
+        order = json.loads(app.lambda_handler(api_event('POST', '/orders', body=sample_order(customer_id=customer_id)),
+                                              None)['body'])
+        path = {'orderId': order['order_id']}
+        action = rng.choice(('cancel', 'delete', 'cancel_then_delete', 'keep'))
+        if action in ('cancel', 'cancel_then_delete'):
+            app.lambda_handler(api_event('PATCH', f"/orders/{order['order_id']}/status",
+                                         body={'status': 'CANCELLED'}, path_parameters=path), None)
+        if action in ('delete', 'cancel_then_delete'):
+            app.lambda_handler(api_event('DELETE', f"/orders/{order['order_id']}", path_parameters=path), None)
+
+def expected_summaries(table) -> Dict[str, Dict[str, Any]]:
+    totals: Dict[str, Dict[str, Any]] = {}
+    kwargs: Dict[str, Any] = {}
+    while True:
+        response = table.scan(**kwargs)
+        for order in response['Items']:
+            entry = totals.setdefault(order['customer_id'], {'order_count': 0, 'cancelled_count': 0,
+                                                             'lifetime_value': Decimal('0')})
+            entry['order_count'] += 1
+            if order['status'] == 'CANCELLED':
+                entry['cancelled_count'] += 1
+            else:
+                entry['lifetime_value'] += order['total_amount']
+        if 'LastEvaluatedKey' not in response:
+            return totals
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def check_summaries(app, table) -> Dict[str, Any]:
+    expected = expected_summaries(table)
+    stored: Dict[str, Dict[str, Any]] = {}
+    next_token = None
+    while True:
+        query = {'limit': '100', **({'next_token': next_token} if next_token else {})}
+        page = json.loads(app.lambda_handler(api_event('GET', '/customers', query=query), None)['body'])
+        for customer in page['customers']:
+            stored[customer['customer_id']] = {field: Decimal(str(customer[field]))
+                                               for field in ('order_count', 'cancelled_count', 'lifetime_value')}
+        next_token = page.get('next_token')
+        if not next_token:
+            break
+    # A customer whose orders were all deleted keeps a zeroed aggregate
+    zero = {'order_count': 0, 'cancelled_count': 0, 'lifetime_value': Decimal('0')}
+    mismatched = sorted(customer_id for customer_id in set(expected) | set(stored)
+                        if expected.get(customer_id, zero) != stored.get(customer_id, zero))
+    return {'customers': len(stored), 'mismatched': mismatched[:10], 'consistent': not mismatched}
+
+def scan_for_customer(app, customer_id: str) -> int:
+    found, next_token = 0, None
+    while True:
+        query = {'mode': 'scan', 'limit': '100', **({'next_token': next_token} if next_token else {})}
+        page = json.loads(app.lambda_handler(api_event('GET', '/orders', query=query), None)['body'])
+        found += sum(1 for order in page['orders'] if order['customer_id'] == customer_id)
+        next_token = page.get('next_token')
+        if not next_token:
+            return found
+
+def time_route(fn, calls: DynamoDBCalls, requests: int) -> Dict[str, Any]:
+    samples = []
+    calls.take()
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return dict(summarize(samples), dynamodb_calls_per_request=calls.take() / requests)
+
+def run(orders: int, customers: int, large_orders: int, requests: int, latency_ms: float) -> dict:
+    results: Dict[str, Any] = {}
+    with local_aws():
+        import boto3
+        import app
+        from order_management import clients
+
+        os.environ['CUSTOMERS_TABLE'] = CUSTOMERS_TABLE
+        os.environ['ORDER_CACHE_ENABLED'] = 'false'
+        app.reset_processor()
+        app.get_processor()
+        rng = random.Random(9)
+        customer_ids = [f'CUST-{i:05d}' for i in range(customers)]
+        with redirect_stdout(io.StringIO()):
+            load_orders(app, [rng.choice(customer_ids) for _ in range(orders)] + [LARGE_CUSTOMER] * large_orders)
+            mutate(app, customer_ids + [LARGE_CUSTOMER], min(200, customers))
+            results['summary_consistency'] = check_summaries(
+                app, boto3.resource('dynamodb').Table(os.environ['ORDERS_TABLE']))
+        if not results['summary_consistency']['consistent']:
+            raise SystemExit(json.dumps(results, indent=2) + '\nCUSTOMER SUMMARIES DIVERGED FROM THE ORDERS')
+
+        inject_latency({'dynamodb': latency_ms})
+        calls = DynamoDBCalls(clients.get_resource('dynamodb').meta.client)
+        small = customer_ids[0]
+        for label, customer_id in (('small_customer', small), ('large_customer', LARGE_CUSTOMER)):
+            summary_event = api_event('GET', f'/customers/{customer_id}/summary',
+                                      path_parameters={'customerId': customer_id})
+            orders_event = api_event('GET', f'/customers/{customer_id}/orders',
+                                     path_parameters={'customerId': customer_id}, query={'limit': '50'})
+            with redirect_stdout(io.StringIO()):
+                summary = json.loads(app.lambda_handler(summary_event, None)['body'])
+                entry = {
+                    'order_count': summary['order_count'],
+                    'scan': time_route(lambda: scan_for_customer(app, customer_id), calls, max(1, requests // 10)),
+                    'orders': time_route(lambda: app.lambda_handler(orders_event, None), calls, requests),
+                    'summary': time_route(lambda: app.lambda_handler(summary_event, None), calls, requests)
+                }
+            entry['speedup_p50'] = round(entry['scan']['p50_ms'] / max(entry['orders']['p50_ms'], 1e-6), 1)
+            results[label] = entry
+        for name in ('CUSTOMERS_TABLE', 'ORDER_CACHE_ENABLED'):
+            os.environ.pop(name, None)
+    return dict(results, orders=orders + large_orders, latency_ms=latency_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--customers', type=int, default=200)
+    parser.add_argument('--large-orders', type=int, default=3000, help='orders of the one large customer')
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB latency')
+    args = parser.parse_args()
+    report('customers', run(args.orders, args.customers, args.large_orders, args.requests, args.latency_ms))
@@ -0,0 +1,173 @@
+# backend/benchmarks/bench_document_requests.py
+"""S3 requests per order lifecycle: versioned documents versus one rewritten key.
+
+Counts every S3 call (by operation) made through the shared client for:
+
+  lifecycle     create -> PROCESSING -> COMPLETED -> delete of each order
+                through the API with inline side effects
+  redelivered   the same document writes applied again, as after an outbox
+                batch is retried
+  bulk_delete   deleting the documents of --orders orders at once
+  history       reading one order's status history
+
+once with the previous handler (LegacyDocumentHandler: every write PUTs
+orders/{id}/order.json, every delete is followed by a verifying HEAD) and
+once with the versioned handler. The versioned run must leave each order's
+history as PENDING, PROCESSING, COMPLETED before the delete and nothing after.
+
+    python benchmarks/bench_document_requests.py --orders 200 --latency-ms 5
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+from typing import Dict, Any, List
+
+from common import local_aws, api_event, sample_order, report, inject_latency
+
+LIFECYCLE = ('PROCESSING', 'COMPLETED')
+
+class S3Calls:
+    """Counts S3 operations made through one client"""
+
+    def __init__(self, client: Any):
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        client.meta.events.register('before-call.s3', self._count)
+
+    def _count(self, model: Any, **kwargs: Any) -> None:
+        with self._lock:
+            self.counts[model.name] += 1
+
+    def take(self) -> Dict[str, int]:
+        with self._lock:
+            counts, self.counts = dict(self.counts), Counter()
+        return dict(counts, total=sum(counts.values()))
+
+def legacy_handler_class():
+    from order_management import serialization
+    from order_management.processor import S3DocumentHandler
+
+    class LegacyDocumentHandler(S3DocumentHandler):
+        """Document storage before versioning: one key per order, rewritten on every write"""
+
+        def store_document(self, order_id: str, document: Dict[str, Any]) -> str:
+            key = f"orders/{order_id}/order.json"
+            self.s3.put_object(Bucket=self.bucket, Key=key, Body=serialization.dumps(document).encode('utf-8'),
+                               ContentType='application/json')
+            return key
+
+        def delete_document(self, order_id: str) -> None:
+            key = f"orders/{order_id}/order.json"
+            self.s3.delete_object(Bucket=self.bucket, Key=key)
+            try:
+                self.s3.head_object(Bucket=self.bucket, Key=key)
+                raise Exception(f"Document still exists after deletion: {key}")
+            except self.s3.exceptions.ClientError as e:
+                if e.response['Error']['Code'] != '404':
+                    raise
+
+        def delete_documents(self, order_ids: List[str]) -> Dict[str, str]:
+            for order_id in order_ids:
+                self.delete_document(order_id)
+            return {}
+
+    return LegacyDocumentHandler
+
+def per_order(counts: Dict[str, int], orders: int) -> Dict[str, float]:
+    return {operation: round(calls / orders, 2) for operation, calls in counts.items()}
+
+def run_handler(app, handler: Any, calls: S3Calls, orders: int, versioned: bool) -> Dict[str, Any]:
+    processor = app.get_processor()
+    processor.doc_handler = handler
+    results: Dict[str, Any] = {}
+    calls.take()
+
+    # Lifecycle through the API, stopping before the delete to check the history
+    start = time.perf_counter()
+    documents = []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(orders):
+            order = json.loads(app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)['body'])
+            documents.append(order)
+            for status in LIFECYCLE:
+                response = app.lambda_handler(api_event('PATCH', f"/orders/{order['order_id']}/status",
+                                                        body={'status': status},
+                                                        path_parameters={'orderId': order['order_id']}), None)
+                documents.append(json.loads(response['body']))
+    writes_ms = (time.perf_counter() - start) * 1000
+    lifecycle = calls.take()
+
+    start = time.perf_counter()
+    for document in documents:
+        handler.store_document(document['order_id'], document)
+    results['redelivered'] = dict(calls.take(), ms=round((time.perf_counter() - start) * 1000, 1))
+
+    order_ids = [document['order_id'] for document in documents[::len(LIFECYCLE) + 1]]
+    results['history'] = None
+    if versioned:
+        processor.get_status_history(order_ids[0])
+        results['history'] = calls.take()
+        for order_id in order_ids:
+            statuses = [version['status'] for version in handler.list_versions(order_id)]
+            if statuses != ['PENDING', *LIFECYCLE]:
+                raise SystemExit(f"Order {order_id} history is {statuses}")
+        calls.take()
+
+    # Half the orders are deleted one at a time through the API, the rest in bulk
+    half = len(order_ids) // 2
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for order_id in order_ids[:half]:
+            app.lambda_handler(api_event('DELETE', f'/orders/{order_id}', path_parameters={'orderId': order_id}), None)
+    deletes_ms = (time.perf_counter() - start) * 1000
+    single_deletes = calls.take()
+    start = time.perf_counter()
+    failures = handler.delete_documents(order_ids[half:])
+    bulk_ms = (time.perf_counter() - start) * 1000
+    bulk_deletes = calls.take()
+    if failures:
+        raise SystemExit(f"Bulk delete failed: {failures}")
+
+    writes, deletes = per_order(lifecycle, orders), per_order(single_deletes, half)
+    results['lifecycle_per_order'] = {operation: round(writes.get(operation, 0) + deletes.get(operation, 0), 2)
+                                      for operation in set(writes) | set(deletes)}
+    results['lifecycle_writes'] = dict(writes, ms=round(writes_ms, 1))
+    results['single_deletes'] = dict(deletes, ms=round(deletes_ms, 1))
+    results['bulk_delete'] = dict(bulk_deletes, orders=len(order_ids) - half, ms=round(bulk_ms, 1))
+    return results
+
+def run(orders: int, latency_ms: float) -> dict:
+    results: Dict[str, Any] = {}
+    with local_aws() as env:
+        import boto3
+        import app
+        from order_management import clients
+        from order_management.processor import S3DocumentHandler
+
+        app.reset_processor()
+        app.get_processor()
+        inject_latency({'dynamodb': latency_ms, 's3': latency_ms, 'sns': latency_ms})
+        calls = S3Calls(clients.get_client('s3'))
+        bucket = env['DOCUMENTS_BUCKET']
+
+        results['before'] = run_handler(app, legacy_handler_class()(bucket), calls, orders, versioned=False)
+        results['after'] = run_handler(app, S3DocumentHandler(bucket), calls, orders, versioned=True)
+
+        leftover = boto3.client('s3').list_objects_v2(Bucket=bucket, Prefix='orders/').get('KeyCount', 0)
+        if leftover:
+            raise SystemExit(f"{leftover} documents left after deleting every order")
+    before, after = results['before']['lifecycle_per_order'], results['after']['lifecycle_per_order']
+    results['lifecycle_calls_per_order'] = {'before': before['total'], 'after': after['total']}
+    return dict(results, orders=orders, latency_ms=latency_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB/S3/SNS latency')
+    args = parser.parse_args()
+    report('document_requests', run(args.orders, args.latency_ms))
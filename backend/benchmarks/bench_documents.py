@@ -0,0 +1,114 @@
+# backend/benchmarks/bench_documents.py
+"""Order documents: proxying through the Lambda versus presigned URLs and ranged streaming.
+
+For each document size (line items per order) this reports:
+
+  proxy      the Lambda reads the document from S3, parses it and returns it
+             as its response body (the only option before the document route)
+  presigned  GET /orders/{orderId}/document returns a URL; the client then
+             fetches the (gzip-encoded) object from S3 directly
+  stream     GET /orders/{orderId}/document?mode=stream with a 1 MiB Range
+
+along with the bytes stored in S3 and the bytes each mode sends through the
+Lambda, which API Gateway caps at 6 MB per response.
+
+    python benchmarks/bench_documents.py --items 10,1000,20000,60000 --requests 20
+"""
+
+import argparse
+import io
+import json
+import time
+from contextlib import redirect_stdout
+from typing import Dict, Any, List
+
+from common import local_aws, api_event, sample_order, summarize, report, inject_latency
+
+LAMBDA_RESPONSE_LIMIT = 6 * 1024 * 1024
+STREAM_RANGE = 'bytes=0-1048575'
+
+def large_document(order: Dict[str, Any], items: int) -> Dict[str, Any]:
+    return dict(order, items=[
+        {'product_id': f'PROD-{i}', 'name': f'Product {i} with a longer descriptive name',
+         'quantity': 1 + i % 5, 'price': 9.99, 'total': 9.99 * (1 + i % 5)}
+        for i in range(items)
+    ])
+
+def timed_calls(fn, requests: int) -> List[float]:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def run(item_counts: List[int], requests: int, latency_ms: float) -> dict:
+    import requests as http
+
+    results: Dict[str, Any] = {}
+    with local_aws() as env:
+        import boto3
+        import app
+
+        app.reset_processor()
+        processor = app.get_processor()
+        inject_latency({'dynamodb': latency_ms, 's3': latency_ms})
+        with redirect_stdout(io.StringIO()):
+            order = json.loads(app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)['body'])
+        order_id = order['order_id']
+        s3 = boto3.client('s3')
+
+        for items in item_counts:
+            document = large_document(order, items)
+            # Version keys are written once; each size replaces the order's document
+            s3.delete_object(Bucket=env['DOCUMENTS_BUCKET'], Key=processor.doc_handler.key_for(document))
+            processor.doc_handler.store_document(order_id, document)
+            stored = s3.head_object(Bucket=env['DOCUMENTS_BUCKET'], Key=processor.doc_handler.key_for(document))
+            raw_bytes = len(json.dumps(document).encode('utf-8'))
+
+            def proxy():
+                return app.create_response(200, processor.doc_handler.get_document(document))
+
+            def presigned():
+                event = api_event('GET', f'/orders/{order_id}/document', path_parameters={'orderId': order_id})
+                response = app.lambda_handler(event, None)
+                url = json.loads(response['body'])['url']
+                time.sleep(latency_ms / 1000.0)  # the client's own round trip to S3
+                fetched = http.get(url)
+                assert fetched.status_code == 200 and len(fetched.json()['items']) == items
+                return response
+
+            def stream():
+                event = api_event('GET', f'/orders/{order_id}/document', path_parameters={'orderId': order_id},
+                                  query={'mode': 'stream'}, headers={'Range': STREAM_RANGE})
+                return app.lambda_handler(event, None)
+
+            with redirect_stdout(io.StringIO()):
+                proxy_response = proxy()
+                presigned_response = presigned()
+                stream_response = stream()
+                proxy_samples = timed_calls(proxy, requests)
+                presigned_samples = timed_calls(presigned, requests)
+                stream_samples = timed_calls(stream, requests)
+
+            proxy_bytes = len(proxy_response['body'].encode('utf-8'))
+            results[str(items)] = {
+                'document_bytes': raw_bytes,
+                'stored_bytes': stored['ContentLength'],
+                'stored_encoding': stored.get('ContentEncoding', 'identity'),
+                'proxy': dict(summarize(proxy_samples), lambda_bytes=proxy_bytes,
+                              over_lambda_limit=proxy_bytes > LAMBDA_RESPONSE_LIMIT),
+                'presigned': dict(summarize(presigned_samples),
+                                  lambda_bytes=len(presigned_response['body'].encode('utf-8'))),
+                'stream_1mib_range': dict(summarize(stream_samples), status=stream_response['statusCode'],
+                                          lambda_bytes=len(stream_response['body']))
+            }
+    return dict(results, latency_ms=latency_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', default='10,1000,20000,60000', help='line items per document')
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB/S3 latency')
+    args = parser.parse_args()
+    report('documents', run([int(i) for i in args.items.split(',')], args.requests, args.latency_ms))
@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_inventory.py
+"""Many parallel orders competing for one hot SKU.
+
+Seeds the SKU with --stock units, then fires --orders POST /orders requests
+(one unit each) from --workers threads. Every order either commits together
+with its reservation or is rejected with 409, so exactly min(stock, orders)
+orders may succeed and the stock level must end at max(0, stock - orders).
+
+    python benchmarks/bench_inventory.py --stock 100 --orders 400 --workers 32
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+from common import local_aws, api_event, summarize, report, inject_latency, INVENTORY_TABLE
+
+HOT_SKU = 'HOT-SKU-1'
+
+def hot_order() -> dict:
+    return {
+        'customer_id': 'CUST-1',
+        'customer_name': 'Benchmark Customer',
+        'items': [{'product_id': HOT_SKU, 'name': 'Hot product', 'quantity': 1, 'price': 19.99}]
+    }
+
+def run(stock: int, orders: int, workers: int, latency_ms: float) -> dict:
+    with local_aws():
+        import boto3
+        import app
+
+        os.environ.update(INVENTORY_TABLE=INVENTORY_TABLE, INVENTORY_RESERVATIONS_ENABLED='true')
+        os.environ.pop('OUTBOX_TABLE', None)
+        os.environ['METRICS_ENABLED'] = 'false'
+        table = boto3.resource('dynamodb').Table(INVENTORY_TABLE)
+        table.put_item(Item={'product_id': HOT_SKU, 'stock_level': stock})
+        app.reset_processor()
+        app.get_processor()
+        inject_latency({'dynamodb': latency_ms})
+
+        def place_order(_):
+            start = time.perf_counter()
+            response = app.lambda_handler(api_event('POST', '/orders', body=hot_order()), None)
+            return response['statusCode'], (time.perf_counter() - start) * 1000
+
+        started = time.perf_counter()
+        with redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(place_order, range(orders)))
+        elapsed = time.perf_counter() - started
+
+        final_stock = int(table.get_item(Key={'product_id': HOT_SKU}, ConsistentRead=True)['Item']['stock_level'])
+        created = sum(1 for status, _ in outcomes if status == 201)
+        rejected = sum(1 for status, _ in outcomes if status == 409)
+        other = {str(status): sum(1 for s, _ in outcomes if s == status)
+                 for status in {s for s, _ in outcomes} if status not in (201, 409)}
+        os.environ.pop('INVENTORY_TABLE', None)
+        os.environ.pop('INVENTORY_RESERVATIONS_ENABLED', None)
+
+    oversold = created > stock or final_stock < 0 or final_stock != stock - created
+    result = {
+        'stock': stock,
+        'orders': orders,
+        'workers': workers,
+        'created': created,
+        'rejected_out_of_stock': rejected,
+        'other_statuses': other,
+        'final_stock': final_stock,
+        'oversold': oversold,
+        'orders_per_second': round(orders / elapsed, 1),
+        'latency': summarize([ms for _, ms in outcomes])
+    }
+    if oversold:
+        raise SystemExit(json.dumps(result, indent=2) + '\nOVERSELL DETECTED')
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stock', type=int, default=100)
+    parser.add_argument('--orders', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB latency')
+    args = parser.parse_args()
+    report('inventory_contention', run(args.stock, args.orders, args.workers, args.latency_ms))
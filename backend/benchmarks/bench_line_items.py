@@ -0,0 +1,255 @@
+# backend/benchmarks/bench_line_items.py
+"""List views over orders with hundreds of line items.
+
+For each order size in --lines, loads --orders orders with the items stored
+inline, then pages through the whole table three ways:
+
+  full       Scan returning every attribute, serialized like GET /orders
+             did before listings were projected
+  projected  GET /orders?mode=scan with the items stored inline; the
+             summary projection trims the response, not the read
+  split      the same request after the items moved to the lines table
+             (order_management.lines migration), reading headers only
+
+and times GET /orders/{orderId}?include=items for the first page of items
+and for every page. Last, with OUTBOX_TABLE set as in backend/template.yaml,
+it creates one order that would exceed DynamoDB's 400 KB item limit inline
+(--outbox-lines) and dispatches its outbox record: the record must stay
+small, and the stored document must hold every line item.
+
+moto does not charge capacity by item size, so read units are estimated
+from the size of the items read (4 KB units, eventually consistent reads at
+half price); a ProjectionExpression does not lower them. The migration must
+move every order, ?include=items must return the original items in order,
+and the analytics product rows of a header plus its pages must equal those
+of the inline order.
+
+    python benchmarks/bench_line_items.py --lines 200,500 --orders 200
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import time
+from contextlib import redirect_stdout
+from decimal import Decimal
+from typing import Dict, Any, List
+
+from common import local_aws, api_event, summarize, report, inject_latency, ORDER_LINES_TABLE, OUTBOX_TABLE
+from bench_outbox import stream_records
+
+PAGE_LIMIT = 100  # orders per listing page, as the dashboard asks
+DYNAMODB_ITEM_LIMIT = 400 * 1024
+
+def call(app, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    response = app.lambda_handler(api_event(*args, **kwargs), None)
+    assert response['statusCode'] < 300, response['body']
+    return json.loads(response['body'])
+
+def large_order(lines: int, customer: int) -> Dict[str, Any]:
+    # Products repeat every 150 lines, so large orders carry a product on several pages
+    return {
+        'customer_id': f'CUST-{customer % 20}',
+        'customer_name': 'Benchmark Customer',
+        'items': [{'product_id': f'PROD-{i % 150}', 'name': f'Product {i % 150}', 'quantity': 1 + i % 4,
+                   'price': 1.25 + i % 7} for i in range(lines)]
+    }
+
+def attribute_size(value: Dict[str, Any]) -> int:
+    """Approximate stored size of one attribute value, following DynamoDB's item size rules"""
+    kind, inner = next(iter(value.items()))
+    if kind == 'S':
+        return len(inner.encode())
+    if kind == 'N':
+        return len(inner.lstrip('-').replace('.', '')) // 2 + 2
+    if kind == 'SS':
+        return sum(len(member.encode()) for member in inner)
+    if kind == 'L':
+        return 3 + sum(1 + attribute_size(member) for member in inner)
+    if kind == 'M':
+        return 3 + sum(1 + len(name.encode()) + attribute_size(member) for name, member in inner.items())
+    return 1
+
+def item_size(item: Dict[str, Any]) -> int:
+    return sum(len(name.encode()) + attribute_size(value) for name, value in item.items())
+
+def scan_read_units(client: Any, table_name: str) -> float:
+    """Eventually consistent read units of paging through a table PAGE_LIMIT items at a time"""
+    units, kwargs = 0.0, {'TableName': table_name, 'Limit': PAGE_LIMIT}
+    while True:
+        response = client.scan(**kwargs)
+        units += math.ceil(sum(item_size(item) for item in response['Items']) / 4096) / 2
+        if 'LastEvaluatedKey' not in response:
+            return units
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def scan_table(table: Any) -> List[Dict[str, Any]]:
+    items, kwargs = [], {}
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def timed_pages(fetch) -> float:
+    start, next_token = time.perf_counter(), None
+    while True:
+        next_token = fetch(next_token)
+        if not next_token:
+            return (time.perf_counter() - start) * 1000
+
+def list_orders(app, next_token: Any) -> Any:
+    query = {'mode': 'scan', 'limit': str(PAGE_LIMIT), **({'next_token': next_token} if next_token else {})}
+    return call(app, 'GET', '/orders', query=query).get('next_token')
+
+def all_items(app, order_id: str) -> List[Dict[str, Any]]:
+    items, next_token = [], None
+    while True:
+        query = {'include': 'items', **({'next_token': next_token} if next_token else {})}
+        page = call(app, 'GET', f'/orders/{order_id}', query=query, path_parameters={'orderId': order_id})
+        items.extend(page['items'])
+        next_token = page['items_next_token']
+        if not next_token:
+            return items
+
+def product_rows(orders: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Decimal]]:
+    from aggregates import contributions
+
+    rows: Dict[Any, Dict[str, Decimal]] = {}
+    for order in orders:
+        for key, counters in contributions(order).items():
+            if key[0] == 'product':
+                row = rows.setdefault(key, {})
+                for name, value in counters.items():
+                    row[name] = row.get(name, Decimal(0)) + value
+    return rows
+
+def run_size(lines: int, orders: int, repeats: int, latency_ms: float) -> Dict[str, Any]:
+    with local_aws() as env:
+        import app
+        from order_management import clients, serialization
+        from order_management.lines import LineStore
+
+        os.environ['ORDER_CACHE_ENABLED'] = 'false'
+        os.environ.pop('ORDER_LINES_TABLE', None)
+        app.reset_processor()
+        with redirect_stdout(io.StringIO()):
+            order_ids: List[str] = []
+            for start in range(0, orders, 50):
+                body = {'orders': [large_order(lines, start + i) for i in range(min(50, orders - start))]}
+                order_ids.extend(result['order_id'] for result in call(app, 'POST', '/orders/batch', body=body)['results'])
+
+            client = clients.get_client('dynamodb')
+            table = clients.get_resource('dynamodb').Table(env['ORDERS_TABLE'])
+            inline = {order['order_id']: order for order in scan_table(table)}
+            inject_latency({'dynamodb': latency_ms})
+
+            def full_page(next_token: Any) -> Any:
+                kwargs = {'Limit': PAGE_LIMIT, **({'ExclusiveStartKey': next_token} if next_token else {})}
+                response = table.scan(**kwargs)
+                serialization.dumps({'orders': response['Items']})
+                return response.get('LastEvaluatedKey')
+
+            samples: Dict[str, List[float]] = {'full': [], 'projected': [], 'split': [],
+                                              'items_first_page': [], 'items_all': []}
+            for _ in range(repeats):
+                samples['full'].append(timed_pages(full_page))
+                samples['projected'].append(timed_pages(lambda token: list_orders(app, token)))
+            inline_units = scan_read_units(client, env['ORDERS_TABLE'])
+
+            migrated = LineStore(ORDER_LINES_TABLE).migrate(env['ORDERS_TABLE'])
+            if migrated['migrated'] != orders or migrated['failed']:
+                raise SystemExit(f"Migration moved {migrated['migrated']} of {orders} orders: {migrated}")
+            os.environ['ORDER_LINES_TABLE'] = ORDER_LINES_TABLE
+            app.reset_processor()
+
+            for _ in range(repeats):
+                samples['split'].append(timed_pages(lambda token: list_orders(app, token)))
+            for order_id in order_ids[:repeats * 5]:
+                start = time.perf_counter()
+                call(app, 'GET', f'/orders/{order_id}', query={'include': 'items'},
+                     path_parameters={'orderId': order_id})
+                samples['items_first_page'].append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                items = all_items(app, order_id)
+                samples['items_all'].append((time.perf_counter() - start) * 1000)
+                if json.loads(serialization.dumps(items)) != json.loads(serialization.dumps(inline[order_id]['items'])):
+                    raise SystemExit(f"Line items of {order_id} changed in the migration")
+            header_units = scan_read_units(client, env['ORDERS_TABLE'])
+
+            pages = scan_table(clients.get_resource('dynamodb').Table(ORDER_LINES_TABLE))
+            if product_rows(list(inline.values())) != product_rows(pages):
+                raise SystemExit("Product rows of the line pages differ from those of the inline orders")
+
+            # New orders take the split layout directly
+            created = call(app, 'POST', '/orders', body=large_order(lines, 0))
+            if len(all_items(app, created['order_id'])) != lines:
+                raise SystemExit("Order created with the lines table lost line items")
+        for name in ('ORDER_LINES_TABLE', 'ORDER_CACHE_ENABLED'):
+            os.environ.pop(name, None)
+    results: Dict[str, Any] = {name: summarize(values) for name, values in samples.items()}
+    results['full']['read_units'] = results['projected']['read_units'] = inline_units
+    results['split']['read_units'] = header_units
+    return dict(results, migration=migrated)
+
+def run_outbox(lines: int, latency_ms: float) -> Dict[str, Any]:
+    """POST /orders of one order too large for an inline item, through the outbox"""
+    with local_aws() as env:
+        import app
+        import dispatcher
+        from order_management import clients
+
+        os.environ.update(ORDER_LINES_TABLE=ORDER_LINES_TABLE, OUTBOX_TABLE=OUTBOX_TABLE, ORDER_CACHE_ENABLED='false')
+        app.reset_processor()
+        inject_latency({'dynamodb': latency_ms})
+        with redirect_stdout(io.StringIO()):
+            from order_management.model import Order
+
+            body = large_order(lines, 0)
+            inline_bytes = item_size(Order.parse(body, 'ORD-SIZE').to_attributes())
+            start = time.perf_counter()
+            created = call(app, 'POST', '/orders', body=body)
+            create_ms = (time.perf_counter() - start) * 1000
+
+            outbox = clients.get_resource('dynamodb').Table(OUTBOX_TABLE)
+            records = stream_records(outbox)
+            record_bytes = max(item_size(item) for item in clients.get_client('dynamodb').scan(
+                TableName=OUTBOX_TABLE)['Items'])
+            if record_bytes >= DYNAMODB_ITEM_LIMIT:
+                raise SystemExit(f"Outbox record of the large order is {record_bytes} bytes")
+            dispatcher._dispatcher = None
+            start = time.perf_counter()
+            response = dispatcher.lambda_handler({'Records': records}, None)
+            dispatch_ms = (time.perf_counter() - start) * 1000
+            if response['batchItemFailures']:
+                raise SystemExit(f"Dispatch of the large order failed: {response}")
+
+            doc_handler = app.get_processor().doc_handler
+            order = app.get_processor().get_order(created['order_id'])
+            stored = doc_handler.get_document(order)
+            if len(stored['items']) != lines or stored['items'] != all_items(app, created['order_id']):
+                raise SystemExit(f"Stored document {doc_handler.key_for(order)} does not hold the order's line items")
+        for name in ('ORDER_LINES_TABLE', 'OUTBOX_TABLE', 'ORDER_CACHE_ENABLED'):
+            os.environ.pop(name, None)
+    return {'lines': lines, 'inline_item_bytes': inline_bytes, 'outbox_record_bytes': record_bytes,
+            'create_ms': round(create_ms, 1), 'dispatch_ms': round(dispatch_ms, 1)}
+
+def run(sizes: List[int], orders: int, repeats: int, latency_ms: float, outbox_lines: int) -> dict:
+    results: Dict[str, Any] = {f'{lines}_lines': run_size(lines, orders, repeats, latency_ms) for lines in sizes}
+    results['outbox_large_order'] = run_outbox(outbox_lines, latency_ms)
+    return dict(results, orders=orders, page_limit=PAGE_LIMIT, latency_ms=latency_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', default='200,500', help='comma-separated line items per order')
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=3, help='full listings per layout')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB latency')
+    parser.add_argument('--outbox-lines', type=int, default=6000,
+                        help='line items of the order created through the outbox (over 400 KB)')
+    args = parser.parse_args()
+    report('line_items', run([int(n) for n in args.lines.split(',')], args.orders, args.repeats, args.latency_ms,
+                             args.outbox_lines))
@@ -0,0 +1,385 @@
+# backend/benchmarks/bench_load.py
+"""Offline load test: a realistic order mix through lambda_handler, in-process.
+
+Every request is a synthetic API Gateway event handled by app.lambda_handler
+against the moto stand-ins, with --latency-ms added to each DynamoDB/S3/SNS
+call. The mix is drawn from --mix (operation=weight, see MIXES), orders have
+a skewed line-item count (ITEM_COUNTS), and customers and SKUs are picked
+with a Zipf-like skew (--skew) so a few hot ones take most of the traffic.
+
+Requests run on --concurrency threads, or with --processes on that many
+worker processes, each with its own stand-ins and preloaded orders. The
+report has throughput, p50/p95/p99 per operation, per-stage times from the
+handler's EMF metrics and, with --allocations, the peak bytes allocated per
+request (measured in a separate single-threaded pass, since tracemalloc
+slows everything down). Allocation figures include what the moto stand-ins
+allocate (each transaction copies their tables), so compare them between
+commits rather than reading them as Lambda memory. --output writes it as JSON, with the git commit, for
+compare_results.py:
+
+    python benchmarks/bench_load.py --requests 2000 --concurrency 8 --output before.json
+    python benchmarks/bench_load.py --requests 2000 --concurrency 8 --output after.json
+    python benchmarks/compare_results.py before.json after.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from common import (local_aws, api_event, summarize, report, inject_latency,
+                    OUTBOX_TABLE, INVENTORY_TABLE, CUSTOMERS_TABLE, CHANGES_TABLE, ORDER_LINES_TABLE)
+
+MIXES = {
+    'read-heavy': 'get=60,list_customer=10,summary=10,create=15,update=4,delete=1',
+    'mixed': 'get=40,list_customer=5,summary=5,create=30,update=15,delete=5',
+    'write-heavy': 'get=15,create=60,update=20,delete=5'
+}
+
+# Line items per order: (count range, share of orders)
+ITEM_COUNTS = (((1, 1), 0.45), ((2, 3), 0.35), ((4, 10), 0.17), ((11, 50), 0.03))
+
+NEXT_STATUS = {'PENDING': 'PROCESSING', 'PROCESSING': 'COMPLETED'}
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in MIXES.get(mix, mix).split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        weights[name] = float(weight)
+    return weights
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    return [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+
+class Workload:
+    """Draws operations; tracks the orders created so reads and updates hit live ones"""
+
+    def __init__(self, config: Dict[str, Any], seed: int):
+        self.rng = random.Random(seed)
+        self.mix = parse_mix(config['mix'])
+        self.customers = [f"CUST-{i:05d}" for i in range(config['customers'])]
+        self.skus = [f"SKU-{i:05d}" for i in range(config['skus'])]
+        self.customer_weights = zipf_weights(len(self.customers), config['skew'])
+        self.sku_weights = zipf_weights(len(self.skus), config['skew'])
+        # Live orders: ids in a list for O(1) random picks, positions and statuses by id
+        self.order_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.statuses: Dict[str, str] = {}
+        self.cursor: Optional[str] = None  # change feed position of this worker's dashboard
+        self.lock = threading.Lock()
+
+    def add_order(self, order_id: str) -> None:
+        self.positions[order_id] = len(self.order_ids)
+        self.order_ids.append(order_id)
+        self.statuses[order_id] = 'PENDING'
+
+    def remove_order(self, order_id: str) -> None:
+        position = self.positions.pop(order_id, None)
+        if position is None:
+            return
+        last = self.order_ids.pop()
+        if last != order_id:
+            self.order_ids[position] = last
+            self.positions[last] = position
+        del self.statuses[order_id]
+
+    def customer(self) -> str:
+        return self.rng.choices(self.customers, self.customer_weights)[0]
+
+    def order_body(self) -> Dict[str, Any]:
+        (low, high), = self.rng.choices([span for span, _ in ITEM_COUNTS], [share for _, share in ITEM_COUNTS])
+        skus = set(self.rng.choices(self.skus, self.sku_weights, k=self.rng.randint(low, high)))
+        return {
+            'customer_id': self.customer(),
+            'customer_name': 'Load Test Customer',
+            'items': [{'product_id': sku, 'name': f'Product {sku}', 'quantity': self.rng.randint(1, 3),
+                       'price': self.rng.randint(100, 20000) / 100} for sku in sorted(skus)]
+        }
+
+    def pick_order(self, statuses: Tuple[str, ...] = ()) -> Optional[Tuple[str, str]]:
+        with self.lock:
+            for _ in range(5 if self.order_ids else 0):
+                order_id = self.rng.choice(self.order_ids)
+                if not statuses or self.statuses[order_id] in statuses:
+                    return order_id, self.statuses[order_id]
+        return None
+
+    def next(self) -> Tuple[str, Dict[str, Any]]:
+        operation = self.rng.choices(list(self.mix), list(self.mix.values()))[0]
+        return OPERATIONS[operation](self)
+
+    def track(self, operation: str, event: Dict[str, Any], response: Dict[str, Any]) -> None:
+        if response['statusCode'] >= 300:
+            return
+        with self.lock:
+            if operation == 'create':
+                self.add_order(json.loads(response['body'])['order_id'])
+            elif operation == 'update' and event['pathParameters']['orderId'] in self.statuses:
+                self.statuses[event['pathParameters']['orderId']] = json.loads(event['body'])['status']
+            elif operation == 'delete':
+                self.remove_order(event['pathParameters']['orderId'])
+            elif operation == 'changes':
+                self.cursor = json.loads(response['body'])['cursor']
+
+def op_create(workload: Workload) -> Tuple[str, Dict[str, Any]]:
+    return 'create', api_event('POST', '/orders', body=workload.order_body())
+
+def op_get(workload: Workload) -> Tuple[str, Dict[str, Any]]:
+    picked = workload.pick_order()
+    if not picked:
+        return op_create(workload)
+    return 'get', api_event('GET', f'/orders/{picked[0]}', path_parameters={'orderId': picked[0]})
+
+def op_update(workload: Workload) -> Tuple[str, Dict[str, Any]]:
+    picked = workload.pick_order(tuple(NEXT_STATUS))
+    if not picked:
+        return op_create(workload)
+    order_id, status = picked
+    return 'update', api_event('PATCH', f'/orders/{order_id}/status', body={'status': NEXT_STATUS[status]},
+                               path_parameters={'orderId': order_id})
+
+def op_delete(workload: Workload) -> Tuple[str, Dict[str, Any]]:
+    picked = workload.pick_order()
+    if not picked:
+        return op_create(workload)
+    return 'delete', api_event('DELETE', f'/orders/{picked[0]}', path_parameters={'orderId': picked[0]})
+
+def op_list_customer(workload: Workload) -> Tuple[str, Dict[str, Any]]:
+    customer_id = workload.customer()
+    return 'list_customer', api_event('GET', f'/customers/{customer_id}/orders', query={'limit': '20'},
+                                      path_parameters={'customerId': customer_id})
+
+def op_summary(workload: Workload) -> Tuple[str, Dict[str, Any]]:
+    customer_id = workload.customer()
+    return 'summary', api_event('GET', f'/customers/{customer_id}/summary', path_parameters={'customerId': customer_id})
+
+def op_changes(workload: Workload) -> Tuple[str, Dict[str, Any]]:
+    query = {'since': workload.cursor} if workload.cursor else {}
+    return 'changes', api_event('GET', '/orders/changes', query=query)
+
+OPERATIONS = {
+    'create': op_create,
+    'get': op_get,
+    'update': op_update,
+    'delete': op_delete,
+    'list_customer': op_list_customer,
+    'summary': op_summary,
+    'changes': op_changes
+}
+
+def configure(config: Dict[str, Any]) -> None:
+    """Set the feature tables for this run (the stand-ins create all of them)"""
+    import boto3
+
+    features = {'OUTBOX_TABLE': OUTBOX_TABLE if config['outbox'] else None,
+                'INVENTORY_TABLE': INVENTORY_TABLE if config['inventory'] else None,
+                'INVENTORY_RESERVATIONS_ENABLED': 'true' if config['inventory'] else None,
+                'CUSTOMERS_TABLE': CUSTOMERS_TABLE,
+                'CHANGES_TABLE': CHANGES_TABLE if config.get('changes') else None,
+                'ORDER_LINES_TABLE': ORDER_LINES_TABLE if config.get('lines') else None}
+    for name, value in features.items():
+        if value:
+            os.environ[name] = value
+        else:
+            os.environ.pop(name, None)
+    if config['inventory']:
+        # Enough stock that the run never sells out
+        with boto3.resource('dynamodb').Table(INVENTORY_TABLE).batch_writer() as batch:
+            for i in range(config['skus']):
+                batch.put_item(Item={'product_id': f"SKU-{i:05d}", 'stock_level': 10 ** 9})
+
+def preload(app, workload: Workload, count: int) -> None:
+    for start in range(0, count, 500):
+        orders = [workload.order_body() for _ in range(min(500, count - start))]
+        response = app.lambda_handler(api_event('POST', '/orders/batch', body={'orders': orders}), None)
+        for result in json.loads(response['body'])['results']:
+            if result['status'] == 'CREATED':
+                workload.add_order(result['order_id'])
+
+def stage_samples(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, List[float]]]:
+    """Warm per-stage durations from EMF records, by operation and stage"""
+    stages: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    for record in records:
+        if record['ColdStart'] == 'true':
+            continue
+        for metric in record['_aws']['CloudWatchMetrics'][0]['Metrics']:
+            if metric['Unit'] == 'Milliseconds':
+                values = record[metric['Name']]
+                stages[record['Operation']][metric['Name']].extend(values if isinstance(values, list) else [values])
+    return stages
+
+def allocation_pass(app, workload: Workload, requests: int) -> Dict[str, List[int]]:
+    """Peak bytes allocated while handling each request, single-threaded under tracemalloc"""
+    peaks: Dict[str, List[int]] = defaultdict(list)
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            operation, event = workload.next()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            response = app.lambda_handler(event, None)
+            peaks[operation].append(tracemalloc.get_traced_memory()[1] - baseline)
+            workload.track(operation, event, response)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def run_worker(config: Dict[str, Any], worker: int, requests: int, threads: int) -> Dict[str, Any]:
+    """Preload, then run `requests` requests on `threads` threads; returns raw samples"""
+    with local_aws():
+        import app
+        from order_management import metrics
+
+        configure(config)
+        app.reset_processor()
+        workload = Workload(config, seed=config['seed'] + worker)
+        with redirect_stdout(io.StringIO()):
+            preload(app, workload, config['preload'])
+        inject_latency({'dynamodb': config['latency_ms'], 's3': config['latency_ms'], 'sns': config['latency_ms']})
+
+        sink = metrics.MemorySink()
+        metrics.set_sink(sink)
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        remaining = [requests]
+        lock = threading.Lock()
+
+        def loop() -> None:
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                operation, event = workload.next()
+                start = time.perf_counter()
+                response = app.lambda_handler(event, None)
+                elapsed = (time.perf_counter() - start) * 1000
+                workload.track(operation, event, response)
+                with lock:
+                    latencies[operation].append(elapsed)
+                    statuses[operation][str(response['statusCode'])] += 1
+
+        try:
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    for future in [pool.submit(loop) for _ in range(threads)]:
+                        future.result()
+                elapsed = time.perf_counter() - start
+                metrics.set_sink(None)
+                allocations = allocation_pass(app, workload, config['allocations']) if config['allocations'] else {}
+        finally:
+            metrics.set_sink(None)
+    return {
+        'seconds': elapsed,
+        'latencies': dict(latencies),
+        'statuses': {operation: dict(codes) for operation, codes in statuses.items()},
+        'stages': {operation: dict(stages) for operation, stages in stage_samples(sink.records).items()},
+        'allocations': dict(allocations)
+    }
+
+def merge(results: List[Dict[str, Any]], requests: int) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    stages: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    allocations: Dict[str, List[int]] = defaultdict(list)
+    for result in results:
+        for operation, samples in result['latencies'].items():
+            latencies[operation].extend(samples)
+        for operation, codes in result['statuses'].items():
+            for code, count in codes.items():
+                statuses[operation][code] += count
+        for operation, names in result['stages'].items():
+            for name, samples in names.items():
+                stages[operation][name].extend(samples)
+        for operation, peaks in result['allocations'].items():
+            allocations[operation].extend(peaks)
+
+    # Workers run side by side, so the slowest one bounds the run
+    seconds = max(result['seconds'] for result in results)
+    all_samples = [sample for samples in latencies.values() for sample in samples]
+    return {
+        'requests': requests,
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(requests / seconds, 1),
+        'latency': dict(summarize(all_samples)),
+        'operations': {
+            operation: dict(summarize(samples), statuses=dict(statuses[operation]),
+                            share=round(len(samples) / requests, 3))
+            for operation, samples in sorted(latencies.items())
+        },
+        'stages': {
+            operation: {name: summarize(samples) for name, samples in sorted(names.items())}
+            for operation, names in sorted(stages.items())
+        },
+        'allocations': {
+            operation: {'requests': len(peaks), 'mean_peak_kib': round(sum(peaks) / len(peaks) / 1024, 1),
+                        'max_peak_kib': round(max(peaks) / 1024, 1)}
+            for operation, peaks in sorted(allocations.items()) if peaks
+        }
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(config: Dict[str, Any]) -> Dict[str, Any]:
+    workers = config['processes'] or 1
+    shares = [config['requests'] // workers + (1 if i < config['requests'] % workers else 0) for i in range(workers)]
+    if config['processes']:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_worker, config, i, shares[i], config['concurrency']) for i in range(workers)]
+            results = [future.result() for future in futures]
+    else:
+        results = [run_worker(config, 0, shares[0], config['concurrency'])]
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'config': config,
+        'results': merge(results, config['requests'])
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8, help='threads (per process with --processes)')
+    parser.add_argument('--processes', type=int, default=0, help='worker processes, each with its own stand-ins')
+    parser.add_argument('--mix', default='mixed', help=f"one of {', '.join(MIXES)} or op=weight,...")
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--skus', type=int, default=500)
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for customers and SKUs (0 = uniform)')
+    parser.add_argument('--preload', type=int, default=1000, help='orders created before the run (per process)')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='injected per-call DynamoDB/S3/SNS latency')
+    parser.add_argument('--outbox', action='store_true', help='commit side effects through the outbox table')
+    parser.add_argument('--inventory', action='store_true', help='reserve stock in the order transaction')
+    parser.add_argument('--changes', action='store_true',
+                        help='append to the change feed (add changes=<weight> to --mix to poll it)')
+    parser.add_argument('--lines', action='store_true', help='store line items in the lines table')
+    parser.add_argument('--allocations', type=int, default=0, help='requests in the tracemalloc pass (0 = skip)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args()
+    parse_mix(args.mix)
+    config = {name: value for name, value in vars(args).items() if name != 'output'}
+    result = run(config)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    report('load', result)
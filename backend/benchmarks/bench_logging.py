@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_logging.py
+"""Per-request logging overhead of POST /orders and GET /orders/{id} at each LOG_LEVEL.
+
+For every setting it reports request latency, the time spent writing log
+lines, and the lines and bytes a request produces (what CloudWatch ingests).
+
+    python benchmarks/bench_logging.py --requests 200 --items 50
+"""
+
+import argparse
+import json
+import os
+import time
+
+from common import local_aws, api_event, sample_order, summarize, report
+
+SETTINGS = {
+    'ERROR': {'LOG_LEVEL': 'ERROR', 'LOG_DEBUG_SAMPLE_RATE': '0'},
+    'INFO': {'LOG_LEVEL': 'INFO', 'LOG_DEBUG_SAMPLE_RATE': '0'},
+    'INFO+debug_sampled_10pct': {'LOG_LEVEL': 'INFO', 'LOG_DEBUG_SAMPLE_RATE': '0.1'},
+    'DEBUG': {'LOG_LEVEL': 'DEBUG', 'LOG_DEBUG_SAMPLE_RATE': '0'},
+}
+
+class CountingStream:
+    """stdout stand-in that only counts what would have been shipped"""
+
+    def __init__(self):
+        self.lines = 0
+        self.bytes = 0
+
+    def write(self, text: str) -> int:
+        self.lines += text.count('\n')
+        self.bytes += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+def run(requests: int, items: int) -> dict:
+    results = {}
+    with local_aws():
+        import app
+        from contextlib import redirect_stdout
+        from order_management import log
+
+        write = log.Logger._write
+        write_seconds = [0.0]
+
+        def timed_write(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                write(self, *args, **kwargs)
+            finally:
+                write_seconds[0] += time.perf_counter() - start
+
+        log.Logger._write = timed_write
+        try:
+            for name, settings in SETTINGS.items():
+                os.environ.update(settings)
+                log.configure()
+                app.reset_processor()
+                stream = CountingStream()
+                latencies = []
+                write_seconds[0] = 0.0
+                with redirect_stdout(stream):
+                    app.get_processor()
+                    stream.lines = stream.bytes = 0
+                    for _ in range(requests):
+                        start = time.perf_counter()
+                        response = app.lambda_handler(api_event('POST', '/orders', body=sample_order(items)), None)
+                        order_id = json.loads(response['body'])['order_id']
+                        app.lambda_handler(api_event('GET', f'/orders/{order_id}',
+                                                     path_parameters={'orderId': order_id}), None)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                results[name] = {
+                    'post_and_get_ms': summarize(latencies),
+                    'log_write_ms_per_request': round(write_seconds[0] * 1000 / requests, 3),
+                    'lines_per_request': round(stream.lines / requests, 1),
+                    'bytes_per_request': round(stream.bytes / requests)
+                }
+        finally:
+            log.Logger._write = write
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--items', type=int, default=50, help='line items per order')
+    args = parser.parse_args()
+    report('logging', run(args.requests, args.items))
@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_order_cache.py
+"""GET /orders/{orderId} latency and DynamoDB reads with and without the order cache.
+
+Reads follow a skewed (Zipf-like) distribution over the orders, as dashboards
+polling a few hot orders do. RCUs assume eventually consistent reads of items
+under 4 KB (0.5 RCU per GetItem).
+
+    python benchmarks/bench_order_cache.py --orders 200 --reads 5000
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import time
+from contextlib import redirect_stdout
+
+from common import local_aws, api_event, sample_order, summarize, report, inject_latency
+
+def run(orders: int, reads: int, latency_ms: float) -> dict:
+    results = {}
+    with local_aws():
+        import app
+        from order_management import clients
+
+        with redirect_stdout(io.StringIO()):
+            order_ids = [
+                json.loads(app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)['body'])['order_id']
+                for _ in range(orders)
+            ]
+        rng = random.Random(42)
+        weights = [1.0 / (rank + 1) for rank in range(orders)]
+        sequence = rng.choices(order_ids, weights=weights, k=reads)
+
+        for mode in ('uncached', 'cached', 'conditional'):
+            os.environ['ORDER_CACHE_ENABLED'] = 'false' if mode == 'uncached' else 'true'
+            app.reset_processor()
+            processor = app.get_processor()
+            inject_latency({'dynamodb': latency_ms})
+            get_items = []
+            clients.get_resource('dynamodb').meta.client.meta.events.register(
+                'before-call.dynamodb.GetItem', lambda **kwargs: get_items.append(1)
+            )
+
+            etags = {}
+            samples = []
+            not_modified = 0
+            for order_id in sequence:
+                headers = {'If-None-Match': etags[order_id]} if mode == 'conditional' and order_id in etags else {}
+                event = api_event('GET', f'/orders/{order_id}', path_parameters={'orderId': order_id}, headers=headers)
+                start = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    response = app.lambda_handler(event, None)
+                samples.append((time.perf_counter() - start) * 1000)
+                etags[order_id] = response['headers'].get('ETag')
+                not_modified += response['statusCode'] == 304
+
+            results[mode] = dict(summarize(samples), get_item_calls=len(get_items),
+                                 rcu=len(get_items) * 0.5, not_modified=not_modified,
+                                 cache=processor.cache_stats())
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--reads', type=int, default=5000)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    args = parser.parse_args()
+    report('order_cache', run(args.orders, args.reads, args.latency_ms))
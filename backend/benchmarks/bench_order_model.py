@@ -0,0 +1,139 @@
+# backend/benchmarks/bench_order_model.py
+"""Per-order CPU and memory of turning a request body into a stored order.
+
+For orders of each size in --items, times (process CPU, per order):
+
+  parse        request dict -> order; previously validate_order_data then
+               format_order_data (float() checks, then Decimal(str()) again)
+  attributes   order -> DynamoDB attribute values; previously boto3's
+               TypeSerializer walk, done by the Table resource on put_item
+  json         order -> response body with serialization.dumps
+
+and reports the tracemalloc peak of the whole path plus the memory the parsed
+order keeps alive. Both paths must produce the same attribute values and JSON.
+
+    python benchmarks/bench_order_model.py --items 10,100,500,2000 --repeat 50
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Any, Callable, List
+
+import common
+from order_management import serialization
+from order_management.model import Order
+
+def legacy_validate(body: Dict[str, Any]) -> None:
+    """app.validate_order_data before the order model"""
+    for field in ('customer_id', 'customer_name', 'items'):
+        if field not in body:
+            raise ValueError(f"Missing required field: {field}")
+    if not isinstance(body['items'], list):
+        raise ValueError("Items must be an array")
+    if not body['items']:
+        raise ValueError("Order must contain at least one item")
+    for item in body['items']:
+        for field in ('product_id', 'name', 'quantity', 'price'):
+            if field not in item:
+                raise ValueError(f"Missing required item field: {field}")
+        try:
+            if float(item['quantity']) <= 0:
+                raise ValueError("Quantity must be positive")
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid quantity: {item.get('quantity')}")
+        try:
+            if float(item['price']) <= 0:
+                raise ValueError("Price must be positive")
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid price: {item.get('price')}")
+
+def legacy_format(body: Dict[str, Any], order_id: str, timestamp: str) -> Dict[str, Any]:
+    """app.format_order_data before the order model"""
+    items = []
+    total_amount = Decimal('0')
+    for item in body['items']:
+        quantity = Decimal(str(item['quantity']))
+        price = Decimal(str(item['price']))
+        item_total = quantity * price
+        items.append({'product_id': item['product_id'], 'name': item['name'], 'quantity': quantity,
+                      'price': price, 'total': item_total})
+        total_amount += item_total
+    return {'order_id': order_id, 'customer_id': body['customer_id'], 'customer_name': body['customer_name'],
+            'items': items, 'total_amount': total_amount, 'status': 'PENDING', 'version': 1,
+            'created_at': timestamp, 'updated_at': timestamp}
+
+def paths(timestamp: str) -> Dict[str, Dict[str, Callable]]:
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+
+    def legacy_parse(body: Dict[str, Any]) -> Dict[str, Any]:
+        legacy_validate(body)
+        return legacy_format(body, 'ORD-00000001', timestamp)
+
+    return {
+        'legacy': {
+            'parse': legacy_parse,
+            'attributes': lambda order: {key: serializer.serialize(value) for key, value in order.items()},
+            'json': serialization.dumps
+        },
+        'model': {
+            'parse': lambda body: Order.parse(body, 'ORD-00000001', timestamp),
+            'attributes': Order.to_attributes,
+            'json': serialization.dumps
+        }
+    }
+
+def cpu_ms(fn: Callable, arg: Any, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.process_time() - start) * 1000 / repeat
+
+def memory_kib(stages: Dict[str, Callable], body: Dict[str, Any]) -> Dict[str, float]:
+    tracemalloc.start()
+    order = stages['parse'](body)
+    retained, _ = tracemalloc.get_traced_memory()
+    stages['attributes'](order)
+    stages['json'](order)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'peak_kib': round(peak / 1024, 1), 'retained_kib': round(retained / 1024, 1)}
+
+def run(item_counts: List[int], repeat: int) -> dict:
+    timestamp = datetime.utcnow().isoformat()
+    implementations = paths(timestamp)
+    results: Dict[str, Any] = {'json_backend': 'orjson' if serialization.orjson is not None else 'stdlib'}
+    for items in item_counts:
+        # A request body as json.loads hands it over: floats and ints
+        body = json.loads(json.dumps(common.sample_order(item_count=items)))
+        legacy_order = implementations['legacy']['parse'](body)
+        model_order = implementations['model']['parse'](body)
+        if (implementations['legacy']['attributes'](legacy_order) != model_order.to_attributes()
+                or serialization.dumps(legacy_order) != serialization.dumps(model_order)):
+            raise SystemExit(f"Order model output differs from the legacy path for {items} items")
+
+        entry: Dict[str, Any] = {}
+        for name, stages in implementations.items():
+            order = stages['parse'](body)
+            timings = {
+                'parse_ms': cpu_ms(stages['parse'], body, repeat),
+                'attributes_ms': cpu_ms(stages['attributes'], order, repeat),
+                'json_ms': cpu_ms(stages['json'], order, repeat)
+            }
+            timings['total_ms'] = sum(timings.values())
+            entry[name] = dict({key: round(value, 3) for key, value in timings.items()}, **memory_kib(stages, body))
+        entry['cpu_speedup'] = round(entry['legacy']['total_ms'] / max(entry['model']['total_ms'], 1e-9), 2)
+        results[f'{items}_items'] = entry
+    return dict(results, repeat=repeat)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', default='10,100,500,2000', help='comma-separated line items per order')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    common.report('order_model', run([int(n) for n in args.items.split(',')], args.repeat))
@@ -0,0 +1,88 @@
+# backend/benchmarks/bench_outbox.py
+"""Outbox mode: POST /orders latency and dispatcher throughput by stream batch size.
+
+Stream records are rebuilt from the outbox table, as DynamoDB Streams would
+deliver them, and fed to the dispatcher in batches of each size.
+
+    python benchmarks/bench_outbox.py --orders 200 --latency-ms 20
+"""
+
+import argparse
+import io
+import os
+import time
+from contextlib import redirect_stdout
+
+from common import local_aws, api_event, sample_order, summarize, report, inject_latency, OUTBOX_TABLE
+
+BATCH_SIZES = (1, 10, 100)
+
+def stream_records(table) -> list:
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+    records = []
+    for sequence, item in enumerate(table.scan()['Items']):
+        records.append({
+            'eventName': 'INSERT',
+            'dynamodb': {
+                'NewImage': {k: serializer.serialize(v) for k, v in item.items()},
+                'SequenceNumber': str(sequence)
+            }
+        })
+    return records
+
+def post_orders(app, count: int) -> list:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def run(orders: int, latency_ms: float) -> dict:
+    results = {}
+    with local_aws():
+        import app
+        import dispatcher
+        from order_management import clients
+
+        latency = {'dynamodb': latency_ms, 's3': latency_ms, 'sns': latency_ms}
+        for mode in ('inline', 'outbox'):
+            if mode == 'outbox':
+                os.environ['OUTBOX_TABLE'] = OUTBOX_TABLE
+            app.reset_processor()
+            app.get_processor()
+            inject_latency(latency)
+            results[f'post_orders_{mode}'] = summarize(post_orders(app, orders))
+
+        table = clients.get_resource('dynamodb').Table(OUTBOX_TABLE)
+        records = stream_records(table)
+        snapshot = table.scan()['Items']
+        for batch_size in BATCH_SIZES:
+            # Restore the outbox so every batch size dispatches the same records
+            with table.batch_writer() as batch:
+                for item in snapshot:
+                    batch.put_item(Item=item)
+            dispatcher._dispatcher = None
+            dispatcher.get_dispatcher()
+            inject_latency(latency)
+
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                for offset in range(0, len(records), batch_size):
+                    dispatcher.lambda_handler({'Records': records[offset:offset + batch_size]}, None)
+            elapsed = time.perf_counter() - start
+            results[f'dispatch_batch_{batch_size}'] = {
+                'records': len(records),
+                'records_per_second': round(len(records) / elapsed, 1)
+            }
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    args = parser.parse_args()
+    report('outbox', run(args.orders, args.latency_ms))
@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_serialization.py
+"""Response serialization: DecimalEncoder copy + json.dumps vs single-pass dumps.
+
+Builds realistic order lists (Decimal money fields, as DynamoDB returns them)
+and reports wall time and tracemalloc peak for each path.
+
+    python benchmarks/bench_serialization.py --orders 10000 --items 50
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from decimal import Decimal
+
+import common  # noqa: F401  (puts the order service on sys.path)
+from order_management import serialization
+from order_management.processor import DecimalEncoder
+
+def build_orders(orders: int, items: int) -> list:
+    return [{
+        'order_id': f'ORD-{n:08x}',
+        'customer_id': f'CUST-{n % 500}',
+        'customer_name': 'Benchmark Customer',
+        'status': 'PENDING',
+        'version': Decimal('1'),
+        'created_at': '2026-10-17T12:00:00.000000',
+        'updated_at': '2026-10-17T12:00:00.000000',
+        'total_amount': Decimal('999.50'),
+        'items': [{
+            'product_id': f'PROD-{i}',
+            'name': f'Product {i}',
+            'quantity': Decimal('2'),
+            'price': Decimal('9.99'),
+            'total': Decimal('19.98')
+        } for i in range(items)]
+    } for n in range(orders)]
+
+def measure(fn, payload) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    output = fn(payload)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 1024 / 1024, 1), 'bytes': len(output)}
+
+def run(orders: int, items: int) -> dict:
+    payload = build_orders(orders, items)
+    backend = 'orjson' if serialization.orjson is not None else 'stdlib'
+    results = {'legacy_decimal_encoder': measure(lambda p: json.dumps(DecimalEncoder.encode(p)), payload)}
+    results[f'dumps_{backend}'] = measure(serialization.dumps, payload)
+    results[f'dumps_{backend}_decimal_string'] = measure(
+        lambda p: serialization.dumps(p, decimal_mode=serialization.STRING), payload)
+
+    if serialization.orjson is not None:
+        fast = serialization.orjson
+        serialization.orjson = None
+        try:
+            results['dumps_stdlib'] = measure(serialization.dumps, payload)
+        finally:
+            serialization.orjson = fast
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--items', type=int, default=50)
+    args = parser.parse_args()
+    common.report('serialization', run(args.orders, args.items))
@@ -0,0 +1,60 @@
+# backend/benchmarks/bench_side_effects.py
+"""p50/p99 latency of POST /orders and PATCH /orders/{id}/status per side-effect policy.
+
+"sequential" is the old behaviour (DynamoDB, then S3, then SNS); "wait" runs
+S3 and SNS concurrently; "background" returns after the DynamoDB write and
+flushes before the handler returns.
+
+    python benchmarks/bench_side_effects.py --requests 100 --latency-ms 20
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from contextlib import redirect_stdout
+
+from common import local_aws, api_event, sample_order, summarize, report, inject_latency
+
+POLICIES = ('sequential', 'wait', 'background')
+
+def run(requests: int, latency_ms: float) -> dict:
+    results = {}
+    with local_aws():
+        import app
+
+        for policy in POLICIES:
+            os.environ['SIDE_EFFECT_POLICY'] = policy
+            app.reset_processor()
+            app.get_processor()
+            inject_latency({'dynamodb': latency_ms, 's3': latency_ms, 'sns': latency_ms})
+
+            create_samples, patch_samples = [], []
+            for _ in range(requests):
+                start = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    response = app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)
+                create_samples.append((time.perf_counter() - start) * 1000)
+                order_id = json.loads(response['body'])['order_id']
+
+                patch = api_event('PATCH', f'/orders/{order_id}/status', body={'status': 'PROCESSING'},
+                                  path_parameters={'orderId': order_id})
+                start = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    app.lambda_handler(patch, None)
+                patch_samples.append((time.perf_counter() - start) * 1000)
+
+            results[policy] = {
+                'post_orders': summarize(create_samples),
+                'patch_status': summarize(patch_samples)
+            }
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='injected per-call latency for DynamoDB, S3 and SNS')
+    args = parser.parse_args()
+    report('side_effects', run(args.requests, args.latency_ms))
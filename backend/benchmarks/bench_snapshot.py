@@ -0,0 +1,126 @@
+# backend/benchmarks/bench_snapshot.py
+"""Columnar snapshot reports versus walking order dicts.
+
+Writes --orders synthetic orders (1-3 line items each, some with fractional
+quantities) as snapshot partitions,
+then times top-products, revenue-by-customer and status-funnel over the
+memory-mapped columns and over the Python dicts (as a DynamoDB scan would
+return them). Both must give the same numbers. Peak memory of each report is
+measured with tracemalloc; memory-mapped pages are not counted, so the
+columnar figure is the heap the reduction itself needs. A second snapshot run
+over the same orders must add no partitions.
+
+    python benchmarks/bench_snapshot.py --orders 1000000
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Any, Callable, List, Tuple
+
+from common import local_aws, report
+from bench_analytics import synthetic_orders
+
+def _cents(value: Any) -> int:
+    # Exact: a fractional quantity can leave half a cent in a line total
+    return int((Decimal(str(value)) * 100).to_integral_value())
+
+def dict_top_products(orders: List[Dict[str, Any]]) -> Dict[str, Tuple[int, int]]:
+    totals: Dict[str, Tuple[int, int]] = {}
+    for order in orders:
+        for item in order['items']:
+            quantity, revenue = totals.get(item['product_id'], (0, 0))
+            totals[item['product_id']] = (quantity + item['quantity'], revenue + _cents(item['total']))
+    return totals
+
+def dict_revenue_by_customer(orders: List[Dict[str, Any]]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for order in orders:
+        totals[order['customer_id']] = totals.get(order['customer_id'], 0) + _cents(order['total_amount'])
+    return totals
+
+def dict_status_funnel(orders: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+    totals: Dict[Tuple[str, str], int] = {}
+    for order in orders:
+        key = (order['created_at'][:10], order['status'])
+        totals[key] = totals.get(key, 0) + 1
+    return totals
+
+def measure(fn: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    """Time one run, then repeat it under tracemalloc (which slows Python-level loops) for the peak"""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 2 ** 20, 1)}
+
+def run(orders_count: int, buffer_rows: int) -> dict:
+    with local_aws() as env, tempfile.TemporaryDirectory() as cache_dir:
+        import query
+        from snapshot import SnapshotWriter
+
+        bucket = env['DOCUMENTS_BUCKET']
+        orders = synthetic_orders(orders_count, fractional=True)
+        yesterday = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+        # Snapshot only complete days, as the job does
+        orders = [order for order in orders if order['created_at'][:10] <= yesterday]
+        items = sum(len(order['items']) for order in orders)
+
+        writer = SnapshotWriter(bucket, buffer_rows=buffer_rows)
+        start = time.perf_counter()
+        first = writer.write(orders, through=yesterday)
+        write_seconds = time.perf_counter() - start
+        second = writer.write(orders, through=yesterday)
+        if second['partitions_added']:
+            raise SystemExit(f"Incremental snapshot rewrote partitions: {second['partitions_added']}")
+
+        reader = query.SnapshotReader(bucket, cache_dir=cache_dir)
+        # Downloads are a one-off per part; time the reports over the local cache
+        reader.fetch([prefix for _, prefix in reader.parts()],
+                     [f"{table}.{name}.npy" for table, name in (('items', 'product_id'), ('items', 'quantity'),
+                                                                ('items', 'total_cents'), ('orders', 'customer_id'),
+                                                                ('orders', 'total_cents'), ('orders', 'status'))]
+                     + ['product_id.dict.json', 'customer_id.dict.json', 'status.dict.json'])
+
+        results: Dict[str, Any] = {}
+        products, results['top_products'] = measure(lambda: query.top_products(reader, limit=None))
+        customers, results['revenue_by_customer'] = measure(lambda: query.revenue_by_customer(reader, limit=None))
+        funnel, results['status_funnel'] = measure(lambda: query.status_funnel(reader))
+        expected_products, dict_products = measure(lambda: dict_top_products(orders))
+        expected_customers, dict_customers = measure(lambda: dict_revenue_by_customer(orders))
+        expected_funnel, dict_funnel = measure(lambda: dict_status_funnel(orders))
+        results['top_products']['dicts'] = dict_products
+        results['revenue_by_customer']['dicts'] = dict_customers
+        results['status_funnel']['dicts'] = dict_funnel
+
+        consistent = (
+            {p['product_id']: (p['quantity'], p['revenue_cents']) for p in products} == expected_products
+            and {c['customer_id']: c['revenue_cents'] for c in customers} == expected_customers
+            and {(day['date'], status): row['orders'] for day in funnel
+                 for status, row in day['statuses'].items()} == expected_funnel
+        )
+        if not consistent:
+            raise SystemExit('COLUMNAR REPORTS DIFFER FROM THE DICT BASELINE')
+
+    return {
+        'orders': len(orders),
+        'line_items': items,
+        'partitions': len(first['partitions_added']),
+        'snapshot_write_seconds': round(write_seconds, 2),
+        'incremental_rerun_partitions_added': len(second['partitions_added']),
+        'reports': results,
+        'consistent': consistent
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--buffer-rows', type=int, default=1000000)
+    args = parser.parse_args()
+    report('snapshot_reports', run(args.orders, args.buffer_rows))
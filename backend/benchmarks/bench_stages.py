@@ -0,0 +1,68 @@
+# backend/benchmarks/bench_stages.py
+"""Per-stage latency of POST /orders and GET /orders/{id} from the EMF metrics.
+
+Captures the Embedded Metric Format records the handler emits (instead of
+writing them to stdout) and reports p50/p99 per span: validate, format,
+db.save, s3.store, sns.publish, encode, ... The records themselves (one per
+request, ColdStart on the first only) are checked by tests/test_metrics.py.
+
+    python benchmarks/bench_stages.py --requests 100 --latency-ms 20
+"""
+
+import argparse
+import io
+import json
+import os
+from collections import defaultdict
+from contextlib import redirect_stdout
+
+from common import local_aws, api_event, sample_order, summarize, report, inject_latency
+
+def run(requests: int, latency_ms: float, items: int) -> dict:
+    with local_aws():
+        import app
+        from order_management import metrics
+
+        os.environ['SIDE_EFFECT_POLICY'] = 'wait'
+        os.environ.pop('OUTBOX_TABLE', None)
+        sink = metrics.MemorySink()
+        metrics.set_sink(sink)
+        app.reset_processor()
+        inject_latency({'dynamodb': latency_ms, 's3': latency_ms, 'sns': latency_ms})
+        try:
+            with redirect_stdout(io.StringIO()):
+                for _ in range(requests):
+                    response = app.lambda_handler(api_event('POST', '/orders', body=sample_order(items)), None)
+                    order_id = json.loads(response['body'])['order_id']
+                    app.lambda_handler(api_event('GET', f'/orders/{order_id}',
+                                                 path_parameters={'orderId': order_id}), None)
+        finally:
+            metrics.set_sink(None)
+
+    cold = [record for record in sink.records if record['ColdStart'] == 'true']
+
+    spans = defaultdict(lambda: defaultdict(list))
+    for record in sink.records:
+        if record['ColdStart'] == 'true':
+            continue
+        for metric in record['_aws']['CloudWatchMetrics'][0]['Metrics']:
+            if metric['Unit'] != 'Milliseconds':
+                continue
+            values = record[metric['Name']]
+            spans[record['Operation']][metric['Name']].extend(values if isinstance(values, list) else [values])
+    return {
+        'cold_start': {k: v for k, v in cold[0].items() if k != '_aws'} if cold else None,
+        'warm': {
+            operation: {name: summarize(values) for name, values in sorted(stages.items())}
+            for operation, stages in spans.items()
+        }
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='injected per-call latency for DynamoDB, S3 and SNS')
+    parser.add_argument('--items', type=int, default=10, help='line items per order')
+    args = parser.parse_args()
+    report('stages', run(args.requests, args.latency_ms, args.items))
@@ -0,0 +1,127 @@
+# backend/benchmarks/bench_status_updates.py
+"""PATCH /orders/{id}/status with the stores backend/template.yaml turns on.
+
+With OUTBOX_TABLE, CHANGES_TABLE, INVENTORY_TABLE, CUSTOMERS_TABLE and
+ORDER_LINES_TABLE set (and reservations on, as once the inventory is seeded), a move to PROCESSING is one TransactWriteItems (the
+dispatcher reads the document later), while a cancel still reads the order
+first to release its stock and uncount it. Reports latency and DynamoDB calls
+per request for both, then dispatches the outbox and checks that the stored
+documents are the orders' latest versions.
+
+    python benchmarks/bench_status_updates.py --orders 200 --latency-ms 10
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from contextlib import redirect_stdout
+from typing import Any, Dict, List
+
+from common import (local_aws, api_event, sample_order, summarize, report, inject_latency,
+                    OUTBOX_TABLE, INVENTORY_TABLE, CUSTOMERS_TABLE, CHANGES_TABLE, ORDER_LINES_TABLE)
+from bench_outbox import stream_records
+
+TEMPLATE_ENV = {
+    'OUTBOX_TABLE': OUTBOX_TABLE,
+    'INVENTORY_TABLE': INVENTORY_TABLE,
+    'INVENTORY_RESERVATIONS_ENABLED': 'true',
+    'CUSTOMERS_TABLE': CUSTOMERS_TABLE,
+    'CHANGES_TABLE': CHANGES_TABLE,
+    'ORDER_LINES_TABLE': ORDER_LINES_TABLE,
+}
+
+def call(app, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+    response = app.lambda_handler(api_event(method, path, **kwargs), None)
+    if response['statusCode'] >= 300:
+        raise SystemExit(f"{method} {path} returned {response['statusCode']}: {response['body']}")
+    return json.loads(response['body'])
+
+def count_calls(clients_: List[Any]) -> Dict[str, int]:
+    """Count the DynamoDB operations made through the given clients"""
+    calls: Dict[str, int] = {}
+
+    def record(model: Any, **kwargs: Any) -> None:
+        calls[model.name] = calls.get(model.name, 0) + 1
+
+    for client in clients_:
+        client.meta.events.register('before-call.dynamodb', record)
+    return calls
+
+def patch_all(app, order_ids: List[str], status: str, versions: Dict[str, int],
+              calls: Dict[str, int]) -> Dict[str, Any]:
+    calls.clear()
+    samples = []
+    for order_id in order_ids:
+        start = time.perf_counter()
+        updated = call(app, 'PATCH', f'/orders/{order_id}/status', body={'status': status, 'version': versions[order_id]},
+                       path_parameters={'orderId': order_id})
+        samples.append((time.perf_counter() - start) * 1000)
+        versions[order_id] += 1
+        if updated['status'] != status or updated.get('version', versions[order_id]) != versions[order_id]:
+            raise SystemExit(f"PATCH of {order_id} returned {updated}")
+    result = summarize(samples)
+    result['dynamodb_calls_per_request'] = {name: round(n / len(order_ids), 2) for name, n in sorted(calls.items())}
+    return result
+
+def run(orders: int, latency_ms: float) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with local_aws():
+        import boto3
+        import app
+        import dispatcher
+        from order_management import clients, serialization
+
+        os.environ.update(TEMPLATE_ENV)
+        inventory = boto3.resource('dynamodb').Table(INVENTORY_TABLE)
+        for i in range(3):
+            inventory.put_item(Item={'product_id': f'PROD-{i}', 'stock_level': orders * 10})
+        app.reset_processor()
+        with redirect_stdout(io.StringIO()):
+            created = [call(app, 'POST', '/orders', body=sample_order()) for _ in range(orders)]
+            order_ids = [order['order_id'] for order in created]
+            versions = {order['order_id']: order.get('version', 0) for order in created}
+
+            calls = count_calls([clients.get_resource('dynamodb').meta.client, clients.get_client('dynamodb')])
+            inject_latency({'dynamodb': latency_ms})
+            results['processing'] = patch_all(app, order_ids, 'PROCESSING', versions, calls)
+            results['cancelled'] = patch_all(app, order_ids, 'CANCELLED', versions, calls)
+
+            # Every order has three records (created, processing, cancelled); only the
+            # cancelled version is current when they are dispatched
+            records = stream_records(clients.get_resource('dynamodb').Table(OUTBOX_TABLE))
+            dispatcher._dispatcher = None
+            start = time.perf_counter()
+            response = dispatcher.lambda_handler({'Records': records}, None)
+            elapsed = time.perf_counter() - start
+        if response['batchItemFailures']:
+            raise SystemExit(f"Dispatch failed for {len(response['batchItemFailures'])} records")
+
+        s3 = clients.get_client('s3')
+        table = clients.get_resource('dynamodb').Table(os.environ['ORDERS_TABLE'])
+        processor = app.get_processor()
+        stored = 0
+        for order_id in order_ids:
+            order = table.get_item(Key={'order_id': order_id}, ConsistentRead=True)['Item']
+            key = processor.doc_handler.key_for(order)
+            document = json.loads(s3.get_object(Bucket=os.environ['DOCUMENTS_BUCKET'], Key=key)['Body'].read())
+            expected = json.loads(serialization.dumps(processor._with_items(order)))
+            if document != expected:
+                raise SystemExit(f"Stored document of {order_id} differs from the order")
+            stored += len(processor.doc_handler.list_versions(order_id))
+        results['dispatch'] = {
+            'records': len(records),
+            'records_per_second': round(len(records) / elapsed, 1),
+            'versions_stored': stored
+        }
+        for name in TEMPLATE_ENV:
+            os.environ.pop(name, None)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=10.0)
+    args = parser.parse_args()
+    report('status_updates', run(args.orders, args.latency_ms))
@@ -0,0 +1,49 @@
+# backend/benchmarks/bench_warm_start.py
+"""Cold-start vs warm-request latency for the order service.
+
+A "cold" request resets the processor/client registry first, which is what
+every request paid before clients were reused across invocations. The order
+cache is off, so warm requests still read the table.
+
+    python benchmarks/bench_warm_start.py --requests 200
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from contextlib import redirect_stdout
+
+from common import local_aws, api_event, sample_order, summarize, report
+
+def run(requests: int) -> dict:
+    with local_aws():
+        import app
+
+        os.environ['ORDER_CACHE_ENABLED'] = 'false'
+        create = api_event('POST', '/orders', body=sample_order())
+        with redirect_stdout(io.StringIO()):
+            order_id = json.loads(app.lambda_handler(create, None)['body'])['order_id']
+        get = api_event('GET', f'/orders/{order_id}', path_parameters={'orderId': order_id})
+
+        results = {}
+        for mode in ('cold', 'warm'):
+            samples = []
+            app.reset_processor()
+            for _ in range(requests):
+                if mode == 'cold':
+                    app.reset_processor()
+                start = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    app.lambda_handler(get, None)
+                samples.append((time.perf_counter() - start) * 1000)
+            results[mode] = summarize(samples)
+        os.environ.pop('ORDER_CACHE_ENABLED', None)
+        return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    report('warm_start', run(args.requests))
@@ -0,0 +1,218 @@
+# backend/benchmarks/common.py
+"""Shared helpers for the offline benchmarks.
+
+AWS is replaced by moto's in-process stand-ins, so every benchmark runs
+without credentials or network access.
+"""
+
+import contextlib
+import json
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+ORDER_SERVICE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'functions', 'order-service')
+if ORDER_SERVICE_DIR not in sys.path:
+    sys.path.insert(0, ORDER_SERVICE_DIR)
+
+# Appended so the order service's app module still wins the `import app`
+ANALYTICS_DIR = os.path.join(os.path.dirname(ORDER_SERVICE_DIR), 'analytics')
+if ANALYTICS_DIR not in sys.path:
+    sys.path.append(ANALYTICS_DIR)
+
+ENV = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'ORDERS_TABLE': 'bench-orders',
+    'DOCUMENTS_BUCKET': 'bench-docs',
+}
+
+OUTBOX_TABLE = 'bench-outbox'
+INVENTORY_TABLE = 'bench-inventory'
+ANALYTICS_TABLE = 'bench-analytics'
+CUSTOMERS_TABLE = 'bench-customers'
+CHANGES_TABLE = 'bench-changes'
+ORDER_LINES_TABLE = 'bench-order-lines'
+ARCHIVE_INDEX_TABLE = 'bench-archive-index'
+
+@contextlib.contextmanager
+def local_aws():
+    """Start moto, create the stack resources and yield the environment"""
+    import boto3
+    from moto import mock_aws
+
+    os.environ.update(ENV)
+    _serialize_moto_dynamodb()
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb')
+        dynamodb.create_table(
+            TableName=ENV['ORDERS_TABLE'],
+            AttributeDefinitions=[
+                {'AttributeName': name, 'AttributeType': 'S'}
+                for name in ('order_id', 'status', 'customer_id', 'created_at')
+            ],
+            KeySchema=[{'AttributeName': 'order_id', 'KeyType': 'HASH'}],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': index_name,
+                    'KeySchema': [
+                        {'AttributeName': hash_key, 'KeyType': 'HASH'},
+                        {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+                for index_name, hash_key in (('StatusCreatedAtIndex', 'status'),
+                                             ('CustomerCreatedAtIndex', 'customer_id'))
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # Created for every run; benchmarks opt into outbox mode by setting OUTBOX_TABLE
+        dynamodb.create_table(
+            TableName=OUTBOX_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'order_id', 'AttributeType': 'S'},
+                                  {'AttributeName': 'event_id', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'order_id', 'KeyType': 'HASH'},
+                       {'AttributeName': 'event_id', 'KeyType': 'RANGE'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # Likewise opt-in through INVENTORY_TABLE
+        dynamodb.create_table(
+            TableName=INVENTORY_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'product_id', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'product_id', 'KeyType': 'HASH'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # Opt-in through CUSTOMERS_TABLE
+        dynamodb.create_table(
+            TableName=CUSTOMERS_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'customer_id', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'customer_id', 'KeyType': 'HASH'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # Opt-in through CHANGES_TABLE
+        dynamodb.create_table(
+            TableName=CHANGES_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'feed', 'AttributeType': 'S'},
+                                  {'AttributeName': 'seq', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'feed', 'KeyType': 'HASH'},
+                       {'AttributeName': 'seq', 'KeyType': 'RANGE'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # Opt-in through ORDER_LINES_TABLE
+        dynamodb.create_table(
+            TableName=ORDER_LINES_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'order_id', 'AttributeType': 'S'},
+                                  {'AttributeName': 'page', 'AttributeType': 'N'}],
+            KeySchema=[{'AttributeName': 'order_id', 'KeyType': 'HASH'},
+                       {'AttributeName': 'page', 'KeyType': 'RANGE'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # Opt-in through ARCHIVE_INDEX_TABLE
+        dynamodb.create_table(
+            TableName=ARCHIVE_INDEX_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'order_id', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'order_id', 'KeyType': 'HASH'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        # Only the analytics benchmark reads and writes ANALYTICS_TABLE
+        dynamodb.create_table(
+            TableName=ANALYTICS_TABLE,
+            AttributeDefinitions=[{'AttributeName': 'dimension', 'AttributeType': 'S'},
+                                  {'AttributeName': 'bucket', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'dimension', 'KeyType': 'HASH'},
+                       {'AttributeName': 'bucket', 'KeyType': 'RANGE'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        boto3.client('s3').create_bucket(Bucket=ENV['DOCUMENTS_BUCKET'])
+        topic = boto3.client('sns').create_topic(Name='bench-orders')
+        os.environ['ORDER_TOPIC_ARN'] = topic['TopicArn']
+        yield dict(os.environ)
+
+_moto_dynamodb_lock = threading.Lock()
+
+def _serialize_moto_dynamodb() -> None:
+    """Run moto's DynamoDB requests one at a time.
+
+    DynamoDB applies each write (and each transaction) atomically; moto's
+    in-memory backend does not lock, so concurrent benchmarks would see
+    races that the real service cannot have. Client-side latency injected
+    with inject_latency still overlaps across threads.
+    """
+    from moto.dynamodb.responses import DynamoHandler
+
+    if getattr(DynamoHandler.call_action, 'serialized', False):
+        return
+    call_action = DynamoHandler.call_action
+
+    def serialized_call_action(self):
+        with _moto_dynamodb_lock:
+            return call_action(self)
+
+    serialized_call_action.serialized = True
+    DynamoHandler.call_action = serialized_call_action
+
+def inject_latency(latency_ms: Dict[str, float]) -> None:
+    """Add a fixed delay to every call made through the shared clients.
+
+    Keys are service names ('dynamodb', 's3', 'sns'); moto answers in-process,
+    so without this the benchmarks would hide network round trips.
+    """
+    from order_management import clients
+
+    for service, delay_ms in latency_ms.items():
+        client = clients.get_resource(service).meta.client if service == 'dynamodb' \
+            else clients.get_client(service)
+        client.meta.events.register(
+            f'before-call.{service}',
+            lambda delay=delay_ms / 1000.0, **kwargs: time.sleep(delay)
+        )
+
+def api_event(method: str, path: str, body: Optional[Dict[str, Any]] = None,
+              path_parameters: Optional[Dict[str, str]] = None,
+              query: Optional[Dict[str, str]] = None,
+              headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Build a minimal API Gateway proxy event"""
+    return {
+        'httpMethod': method,
+        'path': path,
+        'body': json.dumps(body) if body is not None else None,
+        'pathParameters': path_parameters,
+        'queryStringParameters': query,
+        'headers': headers or {}
+    }
+
+def sample_order(item_count: int = 3, customer_id: str = 'CUST-1') -> Dict[str, Any]:
+    return {
+        'customer_id': customer_id,
+        'customer_name': 'Benchmark Customer',
+        'items': [
+            {'product_id': f'PROD-{i}', 'name': f'Product {i}', 'quantity': 2, 'price': 9.99}
+            for i in range(item_count)
+        ]
+    }
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[index]
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        'count': len(samples_ms),
+        'mean_ms': round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p95_ms': round(percentile(samples_ms, 95), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+    }
+
+def report(name: str, results: Dict[str, Any]) -> None:
+    print(json.dumps({'benchmark': name, 'results': results}, indent=2))
@@ -0,0 +1,89 @@
+# backend/benchmarks/compare_results.py
+"""Compare two bench_load.py reports and flag regressions.
+
+Lists throughput and p50/p95/p99 per operation (and overall) side by side
+with the change in percent, plus the mean peak allocation per request when
+both runs measured it. A latency or allocation that grew, or a throughput that fell,
+by more than --threshold percent is a regression; the script exits non-zero
+when there is any, so it can gate CI. Runs with different configurations are
+refused unless --force is given.
+
+    python benchmarks/compare_results.py before.json after.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Any, List, Optional
+
+PERCENTILES = ('p50_ms', 'p95_ms', 'p99_ms')
+
+def change(before: float, after: float) -> Optional[float]:
+    return round((after - before) / before * 100, 1) if before else None
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    rows: List[Dict[str, Any]] = []
+    old, new = before['results'], after['results']
+
+    throughput = change(old['throughput_rps'], new['throughput_rps'])
+    rows.append({'operation': 'all', 'metric': 'throughput_rps', 'before': old['throughput_rps'],
+                 'after': new['throughput_rps'], 'change_pct': throughput,
+                 'regression': throughput is not None and throughput < -threshold})
+
+    sections = [('all', old['latency'], new['latency'])]
+    sections += [(operation, old['operations'][operation], new['operations'][operation])
+                 for operation in sorted(set(old['operations']) & set(new['operations']))]
+    for operation, old_stats, new_stats in sections:
+        for metric in PERCENTILES:
+            pct = change(old_stats[metric], new_stats[metric])
+            rows.append({'operation': operation, 'metric': metric, 'before': old_stats[metric],
+                         'after': new_stats[metric], 'change_pct': pct,
+                         'regression': pct is not None and pct > threshold})
+    old_allocations, new_allocations = old.get('allocations', {}), new.get('allocations', {})
+    for operation in sorted(set(old_allocations) & set(new_allocations)):
+        old_kib, new_kib = old_allocations[operation]['mean_peak_kib'], new_allocations[operation]['mean_peak_kib']
+        pct = change(old_kib, new_kib)
+        rows.append({'operation': operation, 'metric': 'mean_peak_kib', 'before': old_kib, 'after': new_kib,
+                     'change_pct': pct, 'regression': pct is not None and pct > threshold})
+    return {
+        'before': before.get('commit'),
+        'after': after.get('commit'),
+        'threshold_pct': threshold,
+        'rows': rows,
+        'regressions': [row for row in rows if row['regression']]
+    }
+
+def print_table(result: Dict[str, Any]) -> None:
+    print(f"{'operation':<14} {'metric':<15} {'before':>10} {'after':>10} {'change':>8}")
+    for row in result['rows']:
+        pct = '' if row['change_pct'] is None else f"{row['change_pct']:+.1f}%"
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['operation']:<14} {row['metric']:<15} {row['before']:>10} {row['after']:>10} {pct:>8}{flag}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0, help='percent change counted as a regression')
+    parser.add_argument('--json', action='store_true', help='print the comparison as JSON')
+    parser.add_argument('--force', action='store_true', help='compare runs with different configurations')
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    # Options added after the older run was recorded are not compared
+    differing = sorted(k for k in set(before['config']) & set(after['config'])
+                       if before['config'][k] != after['config'][k])
+    if differing and not args.force:
+        sys.exit(f"Configurations differ ({', '.join(differing)}); rerun with the same options or pass --force")
+
+    result = compare(before, after, args.threshold)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['before']} -> {result['after']} (threshold {args.threshold}%)")
+        print_table(result)
+    if result['regressions']:
+        sys.exit(f"{len(result['regressions'])} regression(s) over {args.threshold}%")
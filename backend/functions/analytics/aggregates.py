@@ -0,0 +1,244 @@
+# functions/analytics/aggregates.py
+
+import base64
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Aggregate rows are keyed by (dimension, bucket):
+#   total    all          every order
+#   status   PENDING...   orders currently in that status
+#   customer <id>         orders of a customer
+#   product  <id>         line items of a product (also counts quantity)
+#   day      YYYY-MM-DD   orders created that day (UTC)
+#   hour     YYYY-MM-DDTHH
+DIMENSIONS = ('total', 'status', 'customer', 'product', 'day', 'hour')
+ORDER_STATUSES = ('PENDING', 'PROCESSING', 'COMPLETED', 'CANCELLED')
+COUNTERS = ('order_count', 'revenue', 'quantity')
+MAX_TRANSACT_ITEMS = 100  # TransactWriteItems limit
+BATCH_MARKER = '_batch'
+MARKER_TTL_SECONDS = 86400
+TRANSACTION_MAX_ATTEMPTS = int(os.environ.get('TRANSACTION_MAX_ATTEMPTS', '5'))
+
+Key = Tuple[str, str]
+
+def is_transaction_conflict(error: ClientError) -> bool:
+    """A transaction cancelled only because another one was writing the same rows"""
+    if error.response['Error']['Code'] != 'TransactionCanceledException':
+        return False
+    codes = {reason.get('Code', 'None') for reason in error.response.get('CancellationReasons') or []}
+    return 'TransactionConflict' in codes and codes <= {'TransactionConflict', 'None'}
+
+def add_products(rows: Dict[Key, Dict[str, Decimal]], items: Iterable[Dict[str, Any]],
+                 counted: Iterable[str] = ()) -> None:
+    """Product rows of line items; an order counts once per product (counted: already counted)"""
+    counted = set(counted)
+    for item in items:
+        key = ('product', item['product_id'])
+        row = rows.setdefault(key, {'order_count': Decimal(0 if item['product_id'] in counted else 1),
+                                    'revenue': Decimal(0), 'quantity': Decimal(0)})
+        row['revenue'] += Decimal(str(item.get('total', 0)))
+        row['quantity'] += Decimal(str(item.get('quantity', 0)))
+
+def contributions(order: Dict[str, Any]) -> Dict[Key, Dict[str, Decimal]]:
+    """Counter values one order adds to each aggregate row.
+
+    A line page from the lines table (orders stored as a header) adds its
+    product rows only; its header carries no items and adds the rest.
+    """
+    if 'page' in order:
+        rows: Dict[Key, Dict[str, Decimal]] = {}
+        add_products(rows, order.get('items') or [], order.get('repeated') or ())
+        return rows
+    total = Decimal(str(order.get('total_amount', 0)))
+    created_at = order.get('created_at', '')
+    one_order = {'order_count': Decimal(1), 'revenue': total}
+    rows = {
+        ('total', 'all'): dict(one_order),
+        ('status', order.get('status', 'UNKNOWN')): dict(one_order),
+        ('customer', order.get('customer_id', 'UNKNOWN')): dict(one_order)
+    }
+    if created_at:
+        rows[('day', created_at[:10])] = dict(one_order)
+        rows[('hour', created_at[:13])] = dict(one_order)
+    add_products(rows, order.get('items') or [])
+    return rows
+
+def add_delta(deltas: Dict[Key, Dict[str, Decimal]], order: Optional[Dict[str, Any]], sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) an order's contributions"""
+    if not order:
+        return
+    for key, counters in contributions(order).items():
+        row = deltas.setdefault(key, {})
+        for name, value in counters.items():
+            row[name] = row.get(name, Decimal(0)) + sign * value
+
+def compact(deltas: Dict[Key, Dict[str, Decimal]]) -> Dict[Key, Dict[str, Decimal]]:
+    """Drop counters that net to zero (e.g. a status change leaves day/customer rows alone)"""
+    result = {}
+    for key, counters in deltas.items():
+        nonzero = {name: value for name, value in counters.items() if value != 0}
+        if nonzero:
+            result[key] = nonzero
+    return result
+
+class AnalyticsStore:
+    def __init__(self, table_name: str):
+        self.dynamodb = boto3.resource('dynamodb')
+        self.table = self.dynamodb.Table(table_name)
+        self.table_name = table_name
+
+    def _update(self, key: Key, counters: Dict[str, Decimal]) -> Dict[str, Any]:
+        names = {f"#c{i}": name for i, name in enumerate(counters)}
+        values = {f":c{i}": value for i, value in enumerate(counters.values())}
+        return {
+            'Update': {
+                'TableName': self.table_name,
+                'Key': {'dimension': key[0], 'bucket': key[1]},
+                'UpdateExpression': 'ADD ' + ', '.join(f"#c{i} :c{i}" for i in range(len(counters))),
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values
+            }
+        }
+
+    def apply(self, deltas: Dict[Key, Dict[str, Decimal]], batch_id: str) -> int:
+        """Apply counter deltas with atomic ADDs; returns the number of rows updated.
+
+        Updates go out in transactions of up to 99 rows, each with a marker item
+        for (batch_id, chunk). A retried stream batch finds its markers and skips
+        the chunks that were already applied, so counters are not added twice.
+        """
+        client = self.dynamodb.meta.client
+        keys = sorted(deltas)
+        chunk_size = MAX_TRANSACT_ITEMS - 1
+        applied = 0
+        for chunk, start in enumerate(range(0, len(keys), chunk_size)):
+            marker = {
+                'Put': {
+                    'TableName': self.table_name,
+                    'Item': {
+                        'dimension': BATCH_MARKER,
+                        'bucket': f"{batch_id}#{chunk}",
+                        'expires_at': int(time.time()) + MARKER_TTL_SECONDS
+                    },
+                    'ConditionExpression': 'attribute_not_exists(dimension)'
+                }
+            }
+            updates = [self._update(key, deltas[key]) for key in keys[start:start + chunk_size]]
+            try:
+                self._transact(client, [marker] + updates)
+                applied += len(updates)
+            except ClientError as e:
+                reasons = e.response.get('CancellationReasons') or [{}]
+                if e.response['Error']['Code'] == 'TransactionCanceledException' \
+                        and reasons[0].get('Code') == 'ConditionalCheckFailed':
+                    continue  # this chunk was applied by an earlier attempt
+                raise
+        return applied
+
+    def _transact(self, client: Any, items: List[Dict[str, Any]],
+                  base_delay: float = 0.02, max_delay: float = 0.5) -> None:
+        """TransactWriteItems, retried with full jitter while it only conflicts.
+
+        The two stream mappings (orders, order lines) and a rebuild all ADD to
+        the same hot rows (total, status, day, hour), so their transactions
+        collide. A cancelled transaction wrote nothing, its marker included,
+        so it is safe to send again; failing the whole stream batch instead
+        would redo every chunk of it.
+        """
+        for attempt in range(TRANSACTION_MAX_ATTEMPTS):
+            try:
+                client.transact_write_items(TransactItems=items)
+                return
+            except ClientError as e:
+                if attempt == TRANSACTION_MAX_ATTEMPTS - 1 or not is_transaction_conflict(e):
+                    raise
+                time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+    def summary(self, days: int = 30, hours: int = 24, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Totals, per-status and recent per-day/per-hour rows in one BatchGetItem"""
+        now = now or datetime.utcnow()
+        day_buckets = [(now - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)][::-1]
+        hour_buckets = [(now - timedelta(hours=i)).strftime('%Y-%m-%dT%H') for i in range(hours)][::-1]
+        keys = [('total', 'all')] + [('status', s) for s in ORDER_STATUSES] \
+            + [('day', b) for b in day_buckets] + [('hour', b) for b in hour_buckets]
+        rows = self.get_rows(keys)
+
+        def counters(key: Key) -> Dict[str, Any]:
+            row = rows.get(key, {})
+            return {'order_count': row.get('order_count', 0), 'revenue': row.get('revenue', 0)}
+
+        return {
+            'totals': counters(('total', 'all')),
+            'by_status': {status: counters(('status', status)) for status in ORDER_STATUSES},
+            'by_day': [dict(counters(('day', b)), bucket=b) for b in day_buckets],
+            'by_hour': [dict(counters(('hour', b)), bucket=b) for b in hour_buckets]
+        }
+
+    def get_rows(self, keys: List[Key]) -> Dict[Key, Dict[str, Any]]:
+        found: Dict[Key, Dict[str, Any]] = {}
+        for start in range(0, len(keys), 100):
+            request = {self.table_name: {
+                'Keys': [{'dimension': d, 'bucket': b} for d, b in keys[start:start + 100]]
+            }}
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response['Responses'].get(self.table_name, []):
+                    found[(item['dimension'], item['bucket'])] = item
+                request = response.get('UnprocessedKeys')
+        return found
+
+    def list_dimension(self, dimension: str, limit: int = 50, next_token: Optional[str] = None) -> Dict[str, Any]:
+        """One page of a dimension's rows (e.g. every customer), ordered by bucket"""
+        from boto3.dynamodb.conditions import Key as KeyCondition
+
+        kwargs: Dict[str, Any] = {
+            'KeyConditionExpression': KeyCondition('dimension').eq(dimension),
+            'Limit': limit
+        }
+        if next_token:
+            try:
+                kwargs['ExclusiveStartKey'] = json.loads(base64.urlsafe_b64decode(next_token.encode('ascii')))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Invalid next_token: {str(e)}")
+        response = self.table.query(**kwargs)
+        last_key = response.get('LastEvaluatedKey')
+        return {
+            'items': response.get('Items', []),
+            'next_token': base64.urlsafe_b64encode(json.dumps(last_key).encode('utf-8')).decode('ascii')
+            if last_key else None
+        }
+
+    def replace_all(self, rows: Iterable[Tuple[Key, Dict[str, Any]]]) -> int:
+        """Overwrite the aggregate rows with absolute values (rebuild); returns rows written"""
+        from boto3.dynamodb.conditions import Key as KeyCondition
+
+        rows = dict(rows)
+        written = 0
+        with self.table.batch_writer(overwrite_by_pkeys=['dimension', 'bucket']) as batch:
+            # Rows that no longer have any orders are removed
+            for dimension in DIMENSIONS:
+                kwargs: Dict[str, Any] = {
+                    'KeyConditionExpression': KeyCondition('dimension').eq(dimension),
+                    'ProjectionExpression': '#d, #b',
+                    'ExpressionAttributeNames': {'#d': 'dimension', '#b': 'bucket'}
+                }
+                while True:
+                    response = self.table.query(**kwargs)
+                    for item in response.get('Items', []):
+                        if (item['dimension'], item['bucket']) not in rows:
+                            batch.delete_item(Key={'dimension': item['dimension'], 'bucket': item['bucket']})
+                    if 'LastEvaluatedKey' not in response:
+                        break
+                    kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            for (dimension, bucket), counters in rows.items():
+                batch.put_item(Item=dict(counters, dimension=dimension, bucket=bucket))
+                written += 1
+        return written
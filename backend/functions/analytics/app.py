@@ -0,0 +1,99 @@
+# functions/analytics/app.py
+
+import json
+import os
+from decimal import Decimal
+from typing import Dict, Any, Optional
+
+from aggregates import AnalyticsStore
+from log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_SUMMARY_DAYS = 366
+MAX_SUMMARY_HOURS = 168
+# Dimensions that can be paged through with ?dimension=
+LISTABLE_DIMENSIONS = ('status', 'customer', 'product', 'day', 'hour')
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# Reused across warm invocations of the same container
+_store: Optional[AnalyticsStore] = None
+
+def get_store() -> AnalyticsStore:
+    global _store
+    if _store is None:
+        _store = AnalyticsStore(os.environ.get('ANALYTICS_TABLE', 'scm-stack-analytics'))
+    return _store
+
+def create_cors_headers() -> Dict[str, str]:
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'
+    }
+
+def create_response(status_code: int, body: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': create_cors_headers(),
+        'body': json.dumps(body, default=_json_default)
+    }
+
+def _int_param(params: Dict[str, str], name: str, default: int, maximum: int) -> int:
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if value <= 0 or value > maximum:
+        raise ValueError(f"{name} must be between 1 and {maximum}")
+    return value
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Analytics API: GET /analytics reads pre-computed aggregate rows.
+
+    Without parameters it returns totals, per-status counts and the recent
+    per-day/per-hour series; ?dimension=customer (or product, day, ...) pages
+    through every row of one dimension instead.
+    """
+    method = event.get('httpMethod')
+    if method == 'OPTIONS':
+        return create_response(200, {})
+    if method != 'GET':
+        return create_response(404, {'error': 'Invalid endpoint'})
+
+    try:
+        store = get_store()
+        params = event.get('queryStringParameters') or {}
+
+        # GET /analytics?dimension=customer&limit=50&next_token=...
+        if params.get('dimension'):
+            dimension = params['dimension']
+            if dimension not in LISTABLE_DIMENSIONS:
+                return create_response(400, {
+                    'error': f"dimension must be one of {', '.join(LISTABLE_DIMENSIONS)}"
+                })
+            try:
+                limit = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+                page = store.list_dimension(dimension, limit=limit, next_token=params.get('next_token'))
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            return create_response(200, dict(page, dimension=dimension, count=len(page['items'])))
+
+        # GET /analytics?days=30&hours=24
+        try:
+            days = _int_param(params, 'days', 30, MAX_SUMMARY_DAYS)
+            hours = _int_param(params, 'hours', 24, MAX_SUMMARY_HOURS)
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+        return create_response(200, store.summary(days=days, hours=hours))
+
+    except Exception as e:
+        logger.exception("Unhandled error", error=str(e))
+        return create_response(500, {'error': 'Internal server error', 'message': str(e)})
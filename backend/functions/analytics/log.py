@@ -0,0 +1,74 @@
+# functions/analytics/log.py
+"""JSON line logger for the analytics function.
+
+A trimmed copy of the order service's order_management/log.py (this function
+is packaged on its own and cannot import it): same line format and LOG_LEVEL
+gating, without per-request context, debug sampling or payload fields.
+"""
+
+import json
+import os
+import sys
+import traceback
+from datetime import datetime
+from typing import Dict, Any
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+_LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+# LOG_LEVEL - lowest level written (default INFO), read once per container (configure() re-reads it)
+_level = INFO
+
+def configure() -> None:
+    """(Re)load the log level from the environment"""
+    global _level
+    _level = LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), INFO)
+
+configure()
+
+class Logger:
+    """Writes one JSON object per line to stdout (CloudWatch keeps each as one event).
+
+        logger.info("Applied %d order changes", len(records), rows_updated=updated)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _write(self, level: int, msg: str, args: tuple, exc_info: bool = False, **fields: Any) -> None:
+        record: Dict[str, Any] = {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'level': _LEVEL_NAMES[level],
+            'logger': self.name,
+            'message': msg % args if args else msg
+        }
+        record.update(fields)
+        if exc_info:
+            record['traceback'] = traceback.format_exc()
+        sys.stdout.write(json.dumps(record, separators=(',', ':'), default=str) + '\n')
+
+    def debug(self, msg: str, *args: Any, **fields: Any) -> None:
+        if _level <= DEBUG:
+            self._write(DEBUG, msg, args, **fields)
+
+    def info(self, msg: str, *args: Any, **fields: Any) -> None:
+        if _level <= INFO:
+            self._write(INFO, msg, args, **fields)
+
+    def warning(self, msg: str, *args: Any, **fields: Any) -> None:
+        if _level <= WARNING:
+            self._write(WARNING, msg, args, **fields)
+
+    def error(self, msg: str, *args: Any, **fields: Any) -> None:
+        self._write(ERROR, msg, args, **fields)
+
+    def exception(self, msg: str, *args: Any, **fields: Any) -> None:
+        """Log at ERROR with the current exception's traceback"""
+        self._write(ERROR, msg, args, exc_info=True, **fields)
+
+def get_logger(name: str) -> Logger:
+    return Logger(name)
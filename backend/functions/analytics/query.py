@@ -0,0 +1,191 @@
+# functions/analytics/query.py
+"""Reports over the columnar order snapshots written by snapshot.py.
+
+    python query.py top-products --from 2026-09-01 --to 2026-09-30 --limit 20
+    python query.py revenue-by-customer --status COMPLETED
+    python query.py status-funnel
+
+Only the columns a report needs are downloaded (once, into SNAPSHOT_CACHE_DIR)
+and memory-mapped. Each part is reduced with np.bincount over its dictionary
+codes and merged by label, so memory stays bounded by one part's columns
+plus the distinct labels, however many partitions a report covers.
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import boto3
+
+from snapshot import MANIFEST_KEY
+
+DEFAULT_CACHE_DIR = os.path.join('/tmp', 'snapshots')
+
+class SnapshotReader:
+    """Column access to the snapshot partitions in the documents bucket"""
+
+    def __init__(self, bucket_name: str, cache_dir: Optional[str] = None, max_workers: int = 8):
+        self.s3 = boto3.client('s3')
+        self.bucket = bucket_name
+        self.cache_dir = cache_dir or os.environ.get('SNAPSHOT_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_workers = max_workers
+        self._manifest: Optional[Dict[str, Any]] = None
+
+    def manifest(self) -> Dict[str, Any]:
+        # Read fresh each time a reader is created; parts themselves never change
+        if self._manifest is None:
+            try:
+                response = self.s3.get_object(Bucket=self.bucket, Key=MANIFEST_KEY)
+                self._manifest = json.loads(response['Body'].read())
+            except self.s3.exceptions.NoSuchKey:
+                self._manifest = {'partitions': {}}
+        return self._manifest
+
+    def parts(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Tuple[str, str]]:
+        """(date, prefix) of every part in the date range, oldest first"""
+        return [
+            (date, part['prefix'])
+            for date, partition in sorted(self.manifest()['partitions'].items())
+            if (not date_from or date >= date_from) and (not date_to or date <= date_to)
+            for part in partition['parts']
+        ]
+
+    def _local_path(self, key: str) -> str:
+        path = os.path.join(self.cache_dir, *key.split('/'))
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial = f"{path}.{os.getpid()}.partial"
+            self.s3.download_file(self.bucket, key, partial)
+            os.replace(partial, path)
+        return path
+
+    def fetch(self, prefixes: List[str], files: List[str]) -> None:
+        """Download the named files of several parts concurrently (cached ones are skipped)"""
+        keys = [f"{prefix}/{name}" for prefix in prefixes for name in files]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(self._local_path, keys))
+
+    def column(self, prefix: str, table: str, name: str) -> Any:
+        import numpy as np
+
+        return np.load(self._local_path(f"{prefix}/{table}.{name}.npy"), mmap_mode='r')
+
+    def dictionary(self, prefix: str, column: str) -> List[str]:
+        with open(self._local_path(f"{prefix}/{column}.dict.json"), encoding='utf-8') as f:
+            return json.load(f)
+
+    def scan(self, table: str, columns: List[str], dictionaries: List[str],
+             date_from: Optional[str] = None, date_to: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield each part's memory-mapped columns plus its dictionaries"""
+        parts = self.parts(date_from, date_to)
+        self.fetch([prefix for _, prefix in parts],
+                   [f"{table}.{name}.npy" for name in columns] + [f"{name}.dict.json" for name in dictionaries])
+        for date, prefix in parts:
+            part: Dict[str, Any] = {'date': date}
+            for name in columns:
+                part[name] = self.column(prefix, table, name)
+            part['dictionaries'] = {name: self.dictionary(prefix, name) for name in dictionaries}
+            yield part
+
+def _status_mask(part: Dict[str, Any], status: Optional[str]) -> Any:
+    """Row mask for one status; None keeps every row, False means no row matches"""
+    if not status:
+        return None
+    labels = part['dictionaries']['status']
+    if status not in labels:
+        return False
+    return part['status'] == labels.index(status)
+
+def _number(value: Any) -> Any:
+    """A bincount sum as an int when whole (counts, cents), else a float (fractional quantities)"""
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 6)
+
+def _group(totals: Dict[str, Dict[str, Any]], labels: List[str], codes: Any,
+           mask: Any, weights: Dict[str, Any]) -> None:
+    """Add one part's per-label counts and sums into totals"""
+    import numpy as np
+
+    if mask is not None:
+        codes = codes[mask]
+        weights = {name: values[mask] for name, values in weights.items()}
+    counts = np.bincount(codes, minlength=len(labels))
+    sums = {name: np.bincount(codes, weights=values, minlength=len(labels)) for name, values in weights.items()}
+    for code in np.flatnonzero(counts).tolist():
+        row = totals.setdefault(labels[code], dict.fromkeys(['rows'] + list(weights), 0))
+        row['rows'] += int(counts[code])
+        for name, values in sums.items():
+            row[name] = _number(row[name] + float(values[code]))
+
+def _ranked(totals: Dict[str, Dict[str, int]], key: str, limit: Optional[int], label: str) -> List[Dict[str, Any]]:
+    ranked = sorted(totals.items(), key=lambda entry: (-entry[1][key], entry[0]))
+    return [dict(row, **{label: name}) for name, row in (ranked[:limit] if limit else ranked)]
+
+def top_products(reader: SnapshotReader, limit: Optional[int] = 20, date_from: Optional[str] = None,
+                 date_to: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Products by line-item revenue: line_items, quantity and revenue (in cents)"""
+    totals: Dict[str, Dict[str, int]] = {}
+    columns = ['product_id', 'quantity', 'total_cents'] + (['status'] if status else [])
+    dictionaries = ['product_id'] + (['status'] if status else [])
+    for part in reader.scan('items', columns, dictionaries, date_from, date_to):
+        mask = _status_mask(part, status)
+        if mask is False:
+            continue
+        _group(totals, part['dictionaries']['product_id'], part['product_id'], mask,
+               {'quantity': part['quantity'], 'revenue_cents': part['total_cents']})
+    return [dict(row, line_items=row.pop('rows')) for row in _ranked(totals, 'revenue_cents', limit, 'product_id')]
+
+def revenue_by_customer(reader: SnapshotReader, limit: Optional[int] = 20, date_from: Optional[str] = None,
+                        date_to: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Customers by order revenue: orders and revenue (in cents)"""
+    totals: Dict[str, Dict[str, int]] = {}
+    columns = ['customer_id', 'total_cents'] + (['status'] if status else [])
+    dictionaries = ['customer_id'] + (['status'] if status else [])
+    for part in reader.scan('orders', columns, dictionaries, date_from, date_to):
+        mask = _status_mask(part, status)
+        if mask is False:
+            continue
+        _group(totals, part['dictionaries']['customer_id'], part['customer_id'], mask,
+               {'revenue_cents': part['total_cents']})
+    return [dict(row, orders=row.pop('rows')) for row in _ranked(totals, 'revenue_cents', limit, 'customer_id')]
+
+def status_funnel(reader: SnapshotReader, date_from: Optional[str] = None,
+                  date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Per created_at date: orders and revenue (in cents) by their status at snapshot time"""
+    days: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for part in reader.scan('orders', ['status', 'total_cents'], ['status'], date_from, date_to):
+        _group(days.setdefault(part['date'], {}), part['dictionaries']['status'], part['status'], None,
+               {'revenue_cents': part['total_cents']})
+    return [
+        {'date': date, 'statuses': {status: {'orders': row['rows'], 'revenue_cents': row['revenue_cents']}
+                                    for status, row in sorted(statuses.items())}}
+        for date, statuses in sorted(days.items())
+    ]
+
+REPORTS = {
+    'top-products': top_products,
+    'revenue-by-customer': revenue_by_customer,
+    'status-funnel': status_funnel
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('report', choices=sorted(REPORTS))
+    parser.add_argument('--bucket', default=os.environ.get('DOCUMENTS_BUCKET'))
+    parser.add_argument('--from', dest='date_from', help='first created_at date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='last created_at date (YYYY-MM-DD)')
+    parser.add_argument('--status', help='only orders in this status (not for status-funnel)')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    reader = SnapshotReader(args.bucket)
+    if args.report == 'status-funnel':
+        result = status_funnel(reader, args.date_from, args.date_to)
+    else:
+        result = REPORTS[args.report](reader, args.limit, args.date_from, args.date_to, args.status)
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
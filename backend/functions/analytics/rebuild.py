@@ -0,0 +1,179 @@
+# functions/analytics/rebuild.py
+"""Rebuild every aggregate row from a full order export.
+
+    python rebuild.py --export-id 20261017T120000Z-abc123 --bucket <docs bucket> --table <analytics table> [--archive]
+
+Reads the export's NDJSON segments (see order_management/export.py), computes
+the aggregates column-wise with NumPy, REBUILD_CHUNK_ORDERS orders at a time,
+and overwrites the analytics table.
+The stream keeps counting orders moved to the archive (order_management/
+archive.py); --archive reads the archive partitions too, so a rebuild does
+the same. An order in both counts once, as exported.
+Stream updates that land while a rebuild runs are overwritten, so run it
+while the stream consumer is caught up (or paused).
+"""
+
+import argparse
+import gzip
+import json
+import os
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List
+
+import boto3
+
+from aggregates import AnalyticsStore, Key
+
+def read_export(bucket: str, export_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield the orders of a finished export"""
+    s3 = boto3.client('s3')
+    manifest = json.loads(s3.get_object(Bucket=bucket, Key=f"exports/{export_id}/manifest.json")['Body'].read())
+    for key in manifest['files']:
+        body = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        if key.endswith('.gz') and body:
+            body = gzip.decompress(body)  # handles the concatenated gzip members
+        for line in body.splitlines():
+            if line:
+                yield json.loads(line)
+
+ARCHIVE_PREFIX = 'archive/orders'
+
+# Orders aggregated per NumPy pass; bounds the rebuild's memory to one chunk
+REBUILD_CHUNK_ORDERS = int(os.environ.get('REBUILD_CHUNK_ORDERS', '10000'))
+
+def read_archive(bucket: str) -> Iterator[Dict[str, Any]]:
+    """Yield every archived order; an order archived twice yields each copy"""
+    s3 = boto3.client('s3')
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{ARCHIVE_PREFIX}/closed="):
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('/manifest.json'):
+                continue
+            manifest = json.loads(s3.get_object(Bucket=bucket, Key=obj['Key'])['Body'].read())
+            for file in manifest['files']:
+                body = gzip.decompress(s3.get_object(Bucket=bucket, Key=file['key'])['Body'].read())
+                for line in body.splitlines():
+                    if line:
+                        yield json.loads(line)
+
+def _cents(value: Any) -> int:
+    return int((Decimal(str(value)) * 100).to_integral_value())
+
+def _money(cents: float) -> Decimal:
+    return Decimal(int(round(cents))) / 100
+
+def _number(value: float) -> Decimal:
+    return Decimal(int(value)) if float(value).is_integer() else Decimal(str(round(float(value), 6)))
+
+def aggregate_orders(orders: List[Dict[str, Any]]) -> Dict[Key, Dict[str, Decimal]]:
+    """Aggregate rows for a list of orders, computed with NumPy group-bys.
+
+    Produces the same rows the stream consumer maintains incrementally.
+    """
+    import numpy as np  # only needed for rebuilds, kept out of the API's cold start
+
+    if not orders:
+        return {}
+    totals = np.fromiter((_cents(o.get('total_amount', 0)) for o in orders), dtype=np.int64, count=len(orders))
+    created = np.array([o.get('created_at', '') for o in orders])
+
+    def group(dimension: str, labels: Any, weights: Any, counts: Any = None,
+              quantity: Any = None, skip_empty: bool = False) -> Dict[Key, Dict[str, Decimal]]:
+        buckets, inverse = np.unique(labels, return_inverse=True)
+        order_counts = np.bincount(inverse, weights=counts, minlength=len(buckets))
+        revenue = np.bincount(inverse, weights=weights, minlength=len(buckets))
+        quantities = np.bincount(inverse, weights=quantity, minlength=len(buckets)) if quantity is not None else None
+        rows = {}
+        for i, bucket in enumerate(buckets.tolist()):
+            if skip_empty and not bucket:
+                continue
+            row = {'order_count': _number(order_counts[i]), 'revenue': _money(revenue[i])}
+            if quantities is not None:
+                row['quantity'] = _number(quantities[i])
+            rows[(dimension, bucket)] = row
+        return rows
+
+    rows: Dict[Key, Dict[str, Decimal]] = {
+        ('total', 'all'): {'order_count': Decimal(len(orders)), 'revenue': _money(totals.sum())}
+    }
+    rows.update(group('status', np.array([o.get('status', 'UNKNOWN') for o in orders]), totals))
+    rows.update(group('customer', np.array([o.get('customer_id', 'UNKNOWN') for o in orders]), totals))
+    rows.update(group('day', created.astype('U10'), totals, skip_empty=True))
+    rows.update(group('hour', created.astype('U13'), totals, skip_empty=True))
+
+    # Products: one entry per line item; an order counts once per product it contains
+    order_index: List[int] = []
+    product_ids: List[str] = []
+    item_totals: List[int] = []
+    item_quantities: List[float] = []
+    for index, order in enumerate(orders):
+        for item in order.get('items') or []:
+            order_index.append(index)
+            product_ids.append(item['product_id'])
+            item_totals.append(_cents(item.get('total', 0)))
+            item_quantities.append(float(item.get('quantity', 0)))
+    if product_ids:
+        products = np.array(product_ids)
+        _, product_codes = np.unique(products, return_inverse=True)
+        pairs = np.asarray(order_index, dtype=np.int64) * (int(product_codes.max()) + 1) + product_codes
+        first_in_order = np.zeros(len(pairs))
+        first_in_order[np.unique(pairs, return_index=True)[1]] = 1
+        rows.update(group('product', products, np.asarray(item_totals, dtype=np.float64),
+                          counts=first_in_order, quantity=np.asarray(item_quantities)))
+    return rows
+
+def merge_rows(into: Dict[Key, Dict[str, Decimal]], rows: Dict[Key, Dict[str, Decimal]]) -> None:
+    """Add one chunk's aggregate rows into the running totals"""
+    for key, row in rows.items():
+        target = into.setdefault(key, {})
+        for field, value in row.items():
+            target[field] = target.get(field, Decimal(0)) + value
+
+def aggregate_chunked(orders: Iterable[Dict[str, Any]], rows: Dict[Key, Dict[str, Decimal]],
+                      chunk_size: int = REBUILD_CHUNK_ORDERS) -> int:
+    """Aggregate orders chunk by chunk into rows; returns the number of orders"""
+    orders = iter(orders)
+    count = 0
+    while True:
+        chunk = list(islice(orders, chunk_size))
+        if not chunk:
+            return count
+        merge_rows(rows, aggregate_orders(chunk))
+        count += len(chunk)
+
+def rebuild(export_id: str, bucket: str, table_name: str, archive: bool = False) -> Dict[str, Any]:
+    rows: Dict[Key, Dict[str, Decimal]] = {}
+    exported = set()
+
+    def remember(orders: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for order in orders:
+            exported.add(order['order_id'])
+            yield order
+
+    count = aggregate_chunked(remember(read_export(bucket, export_id)) if archive else read_export(bucket, export_id),
+                              rows)
+    archived = 0
+    if archive:
+        cold: Dict[str, Dict[str, Any]] = {}
+        for order in read_archive(bucket):
+            previous = cold.get(order['order_id'])
+            if order['order_id'] not in exported and (
+                    previous is None or int(order.get('version', 0)) > int(previous.get('version', 0))):
+                cold[order['order_id']] = order
+        archived = aggregate_chunked(cold.values(), rows)
+        count += archived
+    written = AnalyticsStore(table_name).replace_all(rows.items())
+    return {'export_id': export_id, 'orders': count, 'archived_orders': archived, 'rows_written': written}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--export-id', required=True)
+    parser.add_argument('--bucket', default=os.environ.get('DOCUMENTS_BUCKET'))
+    parser.add_argument('--table', default=os.environ.get('ANALYTICS_TABLE'))
+    parser.add_argument('--archive', action='store_true', help='include orders moved to the S3 archive')
+    args = parser.parse_args()
+    print(json.dumps(rebuild(args.export_id, args.bucket, args.table, archive=args.archive), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+# functions/analytics/snapshot.py
+"""Write orders and their line items as columnar snapshot partitions.
+
+    python snapshot.py --export-id 20261017T120000Z-abc123 --bucket <docs bucket>
+
+Reads an order export (see order_management/export.py) and writes one NumPy
+.npy file per column under snapshots/date=YYYY-MM-DD/part-<id>/, so reports
+(see query.py) download and memory-map only the columns they use. String
+columns are dictionary-encoded: an int32 code column plus the part's
+dictionary in <column>.dict.json. Partitions are immutable; a run only adds
+dates that are not in snapshots/manifest.json yet and stops before today
+(UTC), whose orders are still arriving.
+"""
+
+import argparse
+import io
+import json
+import os
+import uuid
+from array import array
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Any, Iterable, List, Optional
+
+import boto3
+
+from rebuild import read_export
+
+SNAPSHOT_PREFIX = 'snapshots'
+MANIFEST_KEY = f"{SNAPSHOT_PREFIX}/manifest.json"
+DEFAULT_BUFFER_ROWS = 1_000_000
+
+# Column name -> array typecode; 'i' columns named in STRING_COLUMNS hold dictionary codes
+SCHEMA = {
+    'orders': {
+        'order_id': 'i', 'customer_id': 'i', 'status': 'i',
+        'created_at': 'q', 'total_cents': 'q', 'item_count': 'i'
+    },
+    'items': {
+        'product_id': 'i', 'customer_id': 'i', 'status': 'i',
+        # Quantities need only be positive numbers, so they stay fractional
+        'created_at': 'q', 'quantity': 'd', 'price_cents': 'q', 'total_cents': 'q'
+    }
+}
+STRING_COLUMNS = ('order_id', 'customer_id', 'status', 'product_id')
+NUMPY_TYPES = {'i': 'int32', 'q': 'int64', 'd': 'float64'}
+
+def _cents(value: Any) -> int:
+    return int((Decimal(str(value)) * 100).to_integral_value())
+
+def _epoch_seconds(created_at: str) -> int:
+    return int(datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc).timestamp())
+
+class _PartBuffer:
+    """Column buffers of one partition until they are flushed as a part"""
+
+    def __init__(self):
+        self.columns = {table: {name: array(code) for name, code in schema.items()}
+                        for table, schema in SCHEMA.items()}
+        self.dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in STRING_COLUMNS}
+        self.rows = 0
+
+    def _code(self, column: str, value: Any) -> int:
+        dictionary = self.dictionaries[column]
+        value = str(value)
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+        return code
+
+    def add(self, order: Dict[str, Any]) -> None:
+        orders = self.columns['orders']
+        customer = self._code('customer_id', order.get('customer_id', 'UNKNOWN'))
+        status = self._code('status', order.get('status', 'UNKNOWN'))
+        created_at = _epoch_seconds(order['created_at'])
+        items = order.get('items') or []
+
+        orders['order_id'].append(self._code('order_id', order['order_id']))
+        orders['customer_id'].append(customer)
+        orders['status'].append(status)
+        orders['created_at'].append(created_at)
+        orders['total_cents'].append(_cents(order.get('total_amount', 0)))
+        orders['item_count'].append(len(items))
+
+        columns = self.columns['items']
+        for item in items:
+            columns['product_id'].append(self._code('product_id', item['product_id']))
+            columns['customer_id'].append(customer)
+            columns['status'].append(status)
+            columns['created_at'].append(created_at)
+            columns['quantity'].append(float(item.get('quantity', 0)))
+            columns['price_cents'].append(_cents(item.get('price', 0)))
+            columns['total_cents'].append(_cents(item.get('total', 0)))
+        self.rows += 1 + len(items)
+
+class SnapshotWriter:
+    """Flatten orders into columnar partitions in the documents bucket.
+
+    Rows are buffered per created_at date and flushed as one part per
+    partition whenever buffer_rows orders plus line items are held, which
+    bounds memory however large the export is.
+    """
+
+    def __init__(self, bucket_name: str, buffer_rows: int = DEFAULT_BUFFER_ROWS):
+        self.s3 = boto3.client('s3')
+        self.bucket = bucket_name
+        self.buffer_rows = buffer_rows
+
+    def load_manifest(self) -> Dict[str, Any]:
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=MANIFEST_KEY)
+            return json.loads(response['Body'].read())
+        except self.s3.exceptions.NoSuchKey:
+            return {'partitions': {}, 'sources': []}
+
+    def _put_array(self, key: str, values: array) -> None:
+        import numpy as np
+
+        out = io.BytesIO()
+        np.save(out, np.frombuffer(values, dtype=NUMPY_TYPES[values.typecode]))
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=out.getvalue())
+
+    def _flush(self, date: str, buffer: _PartBuffer) -> Dict[str, Any]:
+        prefix = f"{SNAPSHOT_PREFIX}/date={date}/part-{uuid.uuid4().hex[:12]}"
+        for table, columns in buffer.columns.items():
+            for name, values in columns.items():
+                self._put_array(f"{prefix}/{table}.{name}.npy", values)
+        for name, values in buffer.dictionaries.items():
+            self.s3.put_object(Bucket=self.bucket, Key=f"{prefix}/{name}.dict.json",
+                               Body=json.dumps(list(values)).encode('utf-8'), ContentType='application/json')
+        return {'prefix': prefix, 'orders': len(buffer.columns['orders']['order_id']),
+                'items': len(buffer.columns['items']['product_id'])}
+
+    def write(self, orders: Iterable[Dict[str, Any]], through: Optional[str] = None,
+              source: Optional[str] = None) -> Dict[str, Any]:
+        """Append partitions for dates up to `through` (default yesterday) that are not in the manifest"""
+        through = through or (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+        manifest = self.load_manifest()
+        existing = set(manifest['partitions'])
+        new_parts: Dict[str, List[Dict[str, Any]]] = {}
+        buffers: Dict[str, _PartBuffer] = {}
+        buffered = 0
+        skipped = 0
+
+        def flush_all() -> None:
+            for date, buffer in buffers.items():
+                new_parts.setdefault(date, []).append(self._flush(date, buffer))
+            buffers.clear()
+
+        for order in orders:
+            date = (order.get('created_at') or '')[:10]
+            if not date or date > through or date in existing:
+                skipped += 1
+                continue
+            buffer = buffers.get(date)
+            if buffer is None:
+                buffer = buffers[date] = _PartBuffer()
+            before = buffer.rows
+            buffer.add(order)
+            buffered += buffer.rows - before
+            if buffered >= self.buffer_rows:
+                flush_all()
+                buffered = 0
+        flush_all()
+
+        # Partitions only become visible once all their parts are written
+        for date, parts in new_parts.items():
+            manifest['partitions'][date] = {'parts': parts}
+        if source:
+            manifest['sources'].append(source)
+        manifest['updated_at'] = datetime.utcnow().isoformat()
+        self.s3.put_object(Bucket=self.bucket, Key=MANIFEST_KEY, Body=json.dumps(manifest, indent=1).encode('utf-8'),
+                           ContentType='application/json')
+        return {
+            'partitions_added': sorted(new_parts),
+            'orders': sum(p['orders'] for parts in new_parts.values() for p in parts),
+            'items': sum(p['items'] for parts in new_parts.values() for p in parts),
+            'orders_skipped': skipped,
+            'through': through
+        }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--export-id', required=True)
+    parser.add_argument('--bucket', default=os.environ.get('DOCUMENTS_BUCKET'))
+    parser.add_argument('--through', help='last date (YYYY-MM-DD) to snapshot; defaults to yesterday')
+    parser.add_argument('--buffer-rows', type=int, default=DEFAULT_BUFFER_ROWS)
+    args = parser.parse_args()
+    writer = SnapshotWriter(args.bucket, buffer_rows=args.buffer_rows)
+    result = writer.write(read_export(args.bucket, args.export_id), through=args.through, source=args.export_id)
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
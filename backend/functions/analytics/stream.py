@@ -0,0 +1,63 @@
+# functions/analytics/stream.py
+
+import os
+from typing import Dict, Any, List, Optional
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from aggregates import AnalyticsStore, add_delta, compact
+from log import get_logger
+
+logger = get_logger(__name__)
+
+_deserializer = TypeDeserializer()
+
+# Reused across warm invocations of the same container
+_store: Optional[AnalyticsStore] = None
+
+def get_store() -> AnalyticsStore:
+    global _store
+    if _store is None:
+        _store = AnalyticsStore(os.environ.get('ANALYTICS_TABLE', 'scm-stack-analytics'))
+    return _store
+
+def _image(record: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+    image = record['dynamodb'].get(name)
+    if not image:
+        return None
+    return {k: _deserializer.deserialize(v) for k, v in image.items()}
+
+def _archive_move(record: Dict[str, Any]) -> bool:
+    """TTL removing an archived order, or a restore putting it back: not a sale or a cancellation.
+
+    Only the archive sweep sets expires_at on orders and line pages, and only
+    a restore writes restored_at on insert.
+    """
+    if record.get('eventName') == 'REMOVE':
+        identity = record.get('userIdentity') or {}
+        return identity.get('type') == 'Service' and identity.get('principalId') == 'dynamodb.amazonaws.com'
+    if record.get('eventName') == 'INSERT':
+        return 'restored_at' in (record['dynamodb'].get('NewImage') or {})
+    return False
+
+def deltas_for(records: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """Net counter changes of a stream batch: minus the old image, plus the new one"""
+    deltas: Dict[Any, Dict[str, Any]] = {}
+    for record in records:
+        if _archive_move(record):
+            continue
+        add_delta(deltas, _image(record, 'OldImage'), -1)
+        add_delta(deltas, _image(record, 'NewImage'), 1)
+    return compact(deltas)
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """DynamoDB Streams handler for the orders and order lines tables (NEW_AND_OLD_IMAGES)"""
+    records = event.get('Records', [])
+    if not records:
+        return {'rows_updated': 0}
+    deltas = deltas_for(records)
+    # The whole batch is one unit: a retry delivers the same records, so the same id
+    batch_id = f"{records[0]['eventID']}:{records[-1]['eventID']}"
+    updated = get_store().apply(deltas, batch_id)
+    logger.info("Applied order changes", records=len(records), rows_updated=updated, batch_id=batch_id)
+    return {'rows_updated': updated}
@@ -0,0 +1,199 @@
+# functions/inventory/app.py
+
+import base64
+import json
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_LOOKUP_PRODUCTS = 100
+
+class InventoryError(Exception):
+    """Base class for inventory exceptions"""
+    pass
+
+class StockConflictError(InventoryError):
+    """Raised when a conditional stock update finds a different level than expected"""
+    pass
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class InventoryHandler:
+    """Stock levels keyed by product_id.
+
+    stock_level is the quantity available to new orders; the order service
+    decrements it (conditionally) in the transaction that writes an order.
+    """
+
+    def __init__(self, table_name: str):
+        self.dynamodb = boto3.resource('dynamodb')
+        self.table = self.dynamodb.Table(table_name)
+        self.table_name = table_name
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        return self.table.get_item(Key={'product_id': product_id}).get('Item')
+
+    def get_many(self, product_ids: List[str]) -> List[Dict[str, Any]]:
+        """Look up several products in one BatchGetItem (plus retries of UnprocessedKeys)"""
+        found: Dict[str, Dict[str, Any]] = {}
+        request = {self.table_name: {'Keys': [{'product_id': p} for p in dict.fromkeys(product_ids)]}}
+        while request:
+            response = self.dynamodb.batch_get_item(RequestItems=request)
+            for item in response['Responses'].get(self.table_name, []):
+                found[item['product_id']] = item
+            request = response.get('UnprocessedKeys')
+        return [found[p] for p in product_ids if p in found]
+
+    def list_page(self, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {'Limit': min(limit, MAX_PAGE_SIZE)}
+        if next_token:
+            try:
+                kwargs['ExclusiveStartKey'] = json.loads(base64.urlsafe_b64decode(next_token.encode('ascii')))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Invalid next_token: {str(e)}")
+        response = self.table.scan(**kwargs)
+        last_key = response.get('LastEvaluatedKey')
+        return {
+            'items': response.get('Items', []),
+            'next_token': base64.urlsafe_b64encode(json.dumps(last_key).encode('utf-8')).decode('ascii')
+            if last_key else None
+        }
+
+    def put(self, product_id: str, stock_level: int, attributes: Dict[str, Any],
+            expected_stock_level: Optional[int] = None) -> Dict[str, Any]:
+        """Set a product's stock level, optionally only if it is still at expected_stock_level"""
+        names = {'#stock_level': 'stock_level'}
+        values: Dict[str, Any] = {':stock_level': stock_level, ':time': datetime.utcnow().isoformat()}
+        assignments = ['#stock_level = :stock_level', 'updated_at = :time']
+        for i, (name, value) in enumerate(attributes.items()):
+            names[f"#a{i}"] = name
+            values[f":a{i}"] = value
+            assignments.append(f"#a{i} = :a{i}")
+
+        kwargs: Dict[str, Any] = {}
+        if expected_stock_level is not None:
+            kwargs['ConditionExpression'] = '#stock_level = :expected'
+            values[':expected'] = expected_stock_level
+        try:
+            response = self.table.update_item(
+                Key={'product_id': product_id},
+                UpdateExpression='SET ' + ', '.join(assignments),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_NEW',
+                **kwargs
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise StockConflictError(
+                    f"Stock level of {product_id} is no longer {expected_stock_level}"
+                )
+            raise
+        return response['Attributes']
+
+# Reused across warm invocations of the same container
+_handler: Optional[InventoryHandler] = None
+
+def get_handler() -> InventoryHandler:
+    global _handler
+    if _handler is None:
+        _handler = InventoryHandler(os.environ.get('INVENTORY_TABLE', 'scm-stack-inventory'))
+    return _handler
+
+def create_cors_headers() -> Dict[str, str]:
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET,PUT,OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'
+    }
+
+def create_response(status_code: int, body: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': create_cors_headers(),
+        'body': json.dumps(body, default=_json_default)
+    }
+
+def parse_stock_update(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a PUT body: stock_level plus optional name, category, price and expected_stock_level"""
+    stock_level = body.get('stock_level')
+    if isinstance(stock_level, bool) or not isinstance(stock_level, int) or stock_level < 0:
+        raise ValueError('stock_level must be a non-negative integer')
+    expected = body.get('expected_stock_level')
+    if expected is not None and (isinstance(expected, bool) or not isinstance(expected, int)):
+        raise ValueError('expected_stock_level must be an integer')
+
+    attributes: Dict[str, Any] = {}
+    for field in ('name', 'category'):
+        if field in body:
+            attributes[field] = str(body[field])
+    if 'price' in body:
+        try:
+            attributes['price'] = Decimal(str(body['price']))
+        except InvalidOperation:
+            raise ValueError(f"Invalid price: {body['price']}")
+    return {'stock_level': stock_level, 'expected_stock_level': expected, 'attributes': attributes}
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Inventory API: GET /inventory, GET/PUT /inventory/{productId}"""
+    method = event.get('httpMethod')
+    if method == 'OPTIONS':
+        return create_response(200, {})
+
+    try:
+        handler = get_handler()
+        product_id = (event.get('pathParameters') or {}).get('productId')
+        params = event.get('queryStringParameters') or {}
+
+        # GET /inventory?product_ids=A,B,C - Batch lookup, or one page of all products
+        if method == 'GET' and not product_id:
+            if params.get('product_ids'):
+                product_ids = [p for p in params['product_ids'].split(',') if p]
+                if len(product_ids) > MAX_LOOKUP_PRODUCTS:
+                    return create_response(400, {'error': f"At most {MAX_LOOKUP_PRODUCTS} product_ids per request"})
+                items = handler.get_many(product_ids)
+                return create_response(200, {'items': items, 'count': len(items), 'next_token': None})
+            try:
+                limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+                if limit <= 0:
+                    raise ValueError('limit must be positive')
+                page = handler.list_page(limit=limit, next_token=params.get('next_token'))
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            return create_response(200, dict(page, count=len(page['items'])))
+
+        # GET /inventory/{productId}
+        elif method == 'GET':
+            item = handler.get(product_id)
+            if not item:
+                return create_response(404, {'error': 'Product not found'})
+            return create_response(200, item)
+
+        # PUT /inventory/{productId} - Set the stock level
+        elif method == 'PUT' and product_id:
+            try:
+                update = parse_stock_update(json.loads(event.get('body') or '{}'))
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            try:
+                item = handler.put(product_id, update['stock_level'], update['attributes'],
+                                   expected_stock_level=update['expected_stock_level'])
+            except StockConflictError as e:
+                return create_response(409, {'error': str(e)})
+            return create_response(200, item)
+
+        return create_response(404, {'error': 'Invalid endpoint'})
+
+    except Exception as e:
+        print(f"Unhandled error: {str(e)}")
+        return create_response(500, {'error': 'Internal server error', 'message': str(e)})
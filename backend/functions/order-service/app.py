@@ -1,39 +1,162 @@
 # functions/order-service/app.py
 
+import base64
 import json
-import boto3
 import os
-from decimal import Decimal
-from datetime import datetime
 import uuid
-import traceback
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from order_management import clients, log, metrics, serialization
+from order_management.model import parse_order
 from order_management.processor import (
     OrderProcessor, 
     OrderError, 
     OrderNotFoundError, 
     DocumentNotFoundError,
-    BaseEncoder,
-    DecimalEncoder
+    CustomerNotFoundError,
+    InvalidStatusTransitionError,
+    InsufficientStockError,
+    VersionConflictError,
+    OrderArchivedError,
+    RangeNotSatisfiableError,
+    DocumentTooLargeError,
+    DEFAULT_PAGE_SIZE,
+    ORDER_STATUSES
 )
 
+logger = log.get_logger('app')
+
+# Reused across warm invocations of the same container
+_processor: Optional[OrderProcessor] = None
+
+def get_processor() -> OrderProcessor:
+    """Return the container-wide OrderProcessor, creating it on first use"""
+    global _processor
+    if _processor is None:
+        _processor = OrderProcessor(
+            table_name=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'),
+            bucket_name=os.environ.get('DOCUMENTS_BUCKET', 'scm-stack-docs-975050073542'),
+            topic_arn=os.environ.get('ORDER_TOPIC_ARN', 'scm-stack-orders'),
+            outbox_table=os.environ.get('OUTBOX_TABLE'),
+            # Reservations reject products without an inventory row, so they are opt-in
+            inventory_table=(os.environ.get('INVENTORY_TABLE')
+                             if os.environ.get('INVENTORY_RESERVATIONS_ENABLED', 'false').lower() == 'true'
+                             else None),
+            customers_table=os.environ.get('CUSTOMERS_TABLE'),
+            changes_table=os.environ.get('CHANGES_TABLE'),
+            lines_table=os.environ.get('ORDER_LINES_TABLE'),
+            archive_index_table=os.environ.get('ARCHIVE_INDEX_TABLE')
+        )
+    return _processor
+
+def reset_processor() -> None:
+    """Forget the cached processor and AWS clients (used by tests and benchmarks)"""
+    global _processor
+    _processor = None
+    clients.reset()
+
+MAX_BATCH_ORDERS = int(os.environ.get('MAX_BATCH_ORDERS', '500'))
+MAX_BULK_TRANSITIONS = int(os.environ.get('MAX_BULK_TRANSITIONS', '100'))
+
+# Stop exporting this long before the Lambda timeout and continue in a new invocation
+EXPORT_TIME_BUFFER_MS = 10000
+# Each segment is a scan worker thread with its own multipart upload buffer: a part
+# (DEFAULT_PART_SIZE, 8 MiB) plus its copy on upload and a scan page. Segments may
+# take half the function's memory, so 256 MB allows 8
+EXPORT_SEGMENT_MEMORY_MB = 16
+
+def default_max_export_segments() -> int:
+    memory_mb = int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '0'))
+    if not memory_mb:
+        return 32  # command line or tests: no Lambda memory limit
+    return max(1, min(32, memory_mb // 2 // EXPORT_SEGMENT_MEMORY_MB))
+
+MAX_EXPORT_SEGMENTS = int(os.environ.get('MAX_EXPORT_SEGMENTS', default_max_export_segments()))
+
+def parse_export_segments(value: Any) -> int:
+    """Validate a requested segment count; raises ValueError outside 1..MAX_EXPORT_SEGMENTS"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("segments must be an integer")
+    try:
+        segments = int(value)
+    except ValueError:
+        raise ValueError("segments must be an integer")
+    if not 1 <= segments <= MAX_EXPORT_SEGMENTS:
+        raise ValueError(f"segments must be between 1 and {MAX_EXPORT_SEGMENTS}")
+    return segments
+
+def start_export_job(job: Dict[str, Any], context: Any) -> None:
+    """Invoke this function asynchronously to run (or resume) an export"""
+    clients.get_client('lambda').invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'export_job': job}).encode('utf-8')
+    )
+
+def run_export_job(job: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Run an export until done or close to the timeout, then hand off to a new invocation"""
+    logger.info("Running export job", **job)
+    summary = get_processor().export_orders(
+        export_id=job['export_id'],
+        segments=job['segments'],
+        compress=job['compress'],
+        should_stop=lambda: context.get_remaining_time_in_millis() < EXPORT_TIME_BUFFER_MS
+    )
+    if not summary['complete']:
+        logger.info("Export not finished, continuing in a new invocation", export_id=job['export_id'])
+        start_export_job(job, context)
+    return summary
+
+# Long polls of the change feed return this long before the Lambda timeout
+CHANGES_TIME_BUFFER_MS = 2000
+
+def read_changes(processor: OrderProcessor, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Parse since/limit/wait and read the change feed; raises ValueError on bad parameters"""
+    params = event.get('queryStringParameters') or {}
+    limit = int(params['limit']) if 'limit' in params else None
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be positive")
+    wait = float(params.get('wait', 0))
+    if context is not None:
+        wait = min(wait, (context.get_remaining_time_in_millis() - CHANGES_TIME_BUFFER_MS) / 1000)
+    return processor.get_changes(since=params.get('since'), limit=limit, wait_seconds=wait)
+
+def read_order_items(processor: OrderProcessor, order_id: str, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Parse limit/next_token and read one page of an order's items; raises ValueError on bad parameters"""
+    from order_management.lines import DEFAULT_LINES_LIMIT, MAX_LINES_LIMIT
+
+    if params['include'] != 'items':
+        raise ValueError("include must be 'items'")
+    try:
+        limit = int(params.get('limit', DEFAULT_LINES_LIMIT))
+        start = int(params.get('next_token') or 0)
+    except ValueError:
+        raise ValueError("limit and next_token must be integers")
+    if limit <= 0 or start < 0:
+        raise ValueError("limit must be positive and next_token non-negative")
+    return processor.get_order_items(order_id, start=start, limit=min(limit, MAX_LINES_LIMIT))
+
 def create_cors_headers():
     return {
         'Content-Type': 'application/json',
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS,HEAD,PATCH',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match,X-Correlation-Id,Range',
+        'Access-Control-Expose-Headers': 'ETag,X-Cache,X-Correlation-Id,Content-Range,Accept-Ranges'
     }
 
-def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+def create_response(status_code: int, body: Any, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Build an API Gateway response; a str body is sent as already-encoded JSON"""
     try:
+        if not isinstance(body, str):
+            with metrics.span('encode'):
+                body = serialization.dumps(body)
         return {
             'statusCode': status_code,
-            'headers': create_cors_headers(),
-            'body': json.dumps(DecimalEncoder.encode(body))
+            'headers': dict(create_cors_headers(), **(headers or {})),
+            'body': body
         }
     except Exception as e:
-        print(f"Error creating response: {str(e)}")
+        logger.error("Error creating response", error=str(e))
         return {
             'statusCode': 500,
             'headers': create_cors_headers(),
@@ -43,198 +166,431 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             })
         }
 
-def format_order_data(body: Dict[str, Any], order_id: str) -> Dict[str, Any]:
-    """Format order data with proper types and structure"""
-    try:
-        timestamp = datetime.utcnow().isoformat()
-        
-        items = []
-        total_amount = Decimal('0')
-        
-        for item in body['items']:
-            quantity = Decimal(str(item['quantity']))
-            price = Decimal(str(item['price']))
-            item_total = quantity * price
-            
-            items.append({
-                'product_id': item['product_id'],
-                'name': item['name'],
-                'quantity': quantity,
-                'price': price,
-                'total': item_total
-            })
-            total_amount += item_total
-        
-        return {
-            'order_id': order_id,
-            'customer_id': body['customer_id'],
-            'customer_name': body['customer_name'],
-            'items': items,
-            'total_amount': total_amount,
-            'status': 'PENDING',
-            'created_at': timestamp,
-            'updated_at': timestamp
-        }
-    except Exception as e:
-        print(f"Error formatting order data: {str(e)}")
-        print(f"Input body: {json.dumps(body)}")
-        raise ValueError(f"Invalid order data format: {str(e)}")
-
-def validate_order_data(body: Dict[str, Any]) -> None:
-    """Validate order data"""
-    try:
-        print(f"Validating order data: {json.dumps(body)}")
-        
-        required_fields = ['customer_id', 'customer_name', 'items']
-        for field in required_fields:
-            if field not in body:
-                raise ValueError(f"Missing required field: {field}")
-
-        if not isinstance(body['items'], list):
-            raise ValueError("Items must be an array")
+def create_document_response(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored document bytes as a base64 API Gateway response (206 for a Range)"""
+    headers = dict(create_cors_headers(), **{
+        'Content-Type': document['content_type'],
+        'Accept-Ranges': 'bytes'
+    })
+    if document['content_encoding']:
+        headers['Content-Encoding'] = document['content_encoding']
+    if document['etag']:
+        headers['ETag'] = document['etag']
+    if document['partial']:
+        headers['Content-Range'] = document['content_range']
+    return {
+        'statusCode': 206 if document['partial'] else 200,
+        'headers': headers,
+        'body': base64.b64encode(document['body']).decode('ascii'),
+        'isBase64Encoded': True
+    }
 
-        if not body['items']:
-            raise ValueError("Order must contain at least one item")
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """Case-insensitive request header lookup"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
 
-        for item in body['items']:
-            required_item_fields = ['product_id', 'name', 'quantity', 'price']
-            for field in required_item_fields:
-                if field not in item:
-                    raise ValueError(f"Missing required item field: {field}")
+def etag_matches(event: Dict[str, Any], etag: str) -> bool:
+    if_none_match = get_header(event, 'If-None-Match')
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
 
-            try:
-                quantity = float(item['quantity'])
-                if quantity <= 0:
-                    raise ValueError("Quantity must be positive")
-            except (ValueError, TypeError):
-                raise ValueError(f"Invalid quantity: {item.get('quantity')}")
+def request_correlation_id(event: Dict[str, Any], context: Any) -> Optional[str]:
+    """Caller-supplied X-Correlation-Id, else the API Gateway or Lambda request id"""
+    return (get_header(event, 'X-Correlation-Id')
+            or (event.get('requestContext') or {}).get('requestId')
+            or getattr(context, 'aws_request_id', None))
 
-            try:
-                price = float(item['price'])
-                if price <= 0:
-                    raise ValueError("Price must be positive")
-            except (ValueError, TypeError):
-                raise ValueError(f"Invalid price: {item.get('price')}")
+def request_operation(event: Dict[str, Any]) -> str:
+    """Metric name for a request, with path parameters left as placeholders"""
+    if 'export_job' in event:
+        return 'export_job'
+    route = event.get('resource')
+    if not route:
+        route = event.get('path', '')
+        for name, value in (event.get('pathParameters') or {}).items():
+            route = route.replace(value, '{' + name + '}')
+    return f"{event.get('httpMethod')} {route}"
 
-    except ValueError as e:
-        raise
-    except Exception as e:
-        print(f"Validation error: {str(e)}\nTraceback: {traceback.format_exc()}")
-        raise ValueError(f"Invalid order data: {str(e)}")
+def profile_mode(event: Dict[str, Any]) -> Optional[str]:
+    """'cpu' or 'memory' from PROFILE_MODE, or from X-Profile when PROFILE_HEADER_ENABLED=true"""
+    if os.environ.get('PROFILE_HEADER_ENABLED', 'false').lower() == 'true':
+        mode = get_header(event, 'X-Profile')
+        if mode:
+            return mode.lower()
+    return os.environ.get('PROFILE_MODE')
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Main Lambda handler"""
-    print('Event:', json.dumps(event))
-    print('Environment variables:', {
-        'ORDERS_TABLE': os.environ.get('ORDERS_TABLE'),
-        'DOCUMENTS_BUCKET': os.environ.get('DOCUMENTS_BUCKET'),
-        'ORDER_TOPIC_ARN': os.environ.get('ORDER_TOPIC_ARN')
-    })
-
+    token = log.start_request(request_correlation_id(event, context),
+                              method=event.get('httpMethod'), path=event.get('path'))
+    metrics_token = metrics.start_request(request_operation(event))
+    response: Dict[str, Any] = {}
     try:
-        # Initialize processor
-        processor = OrderProcessor(
-            table_name=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'),
-            bucket_name=os.environ.get('DOCUMENTS_BUCKET', 'scm-stack-docs-975050073542'),
-            topic_arn=os.environ.get('ORDER_TOPIC_ARN', 'scm-stack-orders')
-        )
+        logger.debug("Received event", payload=event)
+        with metrics.profile(profile_mode(event)):
+            response = handle_request(event, context)
+        if 'headers' in response:
+            response['headers']['X-Correlation-Id'] = log.correlation_id()
+        return response
+    finally:
+        metrics.end_request(metrics_token, correlation_id=log.correlation_id(),
+                            status_code=response.get('statusCode'))
+        log.end_request(token)
 
-        # Handle CORS preflight
-        if event.get('httpMethod') == 'OPTIONS':
-            return create_response(200, {})
+def handle_request(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Route one API Gateway event (or an export job) to its handler"""
+    # Asynchronous export job started by POST /orders/export
+    if 'export_job' in event:
+        return run_export_job(event['export_job'], context)
+
+    # Handle CORS preflight before any AWS setup
+    if event.get('httpMethod') == 'OPTIONS':
+        return create_response(200, {})
+
+    try:
+        # Only constructs handlers; each AWS client is created when a route first uses it
+        processor = get_processor()
 
         path = event.get('path', '')
         method = event['httpMethod']
         
-        print(f"Processing {method} request to {path}")
+        logger.info("Processing request")
         
-        # GET /orders - List all orders
+        # GET /orders - List one page of orders
         if method == 'GET' and path == '/orders':
-            print("Getting all orders")
-            orders = processor.list_orders()
-            print(f"Found {len(orders)} orders")
-            return create_response(200, orders)
+            params = event.get('queryStringParameters') or {}
+            logger.debug("Listing orders", params=params)
+            try:
+                limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+                if limit <= 0:
+                    raise ValueError("limit must be positive")
+                page = processor.list_orders(
+                    limit=limit,
+                    next_token=params.get('next_token'),
+                    filters={
+                        'status': params.get('status'),
+                        'customer_id': params.get('customer_id'),
+                        'created_from': params.get('created_from'),
+                        'created_to': params.get('created_to')
+                    },
+                    scan=params.get('mode') == 'scan'
+                )
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            logger.debug("Found orders", count=page['count'])
+            return create_response(200, page)
+        
+        # GET /orders/changes - Order changes since a cursor (?since=&wait= to long-poll)
+        elif method == 'GET' and path == '/orders/changes':
+            try:
+                return create_response(200, read_changes(processor, event, context))
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+        
+        # GET /notifications - The same changes as notification panel entries
+        elif method == 'GET' and path == '/notifications':
+            from order_management.changes import QUIET_EVENTS, notification
+
+            try:
+                page = read_changes(processor, event, context)
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            changes = page.pop('changes')
+            return create_response(200, dict(page, notifications=[
+                notification(change) for change in changes if change['event'] not in QUIET_EVENTS]))
+        
+        # GET /customers - One page of customer summaries
+        elif method == 'GET' and path == '/customers':
+            params = event.get('queryStringParameters') or {}
+            try:
+                limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+                if limit <= 0:
+                    raise ValueError("limit must be positive")
+                page = processor.list_customers(limit=limit, next_token=params.get('next_token'))
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            return create_response(200, page)
+        
+        # GET /customers/{customerId}/summary - Order count, lifetime value, last order
+        elif method == 'GET' and path.startswith('/customers/') and path.endswith('/summary'):
+            customer_id = event['pathParameters']['customerId']
+            try:
+                return create_response(200, processor.get_customer_summary(customer_id))
+            except CustomerNotFoundError:
+                return create_response(404, {'error': 'Customer not found'})
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+        
+        # GET /customers/{customerId}/orders - One page of a customer's orders, newest first
+        elif method == 'GET' and path.startswith('/customers/') and path.endswith('/orders'):
+            customer_id = event['pathParameters']['customerId']
+            params = event.get('queryStringParameters') or {}
+            try:
+                limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+                if limit <= 0:
+                    raise ValueError("limit must be positive")
+                page = processor.list_customer_orders(customer_id, limit=limit, next_token=params.get('next_token'),
+                                                      filters={
+                                                          'status': params.get('status'),
+                                                          'created_from': params.get('created_from'),
+                                                          'created_to': params.get('created_to')
+                                                      })
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            return create_response(200, dict(page, customer_id=customer_id))
+        
+        # POST /orders/export - Start an asynchronous export of all orders
+        elif method == 'POST' and path == '/orders/export':
+            from order_management.export import OrderExporter
+
+            try:
+                body = json.loads(event.get('body') or '{}')
+            except (TypeError, ValueError):
+                return create_response(400, {'error': 'Request body must be JSON'})
+            if not isinstance(body, dict):
+                return create_response(400, {'error': 'Request body must be a JSON object'})
+            try:
+                segments = parse_export_segments(body.get('segments', 8))
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            job = {
+                'export_id': OrderExporter.new_export_id(),
+                'segments': segments,
+                'compress': bool(body.get('compress', True))
+            }
+            logger.info("Starting export job", **job)
+            start_export_job(job, context)
+            return create_response(202, dict(job, status='STARTED'))
+        
+        # GET /orders/export/{exportId} - Export progress or manifest
+        elif method == 'GET' and path.startswith('/orders/export/'):
+            export_id = event['pathParameters']['exportId']
+            export = processor.get_export(export_id)
+            if not export:
+                return create_response(404, {'error': 'Export not found'})
+            return create_response(200, export)
+        
+        # POST /orders/batch - Create many orders at once
+        elif method == 'POST' and path == '/orders/batch':
+            try:
+                body = json.loads(event['body'])
+            except (TypeError, ValueError):
+                return create_response(400, {'error': 'Request body must be JSON'})
+            orders = body.get('orders') if isinstance(body, dict) else None
+            if not isinstance(orders, list) or not orders:
+                return create_response(400, {'error': 'orders must be a non-empty array'})
+            if len(orders) > MAX_BATCH_ORDERS:
+                return create_response(400, {'error': f"At most {MAX_BATCH_ORDERS} orders per batch"})
+            
+            logger.debug("Creating batch of orders", count=len(orders))
+            results: list = [None] * len(orders)
+            valid = []
+            for index, raw_order in enumerate(orders):
+                try:
+                    valid.append((index, parse_order(raw_order, f"ORD-{uuid.uuid4().hex[:8]}")))
+                except ValueError as e:
+                    results[index] = {'index': index, 'status': 'FAILED', 'error': str(e)}
+            
+            try:
+                created = processor.create_orders([order for _, order in valid]) if valid else []
+            except Exception as e:
+                logger.exception("Error creating order batch", error=str(e))
+                return create_response(500, {'error': 'Failed to create orders', 'details': str(e)})
+            for (index, _), result in zip(valid, created):
+                results[index] = dict(result, index=index)
+            
+            failed = sum(1 for result in results if result['status'] == 'FAILED')
+            return create_response(201 if not failed else 207, {
+                'created': len(results) - failed,
+                'failed': failed,
+                'results': results
+            })
         
         # POST /orders - Create new order
         elif method == 'POST' and path == '/orders':
-            print("Creating new order")
             try:
                 body = json.loads(event['body'])
-                print("Request body:", json.dumps(body))
-                
-                validate_order_data(body)
-                order_id = f"ORD-{uuid.uuid4().hex[:8]}"
-                print("Generated order ID:", order_id)
-                
-                order_data = format_order_data(body, order_id)
-                print("Formatted order data:", json.dumps(DecimalEncoder.encode(order_data)))
+                logger.debug("Creating new order", payload=body)
                 
+                order_data = parse_order(body, f"ORD-{uuid.uuid4().hex[:8]}")
                 processed_order = processor.create_order(order_data)
-                print("Order created successfully:", json.dumps(DecimalEncoder.encode(processed_order)))
                 
                 return create_response(201, processed_order)
                 
+            except InsufficientStockError as e:
+                return create_response(409, {'error': str(e), 'product_ids': e.product_ids})
             except ValueError as e:
-                print(f"Validation error: {str(e)}")
+                logger.info("Validation error", error=str(e))
                 return create_response(400, {'error': str(e)})
             except Exception as e:
-                print(f"Error creating order: {str(e)}\n{traceback.format_exc()}")
+                logger.exception("Error creating order", error=str(e))
                 return create_response(500, {
                     'error': 'Failed to create order',
                     'details': str(e)
                 })
         
-        # GET /orders/{orderId} - Get specific order
-        elif method == 'GET' and path.startswith('/orders/') and not path.endswith('/document'):
+        # GET /orders/{orderId}/document - Presigned URL, or ?mode=stream for (ranged) bytes
+        elif method == 'GET' and path.startswith('/orders/') and path.endswith('/document'):
+            order_id = event['pathParameters']['orderId']
+            params = event.get('queryStringParameters') or {}
+            try:
+                if params.get('mode') == 'stream':
+                    return create_document_response(processor.get_document_range(order_id, get_header(event, 'Range')))
+                document = processor.get_document_url(order_id)
+                if params.get('redirect') == 'true':
+                    return create_response(302, '', {'Location': document['url'], 'Cache-Control': 'no-store'})
+                return create_response(200, document, {'Cache-Control': 'no-store'})
+            except (OrderNotFoundError, DocumentNotFoundError):
+                return create_response(404, {'error': 'Document not found'})
+            except RangeNotSatisfiableError as e:
+                return create_response(416, {'error': str(e)})
+            except DocumentTooLargeError as e:
+                return create_response(413, {'error': str(e)})
+            except Exception as e:
+                logger.exception("Error getting order document", order_id=order_id, error=str(e))
+                return create_response(500, {'error': 'Failed to get order document'})
+        
+        # GET /orders/{orderId}/history - Status of every stored document version
+        elif method == 'GET' and path.startswith('/orders/') and path.endswith('/history'):
+            order_id = event['pathParameters']['orderId']
+            try:
+                versions = processor.get_status_history(order_id)
+            except OrderNotFoundError:
+                return create_response(404, {'error': 'Order history not found'})
+            return create_response(200, {'order_id': order_id, 'versions': versions, 'count': len(versions)})
+        
+        # POST /orders/{orderId}/attachments - Presigned PUT URL for an attachment upload
+        elif method == 'POST' and path.startswith('/orders/') and path.endswith('/attachments'):
+            order_id = event['pathParameters']['orderId']
+            try:
+                body = json.loads(event.get('body') or '{}')
+                filename = body.get('filename')
+                content_type = body.get('content_type', 'application/octet-stream')
+                size = body.get('size')
+                if not isinstance(filename, str) or not filename:
+                    raise ValueError('filename is required')
+                if isinstance(size, bool) or not isinstance(size, int):
+                    raise ValueError('size must be an integer number of bytes')
+                upload = processor.create_attachment_upload(order_id, filename, str(content_type), size)
+            except OrderNotFoundError:
+                return create_response(404, {'error': 'Order not found'})
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+            return create_response(201, upload)
+        
+        # GET /orders/{orderId} - Get specific order (?include=items&limit=&next_token= for its line items)
+        elif method == 'GET' and path.startswith('/orders/'):
             order_id = event['pathParameters']['orderId']
-            print(f"Getting order: {order_id}")
+            params = event.get('queryStringParameters') or {}
+            logger.debug("Getting order", order_id=order_id)
             
             try:
-                order = processor.get_order(order_id)
-                if not order:
+                if 'include' in params:
+                    try:
+                        order = read_order_items(processor, order_id, params)
+                    except ValueError as e:
+                        return create_response(400, {'error': str(e)})
+                    if not order:
+                        return create_response(404, {'error': 'Order not found'})
+                    return create_response(200, order)
+                entry = processor.get_order_entry(order_id)
+                if not entry:
                     return create_response(404, {'error': 'Order not found'})
-                return create_response(200, order)
+                headers = {'ETag': entry['etag'], 'X-Cache': entry['cache']}
+                if etag_matches(event, entry['etag']):
+                    return create_response(304, '', headers)
+                return create_response(200, entry['body'], headers)
             except Exception as e:
-                print(f"Error getting order: {str(e)}\n{traceback.format_exc()}")
+                logger.exception("Error getting order", order_id=order_id, error=str(e))
                 return create_response(500, {'error': 'Failed to get order'})
         
+        # PATCH /orders/status - Move many orders to one status
+        elif method == 'PATCH' and path == '/orders/status':
+            try:
+                body = json.loads(event.get('body') or '{}')
+            except (TypeError, ValueError):
+                return create_response(400, {'error': 'Request body must be JSON'})
+            if not isinstance(body, dict):
+                return create_response(400, {'error': 'Request body must be a JSON object'})
+            order_ids = body.get('order_ids')
+            status = body.get('status')
+            if status not in ORDER_STATUSES:
+                return create_response(400, {
+                    'error': f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}"
+                })
+            if not isinstance(order_ids, list) or not order_ids:
+                return create_response(400, {'error': 'order_ids must be a non-empty array'})
+            if len(order_ids) > MAX_BULK_TRANSITIONS:
+                return create_response(400, {'error': f"At most {MAX_BULK_TRANSITIONS} orders per request"})
+            if not all(isinstance(order_id, str) and order_id for order_id in order_ids):
+                return create_response(400, {'error': 'order_ids must be non-empty strings'})
+            
+            results = processor.bulk_update_status(list(dict.fromkeys(order_ids)), status)
+            failed = sum(1 for result in results if result['status'] == 'FAILED')
+            return create_response(200 if not failed else 207, {
+                'updated': len(results) - failed,
+                'failed': failed,
+                'results': results
+            })
+        
         # PATCH /orders/{orderId}/status - Update order status
         elif method == 'PATCH' and '/status' in path:
             order_id = event['pathParameters']['orderId']
-            body = json.loads(event['body'])
+            try:
+                body = json.loads(event.get('body') or '{}')
+            except (TypeError, ValueError):
+                return create_response(400, {'error': 'Request body must be JSON'})
+            if not isinstance(body, dict):
+                return create_response(400, {'error': 'Request body must be a JSON object'})
             status = body.get('status')
-            print(f"Updating order status: {order_id} to {status}")
+            expected_version = body.get('version')
+            logger.debug("Updating order status", order_id=order_id, status=status)
             
             if not status:
                 return create_response(400, {'error': 'Status field is required'})
             
-            valid_statuses = ['PENDING', 'PROCESSING', 'COMPLETED', 'CANCELLED']
-            if status not in valid_statuses:
+            if status not in ORDER_STATUSES:
                 return create_response(400, {
-                    'error': f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
+                    'error': f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}"
                 })
             
+            if expected_version is not None and (isinstance(expected_version, bool) or not isinstance(expected_version, int)
+                                                 or expected_version < 0):
+                return create_response(400, {'error': 'version must be a non-negative integer'})
+            
             try:
-                updated_order = processor.update_status(order_id, status)
+                updated_order = processor.update_status(order_id, status, expected_version=expected_version)
                 return create_response(200, updated_order)
             except OrderNotFoundError:
                 return create_response(404, {'error': 'Order not found'})
+            except InvalidStatusTransitionError as e:
+                return create_response(409, {'error': str(e), 'current_status': e.current_status})
+            except (VersionConflictError, OrderArchivedError) as e:
+                return create_response(409, {'error': str(e)})
             except Exception as e:
-                print(f"Error updating order status: {str(e)}\n{traceback.format_exc()}")
+                logger.exception("Error updating order status", order_id=order_id, error=str(e))
                 return create_response(500, {'error': 'Failed to update order status'})
         
         # DELETE /orders/{orderId} - Delete order
         elif method == 'DELETE':
             order_id = event['pathParameters']['orderId']
-            print(f"Deleting order: {order_id}")
+            logger.debug("Deleting order", order_id=order_id)
             
             try:
                 processor.delete_order(order_id)
                 return create_response(200, {'message': 'Order deleted successfully'})
             except OrderNotFoundError:
                 return create_response(404, {'error': 'Order not found'})
+            except VersionConflictError as e:
+                return create_response(409, {'error': str(e)})
             except Exception as e:
-                print(f"Error deleting order: {str(e)}\n{traceback.format_exc()}")
+                logger.exception("Error deleting order", order_id=order_id, error=str(e))
                 return create_response(500, {'error': 'Failed to delete order'})
         
         # Invalid endpoint
@@ -242,8 +598,12 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return create_response(404, {'error': 'Invalid endpoint'})
             
     except Exception as e:
-        print(f"Unhandled error: {str(e)}\n{traceback.format_exc()}")
+        logger.exception("Unhandled error", error=str(e))
         return create_response(500, {
             'error': 'Internal server error',
             'message': str(e)
-        })
\ No newline at end of file
+        })
+    finally:
+        # Background side effects must finish before the container is frozen
+        if _processor is not None:
+            _processor.flush(timeout=float(os.environ.get('SIDE_EFFECT_FLUSH_TIMEOUT', '20')))
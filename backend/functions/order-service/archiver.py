@@ -0,0 +1,49 @@
+# functions/order-service/archiver.py
+
+import os
+from typing import Dict, Any, Optional
+from order_management import log, metrics
+from order_management.archive import DEFAULT_ARCHIVE_AFTER_DAYS, OrderArchive, cutoff
+
+logger = log.get_logger('archiver')
+
+# Stop sweeping this long before the Lambda timeout; the next scheduled run continues
+ARCHIVE_TIME_BUFFER_MS = 60000
+
+# Reused across warm invocations of the same container
+_archive: Optional[OrderArchive] = None
+
+def get_archive() -> OrderArchive:
+    global _archive
+    if _archive is None:
+        lines = changes = None
+        if os.environ.get('ORDER_LINES_TABLE'):
+            from order_management.lines import LineStore
+            lines = LineStore(os.environ['ORDER_LINES_TABLE'])
+        if os.environ.get('CHANGES_TABLE'):
+            from order_management.changes import ChangeLog
+            changes = ChangeLog(os.environ['CHANGES_TABLE'])
+        _archive = OrderArchive(
+            bucket_name=os.environ.get('DOCUMENTS_BUCKET', 'scm-stack-docs-975050073542'),
+            index_table=os.environ['ARCHIVE_INDEX_TABLE'],
+            orders_table=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'),
+            lines=lines,
+            changes=changes
+        )
+    return _archive
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Scheduled sweep moving orders closed ARCHIVE_AFTER_DAYS ago to the S3 archive"""
+    token = log.start_request(getattr(context, 'aws_request_id', None))
+    metrics_token = metrics.start_request('archive.sweep')
+    summary: Dict[str, Any] = {}
+    try:
+        older_than_days = float(os.environ.get('ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS))
+        summary = get_archive().sweep(
+            cutoff(older_than_days),
+            should_stop=lambda: context.get_remaining_time_in_millis() < ARCHIVE_TIME_BUFFER_MS
+        )
+        return summary
+    finally:
+        metrics.end_request(metrics_token, archived=summary.get('archived', 0), files=summary.get('files', 0))
+        log.end_request(token)
@@ -0,0 +1,40 @@
+# functions/order-service/dispatcher.py
+
+import os
+from typing import Dict, Any, List, Optional
+from order_management import log, metrics
+from order_management.outbox import OutboxDispatcher
+
+logger = log.get_logger('dispatcher')
+
+# Reused across warm invocations of the same container
+_dispatcher: Optional[OutboxDispatcher] = None
+
+def get_dispatcher() -> OutboxDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = OutboxDispatcher(
+            outbox_table=os.environ['OUTBOX_TABLE'],
+            bucket_name=os.environ.get('DOCUMENTS_BUCKET', 'scm-stack-docs-975050073542'),
+            topic_arn=os.environ.get('ORDER_TOPIC_ARN', 'scm-stack-orders'),
+            orders_table=os.environ.get('ORDERS_TABLE'),
+            lines_table=os.environ.get('ORDER_LINES_TABLE')
+        )
+    return _dispatcher
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """DynamoDB Streams handler for the outbox table (ReportBatchItemFailures)"""
+    records = event.get('Records', [])
+    token = log.start_request(getattr(context, 'aws_request_id', None))
+    metrics_token = metrics.start_request('outbox.dispatch')
+    logger.debug("Received outbox stream records", count=len(records))
+    failed: List[str] = []
+    try:
+        failed = get_dispatcher().dispatch(records)
+    except Exception as e:
+        logger.exception("Error dispatching outbox batch", error=str(e))
+        failed = [r['dynamodb']['SequenceNumber'] for r in records if r.get('eventName') == 'INSERT']
+    finally:
+        metrics.end_request(metrics_token, records=len(records), failed=len(failed))
+        log.end_request(token)
+    return {'batchItemFailures': [{'itemIdentifier': sequence} for sequence in failed]}
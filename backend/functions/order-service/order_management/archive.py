@@ -0,0 +1,478 @@
+# functions/order-service/order_management/archive.py
+
+import argparse
+import gzip
+import itertools
+import json
+import os
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import cached_property
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+from . import clients, serialization
+from .log import get_logger
+from .metrics import count, timed
+
+logger = get_logger(__name__)
+
+ARCHIVE_PREFIX = 'archive/orders'
+CLOSED_STATUSES = ('COMPLETED', 'CANCELLED')
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_FILE_ORDERS = 1000  # orders per archive file, one sweep step
+ARCHIVE_BLOCK_ORDERS = 64  # orders per gzip member; a lookup reads and inflates one member
+MARK_WORKERS = 8
+
+# Archived as strings so numbers come back exactly as stored
+ORDER_NUMBERS = ('total_amount', 'version', 'item_count')
+ITEM_NUMBERS = ('quantity', 'price', 'total')
+# Attributes of the hot copy that are not part of the archived order
+STORAGE_FIELDS = ('archived_at', 'expires_at', 'line_pages', 'restored_at')
+
+class OrderArchive:
+    """Cold tier for closed orders: compressed, date-partitioned files in S3.
+
+    A sweep takes orders COMPLETED or CANCELLED before a cutoff (from
+    StatusCreatedAtIndex: created_at, then updated_at, before it) and writes
+    them to archive/orders/closed=YYYY-MM-DD/<file>.ndjson.gz, partitioned by
+    the day they closed. A file is a series of gzip members of
+    ARCHIVE_BLOCK_ORDERS orders; the index table maps each order_id to its
+    member (key, offset, length), and each partition's manifest.json lists
+    its files.
+
+    Archived orders are then marked in the orders table (archived_at, and
+    expires_at for TTL) on the condition that they are still at the version
+    archived, and DynamoDB's TTL removes them without write cost. Marked
+    orders are left out of listings and refuse status changes. The analytics
+    stream ignores TTL removals, so aggregates keep counting archived orders.
+    An order that changed before it was marked loses its index entry and
+    stays in the hot table.
+
+    A restore puts orders back with restored_at, and the sweep leaves them
+    in the table until restored_at is itself older than the cutoff.
+    """
+
+    def __init__(self, bucket_name: str, index_table: str, orders_table: str,
+                 lines: Optional[Any] = None, changes: Optional[Any] = None):
+        self.bucket = bucket_name
+        self.index_table_name = index_table
+        self.orders_table_name = orders_table
+        self.lines = lines
+        self.changes = changes
+        logger.debug("Initialized order archive", bucket=bucket_name, index=index_table)
+
+    @cached_property
+    def s3(self) -> Any:
+        return clients.get_client('s3')
+
+    @cached_property
+    def dynamodb(self) -> Any:
+        return clients.get_resource('dynamodb')
+
+    @cached_property
+    def index(self) -> Any:
+        return self.dynamodb.Table(self.index_table_name)
+
+    @cached_property
+    def orders(self) -> Any:
+        return self.dynamodb.Table(self.orders_table_name)
+
+    @staticmethod
+    def partition_for(order: Dict[str, Any]) -> str:
+        return (order.get('updated_at') or order['created_at'])[:10]
+
+    @staticmethod
+    def partition_prefix(partition: str) -> str:
+        return f"{ARCHIVE_PREFIX}/closed={partition}"
+
+    @classmethod
+    def manifest_key(cls, partition: str) -> str:
+        return f"{cls.partition_prefix(partition)}/manifest.json"
+
+    @staticmethod
+    def encode(order: Dict[str, Any]) -> bytes:
+        document = {name: value for name, value in order.items() if name not in STORAGE_FIELDS}
+        return serialization.dumps_bytes(document, decimal_mode=serialization.STRING) + b'\n'
+
+    @staticmethod
+    def decode(line: bytes) -> Dict[str, Any]:
+        order = json.loads(line)
+        for name in ORDER_NUMBERS:
+            if order.get(name) is not None:
+                order[name] = Decimal(order[name])
+        for item in order.get('items') or []:
+            for name in ITEM_NUMBERS:
+                if item.get(name) is not None:
+                    item[name] = Decimal(item[name])
+        return order
+
+    def _with_items(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        if 'line_pages' not in order:
+            return order
+        if not self.lines:
+            raise ValueError(f"Order {order['order_id']} keeps its line items in a lines table; pass --lines-table")
+        return dict(order, items=self.lines.get_items(order['order_id'], consistent=True))
+
+    def candidates(self, closed_before: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Unmarked orders closed before the cutoff, up to limit"""
+        return list(itertools.islice(self.iter_candidates(closed_before), limit))
+
+    def iter_candidates(self, closed_before: str) -> Iterator[Dict[str, Any]]:
+        """Unmarked orders closed before the cutoff, one index page at a time.
+
+        A sweep takes its steps from one iterator, so each step continues
+        where the last stopped (ExclusiveStartKey) instead of reading the
+        orders it has just marked, and skipped, again.
+        """
+        from boto3.dynamodb.conditions import Key, Attr
+
+        for status in CLOSED_STATUSES:
+            # An order closes after it is created, so created_at bounds the index range
+            kwargs: Dict[str, Any] = {
+                'IndexName': 'StatusCreatedAtIndex',
+                'KeyConditionExpression': Key('status').eq(status) & Key('created_at').lt(closed_before),
+                # A restored order stays hot as long as a closed one would
+                'FilterExpression': Attr('updated_at').lt(closed_before) & Attr('archived_at').not_exists()
+                & (Attr('restored_at').not_exists() | Attr('restored_at').lt(closed_before))
+            }
+            while True:
+                response = self.orders.query(**kwargs)
+                yield from response.get('Items', [])
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def write_file(self, key: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Write orders as gzip members of ARCHIVE_BLOCK_ORDERS; returns each order's member"""
+        body, locations, raw_bytes = bytearray(), {}, 0
+        for start in range(0, len(orders), ARCHIVE_BLOCK_ORDERS):
+            block = orders[start:start + ARCHIVE_BLOCK_ORDERS]
+            raw = b''.join(self.encode(order) for order in block)
+            # wbits=31 writes a gzip member; members concatenate into a valid gzip file
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            member = compressor.compress(raw) + compressor.flush()
+            for order in block:
+                locations[order['order_id']] = {'offset': len(body), 'length': len(member)}
+            body += member
+            raw_bytes += len(raw)
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=bytes(body), ContentType='application/x-ndjson')
+        return {'key': key, 'orders': len(orders), 'bytes': len(body), 'raw_bytes': raw_bytes,
+                'locations': locations}
+
+    def read_manifest(self, partition: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.manifest_key(partition))
+            return json.loads(response['Body'].read())
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def _add_to_manifest(self, partition: str, file: Dict[str, Any]) -> None:
+        # Sweeps run one at a time (reserved concurrency 1), so read-modify-write is safe
+        manifest = self.read_manifest(partition) or {'partition': partition, 'files': [], 'orders': 0, 'bytes': 0}
+        manifest['files'].append({name: file[name] for name in ('key', 'orders', 'bytes', 'raw_bytes', 'archived_at')})
+        manifest['orders'] += file['orders']
+        manifest['bytes'] += file['bytes']
+        manifest['updated_at'] = file['archived_at']
+        self.s3.put_object(Bucket=self.bucket, Key=self.manifest_key(partition),
+                           Body=json.dumps(manifest), ContentType='application/json')
+
+    def partitions(self) -> List[str]:
+        """Partitions with a manifest, oldest first"""
+        partitions, kwargs = [], {'Bucket': self.bucket, 'Prefix': f"{ARCHIVE_PREFIX}/closed=", 'Delimiter': '/'}
+        while True:
+            response = self.s3.list_objects_v2(**kwargs)
+            partitions.extend(prefix['Prefix'].rstrip('/').split('=', 1)[1]
+                              for prefix in response.get('CommonPrefixes', []))
+            if not response.get('IsTruncated'):
+                return sorted(partitions)
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+    def _mark(self, order: Dict[str, Any], archived_at: str, expires_at: int) -> bool:
+        """Hand an archived order (and its line pages) to TTL if it is still the version archived"""
+        from botocore.exceptions import ClientError
+
+        condition = "attribute_exists(order_id) AND attribute_not_exists(archived_at) AND #status = :status AND "
+        values: Dict[str, Any] = {':archived_at': archived_at, ':expires_at': expires_at, ':status': order['status']}
+        if 'version' in order:
+            condition += "#version = :version"
+            values[':version'] = order['version']
+        else:
+            condition += "attribute_not_exists(#version)"
+        mark = {
+            'UpdateExpression': 'SET archived_at = :archived_at, expires_at = :expires_at',
+            'ExpressionAttributeValues': values
+        }
+        try:
+            self.orders.update_item(Key={'order_id': order['order_id']}, ConditionExpression=condition,
+                                    ExpressionAttributeNames={'#status': 'status', '#version': 'version'},
+                                    **mark)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return False
+        for page in range(int(order.get('line_pages', 0))):
+            self.lines.table.update_item(
+                Key={'order_id': order['order_id'], 'page': page},
+                UpdateExpression=mark['UpdateExpression'],
+                ExpressionAttributeValues={':archived_at': archived_at, ':expires_at': expires_at}
+            )
+        return True
+
+    def _forget_copy(self, order_id: str, key: str) -> None:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.index.delete_item(Key={'order_id': order_id}, ConditionExpression='#key = :key',
+                                   ExpressionAttributeNames={'#key': 'key'}, ExpressionAttributeValues={':key': key})
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def _settle(self, orders: List[Dict[str, Any]], file: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Mark the orders of a written file; returns those marked"""
+        archived_at, expires_at = file['archived_at'], int(time.time())
+        with ThreadPoolExecutor(max_workers=MARK_WORKERS) as pool:
+            results = list(pool.map(lambda order: self._mark(order, archived_at, expires_at), orders))
+        marked = [order for order, ok in zip(orders, results) if ok]
+        stale = [order['order_id'] for order, ok in zip(orders, results) if not ok]
+        for order_id in stale:
+            current = self.orders.get_item(Key={'order_id': order_id}, ConsistentRead=True).get('Item')
+            if current and 'archived_at' in current:
+                # Marked by an earlier sweep the index lagged behind; the new copy is the same version
+                marked.append(current)
+                continue
+            # Changed or deleted since it was read: this copy must not be served
+            self._forget_copy(order_id, file['key'])
+        if self.changes and marked:
+            self.changes.append([self.changes.order_archived(order) for order in marked])
+        return marked
+
+    @timed('archive.sweep')
+    def sweep(self, closed_before: str, max_orders: Optional[int] = None,
+              should_stop: Optional[Callable[[], bool]] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Archive orders closed before the cutoff, one file per partition and step"""
+        if dry_run:
+            found = self.candidates(closed_before, max_orders)
+            return {'closed_before': closed_before, 'dry_run': True, 'candidates': len(found),
+                    'partitions': sorted({self.partition_for(order) for order in found})}
+
+        run_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:6]}"
+        summary: Dict[str, Any] = {'closed_before': closed_before, 'run_id': run_id, 'archived': 0,
+                                   'skipped': 0, 'files': 0, 'bytes': 0, 'raw_bytes': 0, 'partitions': []}
+        sequence = 0
+        found = self.iter_candidates(closed_before)
+        while not (should_stop and should_stop()):
+            remaining = None if max_orders is None else max_orders - summary['archived'] - summary['skipped']
+            if remaining is not None and remaining <= 0:
+                break
+            batch = list(itertools.islice(found, ARCHIVE_FILE_ORDERS if remaining is None
+                                          else min(ARCHIVE_FILE_ORDERS, remaining)))
+            if not batch:
+                break
+            by_partition: Dict[str, List[Dict[str, Any]]] = {}
+            for order in batch:
+                by_partition.setdefault(self.partition_for(order), []).append(order)
+
+            for partition, orders in sorted(by_partition.items()):
+                documents = [self._with_items(order) for order in orders]
+                key = f"{self.partition_prefix(partition)}/{run_id}-{sequence:04d}.ndjson.gz"
+                sequence += 1
+                file = dict(self.write_file(key, documents), archived_at=datetime.utcnow().isoformat())
+                with self.index.batch_writer() as batch_writer:
+                    for order in orders:
+                        batch_writer.put_item(Item=dict(file['locations'][order['order_id']],
+                                                        order_id=order['order_id'], key=key,
+                                                        partition=partition, archived_at=file['archived_at']))
+                self._add_to_manifest(partition, file)
+                marked = self._settle(orders, file)
+                summary['archived'] += len(marked)
+                summary['skipped'] += len(orders) - len(marked)
+                summary['files'] += 1
+                summary['bytes'] += file['bytes']
+                summary['raw_bytes'] += file['raw_bytes']
+                if partition not in summary['partitions']:
+                    summary['partitions'].append(partition)
+
+        count('archive.orders', summary['archived'])
+        summary['partitions'].sort()
+        logger.info("Archived closed orders", **{k: v for k, v in summary.items() if k != 'partitions'})
+        return summary
+
+    def read_block(self, entry: Dict[str, Any]) -> bytes:
+        offset, length = int(entry['offset']), int(entry['length'])
+        response = self.s3.get_object(Bucket=self.bucket, Key=entry['key'],
+                                      Range=f"bytes={offset}-{offset + length - 1}")
+        return gzip.decompress(response['Body'].read())
+
+    @timed('archive.get')
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """An archived order: one index GetItem and one ranged GET of its gzip member"""
+        entry = self.index.get_item(Key={'order_id': order_id}).get('Item')
+        if not entry:
+            return None
+        marker = f'"order_id":"{order_id}"'.encode('utf-8')
+        for line in self.read_block(entry).splitlines():
+            if marker in line:
+                order = self.decode(line)
+                if order['order_id'] == order_id:
+                    return dict(order, archived_at=entry['archived_at'])
+        logger.error("Archived order missing from its block", order_id=order_id, key=entry['key'])
+        return None
+
+    def forget(self, order_id: str) -> None:
+        """Drop the index entry of an order deleted while it waited for TTL"""
+        self.index.delete_item(Key={'order_id': order_id})
+
+    def read_file(self, key: str) -> Iterator[Dict[str, Any]]:
+        body = self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        for line in gzip.decompress(body).splitlines():  # handles the concatenated members
+            if line:
+                yield self.decode(line)
+
+    def _write_back(self, order: Dict[str, Any], restored_at: str) -> None:
+        """Put an order removed by TTL back, in the layout new orders get"""
+        from boto3.dynamodb.types import TypeSerializer
+
+        serializer = TypeSerializer()
+        item = {name: value for name, value in order.items() if name not in STORAGE_FIELDS}
+        if self.lines:
+            pages = self.lines.pages(order['order_id'], [serializer.serialize(line) for line in order['items']])
+            for page in pages:
+                # restored_at tells the analytics stream these pages are not new sales
+                self.lines.writer.client.put_item(TableName=self.lines.table_name,
+                                                  Item=dict(page.to_attributes(), restored_at={'S': restored_at}))
+            del item['items']
+            item.update(item_count=len(order['items']), line_pages=len(pages))
+        self.orders.meta.client.put_item(
+            TableName=self.orders_table_name,
+            Item=dict(item, restored_at=restored_at),
+            ConditionExpression='attribute_not_exists(order_id)'
+        )
+
+    def _unmark(self, order: Dict[str, Any], hot: Dict[str, Any], restored_at: str) -> bool:
+        """Take an order TTL has not removed yet back from the sweep"""
+        from botocore.exceptions import ClientError
+
+        unmark = {'UpdateExpression': 'REMOVE archived_at, expires_at',
+                  'ConditionExpression': 'attribute_exists(archived_at)'}
+        try:
+            self.orders.update_item(Key={'order_id': order['order_id']},
+                                    UpdateExpression='SET restored_at = :restored_at REMOVE archived_at, expires_at',
+                                    ConditionExpression=unmark['ConditionExpression'],
+                                    ExpressionAttributeValues={':restored_at': restored_at})
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return False
+        pages = int(hot.get('line_pages', 0))
+        if pages:
+            rewrite = None
+            for page in range(pages):
+                try:
+                    self.lines.table.update_item(Key={'order_id': order['order_id'], 'page': page}, **unmark)
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    # TTL got to this page first; write it again from the archived items
+                    from boto3.dynamodb.types import TypeSerializer
+                    rewrite = rewrite or self.lines.pages(order['order_id'], [
+                        TypeSerializer().serialize(line) for line in order['items']])
+                    self.lines.writer.client.put_item(
+                        TableName=self.lines.table_name,
+                        Item=dict(rewrite[page].to_attributes(), restored_at={'S': restored_at}))
+        return True
+
+    def _restore_one(self, order: Dict[str, Any]) -> str:
+        from botocore.exceptions import ClientError
+
+        order_id, restored_at = order['order_id'], datetime.utcnow().isoformat()
+        hot = self.orders.get_item(Key={'order_id': order_id}, ConsistentRead=True).get('Item')
+        if hot and 'archived_at' not in hot:
+            outcome = 'present'
+        elif hot and self._unmark(order, hot, restored_at):
+            outcome = 'unmarked'
+        else:
+            try:
+                self._write_back(order, restored_at)
+                outcome = 'restored'
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                outcome = 'present'
+        self.index.delete_item(Key={'order_id': order_id})
+        if self.changes and outcome != 'present':
+            self.changes.append([self.changes.order_restored(order)])
+        return outcome
+
+    @timed('archive.restore')
+    def restore(self, order_ids: Optional[List[str]] = None, partition: Optional[str] = None) -> Dict[str, int]:
+        """Move archived orders back to the orders table, by id or a whole partition"""
+        counts = {'restored': 0, 'unmarked': 0, 'present': 0, 'missing': 0}
+        if partition:
+            manifest = self.read_manifest(partition)
+            if not manifest:
+                raise ValueError(f"No archive partition {partition}")
+            for file in manifest['files']:
+                for order in self.read_file(file['key']):
+                    # The index names the copy to restore; other copies are stale or restored already
+                    entry = self.index.get_item(Key={'order_id': order['order_id']}, ConsistentRead=True).get('Item')
+                    if entry and entry['key'] == file['key']:
+                        counts[self._restore_one(order)] += 1
+        for order_id in order_ids or []:
+            order = self.get(order_id)
+            if not order:
+                counts['missing'] += 1
+                continue
+            counts[self._restore_one(order)] += 1
+        logger.info("Restored archived orders", partition=partition, **counts)
+        return counts
+
+def cutoff(older_than_days: float) -> str:
+    """closed_before for orders closed more than older_than_days ago"""
+    return (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Archive closed orders to S3, or restore archived ones')
+    parser.add_argument('--table', default=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'))
+    parser.add_argument('--bucket', default=os.environ.get('DOCUMENTS_BUCKET', 'scm-stack-docs-975050073542'))
+    parser.add_argument('--index-table', default=os.environ.get('ARCHIVE_INDEX_TABLE', 'scm-stack-archive-index'))
+    parser.add_argument('--lines-table', default=os.environ.get('ORDER_LINES_TABLE'),
+                        help='lines table of orders stored as headers')
+    parser.add_argument('--changes-table', default=os.environ.get('CHANGES_TABLE'),
+                        help='change feed to record archived and restored orders in')
+    commands = parser.add_subparsers(dest='command', required=True)
+    sweep = commands.add_parser('sweep', help='archive orders closed more than --older-than-days ago')
+    sweep.add_argument('--older-than-days', type=float,
+                       default=float(os.environ.get('ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)))
+    sweep.add_argument('--max-orders', type=int)
+    sweep.add_argument('--dry-run', action='store_true', help='count the orders that would move')
+    restore = commands.add_parser('restore', help='move archived orders back to the orders table')
+    target = restore.add_mutually_exclusive_group(required=True)
+    target.add_argument('--order-id', action='append', help='repeat for several orders')
+    target.add_argument('--partition', help='closing day, YYYY-MM-DD')
+    commands.add_parser('partitions', help='print the manifest of every partition')
+    args = parser.parse_args(argv)
+
+    lines = changes = None
+    if args.lines_table:
+        from .lines import LineStore
+        lines = LineStore(args.lines_table)
+    if args.changes_table:
+        from .changes import ChangeLog
+        changes = ChangeLog(args.changes_table)
+    archive = OrderArchive(args.bucket, args.index_table, args.table, lines=lines, changes=changes)
+    if args.command == 'sweep':
+        result: Any = archive.sweep(cutoff(args.older_than_days), max_orders=args.max_orders,
+                                    dry_run=args.dry_run)
+    elif args.command == 'partitions':
+        result = [archive.read_manifest(partition) for partition in archive.partitions()]
+    else:
+        result = archive.restore(order_ids=args.order_id, partition=args.partition)
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
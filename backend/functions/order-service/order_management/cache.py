@@ -0,0 +1,299 @@
+# functions/order-service/order_management/cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+
+from . import serialization
+from .processor import StorageHandler, DEFAULT_PAGE_SIZE
+
+class CacheBackend(ABC):
+    """Key/value cache holding {'body': str, 'etag': str} order entries"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    def add(self, key: str, value: Dict[str, Any], ttl: float) -> bool:
+        """Set only if the key holds nothing (live); returns whether it was set"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        pass
+
+class LRUCache(CacheBackend):
+    """In-process LRU with per-entry TTL, shared by warm invocations of a container"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key: str, value: Dict[str, Any], ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+        self.set(key, value, ttl)
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'size': len(self._entries)
+        }
+
+class LocalSharedCache(CacheBackend):
+    """Stand-in for a shared cache; stores serialized values like a network cache would"""
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(entry[1])
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, json.dumps(value))
+
+    def add(self, key: str, value: Dict[str, Any], ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                return False
+            self._entries[key] = (time.time() + ttl, json.dumps(value))
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+class RedisCache(CacheBackend):
+    """Shared cache on Redis/ElastiCache; needs the optional redis package"""
+
+    def __init__(self, url: str, prefix: str = 'order:'):
+        import redis  # optional dependency, only needed when ORDER_CACHE_REDIS_URL is set
+        self.client = redis.Redis.from_url(url, socket_timeout=0.2)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    def add(self, key: str, value: Dict[str, Any], ttl: float) -> bool:
+        return bool(self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000), nx=True))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+# Left in the shared cache by a write, so a reader that fetched the order
+# before the write cannot put the old version back (fills only add)
+TOMBSTONE = {'invalidated': True}
+
+def make_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Serialize an order once; the body and its ETag are served from cache afterwards"""
+    body = serialization.dumps(item)
+    return {'body': body, 'etag': '"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'}
+
+class CachedStorageHandler(StorageHandler):
+    """Read-through cache in front of another StorageHandler.
+
+    Reads check the local LRU, then the shared backend, then storage. Every
+    write through this handler invalidates the order in both caches; other
+    containers see the change once their local entry's TTL runs out. In the
+    shared cache the invalidation is a tombstone kept for tombstone_ttl:
+    reads treat it as a miss, and a miss fills the shared cache only where
+    nothing is set, so it cannot overwrite a newer invalidation.
+    """
+
+    def __init__(self, inner: StorageHandler, local: CacheBackend,
+                 shared: Optional[CacheBackend] = None, ttl: float = 5.0, shared_ttl: float = 60.0,
+                 tombstone_ttl: float = 5.0):
+        self.inner = inner
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+        self.shared_ttl = shared_ttl
+        self.tombstone_ttl = tombstone_ttl
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything not cached (table, transact, ...) goes straight to storage
+        return getattr(self.inner, name)
+
+    def invalidate(self, id: str) -> None:
+        self.local.delete(id)
+        if self.shared:
+            self.shared.set(id, TOMBSTONE, self.tombstone_ttl)
+
+    def get_entry(self, id: str) -> Optional[Dict[str, Any]]:
+        """Return {'body', 'etag', 'cache'} for an order, or None if it does not exist"""
+        entry = self.local.get(id)
+        if entry is not None:
+            return dict(entry, cache='HIT')
+
+        invalidated = False
+        if self.shared:
+            entry = self.shared.get(id)
+            if entry == TOMBSTONE:
+                # Written moments ago; a concurrent reader may still hold the old version
+                invalidated = True
+            elif entry is not None:
+                self.local.set(id, entry, self.ttl)
+                return dict(entry, cache='HIT')
+
+        item = self.inner.get(id)
+        if item is None:
+            return None
+        entry = make_entry(item)
+        if not invalidated:
+            self.local.set(id, entry, self.ttl)
+            if self.shared:
+                self.shared.add(id, entry, self.shared_ttl)
+        return dict(entry, cache='MISS')
+
+    def get(self, id: str, consistent: bool = False) -> Optional[Dict[str, Any]]:
+        if consistent:
+            # Reads that precede a write skip the cache
+            return self.inner.get(id, consistent=True)
+        entry = self.get_entry(id)
+        return json.loads(entry['body']) if entry else None
+
+    def save(self, data: Dict[str, Any], extra_items: Optional[List[Dict[str, Any]]] = None,
+             line_pages: Optional[int] = None) -> Dict[str, Any]:
+        try:
+            return self.inner.save(data, extra_items=extra_items, line_pages=line_pages)
+        finally:
+            self.invalidate(data['order_id'])
+
+    def batch_save(self, items: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, str]:
+        try:
+            return self.inner.batch_save(items, **kwargs)
+        finally:
+            for item in items:
+                self.invalidate(item['order_id'])
+
+    def update(self, id: str, data: Dict[str, Any],
+               extra_items: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        try:
+            return self.inner.update(id, data, extra_items=extra_items)
+        finally:
+            self.invalidate(id)
+
+    def transition_status(self, id: str, status: str, expected_version: Optional[int] = None,
+                          extra_items: Optional[List[Dict[str, Any]]] = None,
+                          updated_at: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        try:
+            return self.inner.transition_status(id, status, expected_version=expected_version,
+                                                extra_items=extra_items, updated_at=updated_at)
+        finally:
+            self.invalidate(id)
+
+    def delete(self, id: str, extra_items: Optional[List[Dict[str, Any]]] = None,
+               expected_version: Optional[int] = None) -> None:
+        try:
+            self.inner.delete(id, extra_items=extra_items, expected_version=expected_version)
+        finally:
+            self.invalidate(id)
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        return self.inner.list_all()
+
+    def list_page(self, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None,
+                  filters: Optional[Dict[str, str]] = None, scan: bool = False) -> Dict[str, Any]:
+        return self.inner.list_page(limit=limit, next_token=next_token, filters=filters, scan=scan)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {'local': self.local.stats()}
+        if self.shared:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+def cached_from_env(inner: StorageHandler) -> CachedStorageHandler:
+    """Wrap a handler using ORDER_CACHE_* settings from the environment"""
+    shared: Optional[CacheBackend] = None
+    redis_url = os.environ.get('ORDER_CACHE_REDIS_URL')
+    if redis_url:
+        shared = RedisCache(redis_url)
+    return CachedStorageHandler(
+        inner,
+        local=LRUCache(max_entries=int(os.environ.get('ORDER_CACHE_MAX_ENTRIES', '1000'))),
+        shared=shared,
+        ttl=float(os.environ.get('ORDER_CACHE_TTL_SECONDS', '5')),
+        shared_ttl=float(os.environ.get('ORDER_CACHE_SHARED_TTL_SECONDS', '60')),
+        tombstone_ttl=float(os.environ.get('ORDER_CACHE_TOMBSTONE_SECONDS', '5'))
+    )
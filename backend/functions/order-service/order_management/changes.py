@@ -0,0 +1,229 @@
+# functions/order-service/order_management/changes.py
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from functools import cached_property
+from typing import Dict, Any, List, Optional
+
+from . import clients
+from .log import get_logger
+from .metrics import count, timed
+
+logger = get_logger(__name__)
+
+DEFAULT_CHANGES_PAGE_SIZE = 100
+MAX_CHANGES_PAGE_SIZE = 500
+MAX_WAIT_SECONDS = 20  # API Gateway gives up after 29 s
+POLL_INTERVAL_SECONDS = 1.0
+
+CURSOR_PATTERN = re.compile(r'^\d{16}(-[0-9a-f]{8})?$')
+RESPONSE_FIELDS = ('feed', 'expires_at')  # storage-only attributes left out of responses
+
+class ChangeLog:
+    """Time-ordered log of order changes, read incrementally with a cursor.
+
+    Every create, status change and delete appends a compact entry (no line
+    items) in the transaction that writes the order. Entries are partitioned
+    by hour and shard (feed = YYYY-MM-DDTHH#n, n < CHANGES_FEED_SHARDS, taken
+    from the seq's random suffix) so the current hour's writes spread over
+    several partitions, and sorted by seq = <microseconds since epoch,
+    16 digits>-<8 hex>, increasing within a container. Reads query every
+    shard of an hour and merge them by seq. A cursor is the last seq a
+    client has seen. With one shard, feed is the bare hour.
+
+    Writers stamp seq before their transaction commits, so an entry can
+    become visible slightly after a later-stamped one. Reads therefore stop
+    at a horizon CHANGES_SETTLE_MS in the past; once the horizon has passed a
+    seq, nothing earlier can still appear. Entries expire after
+    CHANGES_TTL_HOURS; an older cursor gets reset=true and must reload.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.ttl_seconds = int(os.environ.get('CHANGES_TTL_HOURS', '24')) * 3600
+        self.settle_micros = int(os.environ.get('CHANGES_SETTLE_MS', '2000')) * 1000
+        self.shards = max(1, int(os.environ.get('CHANGES_FEED_SHARDS', '4')))
+        self._lock = threading.Lock()
+        self._last_micros = 0
+        logger.debug("Initialized change log", table=table_name)
+
+    @cached_property
+    def dynamodb(self) -> Any:
+        return clients.get_resource('dynamodb')
+
+    @cached_property
+    def table(self) -> Any:
+        return self.dynamodb.Table(self.table_name)
+
+    @staticmethod
+    def hour_for(micros: int) -> str:
+        return datetime.utcfromtimestamp(micros / 1e6).strftime('%Y-%m-%dT%H')
+
+    def feeds_for(self, micros: int) -> List[str]:
+        """Every shard of the hour containing micros"""
+        hour = self.hour_for(micros)
+        return [hour] if self.shards == 1 else [f"{hour}#{n}" for n in range(self.shards)]
+
+    def _next_micros(self) -> int:
+        with self._lock:
+            self._last_micros = max(self._last_micros + 1, time.time_ns() // 1000)
+            return self._last_micros
+
+    def entry(self, event_type: str, order: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+        """Build one change entry; fields holds what the event changed"""
+        micros = self._next_micros()
+        suffix = os.urandom(4).hex()
+        entry = {
+            'feed': self.feeds_for(micros)[int(suffix, 16) % self.shards],
+            'seq': f"{micros:016d}-{suffix}",
+            'event': event_type,
+            'order_id': order['order_id'],
+            'at': datetime.utcfromtimestamp(micros / 1e6).isoformat(),
+            'expires_at': micros // 1000000 + self.ttl_seconds
+        }
+        entry.update((name, value) for name, value in fields.items() if value is not None)
+        return entry
+
+    def order_created(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        return self.entry('ORDER_CREATED', order, status=order['status'], customer_id=order['customer_id'],
+                          customer_name=order.get('customer_name'), total_amount=order['total_amount'],
+                          item_count=len(order['items']), created_at=order['created_at'],
+                          version=order.get('version'))
+
+    def status_updated(self, order: Dict[str, Any], status: str, previous_status: Optional[str] = None,
+                       version: Optional[int] = None) -> Dict[str, Any]:
+        return self.entry('STATUS_UPDATED', order, status=status, previous_status=previous_status,
+                          customer_id=order.get('customer_id'), version=version)
+
+    def order_deleted(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        return self.entry('ORDER_DELETED', order, previous_status=order.get('status'),
+                          customer_id=order.get('customer_id'))
+
+    def order_archived(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        return self.entry('ORDER_ARCHIVED', order, status=order.get('status'), customer_id=order.get('customer_id'))
+
+    def order_restored(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        return self.entry('ORDER_RESTORED', order, status=order['status'], customer_id=order['customer_id'],
+                          customer_name=order.get('customer_name'), total_amount=order['total_amount'],
+                          item_count=len(order['items']), created_at=order['created_at'],
+                          version=order.get('version'))
+
+    def put_item(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """TransactWriteItems entry appending a change"""
+        return {'Put': {'TableName': self.table_name, 'Item': entry}}
+
+    @timed('changes.append')
+    def append(self, entries: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Append changes outside a transaction (after BatchWriteItem).
+
+        Returns {order_id: error} for entries that could not be written.
+        """
+        failures: Dict[str, str] = {}
+        try:
+            with self.table.batch_writer() as batch:
+                for entry in entries:
+                    batch.put_item(Item=entry)
+        except Exception as e:
+            logger.error("Error appending changes", count=len(entries), error=str(e))
+            failures = {entry['order_id']: str(e) for entry in entries}
+        return failures
+
+    def horizon(self) -> str:
+        """Cursor up to which every entry has committed"""
+        return f"{time.time_ns() // 1000 - self.settle_micros:016d}"
+
+    def _read_once(self, since: str, limit: int) -> Dict[str, Any]:
+        horizon = self.horizon()
+        if since >= horizon:
+            return {'changes': [], 'cursor': since, 'has_more': False}
+
+        changes: List[Dict[str, Any]] = []
+        hour, last_hour = int(since[:16]) // 3600000000, int(horizon) // 3600000000
+        while hour <= last_hour and len(changes) < limit:
+            # Each shard's first `needed` entries hold the hour's first `needed`
+            needed = limit - len(changes)
+            merged: List[Dict[str, Any]] = []
+            for feed in self.feeds_for(hour * 3600000000):
+                merged.extend(self._query_feed(feed, since, horizon, needed))
+            merged.sort(key=lambda item: item['seq'])
+            changes.extend(merged[:needed + 1])
+            hour += 1
+
+        has_more = len(changes) >= limit
+        changes = changes[:limit]
+        for change in changes:
+            for name in RESPONSE_FIELDS:
+                change.pop(name, None)
+        return {
+            'changes': changes,
+            'cursor': changes[-1]['seq'] if has_more else horizon,
+            'has_more': has_more
+        }
+
+    def _query_feed(self, feed: str, since: str, horizon: str, needed: int) -> List[Dict[str, Any]]:
+        """Up to needed + 1 entries of one feed after since (the extra one tells has_more)"""
+        from boto3.dynamodb.conditions import Key
+
+        items: List[Dict[str, Any]] = []
+        # BETWEEN is inclusive, so the entry at the cursor comes back once more
+        kwargs: Dict[str, Any] = {
+            'KeyConditionExpression': Key('feed').eq(feed) & Key('seq').between(since, horizon),
+            'Limit': needed + 1
+        }
+        while len(items) <= needed:
+            response = self.table.query(**kwargs)
+            items.extend(item for item in response['Items'] if item['seq'] != since)
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            kwargs['Limit'] = needed + 2 - len(items)
+        return items[:needed + 1]
+
+    @timed('changes.read')
+    def read(self, since: Optional[str] = None, limit: Optional[int] = None,
+             wait_seconds: float = 0) -> Dict[str, Any]:
+        """Changes after a cursor, oldest first, with the cursor to pass next time.
+
+        Without since, returns no changes and the current cursor (take it
+        before loading the full list). With wait_seconds, polls until a change
+        arrives or the wait runs out.
+        """
+        if since is None:
+            return {'changes': [], 'cursor': self.horizon(), 'has_more': False}
+        if not CURSOR_PATTERN.match(since):
+            raise ValueError("Invalid cursor")
+        if int(since[:16]) < (time.time_ns() // 1000) - self.ttl_seconds * 1000000:
+            count('changes.reset')
+            return {'changes': [], 'cursor': self.horizon(), 'has_more': False, 'reset': True}
+
+        limit = max(1, min(limit or DEFAULT_CHANGES_PAGE_SIZE, MAX_CHANGES_PAGE_SIZE))
+        deadline = time.monotonic() + max(0.0, min(wait_seconds, MAX_WAIT_SECONDS))
+        while True:
+            page = self._read_once(since, limit)
+            remaining = deadline - time.monotonic()
+            if page['changes'] or remaining <= 0:
+                return page
+            since = page['cursor']
+            time.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+
+NOTIFICATION_TYPES = {'ORDER_CREATED': 'success', 'ORDER_DELETED': 'info'}
+# Moves between the orders table and the archive change listings but are not news to the panel
+QUIET_EVENTS = ('ORDER_ARCHIVED', 'ORDER_RESTORED')
+
+def notification(change: Dict[str, Any]) -> Dict[str, Any]:
+    """A change rendered for the notification panel"""
+    order_id, event = change['order_id'], change['event']
+    if event == 'ORDER_CREATED':
+        message = f"Order {order_id} created" + (f" for {change['customer_name']}" if change.get('customer_name') else '')
+    elif event == 'ORDER_DELETED':
+        message = f"Order {order_id} deleted"
+    elif change.get('previous_status'):
+        message = f"Order {order_id} moved from {change['previous_status']} to {change['status']}"
+    else:
+        message = f"Order {order_id} moved to {change['status']}"
+    kind = 'warning' if change.get('status') == 'CANCELLED' else NOTIFICATION_TYPES.get(event, 'info')
+    return {'id': change['seq'], 'type': kind, 'event': event, 'message': message,
+            'order_id': order_id, 'timestamp': change['at']}
@@ -0,0 +1,62 @@
+# functions/order-service/order_management/clients.py
+
+import os
+import threading
+from typing import Dict, Any, Tuple
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# Clients and resources live for the lifetime of the Lambda container so warm
+# invocations skip endpoint resolution and reuse pooled TLS connections.
+# boto3 itself is imported on first use: it is most of the module import time,
+# and CORS preflights never need it.
+_lock = threading.Lock()
+_session = None
+_clients: Dict[Tuple[str, str], Any] = {}
+
+def _client_config() -> Any:
+    """Build the shared botocore config from the environment"""
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '10')),
+        tcp_keepalive=os.environ.get('AWS_TCP_KEEPALIVE', 'true').lower() == 'true',
+        connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', '2')),
+        read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', '10')),
+        retries={'mode': 'standard', 'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '3'))}
+    )
+
+def _get(kind: str, service_name: str) -> Any:
+    key = (kind, service_name)
+    cached = _clients.get(key)
+    if cached is not None:
+        return cached
+
+    global _session
+    with _lock:
+        if key not in _clients:
+            if _session is None:
+                import boto3
+
+                _session = boto3.session.Session()
+            factory = _session.resource if kind == 'resource' else _session.client
+            _clients[key] = factory(service_name, config=_client_config())
+            logger.debug("Created boto3 %s", kind, service=service_name)
+        return _clients[key]
+
+def get_client(service_name: str) -> Any:
+    """Return the container-wide boto3 client for a service"""
+    return _get('client', service_name)
+
+def get_resource(service_name: str) -> Any:
+    """Return the container-wide boto3 resource for a service"""
+    return _get('resource', service_name)
+
+def reset() -> None:
+    """Drop all cached clients so the next call builds fresh ones (tests/benchmarks)"""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
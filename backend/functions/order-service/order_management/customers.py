@@ -0,0 +1,176 @@
+# functions/order-service/order_management/customers.py
+
+import argparse
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+from functools import cached_property
+from typing import Dict, Any, List, Optional
+
+from . import clients
+from .log import get_logger
+from .metrics import timed
+from .processor import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_page_token, decode_page_token
+
+logger = get_logger(__name__)
+
+SUMMARY_FIELDS = ('order_count', 'cancelled_count', 'lifetime_value')
+
+class CustomerStore:
+    """Per-customer order aggregates in the customers table.
+
+    Each customer item carries order_count, cancelled_count, lifetime_value
+    (the total of the customer's orders that are not cancelled) and the time
+    of the customer's first and last order. Every order create, cancel and
+    delete changes the aggregate in the transaction that writes the order,
+    so a summary is one GetItem however many orders the customer has.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        logger.debug("Initialized customer store", table=table_name)
+
+    @cached_property
+    def dynamodb(self) -> Any:
+        return clients.get_resource('dynamodb')
+
+    @cached_property
+    def table(self) -> Any:
+        return self.dynamodb.Table(self.table_name)
+
+    @staticmethod
+    def _created_update(customer_id: str, customer_name: Optional[str], orders: int,
+                        amount: Decimal, last_order_at: str, first_order_at: str) -> Dict[str, Any]:
+        names = ['last_order_at = :last', 'first_order_at = if_not_exists(first_order_at, :first)',
+                 'updated_at = :time']
+        values: Dict[str, Any] = {':orders': orders, ':amount': amount, ':last': last_order_at,
+                                  ':first': first_order_at, ':time': datetime.utcnow().isoformat()}
+        if customer_name:
+            names.append('customer_name = :name')
+            values[':name'] = customer_name
+        return {
+            'Key': {'customer_id': customer_id},
+            'UpdateExpression': f"SET {', '.join(names)} ADD order_count :orders, lifetime_value :amount",
+            'ExpressionAttributeValues': values
+        }
+
+    def order_created(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """TransactWriteItems entry counting a new order"""
+        update = self._created_update(order['customer_id'], order.get('customer_name'), 1,
+                                      Decimal(str(order['total_amount'])), order['created_at'], order['created_at'])
+        return {'Update': dict(update, TableName=self.table_name)}
+
+    def order_cancelled(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """TransactWriteItems entry taking a cancelled order out of the lifetime value"""
+        return {'Update': {
+            'TableName': self.table_name,
+            'Key': {'customer_id': order['customer_id']},
+            'UpdateExpression': 'SET updated_at = :time ADD cancelled_count :one, lifetime_value :amount',
+            'ExpressionAttributeValues': {':one': 1, ':amount': -Decimal(str(order['total_amount'])),
+                                          ':time': datetime.utcnow().isoformat()}
+        }}
+
+    def order_deleted(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """TransactWriteItems entry removing a deleted order from the aggregate"""
+        cancelled = order['status'] == 'CANCELLED'
+        amount = Decimal('0') if cancelled else -Decimal(str(order['total_amount']))
+        return {'Update': {
+            'TableName': self.table_name,
+            'Key': {'customer_id': order['customer_id']},
+            'UpdateExpression': ('SET updated_at = :time '
+                                 'ADD order_count :minus, cancelled_count :cancelled, lifetime_value :amount'),
+            'ExpressionAttributeValues': {':minus': -1, ':cancelled': -1 if cancelled else 0, ':amount': amount,
+                                          ':time': datetime.utcnow().isoformat()}
+        }}
+
+    @timed('customers.apply_created')
+    def apply_created(self, orders: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Count orders written outside a transaction (BatchWriteItem), one update per customer.
+
+        Returns {customer_id: error} for aggregates that could not be updated.
+        """
+        groups: Dict[str, Dict[str, Any]] = {}
+        for order in orders:
+            group = groups.setdefault(order['customer_id'], {
+                'customer_name': order.get('customer_name'), 'orders': 0, 'amount': Decimal('0'),
+                'first': order['created_at'], 'last': order['created_at']
+            })
+            group['orders'] += 1
+            group['amount'] += Decimal(str(order['total_amount']))
+            group['first'] = min(group['first'], order['created_at'])
+            group['last'] = max(group['last'], order['created_at'])
+
+        failures: Dict[str, str] = {}
+        for customer_id, group in groups.items():
+            try:
+                self.table.update_item(**self._created_update(customer_id, group['customer_name'], group['orders'],
+                                                              group['amount'], group['last'], group['first']))
+            except Exception as e:
+                logger.error("Error updating customer aggregate", customer_id=customer_id, error=str(e))
+                failures[customer_id] = str(e)
+        return failures
+
+    @timed('customers.get')
+    def get(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        response = self.table.get_item(Key={'customer_id': customer_id})
+        return response.get('Item')
+
+    @timed('customers.list')
+    def list_page(self, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None) -> Dict[str, Any]:
+        """One page of customer aggregates; reads only the customers table"""
+        kwargs: Dict[str, Any] = {'Limit': max(1, min(limit, MAX_PAGE_SIZE))}
+        if next_token:
+            kwargs['ExclusiveStartKey'] = decode_page_token(next_token)
+        response = self.table.scan(**kwargs)
+        return {
+            'items': response.get('Items', []),
+            'next_token': encode_page_token(response.get('LastEvaluatedKey'))
+        }
+
+    def rebuild(self, orders_table: str) -> int:
+        """Recompute every aggregate from the orders table (for a new or drifted table)"""
+        table = self.dynamodb.Table(orders_table)
+        totals: Dict[str, Dict[str, Any]] = {}
+        kwargs: Dict[str, Any] = {
+            'ProjectionExpression': 'customer_id, customer_name, #status, total_amount, created_at',
+            'ExpressionAttributeNames': {'#status': 'status'}
+        }
+        while True:
+            response = table.scan(**kwargs)
+            for order in response.get('Items', []):
+                item = totals.setdefault(order['customer_id'], {
+                    'customer_id': order['customer_id'], 'order_count': 0, 'cancelled_count': 0,
+                    'lifetime_value': Decimal('0'), 'first_order_at': order['created_at'],
+                    'last_order_at': order['created_at']
+                })
+                if order.get('customer_name'):
+                    item['customer_name'] = order['customer_name']
+                item['order_count'] += 1
+                if order['status'] == 'CANCELLED':
+                    item['cancelled_count'] += 1
+                else:
+                    item['lifetime_value'] += Decimal(str(order['total_amount']))
+                item['first_order_at'] = min(item['first_order_at'], order['created_at'])
+                item['last_order_at'] = max(item['last_order_at'], order['created_at'])
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        now = datetime.utcnow().isoformat()
+        with self.table.batch_writer() as batch:
+            for item in totals.values():
+                batch.put_item(Item=dict(item, updated_at=now))
+        logger.info("Rebuilt customer aggregates", customers=len(totals))
+        return len(totals)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Rebuild the per-customer order aggregates')
+    parser.add_argument('--orders-table', default=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'))
+    parser.add_argument('--customers-table', default=os.environ.get('CUSTOMERS_TABLE', 'scm-stack-customers'))
+    args = parser.parse_args(argv)
+    customers = CustomerStore(args.customers_table).rebuild(args.orders_table)
+    print(json.dumps({'customers': customers}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+# functions/order-service/order_management/export.py
+
+import argparse
+import io
+import json
+import os
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, List
+
+from . import clients, serialization
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+EXPORT_PREFIX = 'exports'
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for every part but the last
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+class OrderExporter:
+    """Parallel Scan of the orders table streamed to S3 as NDJSON (optionally gzip).
+
+    Each scan segment runs on its own thread and writes its own multipart
+    upload, flushing a part whenever the buffered output reaches part_size, so
+    memory stays bounded by segments * part_size. After every part the segment
+    checkpoint (upload id, uploaded parts and the next ExclusiveStartKey) is
+    written next to the export, which lets an interrupted export resume. A
+    job record (job.json) written first keeps the segment count, so progress
+    is read back with the count the export was started with.
+    Orders stored as a header (line_pages) are exported with their items
+    read back from the lines table, so every row has the same shape.
+    """
+
+    def __init__(self, table_name: str, bucket_name: str, segments: int = 8,
+                 compress: bool = True, part_size: int = DEFAULT_PART_SIZE,
+                 page_size: int = 1000, lines_table: Optional[str] = None):
+        self.dynamodb = clients.get_resource('dynamodb')
+        self.s3 = clients.get_client('s3')
+        self.table_name = table_name
+        self.bucket = bucket_name
+        self.segments = max(1, segments)
+        self.compress = compress
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.page_size = page_size
+        self.lines_table = lines_table
+
+    @staticmethod
+    def new_export_id() -> str:
+        return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:6]}"
+
+    def _prefix(self, export_id: str) -> str:
+        return f"{EXPORT_PREFIX}/{export_id}"
+
+    def _segment_key(self, export_id: str, segment: int) -> str:
+        extension = 'ndjson.gz' if self.compress else 'ndjson'
+        return f"{self._prefix(export_id)}/segment-{segment:04d}.{extension}"
+
+    def _checkpoint_key(self, export_id: str, segment: int) -> str:
+        return f"{self._prefix(export_id)}/checkpoints/segment-{segment:04d}.json"
+
+    def _job_key(self, export_id: str) -> str:
+        return f"{self._prefix(export_id)}/job.json"
+
+    def _load_json(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=key)
+            return json.loads(response['Body'].read())
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def _save_job(self, export_id: str) -> None:
+        """Record the segment count of a new export; a resume must use the same one"""
+        job = self._load_json(self._job_key(export_id))
+        if job:
+            if job['segments'] != self.segments:
+                raise ValueError(f"Export {export_id} was started with {job['segments']} segments")
+            return
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self._job_key(export_id),
+            Body=json.dumps({'export_id': export_id, 'segments': self.segments, 'compress': self.compress,
+                             'started_at': datetime.utcnow().isoformat()}),
+            ContentType='application/json'
+        )
+
+    def _load_checkpoint(self, export_id: str, segment: int) -> Optional[Dict[str, Any]]:
+        return self._load_json(self._checkpoint_key(export_id, segment))
+
+    def _save_checkpoint(self, export_id: str, checkpoint: Dict[str, Any]) -> None:
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self._checkpoint_key(export_id, checkpoint['segment']),
+            Body=serialization.dumps(checkpoint, decimal_mode=serialization.STRING),
+            ContentType='application/json'
+        )
+
+    def _join_lines(self, client: Any, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Put a header's line pages back into its items"""
+        if 'line_pages' not in item:
+            return item
+        if not self.lines_table:
+            raise ValueError(f"Order {item['order_id']} keeps its line items in a lines table; pass --lines-table")
+        kwargs: Dict[str, Any] = {
+            'TableName': self.lines_table,
+            'KeyConditionExpression': 'order_id = :order_id',
+            'ExpressionAttributeValues': {':order_id': item['order_id']}
+        }
+        lines: List[Dict[str, Any]] = []
+        while True:
+            response = client.query(**kwargs)
+            for page in response.get('Items', []):
+                lines.extend(page['items'])
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        item = dict(item, items=lines)
+        del item['line_pages']
+        return item
+
+    def _new_compressor(self):
+        # wbits=31 writes a gzip member; members concatenate into a valid gzip file
+        return zlib.compressobj(6, zlib.DEFLATED, 31) if self.compress else None
+
+    def export_segment(self, export_id: str, segment: int,
+                       should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """Export one scan segment, resuming from its checkpoint if present"""
+        checkpoint = self._load_checkpoint(export_id, segment) or {
+            'segment': segment,
+            'total_segments': self.segments,
+            'key': self._segment_key(export_id, segment),
+            'upload_id': None,
+            'parts': [],
+            'last_evaluated_key': None,
+            'rows': 0,
+            'done': False
+        }
+        if checkpoint.get('total_segments', self.segments) != self.segments:
+            raise ValueError(f"Export {export_id} was started with {checkpoint['total_segments']} segments")
+        if checkpoint['done']:
+            return checkpoint
+
+        if not checkpoint['upload_id']:
+            upload = self.s3.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=checkpoint['key'],
+                ContentType='application/x-ndjson'
+            )
+            checkpoint['upload_id'] = upload['UploadId']
+            self._save_checkpoint(export_id, checkpoint)
+
+        client = self.dynamodb.meta.client
+        out = io.BytesIO()
+        compressor = self._new_compressor()
+        scan_kwargs: Dict[str, Any] = {
+            'TableName': self.table_name,
+            'Segment': segment,
+            'TotalSegments': self.segments,
+            'Limit': self.page_size
+        }
+        start_key = checkpoint['last_evaluated_key']
+        buffered_rows = 0
+
+        while True:
+            if should_stop and should_stop():
+                # Buffered rows are dropped and re-read from the last checkpoint on resume
+                logger.info("Pausing export segment", export_id=export_id, segment=segment, rows=checkpoint['rows'])
+                return checkpoint
+
+            if start_key:
+                scan_kwargs['ExclusiveStartKey'] = start_key
+            response = client.scan(**scan_kwargs)
+            items = [self._join_lines(client, item) for item in response.get('Items', [])]
+
+            chunk = b''.join(serialization.dumps_bytes(item) + b'\n' for item in items)
+            out.write(compressor.compress(chunk) if compressor else chunk)
+            buffered_rows += len(items)
+            start_key = response.get('LastEvaluatedKey')
+
+            # Parts are cut on page boundaries so the checkpoint key matches the uploaded bytes
+            if out.tell() >= self.part_size or not start_key:
+                if compressor:
+                    out.write(compressor.flush())
+                    compressor = self._new_compressor()
+                if out.tell():
+                    part_number = len(checkpoint['parts']) + 1
+                    part = self.s3.upload_part(
+                        Bucket=self.bucket,
+                        Key=checkpoint['key'],
+                        UploadId=checkpoint['upload_id'],
+                        PartNumber=part_number,
+                        Body=out.getvalue()
+                    )
+                    checkpoint['parts'].append({'PartNumber': part_number, 'ETag': part['ETag']})
+                out = io.BytesIO()
+                checkpoint['rows'] += buffered_rows
+                checkpoint['last_evaluated_key'] = start_key
+                buffered_rows = 0
+                self._save_checkpoint(export_id, checkpoint)
+
+            if not start_key:
+                break
+
+        if checkpoint['parts']:
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=checkpoint['key'],
+                UploadId=checkpoint['upload_id'],
+                MultipartUpload={'Parts': checkpoint['parts']}
+            )
+        else:
+            # Empty segment: S3 will not complete an upload without parts
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=checkpoint['key'],
+                                           UploadId=checkpoint['upload_id'])
+            self.s3.put_object(Bucket=self.bucket, Key=checkpoint['key'], Body=b'')
+        checkpoint['done'] = True
+        self._save_checkpoint(export_id, checkpoint)
+        logger.info("Export segment complete", export_id=export_id, segment=segment, rows=checkpoint['rows'])
+        return checkpoint
+
+    def run(self, export_id: Optional[str] = None,
+            should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """Export every segment in parallel and write the manifest when all are done"""
+        export_id = export_id or self.new_export_id()
+        logger.info("Starting export", export_id=export_id, segments=self.segments)
+        self._save_job(export_id)
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.segments) as pool:
+            checkpoints: List[Dict[str, Any]] = list(pool.map(
+                lambda segment: self.export_segment(export_id, segment, should_stop),
+                range(self.segments)
+            ))
+
+        elapsed = time.monotonic() - started
+        rows = sum(c['rows'] for c in checkpoints)
+        summary = {
+            'export_id': export_id,
+            'complete': all(c['done'] for c in checkpoints),
+            'segments': self.segments,
+            'format': 'ndjson.gz' if self.compress else 'ndjson',
+            'files': [c['key'] for c in checkpoints],
+            'rows': rows,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed > 0 else None
+        }
+        if summary['complete']:
+            summary['completed_at'] = datetime.utcnow().isoformat()
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=f"{self._prefix(export_id)}/manifest.json",
+                Body=json.dumps(summary),
+                ContentType='application/json'
+            )
+        logger.info("Export finished", export_id=export_id, rows=rows, seconds=round(elapsed, 1),
+                    rows_per_second=summary['rows_per_second'])
+        return summary
+
+    def status(self, export_id: str) -> Optional[Dict[str, Any]]:
+        """Return the manifest of a finished export, or checkpoint progress of a running one.
+
+        The segment count comes from the export itself: its job record, or
+        for exports started before there was one, checkpoint 0.
+        """
+        manifest = self._load_json(f"{self._prefix(export_id)}/manifest.json")
+        if manifest:
+            return manifest
+
+        job = self._load_json(self._job_key(export_id)) or self._load_checkpoint(export_id, 0)
+        if not job:
+            return None
+        segments = job.get('segments') or job['total_segments']
+        checkpoints = [self._load_checkpoint(export_id, segment) for segment in range(segments)]
+        return {
+            'export_id': export_id,
+            'complete': False,
+            'segments': segments,
+            'segments_done': sum(1 for c in checkpoints if c and c['done']),
+            'rows': sum(c['rows'] for c in checkpoints if c)
+        }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Export all orders to S3 as NDJSON')
+    parser.add_argument('--table', default=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'))
+    parser.add_argument('--bucket', default=os.environ.get('DOCUMENTS_BUCKET', 'scm-stack-docs-975050073542'))
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--no-compress', action='store_true', help='write plain NDJSON instead of gzip')
+    parser.add_argument('--part-size-mb', type=int, default=DEFAULT_PART_SIZE // (1024 * 1024))
+    parser.add_argument('--export-id', help='resume an existing export from its checkpoints')
+    parser.add_argument('--lines-table', default=os.environ.get('ORDER_LINES_TABLE'),
+                        help='lines table of orders stored as headers')
+    args = parser.parse_args(argv)
+
+    exporter = OrderExporter(
+        table_name=args.table,
+        bucket_name=args.bucket,
+        segments=args.segments,
+        compress=not args.no_compress,
+        part_size=args.part_size_mb * 1024 * 1024,
+        lines_table=args.lines_table
+    )
+    print(json.dumps(exporter.run(export_id=args.export_id), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# functions/order-service/order_management/inventory.py
+
+import argparse
+import csv
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+from functools import cached_property
+from typing import Dict, Any, List, Optional, Set
+
+from . import clients
+from .log import get_logger
+from .metrics import timed
+from .processor import InsufficientStockError
+
+logger = get_logger(__name__)
+
+MAX_TRANSACT_ITEMS = 100  # TransactWriteItems limit
+
+class InventoryStore:
+    """Stock levels in the inventory table.
+
+    Orders reserve stock inside the transaction that writes the order: every
+    product gets a conditional decrement (stock_level >= quantity), so two
+    orders racing for the last unit cannot both commit. Cancelling or
+    deleting an order puts the stock back in the transaction that changes
+    the order. A product without a row has no stock, so the table is seeded
+    (main) before INVENTORY_RESERVATIONS_ENABLED turns reservations on.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        logger.debug("Initialized inventory store", table=table_name)
+
+    @cached_property
+    def dynamodb(self) -> Any:
+        return clients.get_resource('dynamodb')
+
+    @cached_property
+    def table(self) -> Any:
+        return self.dynamodb.Table(self.table_name)
+
+    @staticmethod
+    def quantities(items: List[Dict[str, Any]]) -> Dict[str, Decimal]:
+        """Total quantity per product; a transaction may touch each item only once"""
+        totals: Dict[str, Decimal] = {}
+        for item in items:
+            totals[item['product_id']] = totals.get(item['product_id'], Decimal('0')) + Decimal(str(item['quantity']))
+        return totals
+
+    def reserve_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """TransactWriteItems entries taking an order's quantities out of stock"""
+        totals = self.quantities(items)
+        # The transaction also carries the order, its outbox record, its customer aggregate
+        # and its change entry
+        if len(totals) > MAX_TRANSACT_ITEMS - 4:
+            raise ValueError(f"An order can reserve at most {MAX_TRANSACT_ITEMS - 4} distinct products")
+        now = datetime.utcnow().isoformat()
+        return [{
+            'Update': {
+                'TableName': self.table_name,
+                'Key': {'product_id': product_id},
+                'UpdateExpression': 'SET stock_level = stock_level - :quantity, updated_at = :time',
+                'ConditionExpression': 'stock_level >= :quantity',
+                'ExpressionAttributeValues': {':quantity': quantity, ':time': now}
+            }
+        } for product_id, quantity in totals.items()]
+
+    def release_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """TransactWriteItems entries putting an order's quantities back in stock"""
+        now = datetime.utcnow().isoformat()
+        # Unconditional, so a product removed from the inventory cannot block a cancellation
+        return [{
+            'Update': {
+                'TableName': self.table_name,
+                'Key': {'product_id': product_id},
+                'UpdateExpression': 'SET stock_level = if_not_exists(stock_level, :zero) + :quantity, updated_at = :time',
+                'ExpressionAttributeValues': {':quantity': quantity, ':zero': 0, ':time': now}
+            }
+        } for product_id, quantity in self.quantities(items).items()]
+
+    def insufficient_stock(self, error: Exception, items: List[Dict[str, Any]],
+                           offset: int = 1) -> Optional[InsufficientStockError]:
+        """Map a cancelled order transaction to the products that were out of stock.
+
+        offset is the position of the first reservation in the transaction.
+        """
+        response = getattr(error, 'response', None) or {}
+        if response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+            return None
+        reasons = response.get('CancellationReasons') or []
+        product_ids = list(self.quantities(items))
+        failed = [
+            product_id for i, product_id in enumerate(product_ids)
+            if offset + i < len(reasons) and reasons[offset + i].get('Code') == 'ConditionalCheckFailed'
+        ]
+        return InsufficientStockError(failed) if failed else None
+
+    @timed('inventory.get_levels')
+    def get_levels(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up many products with BatchGetItem (100 keys per call)"""
+        levels: Dict[str, Dict[str, Any]] = {}
+        product_ids = list(dict.fromkeys(product_ids))
+        for start in range(0, len(product_ids), 100):
+            request = {self.table_name: {'Keys': [{'product_id': p} for p in product_ids[start:start + 100]]}}
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response['Responses'].get(self.table_name, []):
+                    levels[item['product_id']] = item
+                request = response.get('UnprocessedKeys')
+        return levels
+
+    def seed(self, levels: Dict[str, int], dry_run: bool = False) -> Dict[str, List[str]]:
+        """Create rows for products that have none; existing stock levels are left alone"""
+        existing = set(self.get_levels(list(levels)))
+        created: List[str] = []
+        for product_id, stock_level in levels.items():
+            if product_id in existing or dry_run:
+                continue
+            try:
+                self.table.put_item(
+                    Item={'product_id': product_id, 'stock_level': stock_level,
+                          'updated_at': datetime.utcnow().isoformat()},
+                    ConditionExpression='attribute_not_exists(product_id)'
+                )
+                created.append(product_id)
+            except self.dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+                existing.add(product_id)
+        missing = [p for p in levels if p not in existing and p not in created]
+        logger.info("Seeded inventory", created=len(created), existing=len(existing), dry_run=dry_run)
+        return {'created': created, 'existing': sorted(existing), 'would_create': missing if dry_run else []}
+
+    def unknown_products(self, orders_table: str, lines_table: Optional[str] = None) -> List[str]:
+        """Products named by stored orders that have no inventory row (reservations would reject them)"""
+        product_ids: Set[str] = set()
+        tables = [orders_table] + ([lines_table] if lines_table else [])
+        for table_name in tables:
+            kwargs: Dict[str, Any] = {'ProjectionExpression': '#items', 'ExpressionAttributeNames': {'#items': 'items'}}
+            table = self.dynamodb.Table(table_name)
+            while True:
+                response = table.scan(**kwargs)
+                for row in response.get('Items', []):
+                    product_ids.update(item['product_id'] for item in row.get('items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        known = self.get_levels(list(product_ids))
+        return sorted(product_ids - set(known))
+
+def read_levels(path: str) -> Dict[str, int]:
+    """product_id,stock_level rows of a CSV file (a header row is skipped)"""
+    levels: Dict[str, int] = {}
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0] == 'product_id':
+                continue
+            levels[row[0].strip()] = int(row[1])
+    return levels
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Seed the inventory table before enabling stock reservations')
+    parser.add_argument('--inventory-table', default=os.environ.get('INVENTORY_TABLE', 'scm-stack-inventory'))
+    parser.add_argument('--levels', help='CSV of product_id,stock_level rows to create where missing')
+    parser.add_argument('--check-orders', action='store_true',
+                        help='list products in stored orders that still have no inventory row')
+    parser.add_argument('--orders-table', default=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'))
+    parser.add_argument('--lines-table', default=os.environ.get('ORDER_LINES_TABLE'))
+    parser.add_argument('--dry-run', action='store_true', help='report the rows that would be created')
+    args = parser.parse_args(argv)
+    store = InventoryStore(args.inventory_table)
+    result: Dict[str, Any] = {}
+    if args.levels:
+        result['seed'] = store.seed(read_levels(args.levels), dry_run=args.dry_run)
+    if args.check_orders:
+        result['unknown_products'] = store.unknown_products(args.orders_table, args.lines_table)
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+# functions/order-service/order_management/lines.py
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Dict, Any, List, Optional
+
+from . import clients
+from .log import get_logger
+from .metrics import timed
+from .model import LinePage, Order
+from .processor import DynamoDBHandler
+
+logger = get_logger(__name__)
+
+LINES_PER_PAGE = 100
+DEFAULT_LINES_LIMIT = 100
+MAX_LINES_LIMIT = 1000
+
+class LineStore:
+    """Line items of orders, stored apart from the orders in pages.
+
+    With a lines table, the orders table holds a header per order (every
+    field but items, plus item_count and line_pages) and the lines table
+    holds its items LINES_PER_PAGE at a time, keyed by (order_id, page).
+    Listings and status changes read headers only; GET
+    /orders/{orderId}?include=items reads just the pages it returns.
+
+    The header is the commit point: pages are written before it and deleted
+    after it, so a reader that finds a header finds every page. Pages left by
+    a create that failed have no header and are never read.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        # Page writes reuse the orders handler's BatchWriteItem retries
+        self.writer = DynamoDBHandler(table_name)
+        logger.debug("Initialized line store", table=table_name)
+
+    @cached_property
+    def dynamodb(self) -> Any:
+        return clients.get_resource('dynamodb')
+
+    @cached_property
+    def table(self) -> Any:
+        return self.dynamodb.Table(self.table_name)
+
+    @staticmethod
+    def pages(order_id: str, items: List[Dict[str, Any]]) -> List[LinePage]:
+        """Cut an order's items (attribute-value form) into pages"""
+        pages, seen = [], set()
+        for number, start in enumerate(range(0, len(items), LINES_PER_PAGE)):
+            chunk = items[start:start + LINES_PER_PAGE]
+            products = {item['M']['product_id']['S'] for item in chunk}
+            pages.append(LinePage(order_id, number, chunk, sorted(products & seen)))
+            seen |= products
+        return pages
+
+    @classmethod
+    def order_pages(cls, order: Order) -> List[LinePage]:
+        return cls.pages(order.order_id, order.item_attributes())
+
+    @timed('lines.save')
+    def save_pages(self, pages: List[LinePage]) -> Dict[str, str]:
+        """Write pages with BatchWriteItem; returns {order_id: error} for orders missing a page"""
+        return self.writer.batch_save(pages)
+
+    @timed('lines.delete')
+    def delete_pages(self, line_pages: Dict[str, int]) -> Dict[str, str]:
+        """Delete every page of {order_id: line_pages}; returns {order_id: error}"""
+        try:
+            with self.table.batch_writer() as batch:
+                for order_id, count in line_pages.items():
+                    for page in range(count):
+                        batch.delete_item(Key={'order_id': order_id, 'page': page})
+        except Exception as e:
+            logger.error("Error deleting line pages", orders=len(line_pages), error=str(e))
+            return {order_id: str(e) for order_id in line_pages}
+        return {}
+
+    @timed('lines.get')
+    def get_items(self, order_id: str, start: int = 0, limit: Optional[int] = None,
+                  consistent: bool = False) -> List[Dict[str, Any]]:
+        """Items start..start+limit of an order (all from start without a limit), reading only their pages"""
+        from boto3.dynamodb.conditions import Key
+
+        first = start // LINES_PER_PAGE
+        if limit is None:
+            key_condition = Key('order_id').eq(order_id) & Key('page').gte(first)
+        else:
+            last = (start + max(limit, 1) - 1) // LINES_PER_PAGE
+            key_condition = Key('order_id').eq(order_id) & Key('page').between(first, last)
+        kwargs: Dict[str, Any] = {'KeyConditionExpression': key_condition, 'ConsistentRead': consistent}
+        items: List[Dict[str, Any]] = []
+        while True:
+            response = self.table.query(**kwargs)
+            for page in response.get('Items', []):
+                items.extend(page['items'])
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        skip = start - first * LINES_PER_PAGE
+        return items[skip:] if limit is None else items[skip:skip + limit]
+
+    def _migrate_segment(self, orders_table: str, segment: int, segments: int, dry_run: bool) -> Dict[str, int]:
+        from botocore.exceptions import ClientError
+
+        client = self.writer.client
+        counts = {'scanned': 0, 'migrated': 0, 'skipped': 0, 'failed': 0}
+        kwargs: Dict[str, Any] = {'TableName': orders_table, 'Segment': segment, 'TotalSegments': segments}
+        while True:
+            response = client.scan(**kwargs)
+            inline: Dict[str, List[Dict[str, Any]]] = {}
+            for item in response.get('Items', []):
+                counts['scanned'] += 1
+                if 'items' in item and 'line_pages' not in item:
+                    inline[item['order_id']['S']] = item['items']['L']
+            counts['skipped'] += len(response.get('Items', [])) - len(inline)
+            if dry_run:
+                counts['migrated'] += len(inline)
+                inline = {}
+            pages = {order_id: self.pages(order_id, items) for order_id, items in inline.items()}
+            failures = self.save_pages([page for order_pages in pages.values() for page in order_pages]) \
+                if pages else {}
+            counts['failed'] += len(failures)
+            for order_id, order_pages in pages.items():
+                if order_id in failures:
+                    continue
+                # Items never change after a create, so only a concurrent delete (or
+                # another migration) fails the condition
+                try:
+                    client.update_item(
+                        TableName=orders_table,
+                        Key={'order_id': {'S': order_id}},
+                        UpdateExpression='SET item_count = :count, line_pages = :pages REMOVE #items',
+                        ConditionExpression='attribute_exists(#items)',
+                        ExpressionAttributeNames={'#items': 'items'},
+                        ExpressionAttributeValues={':count': {'N': str(len(inline[order_id]))},
+                                                   ':pages': {'N': str(len(order_pages))}}
+                    )
+                    counts['migrated'] += 1
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    self.delete_pages({order_id: len(order_pages)})
+                    counts['skipped'] += 1
+            if 'LastEvaluatedKey' not in response:
+                return counts
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def migrate(self, orders_table: str, segments: int = 4, dry_run: bool = False) -> Dict[str, int]:
+        """Move the items of every order stored inline into pages (safe to rerun)"""
+        with ThreadPoolExecutor(max_workers=segments) as pool:
+            results = list(pool.map(lambda segment: self._migrate_segment(orders_table, segment, segments, dry_run),
+                                    range(segments)))
+        totals = {name: sum(result[name] for result in results) for name in results[0]}
+        logger.info("Migrated orders to line pages", dry_run=dry_run, **totals)
+        return totals
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Move the line items of existing orders into the lines table')
+    parser.add_argument('--orders-table', default=os.environ.get('ORDERS_TABLE', 'scm-stack-orders'))
+    parser.add_argument('--lines-table', default=os.environ.get('ORDER_LINES_TABLE', 'scm-stack-order-lines'))
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--dry-run', action='store_true', help='count the orders that would move')
+    args = parser.parse_args(argv)
+    print(json.dumps(LineStore(args.lines_table).migrate(args.orders_table, args.segments, args.dry_run), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# functions/order-service/order_management/log.py
+
+import contextvars
+import os
+import random
+import sys
+import traceback
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from . import serialization
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+_LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+# Settings, read from the environment once per container (configure() re-reads them):
+#   LOG_LEVEL             - lowest level written (default INFO)
+#   LOG_DEBUG_SAMPLE_RATE - share of requests that also write DEBUG lines (default 0)
+#   LOG_PAYLOAD_MAX_CHARS - payload fields are cut to this many characters (default 1024)
+_level = INFO
+_debug_sample_rate = 0.0
+_payload_max_chars = 1024
+
+# Per-request context: correlation id, request fields and the debug sampling decision.
+# side_effects.submit copies context variables, so worker threads log under the same id.
+_request: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar('log_request', default=None)
+
+def configure() -> None:
+    """(Re)load the logging settings from the environment"""
+    global _level, _debug_sample_rate, _payload_max_chars
+    _level = LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), INFO)
+    _debug_sample_rate = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0'))
+    _payload_max_chars = int(os.environ.get('LOG_PAYLOAD_MAX_CHARS', '1024'))
+
+configure()
+
+def start_request(correlation_id: Optional[str] = None, **fields: Any) -> contextvars.Token:
+    """Begin a request: every line logged until end_request carries its correlation id"""
+    context = {k: v for k, v in fields.items() if v is not None}
+    context['correlation_id'] = correlation_id or uuid.uuid4().hex
+    context['debug'] = _level <= DEBUG or (_debug_sample_rate > 0 and random.random() < _debug_sample_rate)
+    return _request.set(context)
+
+def end_request(token: contextvars.Token) -> None:
+    _request.reset(token)
+
+def correlation_id() -> Optional[str]:
+    context = _request.get()
+    return context['correlation_id'] if context else None
+
+def is_enabled(level: int) -> bool:
+    """True if a line at this level would be written for the current request"""
+    if level >= _level:
+        return True
+    if level == DEBUG:
+        context = _request.get()
+        return bool(context and context['debug'])
+    return False
+
+def _truncate(payload: Any) -> Dict[str, Any]:
+    text = payload if isinstance(payload, str) else serialization.dumps(payload)
+    if len(text) <= _payload_max_chars:
+        return {'payload': text}
+    return {'payload': text[:_payload_max_chars], 'payload_truncated': len(text)}
+
+class Logger:
+    """Writes one JSON object per line to stdout (CloudWatch keeps each as one event).
+
+    Messages use %-style arguments that are only formatted, and payloads only
+    serialized, when the line is actually written:
+
+        logger.debug("Saving item %s", order_id, payload=data)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _write(self, level: int, msg: str, args: tuple, payload: Any = None,
+               exc_info: bool = False, **fields: Any) -> None:
+        record: Dict[str, Any] = {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'level': _LEVEL_NAMES[level],
+            'logger': self.name,
+            'message': msg % args if args else msg
+        }
+        context = _request.get()
+        if context:
+            record.update((k, v) for k, v in context.items() if k != 'debug')
+        record.update(fields)
+        if payload is not None:
+            record.update(_truncate(payload))
+        if exc_info:
+            record['traceback'] = traceback.format_exc()
+        sys.stdout.write(serialization.dumps(record, decimal_mode=serialization.STRING) + '\n')
+
+    def debug(self, msg: str, *args: Any, **fields: Any) -> None:
+        if is_enabled(DEBUG):
+            self._write(DEBUG, msg, args, **fields)
+
+    def info(self, msg: str, *args: Any, **fields: Any) -> None:
+        if _level <= INFO:
+            self._write(INFO, msg, args, **fields)
+
+    def warning(self, msg: str, *args: Any, **fields: Any) -> None:
+        if _level <= WARNING:
+            self._write(WARNING, msg, args, **fields)
+
+    def error(self, msg: str, *args: Any, **fields: Any) -> None:
+        self._write(ERROR, msg, args, **fields)
+
+    def exception(self, msg: str, *args: Any, **fields: Any) -> None:
+        """Log at ERROR with the current exception's traceback"""
+        self._write(ERROR, msg, args, exc_info=True, **fields)
+
+def get_logger(name: str) -> Logger:
+    return Logger(name)
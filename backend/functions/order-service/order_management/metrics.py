@@ -0,0 +1,178 @@
+# functions/order-service/order_management/metrics.py
+
+import contextvars
+import functools
+import io
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, List, Optional
+
+from . import serialization
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'SupplyChain/Orders')
+SERVICE = os.environ.get('POWERTOOLS_SERVICE_NAME', 'order-service')
+MAX_VALUES = 100  # EMF limit on values per metric in one line
+
+# Time from this module's import (container init) to the first request
+_loaded_at = time.perf_counter()
+_cold_start = True
+
+class Recorder:
+    """Durations (ms) recorded by the spans of one request, keyed by stage name"""
+
+    def __init__(self, operation: str, cold_start: bool = False):
+        self.operation = operation
+        self.cold_start = cold_start
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            self.spans.setdefault(name, []).append(duration_ms)
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+# Shared with side-effect threads through side_effects.submit's context copy
+_recorder: contextvars.ContextVar[Optional[Recorder]] = contextvars.ContextVar('metrics_recorder', default=None)
+
+def stdout_sink(record: Dict[str, Any]) -> None:
+    sys.stdout.write(serialization.dumps(record) + '\n')
+
+class MemorySink:
+    """Keeps emitted EMF records in memory, for checking metrics offline"""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+
+_sink: Callable[[Dict[str, Any]], None] = stdout_sink
+
+def set_sink(sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    """Send EMF records somewhere other than stdout (None restores stdout)"""
+    global _sink
+    _sink = sink or stdout_sink
+
+def enabled() -> bool:
+    return os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage of the current request; a no-op outside a request"""
+    recorder = _recorder.get()
+    if recorder is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, (time.perf_counter() - start) * 1000)
+
+def timed(name: str) -> Callable:
+    """Decorator form of span()"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _recorder.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name: str, value: int = 1) -> None:
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.count(name, value)
+
+def start_request(operation: str) -> contextvars.Token:
+    """Start recording spans for a request; the first request of a container is the cold start"""
+    global _cold_start
+    recorder = Recorder(operation, cold_start=_cold_start)
+    if _cold_start:
+        _cold_start = False
+        recorder.add('init', (recorder.started - _loaded_at) * 1000)
+    return _recorder.set(recorder)
+
+def end_request(token: contextvars.Token, **properties: Any) -> Optional[Dict[str, Any]]:
+    """Stop recording and emit the request's spans as one EMF record"""
+    recorder = _recorder.get()
+    _recorder.reset(token)
+    if recorder is None or not enabled():
+        return None
+    recorder.add('request', (time.perf_counter() - recorder.started) * 1000)
+    record = to_emf(recorder, properties)
+    _sink(record)
+    return record
+
+def to_emf(recorder: Recorder, properties: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build a CloudWatch Embedded Metric Format record.
+
+    Each span is a list of raw values, so CloudWatch can compute p50/p99 over
+    them. ColdStart is a dimension, which keeps cold requests out of the warm
+    percentiles.
+    """
+    metrics = [{'Name': name, 'Unit': 'Milliseconds'} for name in recorder.spans]
+    metrics += [{'Name': name, 'Unit': 'Count'} for name in recorder.counts]
+    record: Dict[str, Any] = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['Service', 'Operation', 'ColdStart']],
+                'Metrics': metrics
+            }]
+        },
+        'Service': SERVICE,
+        'Operation': recorder.operation,
+        'ColdStart': 'true' if recorder.cold_start else 'false'
+    }
+    record.update(properties or {})
+    for name, values in recorder.spans.items():
+        values = [round(value, 3) for value in values[:MAX_VALUES]]
+        record[name] = values[0] if len(values) == 1 else values
+    record.update(recorder.counts)
+    return record
+
+@contextmanager
+def profile(mode: Optional[str]) -> Iterator[None]:
+    """Profile the enclosed code with cProfile ('cpu') or tracemalloc ('memory') and log the top entries"""
+    if mode == 'cpu':
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+            logger.info("CPU profile", profile=out.getvalue())
+    elif mode == 'memory':
+        import tracemalloc
+
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            top = [str(stat) for stat in snapshot.statistics('lineno')[:25]]
+            logger.info("Memory profile", peak_bytes=peak, top_allocations=top)
+    else:
+        yield
@@ -0,0 +1,205 @@
+# functions/order-service/order_management/model.py
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Clamped, Context, Decimal, DecimalException, Inexact, Overflow, Rounded, Underflow
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from .metrics import timed
+
+# DynamoDB numbers: 38 significant digits, exponent -130..125. Same traps as
+# boto3's TypeSerializer, which new orders no longer pass through.
+DYNAMODB_CONTEXT = Context(Emin=-128, Emax=126, prec=38, traps=[Clamped, Overflow, Inexact, Rounded, Underflow])
+
+REQUIRED_FIELDS = ('customer_id', 'customer_name', 'items')
+REQUIRED_ITEM_FIELDS = ('product_id', 'name', 'quantity', 'price')
+
+INFINITY = float('inf')
+
+def _positive_number(value: Any, label: str) -> Decimal:
+    kind = type(value)
+    # json.loads hands over ints and floats; NaN and infinities fail the range check
+    if kind is int or kind is float:
+        if 0 < value < INFINITY:
+            return Decimal(value) if kind is int else Decimal(repr(value))
+        raise ValueError(f"Invalid {label}: {value}")
+    if kind is bool or not isinstance(value, (int, float, Decimal, str)):
+        raise ValueError(f"Invalid {label}: {value}")
+    try:
+        number = Decimal(str(value))
+    except DecimalException:
+        raise ValueError(f"Invalid {label}: {value}")
+    if not number.is_finite() or number <= 0:
+        raise ValueError(f"Invalid {label}: {value}")
+    return number
+
+def _string(value: Any, label: str, required: bool = False) -> str:
+    if not isinstance(value, str) or (required and not value):
+        raise ValueError(f"Invalid {label}: must be a{' non-empty' if required else ''} string")
+    return value
+
+class _Fields:
+    """Read-only mapping access, so code written against order dicts takes models too"""
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+# Field order is the JSON key order (orjson serializes dataclasses natively)
+@dataclass
+class LineItem(_Fields):
+    __slots__ = ('product_id', 'name', 'quantity', 'price', 'total')
+    product_id: str
+    name: str
+    quantity: Decimal
+    price: Decimal
+    total: Decimal
+
+    @classmethod
+    def parse(cls, raw: Any) -> 'LineItem':
+        if type(raw) is not dict:
+            raise ValueError("Invalid order data: item must be an object")
+        try:
+            product_id, name, quantity, price = raw['product_id'], raw['name'], raw['quantity'], raw['price']
+        except KeyError:
+            missing = next(field for field in REQUIRED_ITEM_FIELDS if field not in raw)
+            raise ValueError(f"Missing required item field: {missing}")
+        if type(product_id) is not str or not product_id:
+            _string(product_id, 'product_id', required=True)
+        if type(name) is not str:
+            _string(name, 'name')
+        quantity = _positive_number(quantity, 'quantity')
+        price = _positive_number(price, 'price')
+        try:
+            total = DYNAMODB_CONTEXT.multiply(quantity, price)
+        except DecimalException:
+            raise ValueError(f"Invalid item total: {quantity} x {price} needs more than 38 significant digits")
+        return cls(product_id, name, quantity, price, total)
+
+    def to_attributes(self) -> Dict[str, Any]:
+        return {
+            'product_id': {'S': self.product_id},
+            'name': {'S': self.name},
+            'quantity': {'N': str(self.quantity)},
+            'price': {'N': str(self.price)},
+            'total': {'N': str(self.total)}
+        }
+
+@dataclass
+class Order(_Fields):
+    """A new order, parsed and validated from a request body in one pass.
+
+    Quantities and prices become Decimals once and the totals are computed
+    once. to_attributes() is the DynamoDB wire format, written without
+    boto3's TypeSerializer walk, and serialization.dumps writes the model
+    directly. Orders read back from DynamoDB stay plain dicts; mapping access
+    (order['items'], order.get(...)) works on both.
+    """
+    __slots__ = ('order_id', 'customer_id', 'customer_name', 'items', 'total_amount', 'status', 'version',
+                 'created_at', 'updated_at')
+    order_id: str
+    customer_id: str
+    customer_name: str
+    items: List[LineItem]
+    total_amount: Decimal
+    status: str
+    version: int
+    created_at: str
+    updated_at: str
+
+    @classmethod
+    def parse(cls, body: Any, order_id: str, timestamp: Optional[str] = None) -> 'Order':
+        """Build a PENDING order from a request body; raises ValueError naming the first problem"""
+        if not isinstance(body, dict):
+            raise ValueError("Order must be an object")
+        for field in REQUIRED_FIELDS:
+            if field not in body:
+                raise ValueError(f"Missing required field: {field}")
+        raw_items = body['items']
+        if not isinstance(raw_items, list):
+            raise ValueError("Items must be an array")
+        if not raw_items:
+            raise ValueError("Order must contain at least one item")
+
+        parse_item = LineItem.parse
+        items = [parse_item(raw) for raw in raw_items]
+        try:
+            total_amount = Decimal('0')
+            for item in items:
+                total_amount = DYNAMODB_CONTEXT.add(total_amount, item.total)
+        except DecimalException:
+            raise ValueError("Invalid order total: needs more than 38 significant digits")
+
+        timestamp = timestamp or datetime.utcnow().isoformat()
+        return cls(order_id, _string(body['customer_id'], 'customer_id', required=True),
+                   _string(body['customer_name'], 'customer_name'), items, total_amount,
+                   'PENDING', 1, timestamp, timestamp)
+
+    def to_attributes(self, line_pages: Optional[int] = None) -> Dict[str, Any]:
+        """The order as a DynamoDB item in attribute-value form, for the low-level client.
+
+        With line_pages, the header only: the items are stored as that many
+        LinePages and the header records item_count and line_pages instead.
+        """
+        attributes = {
+            'order_id': {'S': self.order_id},
+            'customer_id': {'S': self.customer_id},
+            'customer_name': {'S': self.customer_name},
+            'total_amount': {'N': str(self.total_amount)},
+            'status': {'S': self.status},
+            'version': {'N': str(self.version)},
+            'created_at': {'S': self.created_at},
+            'updated_at': {'S': self.updated_at}
+        }
+        if line_pages is None:
+            attributes['items'] = {'L': self.item_attributes()}
+        else:
+            attributes['item_count'] = {'N': str(len(self.items))}
+            attributes['line_pages'] = {'N': str(line_pages)}
+        return attributes
+
+    def item_attributes(self) -> List[Dict[str, Any]]:
+        return [{'M': item.to_attributes()} for item in self.items]
+
+@dataclass
+class LinePage(_Fields):
+    """Up to LINES_PER_PAGE line items of an order, stored apart from its header.
+
+    items are kept in attribute-value form ({'M': {...}}), so pages cut from a
+    stored order (the migration) need no conversion either way. repeated lists
+    the products that also appear on an earlier page; analytics counts an
+    order once per product.
+    """
+    __slots__ = ('order_id', 'page', 'items', 'repeated')
+    order_id: str
+    page: int
+    items: List[Dict[str, Any]]
+    repeated: List[str]
+
+    def to_attributes(self) -> Dict[str, Any]:
+        attributes = {
+            'order_id': {'S': self.order_id},
+            'page': {'N': str(self.page)},
+            'items': {'L': self.items}
+        }
+        if self.repeated:
+            attributes['repeated'] = {'SS': self.repeated}
+        return attributes
+
+@timed('parse')
+def parse_order(body: Any, order_id: str) -> Order:
+    return Order.parse(body, order_id)
@@ -0,0 +1,260 @@
+# functions/order-service/order_management/outbox.py
+
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from functools import cached_property
+from typing import Dict, Any, Optional, List, Tuple
+
+from . import clients, log, serialization
+from .metrics import count
+from .processor import S3DocumentHandler, NotificationService
+from .side_effects import submit
+
+logger = log.get_logger(__name__)
+
+STORE_DOCUMENT = 'store'
+DELETE_DOCUMENT = 'delete'
+
+class OutboxStore:
+    """Outbox records committed in the same transaction as the order write.
+
+    Records are keyed by order_id + event_id so DynamoDB Streams delivers the
+    events of one order in order. A record is deleted once dispatched, so a
+    missing record means "already done" when a stream batch is retried.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.ttl_seconds = int(os.environ.get('OUTBOX_TTL_DAYS', '7')) * 86400
+        logger.debug("Initialized outbox", table=table_name)
+
+    @cached_property
+    def dynamodb(self) -> Any:
+        return clients.get_resource('dynamodb')
+
+    @cached_property
+    def table(self) -> Any:
+        return self.dynamodb.Table(self.table_name)
+
+    def put_item(self, order_id: str, event_type: str, notification: Dict[str, Any],
+                 document: Optional[Dict[str, Any]] = None,
+                 document_action: Optional[str] = None,
+                 document_key: Optional[str] = None,
+                 order_updated_at: Optional[str] = None,
+                 line_pages: Optional[int] = None) -> Dict[str, Any]:
+        """Build the TransactWriteItems entry for one outbox record.
+
+        A store without a document names the write by its updated_at
+        (order_updated_at); the dispatcher reads the order and stores it if
+        that write is still the latest. With line_pages the document is the
+        order's header, and the dispatcher reads the items from their pages.
+        """
+        record = {
+            'order_id': order_id,
+            'event_id': f"{datetime.utcnow().isoformat()}#{uuid.uuid4().hex[:8]}",
+            'event_type': event_type,
+            'notification': serialization.dumps(notification),
+            'created_at': datetime.utcnow().isoformat(),
+            'expires_at': int(time.time()) + self.ttl_seconds
+        }
+        if log.correlation_id():
+            # Lets dispatcher lines be traced back to the request that wrote the order
+            record['correlation_id'] = log.correlation_id()
+        if document_action:
+            record['document_action'] = document_action
+        if document_key:
+            record['document_key'] = document_key
+        if order_updated_at:
+            record['order_updated_at'] = order_updated_at
+        if line_pages is not None:
+            record['line_pages'] = line_pages
+        if document is not None:
+            # Stored pre-serialized so the dispatcher uploads it without re-encoding
+            record['document'] = serialization.dumps(document)
+        return {'Put': {'TableName': self.table_name, 'Item': record}}
+
+    def pending(self, keys: List[Tuple[str, str]]) -> set:
+        """Return the (order_id, event_id) keys that have not been dispatched yet"""
+        found = set()
+        for start in range(0, len(keys), 100):
+            request = {self.table_name: {
+                'Keys': [{'order_id': o, 'event_id': e} for o, e in keys[start:start + 100]],
+                'ProjectionExpression': 'order_id, event_id'
+            }}
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response['Responses'].get(self.table_name, []):
+                    found.add((item['order_id'], item['event_id']))
+                request = response.get('UnprocessedKeys')
+        return found
+
+    def mark_dispatched(self, keys: List[Tuple[str, str]]) -> None:
+        with self.table.batch_writer() as batch:
+            for order_id, event_id in keys:
+                batch.delete_item(Key={'order_id': order_id, 'event_id': event_id})
+
+class OutboxDispatcher:
+    """Applies outbox records from a DynamoDB Streams batch.
+
+    Document writes run concurrently on the shared pool (every version of an
+    order is stored, unless the order is deleted later in the batch; deletes
+    go out together through DeleteObjects), notifications go out through
+    SNS PublishBatch, and records are deleted only after both succeeded.
+
+    Status updates carry no document: the dispatcher reads their orders
+    (consistently, in one BatchGetItem) and stores the version a record
+    wrote. A version already superseded when its record is dispatched is
+    not stored; its notification still goes out. Creates of orders with
+    line pages carry the header, and the items are read from the pages.
+    """
+
+    def __init__(self, outbox_table: str, bucket_name: str, topic_arn: str,
+                 orders_table: Optional[str] = None, lines_table: Optional[str] = None):
+        self.outbox = OutboxStore(outbox_table)
+        self.doc_handler = S3DocumentHandler(bucket_name)
+        self.notification_service = NotificationService(topic_arn)
+        self.orders_table = orders_table
+        self.lines = None
+        if lines_table:
+            from .lines import LineStore
+            self.lines = LineStore(lines_table)
+
+    @staticmethod
+    def parse_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from boto3.dynamodb.types import TypeDeserializer
+
+        deserializer = TypeDeserializer()
+        entries = []
+        for record in records:
+            if record.get('eventName') != 'INSERT':
+                continue
+            image = record['dynamodb']['NewImage']
+            entry = {k: deserializer.deserialize(v) for k, v in image.items()}
+            entry['sequence_number'] = record['dynamodb']['SequenceNumber']
+            entries.append(entry)
+        return entries
+
+    def _get_orders(self, order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Current orders by id, read consistently; missing orders are left out"""
+        if not self.orders_table:
+            raise ValueError("Outbox records without a document need ORDERS_TABLE")
+        orders: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(order_ids), 100):
+            request = {self.orders_table: {
+                'Keys': [{'order_id': order_id} for order_id in order_ids[start:start + 100]],
+                'ConsistentRead': True
+            }}
+            while request:
+                response = self.outbox.dynamodb.batch_get_item(RequestItems=request)
+                for order in response['Responses'].get(self.orders_table, []):
+                    orders[order['order_id']] = order
+                request = response.get('UnprocessedKeys')
+        return orders
+
+    def _document(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """The order with its line items; a header gets them from its pages"""
+        if 'line_pages' not in order:
+            return order
+        if not self.lines:
+            raise ValueError(f"Order {order['order_id']} keeps its line items in ORDER_LINES_TABLE, which is not set")
+        document = dict(order, items=self.lines.get_items(order['order_id'], consistent=True))
+        del document['line_pages']
+        return document
+
+    def _resolve_documents(self, entries: List[Dict[str, Any]]) -> None:
+        """Fill in the document, key and notification fields of stores written without a
+        document, and the items of those written with a header.
+
+        Entries whose write has been superseded (or whose order is gone) keep
+        no document and are skipped by the stores.
+        """
+        for entry in entries:
+            if 'line_pages' in entry and 'document' in entry:
+                self._attach_items(entry)
+        unresolved = [e for e in entries if e.get('document_action') == STORE_DOCUMENT and 'document' not in e]
+        if not unresolved:
+            return
+        orders = self._get_orders(list(dict.fromkeys(e['order_id'] for e in unresolved)))
+        for entry in unresolved:
+            order = orders.get(entry['order_id'])
+            if not order or order.get('updated_at') != entry.get('order_updated_at'):
+                count('outbox.superseded')
+                logger.debug("Outbox store superseded", order_id=entry['order_id'], event_id=entry['event_id'])
+                continue
+            entry['document_key'] = self.doc_handler.key_for(order)
+            entry['document'] = serialization.dumps(self._document(order))
+            notification = json.loads(entry['notification'])
+            notification.update(document_key=entry['document_key'], customer_id=order['customer_id'],
+                                previous_status=order.get('previous_status'))
+            entry['notification'] = serialization.dumps(notification)
+
+    def _attach_items(self, entry: Dict[str, Any]) -> None:
+        """Turn a header document into the full document; without all its pages the order is gone"""
+        header = json.loads(entry.pop('document'))
+        document = self._document(header)
+        if len(document['items']) != header['item_count']:
+            count('outbox.superseded')
+            logger.debug("Outbox store superseded", order_id=entry['order_id'], event_id=entry['event_id'])
+            return
+        entry['document'] = serialization.dumps(document)
+
+    def _store_documents(self, entries: List[Dict[str, Any]]) -> None:
+        for entry in entries:
+            if 'document' not in entry:
+                continue
+            # Records written before documents were versioned carry no key
+            key = entry.get('document_key') or self.doc_handler.key_for(json.loads(entry['document']))
+            self.doc_handler.store_document_json(key, entry['document'])
+
+    def dispatch(self, records: List[Dict[str, Any]]) -> List[str]:
+        """Dispatch a stream batch and return the sequence numbers that failed"""
+        entries = self.parse_records(records)
+        if not entries:
+            return []
+
+        pending = self.outbox.pending([(e['order_id'], e['event_id']) for e in entries])
+        entries = [e for e in entries if (e['order_id'], e['event_id']) in pending]
+        logger.debug("Dispatching pending outbox records", count=len(entries))
+
+        self._resolve_documents(entries)
+
+        # Each stored version is kept as history; a delete supersedes the order's earlier stores
+        document_entries: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            if entry.get('document_action'):
+                document_entries.setdefault(entry['order_id'], []).append(entry)
+        deleted = [order_id for order_id, actions in document_entries.items()
+                   if actions[-1]['document_action'] == DELETE_DOCUMENT]
+        document_futures = {
+            order_id: submit(self._store_documents, actions)
+            for order_id, actions in document_entries.items() if order_id not in deleted
+        }
+        delete_failures = self.doc_handler.delete_documents(deleted) if deleted else {}
+
+        failed_notifications = set(self.notification_service.send_notifications(
+            [(e['event_type'], json.loads(e['notification'])) for e in entries]
+        ))
+
+        failed_orders = set()
+        errors = dict(delete_failures)
+        for order_id, future in document_futures.items():
+            if future.exception() is not None:
+                errors[order_id] = str(future.exception())
+        for order_id, error in errors.items():
+            logger.error("Outbox document action failed", order_id=order_id,
+                         correlation_id=document_entries[order_id][-1].get('correlation_id'), error=error)
+            failed_orders.add(order_id)
+
+        done, failed = [], []
+        for index, entry in enumerate(entries):
+            if index in failed_notifications or entry['order_id'] in failed_orders:
+                failed.append(entry['sequence_number'])
+            else:
+                done.append((entry['order_id'], entry['event_id']))
+
+        self.outbox.mark_dispatched(done)
+        logger.info("Outbox dispatch complete", dispatched=len(done), failed=len(failed))
+        return failed
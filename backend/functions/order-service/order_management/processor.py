@@ -1,13 +1,70 @@
 # functions/order-service/order_management/processor.py
 
 import json
-import boto3
 import os
+import base64
+import gzip
+import hashlib
+import random
+import re
+import threading
+import time
+import uuid
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from decimal import Decimal
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Tuple
 from abc import ABC, abstractmethod
 
+from . import clients, serialization
+from .log import get_logger
+from .metrics import count, span, timed
+from .model import LinePage, Order
+from .side_effects import SideEffectRunner, submit
+
+logger = get_logger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+BATCH_WRITE_SIZE = 25  # BatchWriteItem limit
+
+ORDER_STATUSES = ('PENDING', 'PROCESSING', 'COMPLETED', 'CANCELLED')
+
+# Status state machine: target status -> statuses it may be reached from
+STATUS_TRANSITIONS = {
+    'PENDING': (),
+    'PROCESSING': ('PENDING',),
+    'COMPLETED': ('PROCESSING',),
+    'CANCELLED': ('PENDING', 'PROCESSING', 'COMPLETED')
+}
+
+# Order documents: presigned URLs expire after DOCUMENT_URL_TTL_SECONDS, JSON of at
+# least DOCUMENT_GZIP_MIN_BYTES is stored gzip-encoded, and streamed reads through
+# the Lambda return at most DOCUMENT_MAX_PROXY_BYTES (base64 must fit in 6 MB)
+DOCUMENT_URL_TTL_SECONDS = int(os.environ.get('DOCUMENT_URL_TTL_SECONDS', '300'))
+DOCUMENT_GZIP_MIN_BYTES = int(os.environ.get('DOCUMENT_GZIP_MIN_BYTES', '1024'))
+DOCUMENT_MAX_PROXY_BYTES = int(os.environ.get('DOCUMENT_MAX_PROXY_BYTES', str(4 * 1024 * 1024)))
+MAX_ATTACHMENT_BYTES = int(os.environ.get('MAX_ATTACHMENT_BYTES', str(25 * 1024 * 1024)))
+STORED_HASHES_MAX = 4096  # content hashes remembered per container to skip repeated uploads
+DELETE_OBJECTS_SIZE = 1000  # DeleteObjects limit
+
+# Transactions cancelled only by TransactionConflict (another transaction on the
+# same item, e.g. a hot SKU or customer) are retried this many times in all
+TRANSACTION_MAX_ATTEMPTS = int(os.environ.get('TRANSACTION_MAX_ATTEMPTS', '5'))
+
+# GSIs that serve filtered listings, keyed by the attribute they partition on
+ORDER_INDEXES = {
+    'customer_id': 'CustomerCreatedAtIndex',
+    'status': 'StatusCreatedAtIndex'
+}
+
+# Attributes of an order summary: listings project these and never return line items
+SUMMARY_FIELDS = ('order_id', 'customer_id', 'customer_name', 'total_amount', 'status', 'previous_status',
+                  'version', 'created_at', 'updated_at', 'item_count', 'line_pages')
+
 class OrderError(Exception):
     """Base class for Order exceptions"""
     pass
@@ -20,6 +77,49 @@ class DocumentNotFoundError(OrderError):
     """Raised when document is not found"""
     pass
 
+class InvalidStatusTransitionError(OrderError):
+    """Raised when the state machine does not allow the requested status change"""
+    def __init__(self, order_id: str, current_status: Optional[str], status: str):
+        self.current_status = current_status
+        if current_status is None:
+            super().__init__(f"Order {order_id} cannot move to {status}")
+        else:
+            super().__init__(f"Order {order_id} cannot move from {current_status} to {status}")
+
+class CustomerNotFoundError(OrderError):
+    """Raised when a customer has no order aggregate"""
+    pass
+
+class VersionConflictError(OrderError):
+    """Raised when the order changed since the version the caller read"""
+    pass
+
+class RangeNotSatisfiableError(OrderError):
+    """Raised when a Range header is malformed or starts past the end of the document"""
+    pass
+
+class DocumentTooLargeError(OrderError):
+    """Raised when a document is too large to stream through the Lambda without a Range"""
+    pass
+
+class InsufficientStockError(OrderError):
+    """Raised when an order cannot reserve stock for some of its products"""
+    def __init__(self, product_ids: List[str]):
+        self.product_ids = product_ids
+        super().__init__(f"Insufficient stock for products: {', '.join(product_ids)}")
+
+class OrderArchivedError(OrderError):
+    """Order was archived and waits for TTL to remove it; restore it to change it"""
+    pass
+
+class SideEffectError(OrderError):
+    """Raised when side effects fail after the order write committed"""
+    def __init__(self, order_id: str, failures: Dict[str, BaseException]):
+        self.order_id = order_id
+        self.failures = failures
+        details = ', '.join(f"{name}: {error}" for name, error in failures.items())
+        super().__init__(f"Side effects failed for order {order_id}: {details}")
+
 class BaseEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Decimal):
@@ -29,6 +129,7 @@ class BaseEncoder(json.JSONEncoder):
         return super(BaseEncoder, self).default(obj)
 
 class DecimalEncoder:
+    """Recursive Decimal -> float copy; prefer serialization.dumps, which needs no copy"""
     @staticmethod
     def encode(obj):
         if isinstance(obj, Decimal):
@@ -61,33 +162,221 @@ class StorageHandler(ABC):
     @abstractmethod
     def list_all(self) -> List[Dict[str, Any]]:
         pass
+    
+    @abstractmethod
+    def list_page(self, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None,
+                  filters: Optional[Dict[str, str]] = None, scan: bool = False) -> Dict[str, Any]:
+        """Return one bounded page as {'items': [...], 'next_token': str or None}"""
+        pass
+
+def is_transaction_conflict(error: Exception) -> bool:
+    """True for a cancelled transaction whose reasons are all TransactionConflict or None"""
+    response = getattr(error, 'response', None) or {}
+    if response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+        return False
+    codes = {reason.get('Code', 'None') for reason in response.get('CancellationReasons') or []}
+    return 'TransactionConflict' in codes and codes <= {'TransactionConflict', 'None'}
+
+def retry_conflicts(write: Callable[[], Any], max_attempts: int = TRANSACTION_MAX_ATTEMPTS,
+                    base_delay: float = 0.02, max_delay: float = 0.5) -> Any:
+    """Run a transactional write, retrying it with backoff while it only conflicts.
+
+    A conflict commits nothing, so the whole transaction is safe to resend.
+    """
+    attempt = 0
+    while True:
+        try:
+            return write()
+        except Exception as e:
+            attempt += 1
+            if attempt >= max_attempts or not is_transaction_conflict(e):
+                raise
+            count('db.transaction_conflict')
+            # Exponential backoff with full jitter, as for unprocessed batch items
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            logger.info("Retrying conflicting transaction", attempt=attempt)
+            time.sleep(random.uniform(0, delay))
+
+def encode_page_token(last_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Turn a DynamoDB LastEvaluatedKey into an opaque cursor"""
+    if not last_key:
+        return None
+    raw = serialization.dumps_bytes(last_key, decimal_mode=serialization.STRING)
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_page_token(token: str) -> Dict[str, Any]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid next_token: {str(e)}")
+    if not isinstance(key, dict):
+        raise ValueError("Invalid next_token")
+    return key
 
 class DynamoDBHandler(StorageHandler):
     def __init__(self, table_name: str):
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table(table_name)
-        print(f"Initialized DynamoDB handler for table: {table_name}")
+        self.table_name = table_name
+        logger.debug("Initialized DynamoDB handler", table=table_name)
     
-    def save(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        print(f"Saving item to DynamoDB: {data['order_id']}")
-        self.table.put_item(Item=data)
-        return DecimalEncoder.encode(data)
+    # Clients are created on first use, so routes that never reach a store pay nothing
+    @cached_property
+    def dynamodb(self) -> Any:
+        return clients.get_resource('dynamodb')
     
-    def get(self, id: str) -> Optional[Dict[str, Any]]:
-        print(f"Getting item from DynamoDB: {id}")
-        response = self.table.get_item(Key={'order_id': id})
+    @cached_property
+    def table(self) -> Any:
+        return self.dynamodb.Table(self.table_name)
+    
+    @cached_property
+    def client(self) -> Any:
+        # Low-level client: takes items already in attribute-value form (Order.to_attributes)
+        return clients.get_client('dynamodb')
+    
+    @timed('db.transact')
+    def transact(self, items: List[Dict[str, Any]]) -> None:
+        """Commit several writes atomically with TransactWriteItems, retrying conflicts.
+
+        Status changes and deletes carry customer and inventory updates, so
+        concurrent writes for the same customer or product conflict.
+        """
+        # The resource's client accepts native Python types, like Table does
+        retry_conflicts(lambda: self.dynamodb.meta.client.transact_write_items(TransactItems=items))
+    
+    @staticmethod
+    def wire_item(item: Any, serializer: Any, line_pages: Optional[int] = None) -> Dict[str, Any]:
+        if isinstance(item, Order):
+            return item.to_attributes(line_pages)
+        if isinstance(item, LinePage):
+            return item.to_attributes()
+        return {key: serializer.serialize(value) for key, value in item.items()}
+    
+    @classmethod
+    def wire_transact_items(cls, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """TransactWriteItems entries in native types, converted for the low-level client"""
+        from boto3.dynamodb.types import TypeSerializer
+
+        serializer = TypeSerializer()
+        wire = []
+        for entry in items:
+            converted = {}
+            for operation, request in entry.items():
+                converted[operation] = dict(request, **{
+                    field: cls.wire_item(request[field], serializer)
+                    for field in ('Item', 'Key', 'ExpressionAttributeValues') if field in request
+                })
+            wire.append(converted)
+        return wire
+    
+    @timed('db.save')
+    def save(self, data: Dict[str, Any], extra_items: Optional[List[Dict[str, Any]]] = None,
+             line_pages: Optional[int] = None) -> Dict[str, Any]:
+        """Write an order; with line_pages, only its header (the pages are already stored)"""
+        logger.debug("Saving item to DynamoDB", order_id=data['order_id'])
+        if isinstance(data, Order):
+            # Written as built by the model; only the (small) extra entries are converted
+            item = data.to_attributes(line_pages)
+            if extra_items:
+                transact_items = [{
+                    'Put': {
+                        'TableName': self.table_name,
+                        'Item': item,
+                        'ConditionExpression': 'attribute_not_exists(order_id)'
+                    }
+                }] + self.wire_transact_items(extra_items)
+                with span('db.transact'):
+                    retry_conflicts(lambda: self.client.transact_write_items(TransactItems=transact_items))
+            else:
+                self.client.put_item(TableName=self.table_name, Item=item)
+        elif extra_items:
+            transact_items = [{
+                'Put': {
+                    'TableName': self.table.name,
+                    'Item': data,
+                    'ConditionExpression': 'attribute_not_exists(order_id)'
+                }
+            }] + extra_items
+            self.transact(transact_items)
+        else:
+            self.table.put_item(Item=data)
+        return data
+    
+    @timed('db.get')
+    def get(self, id: str, consistent: bool = False) -> Optional[Dict[str, Any]]:
+        logger.debug("Getting item from DynamoDB", order_id=id)
+        response = self.table.get_item(Key={'order_id': id}, ConsistentRead=consistent)
         item = response.get('Item')
-        return DecimalEncoder.encode(item) if item else None
+        return item or None
     
-    def update(self, id: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        print(f"Updating item in DynamoDB: {id}")
+    @timed('db.batch_save')
+    def batch_save(self, items: List[Dict[str, Any]], max_attempts: int = 8,
+                   base_delay: float = 0.05, max_delay: float = 2.0,
+                   line_pages: Optional[Dict[str, int]] = None) -> Dict[str, str]:
+        """Write items in BatchWriteItem chunks, retrying UnprocessedItems with backoff.
+
+        line_pages ({order_id: pages}) writes those orders as headers.
+        Returns {order_id: error} for items that could not be written.
+        """
+        from botocore.exceptions import ClientError
+        from boto3.dynamodb.types import TypeSerializer
+
+        client, serializer = self.client, TypeSerializer()
+        failures: Dict[str, str] = {}
+        for start in range(0, len(items), BATCH_WRITE_SIZE):
+            requests = [{'PutRequest': {'Item': self.wire_item(
+                item, serializer, line_pages.get(item['order_id']) if line_pages else None)}}
+                for item in items[start:start + BATCH_WRITE_SIZE]]
+            attempt = 0
+            while requests:
+                try:
+                    response = client.batch_write_item(RequestItems={self.table_name: requests})
+                    requests = response.get('UnprocessedItems', {}).get(self.table_name, [])
+                    error = 'Unprocessed after retries'
+                except ClientError as e:
+                    code = e.response['Error']['Code']
+                    if code not in ('ProvisionedThroughputExceededException', 'ThrottlingException',
+                                    'RequestLimitExceeded', 'InternalServerError'):
+                        error = str(e)
+                        attempt = max_attempts
+                    else:
+                        error = code
+                if requests:
+                    attempt += 1
+                    if attempt >= max_attempts:
+                        for request in requests:
+                            failures[request['PutRequest']['Item']['order_id']['S']] = error
+                        break
+                    # Exponential backoff with full jitter
+                    delay = min(max_delay, base_delay * (2 ** attempt))
+                    logger.info("Retrying unprocessed items", count=len(requests), attempt=attempt)
+                    time.sleep(random.uniform(0, delay))
+        logger.debug("Batch saved items", saved=len(items) - len(failures), total=len(items))
+        return failures
+    
+    @timed('db.update')
+    def update(self, id: str, data: Dict[str, Any],
+               extra_items: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """Update status; returns None when committed in a transaction (no ReturnValues there)"""
+        logger.debug("Updating item in DynamoDB", order_id=id)
         update_expression = "SET #status = :status, updated_at = :time"
         expression_values = {
             ':status': data['status'],
-            ':time': datetime.utcnow().isoformat()
+            ':time': data.get('updated_at') or datetime.utcnow().isoformat()
         }
         attr_names = {'#status': 'status'}
         
+        if extra_items:
+            self.transact([{
+                'Update': {
+                    'TableName': self.table.name,
+                    'Key': {'order_id': id},
+                    'UpdateExpression': update_expression,
+                    'ExpressionAttributeValues': expression_values,
+                    'ExpressionAttributeNames': attr_names,
+                    'ConditionExpression': 'attribute_exists(order_id)'
+                }
+            }] + extra_items)
+            return None
+        
         response = self.table.update_item(
             Key={'order_id': id},
             UpdateExpression=update_expression,
@@ -95,226 +384,1172 @@ class DynamoDBHandler(StorageHandler):
             ExpressionAttributeNames=attr_names,
             ReturnValues='ALL_NEW'
         )
-        return DecimalEncoder.encode(response['Attributes'])
+        return response['Attributes']
     
-    def delete(self, id: str) -> None:
-        print(f"Deleting item from DynamoDB: {id}")
-        self.table.delete_item(Key={'order_id': id})
+    def _transition_condition(self, id: str, status: str, expected_version: Optional[int]) -> Dict[str, Any]:
+        """ConditionExpression enforcing the state machine and optional optimistic version"""
+        allowed = STATUS_TRANSITIONS[status]
+        if not allowed:
+            raise InvalidStatusTransitionError(id, None, status)
+        placeholders = [f":from{i}" for i in range(len(allowed))]
+        # Archived orders are immutable until restored
+        condition = f"attribute_exists(order_id) AND attribute_not_exists(archived_at) AND #status IN ({', '.join(placeholders)})"
+        values: Dict[str, Any] = dict(zip(placeholders, allowed))
+        if expected_version is not None:
+            if expected_version == 0:
+                condition += " AND attribute_not_exists(#version)"
+            else:
+                condition += " AND #version = :expected_version"
+                values[':expected_version'] = expected_version
+        return {'condition': condition, 'values': values}
+    
+    def _transition_failure(self, id: str, status: str, expected_version: Optional[int],
+                            old_item: Optional[Dict[str, Any]]) -> OrderError:
+        """Explain a failed transition condition from the old item"""
+        if old_item is None:
+            # Older SDKs do not return ALL_OLD on condition failures
+            old_item = self.table.get_item(Key={'order_id': id}, ConsistentRead=True).get('Item')
+        if not old_item:
+            return OrderNotFoundError(f"Order {id} not found")
+        if 'archived_at' in old_item:
+            return OrderArchivedError(f"Order {id} is archived")
+        if old_item.get('status') in STATUS_TRANSITIONS[status]:
+            return VersionConflictError(
+                f"Order {id} is at version {old_item.get('version', 0)}, expected {expected_version}"
+            )
+        return InvalidStatusTransitionError(id, old_item.get('status'), status)
     
+    @timed('db.transition_status')
+    def transition_status(self, id: str, status: str, expected_version: Optional[int] = None,
+                          extra_items: Optional[List[Dict[str, Any]]] = None,
+                          updated_at: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Move an order to a new status in one conditional write.
+        
+        The previous status is copied to previous_status in the same update, so
+        ALL_NEW carries both. Returns None when committed in a transaction;
+        updated_at lets the caller know the timestamp written there.
+        """
+        from botocore.exceptions import ClientError
+        from boto3.dynamodb.types import TypeDeserializer
+
+        logger.debug("Transitioning item in DynamoDB", order_id=id, status=status)
+        check = self._transition_condition(id, status, expected_version)
+        update = {
+            'Key': {'order_id': id},
+            'UpdateExpression': ("SET previous_status = #status, #status = :status, updated_at = :time, "
+                                 "#version = if_not_exists(#version, :zero) + :one"),
+            'ConditionExpression': check['condition'],
+            'ExpressionAttributeNames': {'#status': 'status', '#version': 'version'},
+            'ExpressionAttributeValues': dict(check['values'], **{
+                ':status': status,
+                ':time': updated_at or datetime.utcnow().isoformat(),
+                ':zero': 0,
+                ':one': 1
+            })
+        }
+        
+        try:
+            if extra_items:
+                self.transact([{'Update': dict(update, TableName=self.table.name)}] + extra_items)
+                return None
+            response = self.table.update_item(
+                ReturnValues='ALL_NEW',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD',
+                **update
+            )
+            return response['Attributes']
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == 'ConditionalCheckFailedException':
+                raw = e.response.get('Item')
+                old_item = {k: TypeDeserializer().deserialize(v) for k, v in raw.items()} if raw else None
+                raise self._transition_failure(id, status, expected_version, old_item)
+            if code == 'TransactionCanceledException':
+                reasons = e.response.get('CancellationReasons') or [{}]
+                if reasons[0].get('Code') == 'ConditionalCheckFailed':
+                    raise self._transition_failure(id, status, expected_version, None)
+            raise
+    
+    @timed('db.delete')
+    def delete(self, id: str, extra_items: Optional[List[Dict[str, Any]]] = None,
+               expected_version: Optional[int] = None) -> None:
+        """Delete an order, optionally only if it is still at expected_version"""
+        from botocore.exceptions import ClientError
+
+        logger.debug("Deleting item from DynamoDB", order_id=id)
+        delete: Dict[str, Any] = {'Key': {'order_id': id}}
+        if expected_version is not None:
+            if expected_version == 0:
+                delete['ConditionExpression'] = 'attribute_exists(order_id) AND attribute_not_exists(#version)'
+            else:
+                delete['ConditionExpression'] = 'attribute_exists(order_id) AND #version = :expected_version'
+                delete['ExpressionAttributeValues'] = {':expected_version': expected_version}
+            delete['ExpressionAttributeNames'] = {'#version': 'version'}
+        elif extra_items:
+            delete['ConditionExpression'] = 'attribute_exists(order_id)'
+        
+        try:
+            if extra_items:
+                self.transact([{'Delete': dict(delete, TableName=self.table.name)}] + extra_items)
+            else:
+                self.table.delete_item(**delete)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            reasons = e.response.get('CancellationReasons') or [{}]
+            if code == 'ConditionalCheckFailedException' or (
+                    code == 'TransactionCanceledException' and reasons[0].get('Code') == 'ConditionalCheckFailed'):
+                if expected_version is None:
+                    raise OrderNotFoundError(f"Order {id} not found")
+                raise VersionConflictError(f"Order {id} changed since version {expected_version}")
+            raise
+    
+    @timed('db.list_all')
     def list_all(self) -> List[Dict[str, Any]]:
-        print("Scanning all items from DynamoDB")
-        response = self.table.scan()
-        items = response.get('Items', [])
-        return [DecimalEncoder.encode(item) for item in items]
+        logger.debug("Scanning all items from DynamoDB")
+        items = []
+        next_token = None
+        while True:
+            page = self.list_page(limit=MAX_PAGE_SIZE, next_token=next_token, scan=True)
+            items.extend(page['items'])
+            next_token = page['next_token']
+            if not next_token:
+                return items
+    
+    @timed('db.list_page')
+    def list_page(self, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None,
+                  filters: Optional[Dict[str, str]] = None, scan: bool = False) -> Dict[str, Any]:
+        """Query a GSI for filtered listings; Scan only when explicitly requested"""
+        from boto3.dynamodb.conditions import Key, Attr
+
+        filters = {k: v for k, v in (filters or {}).items() if v}
+        # Summaries only: line items are not read back, converted or serialized
+        kwargs: Dict[str, Any] = {
+            'Limit': max(1, min(limit, MAX_PAGE_SIZE)),
+            'ProjectionExpression': ', '.join(f"#p{i}" for i in range(len(SUMMARY_FIELDS))),
+            'ExpressionAttributeNames': {f"#p{i}": field for i, field in enumerate(SUMMARY_FIELDS)}
+        }
+        if next_token:
+            kwargs['ExclusiveStartKey'] = decode_page_token(next_token)
+
+        created_from = filters.get('created_from')
+        created_to = filters.get('created_to')
+        key_field = next((field for field in ORDER_INDEXES if filters.get(field)), None)
+
+        if key_field:
+            key_condition = Key(key_field).eq(filters[key_field])
+            if created_from and created_to:
+                key_condition = key_condition & Key('created_at').between(created_from, created_to)
+            elif created_from:
+                key_condition = key_condition & Key('created_at').gte(created_from)
+            elif created_to:
+                key_condition = key_condition & Key('created_at').lte(created_to)
+
+            # Any remaining indexed field is applied as a filter on the query; orders
+            # archived and waiting for TTL are already gone from listings
+            other_fields = [f for f in ORDER_INDEXES if f != key_field and filters.get(f)]
+            filter_expression = Attr('archived_at').not_exists()
+            for field in other_fields:
+                filter_expression = filter_expression & Attr(field).eq(filters[field])
+            kwargs['FilterExpression'] = filter_expression
+
+            logger.debug("Querying %s", ORDER_INDEXES[key_field], **{key_field: filters[key_field]})
+            response = self.table.query(
+                IndexName=ORDER_INDEXES[key_field],
+                KeyConditionExpression=key_condition,
+                ScanIndexForward=False,
+                **kwargs
+            )
+        elif scan:
+            filter_expression = Attr('archived_at').not_exists()
+            if created_from:
+                filter_expression = filter_expression & Attr('created_at').gte(created_from)
+            if created_to:
+                filter_expression = filter_expression & Attr('created_at').lte(created_to)
+            kwargs['FilterExpression'] = filter_expression
+
+            logger.debug("Scanning one page of items from DynamoDB")
+            response = self.table.scan(**kwargs)
+        else:
+            raise ValueError("Listing orders requires a status or customer_id filter, or mode=scan")
+
+        return {
+            'items': response.get('Items', []),
+            'next_token': encode_page_token(response.get('LastEvaluatedKey'))
+        }
 
 class S3DocumentHandler:
     def __init__(self, bucket_name: str):
-        self.s3 = boto3.client('s3')
         self.bucket = bucket_name
-        print(f"Initialized S3 document handler for bucket: {bucket_name}")
+        # Content hash of the documents this container stored last, by key (LRU)
+        self._stored: OrderedDict = OrderedDict()
+        self._stored_lock = threading.Lock()
+        logger.debug("Initialized S3 document handler", bucket=bucket_name)
+    
+    @cached_property
+    def s3(self) -> Any:
+        return clients.get_client('s3')
+    
+    @staticmethod
+    def history_prefix(order_id: str) -> str:
+        return f"orders/{order_id}/versions/"
+    
+    @classmethod
+    def document_key(cls, order_id: str, version: Any, status: str) -> str:
+        """Immutable key of one version of an order document; the status is part of
+        the name so the status history can be listed without reading any document"""
+        return f"{cls.history_prefix(order_id)}{int(version):06d}-{status}.json"
+    
+    @classmethod
+    def key_for(cls, order: Dict[str, Any]) -> str:
+        return cls.document_key(order['order_id'], order.get('version', 0), order['status'])
     
     def store_document(self, order_id: str, document: Dict[str, Any]) -> str:
-        key = f"orders/{order_id}/order.json"
+        with span('encode.document'):
+            body = serialization.dumps(document)
+        return self.store_document_json(self.key_for(dict(document, order_id=order_id)), body)
+    
+    @timed('s3.store')
+    def store_document_json(self, key: str, body: str) -> str:
+        """Store an already serialized order document, gzip-encoded when large enough.
+        
+        Version keys are written once: the PUT is conditional (If-None-Match),
+        so a redelivered outbox record or retried batch that finds the key
+        already stored, by any container, leaves it as it is. A container
+        that stored the same content under the key itself skips the request.
+        """
+        from botocore.exceptions import ClientError
+
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        digest = hashlib.sha256(data).hexdigest()
+        with self._stored_lock:
+            if self._stored.get(key) == digest:
+                self._stored.move_to_end(key)
+                count('s3.store.unchanged')
+                return key
+        extra: Dict[str, str] = {}
+        if len(data) >= DOCUMENT_GZIP_MIN_BYTES:
+            with span('encode.gzip'):
+                data = gzip.compress(data, compresslevel=6)
+            extra['ContentEncoding'] = 'gzip'
         try:
-            print(f"Storing document in S3: {key}")
+            logger.debug("Storing document in S3", key=key, bytes=len(data), encoding=extra.get('ContentEncoding'))
             self.s3.put_object(
                 Bucket=self.bucket,
                 Key=key,
-                Body=json.dumps(document, cls=BaseEncoder),
-                ContentType='application/json'
+                Body=data,
+                ContentType='application/json',
+                IfNoneMatch='*',
+                **extra
             )
-            print(f"Successfully stored document in S3: {key}")
-            return key
+        except ClientError as e:
+            # 409: a concurrent PUT of the same key is in flight
+            if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                logger.error("Error storing document in S3", key=key, error=str(e))
+                raise
+            count('s3.store.exists')
         except Exception as e:
-            print(f"Error storing document in S3: {str(e)}")
+            logger.error("Error storing document in S3", key=key, error=str(e))
             raise
+        with self._stored_lock:
+            self._stored[key] = digest
+            self._stored.move_to_end(key)
+            while len(self._stored) > STORED_HASHES_MAX:
+                self._stored.popitem(last=False)
+        return key
     
-    def get_document(self, order_id: str) -> Dict[str, Any]:
-        key = f"orders/{order_id}/order.json"
+    @timed('s3.get')
+    def get_document(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """Current version of an order's document, for the order item read from DynamoDB"""
+        order_id = order['order_id']
+        key = self.key_for(order)
         try:
-            print(f"Getting document from S3: {key}")
+            logger.debug("Getting document from S3", key=key)
             response = self.s3.get_object(Bucket=self.bucket, Key=key)
-            return json.loads(response['Body'].read())
+            # Decode from the stream instead of holding the raw bytes as well
+            body = response['Body']
+            if response.get('ContentEncoding') == 'gzip':
+                body = gzip.GzipFile(fileobj=body, mode='rb')
+            return json.load(body)
         except self.s3.exceptions.NoSuchKey:
-            print(f"Document not found in S3: {key}")
+            logger.info("Document not found in S3", key=key)
             raise DocumentNotFoundError(f"Document not found for order {order_id}")
         except Exception as e:
-            print(f"Error getting document from S3: {str(e)}")
+            logger.error("Error getting document from S3", key=key, error=str(e))
             raise
+    
+    @staticmethod
+    def clamp_range(range_header: Optional[str], max_bytes: int) -> str:
+        """S3 Range for a request's Range header, shortened to at most max_bytes"""
+        if not range_header:
+            return f"bytes=0-{max_bytes - 1}"
+        match = re.fullmatch(r'\s*bytes=(\d*)-(\d*)\s*', range_header)
+        if not match or not (match.group(1) or match.group(2)):
+            raise RangeNotSatisfiableError(f"Unsupported Range: {range_header}")
+        start, end = match.group(1), match.group(2)
+        if not start:
+            return f"bytes=-{min(int(end), max_bytes)}"
+        start_byte = int(start)
+        last_byte = start_byte + max_bytes - 1
+        if end:
+            if int(end) < start_byte:
+                raise RangeNotSatisfiableError(f"Unsupported Range: {range_header}")
+            last_byte = min(int(end), last_byte)
+        return f"bytes={start_byte}-{last_byte}"
+    
+    @timed('s3.get_range')
+    def get_document_range(self, order: Dict[str, Any], range_header: Optional[str] = None,
+                           max_bytes: int = DOCUMENT_MAX_PROXY_BYTES) -> Dict[str, Any]:
+        """Stored bytes of a document (still gzip-encoded if stored that way) for one Range.
 
-    def delete_document(self, order_id: str) -> None:
-        """Delete order document from S3"""
-        key = f"orders/{order_id}/order.json"
+        Without a Range the whole document is returned, unless it is larger
+        than max_bytes (DocumentTooLargeError).
+        """
+        from botocore.exceptions import ClientError
+
+        order_id = order['order_id']
+        key = self.key_for(order)
+        s3_range = self.clamp_range(range_header, max_bytes)
         try:
-            print(f"Attempting to delete document from S3: {key}")
-            self.s3.delete_object(
-                Bucket=self.bucket,
-                Key=key
+            response = self.s3.get_object(Bucket=self.bucket, Key=key, Range=s3_range)
+        except self.s3.exceptions.NoSuchKey:
+            raise DocumentNotFoundError(f"Document not found for order {order_id}")
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'InvalidRange':
+                raise RangeNotSatisfiableError(f"Range {range_header} starts past the end of the document")
+            raise
+        content_range = response.get('ContentRange', '')
+        total = int(content_range.rsplit('/', 1)[1]) if '/' in content_range else response['ContentLength']
+        if range_header is None and total > max_bytes:
+            raise DocumentTooLargeError(
+                f"Document is {total} bytes; request a Range or the presigned URL"
             )
-            # Verify deletion
+        return {
+            'body': response['Body'].read(),
+            'partial': range_header is not None,
+            'content_range': content_range,
+            'content_type': response.get('ContentType', 'application/json'),
+            'content_encoding': response.get('ContentEncoding'),
+            'etag': response.get('ETag')
+        }
+    
+    @timed('s3.head')
+    def stored_document_key(self, order: Dict[str, Any]) -> Tuple[str, bool]:
+        """Key of the newest stored document of an order, and whether it is the current version.
+
+        With an outbox the document of a write is stored after the write, so
+        right after a PATCH the current version may not exist yet: the newest
+        stored version stands in for it until the dispatcher catches up.
+        """
+        from botocore.exceptions import ClientError
+
+        key = self.key_for(order)
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=key)
+            return key, True
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+                raise
+        versions = self.list_versions(order['order_id'])
+        if not versions:
+            raise DocumentNotFoundError(f"Document not found for order {order['order_id']}")
+        count('s3.document.stale')
+        return versions[-1]['key'], False
+    
+    def presigned_document_url(self, order: Dict[str, Any], expires_in: int = DOCUMENT_URL_TTL_SECONDS) -> Dict[str, Any]:
+        """Short-lived GET URL for the newest stored order document (stale: not the current version yet)"""
+        key, current = self.stored_document_key(order)
+        url = self.s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=expires_in
+        )
+        return {'url': url, 'key': key, 'expires_in': expires_in, 'stale': not current}
+    
+    @staticmethod
+    def attachment_key(order_id: str, filename: str) -> str:
+        safe_name = re.sub(r'[^A-Za-z0-9._-]', '_', filename)[:128] or 'attachment'
+        return f"orders/{order_id}/attachments/{uuid.uuid4().hex[:12]}-{safe_name}"
+    
+    def presigned_attachment_upload(self, order_id: str, filename: str, content_type: str, size: int,
+                                    expires_in: int = DOCUMENT_URL_TTL_SECONDS) -> Dict[str, Any]:
+        """Short-lived PUT URL for one attachment.
+
+        Content-Type and Content-Length are part of the signature, so the
+        upload must send exactly the declared type and size.
+        """
+        key = self.attachment_key(order_id, filename)
+        url = self.s3.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': self.bucket, 'Key': key, 'ContentType': content_type, 'ContentLength': size},
+            ExpiresIn=expires_in
+        )
+        return {
+            'url': url,
+            'key': key,
+            'method': 'PUT',
+            'headers': {'Content-Type': content_type, 'Content-Length': str(size)},
+            'expires_in': expires_in
+        }
+
+    @timed('s3.history')
+    def list_versions(self, order_id: str) -> List[Dict[str, Any]]:
+        """Stored versions of an order's document, oldest first, from key listings alone"""
+        prefix = self.history_prefix(order_id)
+        versions = []
+        for page in self.s3.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                name = obj['Key'][len(prefix):].rsplit('.', 1)[0]
+                version, _, status = name.partition('-')
+                versions.append({
+                    'version': int(version),
+                    'status': status,
+                    'stored_at': obj['LastModified'].isoformat(),
+                    'bytes': obj['Size'],
+                    'key': obj['Key']
+                })
+        return versions
+    
+    @timed('s3.delete')
+    def delete_document(self, order_id: str) -> None:
+        """Delete every stored version of an order document from S3"""
+        failures = self.delete_documents([order_id])
+        if failures:
+            raise Exception(failures[order_id])
+    
+    def delete_documents(self, order_ids: List[str]) -> Dict[str, str]:
+        """Delete the documents of many orders with DeleteObjects (1000 keys per call).
+        
+        Returns an error message per order whose keys could not all be deleted.
+        """
+        failures: Dict[str, str] = {}
+        owners: Dict[str, str] = {}
+        # A dedicated pool: single deletes already run on the shared side-effect pool
+        with ThreadPoolExecutor(max_workers=min(16, max(1, len(order_ids)))) as pool:
+            listings = [
+                (order_id, pool.submit(contextvars.copy_context().run, self.list_versions, order_id))
+                for order_id in order_ids
+            ]
+        for order_id, future in listings:
+            if future.exception() is not None:
+                failures[order_id] = f"list: {future.exception()}"
+                continue
+            for version in future.result():
+                owners[version['key']] = order_id
+            # Documents stored before versioning lived under a single key
+            owners[f"orders/{order_id}/order.json"] = order_id
+        
+        keys = list(owners)
+        for start in range(0, len(keys), DELETE_OBJECTS_SIZE):
+            chunk = keys[start:start + DELETE_OBJECTS_SIZE]
+            logger.debug("Deleting documents from S3", keys=len(chunk))
             try:
-                self.s3.head_object(Bucket=self.bucket, Key=key)
-                raise Exception(f"Document still exists after deletion: {key}")
-            except self.s3.exceptions.ClientError as e:
-                if e.response['Error']['Code'] == '404':
-                    print(f"Successfully deleted document from S3: {key}")
-                else:
-                    raise
-        except Exception as e:
-            print(f"Error deleting document from S3: {str(e)}")
-            raise
+                # Quiet mode reports only the keys that failed; a missing key is not an error
+                response = self.s3.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True}
+                )
+            except Exception as e:
+                logger.error("Error deleting documents from S3", keys=len(chunk), error=str(e))
+                for key in chunk:
+                    failures.setdefault(owners[key], str(e))
+                continue
+            for error in response.get('Errors', []):
+                logger.error("Error deleting document from S3", key=error['Key'], code=error.get('Code'),
+                             error=error.get('Message'))
+                failures.setdefault(owners[error['Key']], f"{error['Key']}: {error.get('Code')}")
+        
+        with self._stored_lock:
+            for key in keys:
+                self._stored.pop(key, None)
+        return failures
 
 class NotificationService:
     def __init__(self, topic_arn: str):
-        self.sns = boto3.client('sns')
         self.topic_arn = topic_arn
-        print(f"Initialized SNS notification service for topic: {topic_arn}")
+        logger.debug("Initialized SNS notification service", topic=topic_arn)
     
-    def send_notification(self, event_type: str, data: Dict[str, Any]) -> None:
-        try:
-            timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-            
-            message = f"""
+    @cached_property
+    def sns(self) -> Any:
+        return clients.get_client('sns')
+    
+    @staticmethod
+    def format_message(event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the SNS message fields shared by publish and PublishBatch"""
+        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        
+        message = f"""
 Order Event: {event_type}
 Time: {timestamp}
 Order ID: {data.get('order_id')}
 Status: {data.get('status', 'N/A')}
 ------------------------
-Details: {json.dumps(data, indent=2)}
+Details: {serialization.dumps(data, indent=True)}
 """
-            
-            print(f"Sending SNS notification for event: {event_type}")
-            response = self.sns.publish(
-                TopicArn=self.topic_arn,
-                Message=message,
-                Subject=f"Order System Notification: {event_type}",
-                MessageAttributes={
-                    'event_type': {
-                        'DataType': 'String',
-                        'StringValue': event_type
-                    }
+        return {
+            'Message': message,
+            'Subject': f"Order System Notification: {event_type}",
+            'MessageAttributes': {
+                'event_type': {
+                    'DataType': 'String',
+                    'StringValue': event_type
                 }
-            )
-            print(f"Successfully sent notification: {event_type}, MessageId: {response.get('MessageId')}")
+            }
+        }
+    
+    @timed('sns.publish')
+    def send_notification(self, event_type: str, data: Dict[str, Any]) -> None:
+        try:
+            logger.debug("Sending SNS notification", event_type=event_type)
+            response = self.sns.publish(TopicArn=self.topic_arn, **self.format_message(event_type, data))
+            logger.debug("Sent SNS notification", event_type=event_type, message_id=response.get('MessageId'))
         except Exception as e:
-            print(f"Error sending notification: {str(e)}")
+            logger.error("Error sending notification", event_type=event_type, error=str(e))
             raise
 
+    @timed('sns.publish_batch')
+    def send_notifications(self, events: List[Any]) -> List[int]:
+        """Publish (event_type, data) pairs 10 per PublishBatch call; returns failed indexes"""
+        failed: List[int] = []
+        for start in range(0, len(events), 10):
+            chunk = events[start:start + 10]
+            entries = [
+                dict(Id=str(start + i), **self.format_message(event_type, data))
+                for i, (event_type, data) in enumerate(chunk)
+            ]
+            try:
+                logger.debug("Publishing SNS notification batch", count=len(entries))
+                response = self.sns.publish_batch(TopicArn=self.topic_arn, PublishBatchRequestEntries=entries)
+                failed.extend(int(entry['Id']) for entry in response.get('Failed', []))
+            except Exception as e:
+                logger.error("Error publishing notification batch", count=len(entries), error=str(e))
+                failed.extend(range(start, start + len(chunk)))
+        return failed
+
 class OrderProcessor:
-    def __init__(self, table_name: str, bucket_name: str, topic_arn: str):
-        print(f"Initializing OrderProcessor with table: {table_name}, bucket: {bucket_name}, topic: {topic_arn}")
-        self.db_handler = DynamoDBHandler(table_name)
+    def __init__(self, table_name: str, bucket_name: str, topic_arn: str,
+                 outbox_table: Optional[str] = None, inventory_table: Optional[str] = None,
+                 customers_table: Optional[str] = None, changes_table: Optional[str] = None,
+                 lines_table: Optional[str] = None, archive_index_table: Optional[str] = None):
+        logger.info("Initializing OrderProcessor", table=table_name, bucket=bucket_name, topic=topic_arn,
+                    outbox=outbox_table, inventory=inventory_table, customers=customers_table,
+                    changes=changes_table, lines=lines_table, archive=archive_index_table)
+        self.table_name = table_name
+        self.bucket_name = bucket_name
+        self.db_handler: StorageHandler = DynamoDBHandler(table_name)
+        if os.environ.get('ORDER_CACHE_ENABLED', 'true').lower() == 'true':
+            from .cache import cached_from_env
+            self.db_handler = cached_from_env(self.db_handler)
         self.doc_handler = S3DocumentHandler(bucket_name)
         self.notification_service = NotificationService(topic_arn)
+        self.side_effects = SideEffectRunner()
+        
+        # In outbox mode side effects are committed with the order write and
+        # dispatched later from the outbox table's stream
+        self.outbox = None
+        if outbox_table:
+            from .outbox import OutboxStore
+            self.outbox = OutboxStore(outbox_table)
+        
+        # With an inventory table, orders reserve stock in the transaction that writes them
+        self.inventory = None
+        if inventory_table:
+            from .inventory import InventoryStore
+            self.inventory = InventoryStore(inventory_table)
+        
+        # With a customers table, order writes keep each customer's aggregate in the same transaction
+        self.customers = None
+        if customers_table:
+            from .customers import CustomerStore
+            self.customers = CustomerStore(customers_table)
+        
+        # With a changes table, every order write also appends to the change feed
+        self.changes = None
+        if changes_table:
+            from .changes import ChangeLog
+            self.changes = ChangeLog(changes_table)
+        
+        # With a lines table, orders are stored as a header plus pages of line items
+        self.lines = None
+        if lines_table:
+            from .lines import LineStore
+            self.lines = LineStore(lines_table)
+        
+        # With an archive index, reads of orders gone from the table fall back to the S3 archive
+        self.archive = None
+        if archive_index_table:
+            from .archive import OrderArchive
+            self.archive = OrderArchive(bucket_name, archive_index_table, table_name,
+                                        lines=self.lines, changes=self.changes)
+    
+    def _run_side_effects(self, order_id: str, effects: Dict[str, Any]) -> None:
+        """Run S3/SNS side effects once the DynamoDB write has committed"""
+        failures = self.side_effects.run({f"{name}:{order_id}": effect for name, effect in effects.items()})
+        if failures:
+            raise SideEffectError(order_id, failures)
+    
+    def _line_store(self, order: Dict[str, Any]) -> Any:
+        if not self.lines:
+            raise OrderError(f"Order {order['order_id']} keeps its line items in ORDER_LINES_TABLE, which is not set")
+        return self.lines
     
+    def _with_items(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """The order with all its line items (a header gets them from its pages)"""
+        if 'line_pages' not in order:
+            return order
+        full = dict(order, items=self._line_store(order).get_items(order['order_id'], consistent=True))
+        del full['line_pages']
+        return full
+    
+    def _find_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """The order from the table, or from the archive once TTL has removed it"""
+        order = self.db_handler.get(order_id)
+        if order or not self.archive:
+            return order
+        return self.archive.get(order_id)
+    
+    def _save_line_pages(self, orders: List[Order]) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """Store the line pages of new orders before their headers.
+
+        Returns ({order_id: pages} of the orders stored, {order_id: error}).
+        """
+        pages = {order.order_id: self.lines.order_pages(order) for order in orders}
+        failures = self.lines.save_pages([page for order_pages in pages.values() for page in order_pages])
+        if failures:
+            self.lines.delete_pages({order_id: len(pages[order_id]) for order_id in failures})
+        return {order_id: len(order_pages) for order_id, order_pages in pages.items()
+                if order_id not in failures}, failures
+    
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for background side effects; call before the Lambda returns"""
+        failures = self.side_effects.flush(timeout)
+        for name, error in failures.items():
+            logger.error("Background side effect failed", side_effect=name, error=str(error))
+    
+    @timed('order.create')
     def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create new order"""
         try:
-            print(f"Creating new order: {order_data['order_id']}")
-            
-            # Save to DynamoDB
-            saved_order = self.db_handler.save(order_data)
-            
-            # Store document in S3
-            document_key = self.doc_handler.store_document(order_data['order_id'], saved_order)
+            order_id = order_data['order_id']
+            logger.debug("Creating new order", order_id=order_id, items=len(order_data['items']))
             
-            # Send notification
-            self.notification_service.send_notification('ORDER_CREATED', {
-                'order_id': order_data['order_id'],
+            document_key = self.doc_handler.key_for(order_data)
+            notification = {
+                'order_id': order_id,
                 'document_key': document_key,
                 'status': 'PENDING',
                 'customer_id': order_data['customer_id'],
                 'total_amount': str(order_data['total_amount'])
-            })
+            }
             
-            print(f"Successfully created order: {order_data['order_id']}")
+            # Stock reservations come right after the order Put (position 0)
+            extra_items = self.inventory.reserve_items(order_data['items']) if self.inventory else []
+            if self.customers:
+                extra_items.append(self.customers.order_created(order_data))
+            if self.changes:
+                extra_items.append(self.changes.put_item(self.changes.order_created(order_data)))
+            
+            # Line pages go first; the header write makes them part of the order
+            line_pages = None
+            if self.lines:
+                stored, failures = self._save_line_pages([order_data])
+                if failures:
+                    raise OrderError(f"Could not store the line items of order {order_id}: {failures[order_id]}")
+                line_pages = stored[order_id]
+            if self.outbox:
+                # Order and outbox record commit together; the dispatcher does the rest. With
+                # line pages the record holds the header only (a record is capped at 400 KB too)
+                # and the dispatcher reads the items back from the pages
+                document = order_data
+                if line_pages is not None:
+                    document = {name: order_data[name] for name in order_data.keys() if name != 'items'}
+                    document.update(item_count=len(order_data['items']), line_pages=line_pages)
+                extra_items.append(self.outbox.put_item(order_id, 'ORDER_CREATED', notification,
+                                                        document=document, document_action='store',
+                                                        document_key=document_key, line_pages=line_pages))
+            try:
+                saved_order = self.db_handler.save(order_data, extra_items=extra_items, line_pages=line_pages)
+            except Exception as e:
+                if line_pages is not None:
+                    self.lines.delete_pages({order_id: line_pages})
+                stock_error = self.inventory.insufficient_stock(e, order_data['items']) if self.inventory else None
+                if stock_error:
+                    raise stock_error from e
+                raise
+            
+            if not self.outbox:
+                # Store document in S3 and send notification concurrently
+                self._run_side_effects(order_id, {
+                    's3.store': lambda: self.doc_handler.store_document(order_id, saved_order),
+                    'sns.publish': lambda: self.notification_service.send_notification('ORDER_CREATED', notification)
+                })
+            
+            logger.info("Created order", order_id=order_id)
             return saved_order
             
+        except InsufficientStockError as e:
+            logger.info("Insufficient stock", order_id=order_data['order_id'], product_ids=e.product_ids)
+            raise
         except Exception as e:
-            print(f"Error in create_order: {str(e)}")
+            logger.error("Error in create_order", error=str(e))
             raise
     
+    @timed('order.create_batch')
+    def create_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create many orders with BatchWriteItem; returns one result per order"""
+        if self.inventory:
+            # Reservations need a transaction per order; BatchWriteItem cannot be conditional
+            return self._create_orders_reserving(orders)
+        try:
+            logger.debug("Creating batch of orders", count=len(orders))
+            if self.lines:
+                line_pages, failures = self._save_line_pages(orders)
+                header_failures = self.db_handler.batch_save(
+                    [order for order in orders if order['order_id'] in line_pages], line_pages=line_pages)
+                if header_failures:
+                    self.lines.delete_pages({order_id: line_pages[order_id] for order_id in header_failures})
+                failures.update(header_failures)
+            else:
+                failures = self.db_handler.batch_save(orders)
+            created = [order for order in orders if order['order_id'] not in failures]
+            # BatchWriteItem cannot carry the aggregate updates; one update per customer follows it
+            customer_failures = self.customers.apply_created(created) if self.customers else {}
+            change_failures = (self.changes.append([self.changes.order_created(order) for order in created])
+                               if self.changes else {})
+            
+            # Documents upload concurrently; notifications go out 10 per PublishBatch call
+            uploads = {
+                order['order_id']: submit(self.doc_handler.store_document, order['order_id'], order)
+                for order in created
+            }
+            failed_notifications = set(self.notification_service.send_notifications([
+                ('ORDER_CREATED', {
+                    'order_id': order['order_id'],
+                    'document_key': self.doc_handler.key_for(order),
+                    'status': 'PENDING',
+                    'customer_id': order['customer_id'],
+                    'total_amount': str(order['total_amount'])
+                })
+                for order in created
+            ]))
+            
+            positions = {order['order_id']: i for i, order in enumerate(created)}
+            results = []
+            for order in orders:
+                order_id = order['order_id']
+                if order_id in failures:
+                    results.append({'order_id': order_id, 'status': 'FAILED', 'error': failures[order_id]})
+                    continue
+                result = {'order_id': order_id, 'status': 'CREATED'}
+                side_effect_errors = []
+                if uploads[order_id].exception() is not None:
+                    side_effect_errors.append(f"s3.store: {uploads[order_id].exception()}")
+                if positions[order_id] in failed_notifications:
+                    side_effect_errors.append('sns.publish: failed')
+                if order['customer_id'] in customer_failures:
+                    side_effect_errors.append(f"customers: {customer_failures[order['customer_id']]}")
+                if order_id in change_failures:
+                    side_effect_errors.append(f"changes: {change_failures[order_id]}")
+                if side_effect_errors:
+                    result['side_effect_errors'] = side_effect_errors
+                results.append(result)
+            
+            logger.info("Created batch of orders", created=len(created), total=len(orders))
+            return results
+            
+        except Exception as e:
+            logger.error("Error in create_orders", error=str(e))
+            raise
+    
+    def _create_orders_reserving(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create orders one transaction each, concurrently; returns one result per order"""
+        logger.debug("Creating batch of orders with stock reservations", count=len(orders))
+        # A dedicated pool: create_order itself waits on the shared side-effect pool
+        with ThreadPoolExecutor(max_workers=min(16, max(1, len(orders)))) as pool:
+            futures = [
+                (order['order_id'], pool.submit(contextvars.copy_context().run, self.create_order, order))
+                for order in orders
+            ]
+        results = []
+        for order_id, future in futures:
+            error = future.exception()
+            if error is None:
+                results.append({'order_id': order_id, 'status': 'CREATED'})
+            elif isinstance(error, SideEffectError):
+                results.append({'order_id': order_id, 'status': 'CREATED', 'side_effect_errors': [
+                    f"{name.split(':')[0]}: {failure}" for name, failure in error.failures.items()
+                ]})
+            else:
+                result = {'order_id': order_id, 'status': 'FAILED', 'error': str(error)}
+                if isinstance(error, InsufficientStockError):
+                    result['product_ids'] = error.product_ids
+                results.append(result)
+        logger.info("Created batch of orders",
+                    created=sum(1 for r in results if r['status'] == 'CREATED'), total=len(orders))
+        return results
+    
+    @timed('order.get')
     def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
         """Get order by ID"""
         try:
-            print(f"Getting order: {order_id}")
-            return self.db_handler.get(order_id)
+            logger.debug("Getting order", order_id=order_id)
+            return self._find_order(order_id)
         except Exception as e:
-            print(f"Error getting order: {str(e)}")
+            logger.error("Error getting order", order_id=order_id, error=str(e))
             raise
     
-    def update_status(self, order_id: str, status: str) -> Dict[str, Any]:
-        """Update order status"""
+    @timed('order.get_items')
+    def get_order_items(self, order_id: str, start: int = 0, limit: int = 100) -> Optional[Dict[str, Any]]:
+        """An order with line items start..start+limit and items_next_token for the rest"""
+        order = self._find_order(order_id)
+        if not order:
+            return None
+        if 'line_pages' in order:
+            items = self._line_store(order).get_items(order_id, start, limit)
+            total = int(order['item_count'])
+        else:
+            total = len(order.get('items') or [])
+            items = (order.get('items') or [])[start:start + limit]
+        end = start + len(items)
+        return dict(order, items=items, items_next_token=str(end) if end < total else None)
+    
+    @timed('order.get_entry')
+    def get_order_entry(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get an order pre-serialized as {'body', 'etag', 'cache'}"""
         try:
-            print(f"Updating order status: {order_id} to {status}")
-            order = self.db_handler.get(order_id)
-            if not order:
-                raise OrderNotFoundError(f"Order {order_id} not found")
-            
-            updated_order = self.db_handler.update(order_id, {'status': status})
+            logger.debug("Getting order entry", order_id=order_id)
+            from .cache import make_entry
+            if hasattr(self.db_handler, 'get_entry'):
+                entry = self.db_handler.get_entry(order_id)
+                if entry:
+                    count(f"cache.{entry['cache'].lower()}")
+                    return entry
+            else:
+                order = self.db_handler.get(order_id)
+                if order:
+                    return dict(make_entry(order), cache='BYPASS')
+            archived = self.archive.get(order_id) if self.archive else None
+            return dict(make_entry(archived), cache='ARCHIVE') if archived else None
+        except Exception as e:
+            logger.error("Error getting order entry", order_id=order_id, error=str(e))
+            raise
+    
+    def _require_order(self, order_id: str) -> Dict[str, Any]:
+        order = self._find_order(order_id)
+        if not order:
+            raise OrderNotFoundError(f"Order {order_id} not found")
+        return order
+    
+    @timed('order.document_url')
+    def get_document_url(self, order_id: str) -> Dict[str, Any]:
+        """Presigned GET URL for an order's document; the bytes never pass through the Lambda"""
+        return self.doc_handler.presigned_document_url(self._require_order(order_id))
+    
+    @timed('order.document_range')
+    def get_document_range(self, order_id: str, range_header: Optional[str] = None) -> Dict[str, Any]:
+        """Stored bytes of an order's document for one HTTP Range (or the whole, if small)"""
+        return self.doc_handler.get_document_range(self._require_order(order_id), range_header)
+    
+    @timed('order.history')
+    def get_status_history(self, order_id: str) -> List[Dict[str, Any]]:
+        """Status of every stored document version, from one S3 listing (no DynamoDB reads)"""
+        versions = self.doc_handler.list_versions(order_id)
+        if not versions:
+            raise OrderNotFoundError(f"No document history for order {order_id}")
+        return versions
+    
+    @timed('order.attachment_upload')
+    def create_attachment_upload(self, order_id: str, filename: str, content_type: str, size: int) -> Dict[str, Any]:
+        """Presigned PUT URL for uploading an attachment of an order straight to S3"""
+        if size <= 0 or size > MAX_ATTACHMENT_BYTES:
+            raise ValueError(f"size must be between 1 and {MAX_ATTACHMENT_BYTES} bytes")
+        self._require_order(order_id)
+        return self.doc_handler.presigned_attachment_upload(order_id, filename, content_type, size)
+    
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Hit/miss/eviction counters of the order cache, if enabled"""
+        return self.db_handler.stats() if hasattr(self.db_handler, 'stats') else None
+    
+    @timed('order.update_status')
+    def update_status(self, order_id: str, status: str, expected_version: Optional[int] = None) -> Dict[str, Any]:
+        """Update order status through the state machine.
+        
+        Returns the updated order, or with an outbox only the fields the write
+        determined (order_id, status, updated_at, and previous_status/version
+        when the transition or the expected version fixes them).
+        """
+        try:
+            logger.debug("Updating order status", order_id=order_id, status=status)
             
-            # Update document in S3
-            document_key = self.doc_handler.store_document(order_id, updated_order)
+            release_stock = self.inventory is not None and status == 'CANCELLED'
+            cancel_customer = self.customers is not None and status == 'CANCELLED'
+            if release_stock or cancel_customer or (self.changes and not self.outbox):
+                # The stock to release and the amount to uncount depend on the order
+                # (and inline side effects need its document), so read it and pin
+                # the write to that version
+                order = self.db_handler.get(order_id, consistent=True)
+                if not order:
+                    raise OrderNotFoundError(f"Order {order_id} not found")
+                if 'archived_at' in order:
+                    raise OrderArchivedError(f"Order {order_id} is archived")
+                version = int(order.get('version', 0))
+                if expected_version is not None and expected_version != version:
+                    raise VersionConflictError(f"Order {order_id} is at version {version}, expected {expected_version}")
+                updated_order = dict(order, status=status, previous_status=order['status'],
+                                     updated_at=datetime.utcnow().isoformat(), version=version + 1)
+                # Documents and stock releases need the line items of a header
+                document = self._with_items(updated_order) if release_stock or not self.outbox else None
+                notification = {
+                    'order_id': order_id,
+                    'status': status,
+                    'document_key': self.doc_handler.key_for(updated_order),
+                    'customer_id': order['customer_id'],
+                    'previous_status': order['status']
+                }
+                extra_items = self.inventory.release_items(document['items']) if release_stock else []
+                if cancel_customer:
+                    extra_items.append(self.customers.order_cancelled(order))
+                if self.changes:
+                    extra_items.append(self.changes.put_item(self.changes.status_updated(
+                        order, status, previous_status=order['status'], version=version + 1)))
+                if self.outbox:
+                    extra_items.append(self.outbox.put_item(order_id, 'STATUS_UPDATED', notification,
+                                                            document_action='store',
+                                                            order_updated_at=updated_order['updated_at']))
+                self.db_handler.transition_status(order_id, status, expected_version=version, extra_items=extra_items,
+                                                  updated_at=updated_order['updated_at'])
+            elif self.outbox:
+                # One transaction and no read: the Update enforces the state machine and
+                # the version, and the dispatcher reads the document that was written
+                allowed = STATUS_TRANSITIONS[status]
+                updated_order = {
+                    'order_id': order_id,
+                    'status': status,
+                    'previous_status': allowed[0] if len(allowed) == 1 else None,
+                    'updated_at': datetime.utcnow().isoformat(),
+                    'version': expected_version + 1 if expected_version is not None else None
+                }
+                updated_order = {name: value for name, value in updated_order.items() if value is not None}
+                document = None
+                notification = {name: updated_order[name] for name in ('order_id', 'status', 'previous_status')
+                                if name in updated_order}
+                extra_items = []
+                if self.changes:
+                    extra_items.append(self.changes.put_item(self.changes.status_updated(
+                        updated_order, status, previous_status=updated_order.get('previous_status'),
+                        version=updated_order.get('version'))))
+                extra_items.append(self.outbox.put_item(order_id, 'STATUS_UPDATED', notification,
+                                                        document_action='store',
+                                                        order_updated_at=updated_order['updated_at']))
+                self.db_handler.transition_status(order_id, status, expected_version=expected_version,
+                                                  extra_items=extra_items, updated_at=updated_order['updated_at'])
+            else:
+                updated_order = self.db_handler.transition_status(order_id, status, expected_version=expected_version)
+                document = None
+                notification = {
+                    'order_id': order_id,
+                    'status': status,
+                    'document_key': self.doc_handler.key_for(updated_order),
+                    'customer_id': updated_order['customer_id'],
+                    'previous_status': updated_order['previous_status']
+                }
             
-            # Send notification
-            self.notification_service.send_notification('STATUS_UPDATED', {
-                'order_id': order_id,
-                'status': status,
-                'document_key': document_key,
-                'customer_id': updated_order['customer_id'],
-                'previous_status': order['status']
-            })
+            if not self.outbox:
+                # Update document in S3 and send notification concurrently
+                self._run_side_effects(order_id, {
+                    's3.store': lambda: self.doc_handler.store_document(order_id,
+                                                                        document or self._with_items(updated_order)),
+                    'sns.publish': lambda: self.notification_service.send_notification('STATUS_UPDATED', notification)
+                })
             
-            print(f"Successfully updated order status: {order_id} to {status}")
+            logger.info("Updated order status", order_id=order_id, status=status)
             return updated_order
             
-        except OrderNotFoundError:
+        except (OrderNotFoundError, InvalidStatusTransitionError, VersionConflictError, OrderArchivedError):
             raise
         except Exception as e:
-            print(f"Error updating status: {str(e)}")
+            logger.error("Error updating status", order_id=order_id, error=str(e))
             raise
     
+    @timed('order.bulk_update_status')
+    def bulk_update_status(self, order_ids: List[str], status: str) -> List[Dict[str, Any]]:
+        """Move many orders to a status concurrently; returns one result per order"""
+        logger.info("Bulk updating order status", count=len(order_ids), status=status)
+        # A dedicated pool: update_status itself waits on the shared side-effect pool
+        with ThreadPoolExecutor(max_workers=min(16, max(1, len(order_ids)))) as pool:
+            futures = [
+                (order_id, pool.submit(contextvars.copy_context().run, self.update_status, order_id, status))
+                for order_id in order_ids
+            ]
+        results = []
+        for order_id, future in futures:
+            error = future.exception()
+            if error is None:
+                order = future.result()
+                results.append({
+                    'order_id': order_id,
+                    'status': 'UPDATED',
+                    'previous_status': order.get('previous_status'),
+                    'version': order.get('version')
+                })
+            else:
+                results.append({'order_id': order_id, 'status': 'FAILED', 'error': str(error)})
+        return results
+    
+    @timed('order.delete')
     def delete_order(self, order_id: str) -> None:
         """Delete order and associated documents"""
         try:
-            print(f"Starting deletion process for order: {order_id}")
+            logger.debug("Deleting order", order_id=order_id)
             
             # Get order details before deletion
-            order = self.db_handler.get(order_id)
+            order = self.db_handler.get(order_id, consistent=True)
             if not order:
                 raise OrderNotFoundError(f"Order {order_id} not found")
             
-            # Delete from S3 first
-            print(f"Deleting S3 document for order: {order_id}")
-            self.doc_handler.delete_document(order_id)
-            
-            # Delete from DynamoDB
-            print(f"Deleting from DynamoDB: {order_id}")
-            self.db_handler.delete(order_id)
-            
-            # Send notification
-            self.notification_service.send_notification('ORDER_DELETED', {
+            notification = {
                 'order_id': order_id,
                 'customer_id': order['customer_id'],
                 'status': 'DELETED',
                 'previous_status': order['status']
-            })
+            }
+            
+            # Stock of a cancelled order was already released; pin the delete to the
+            # version read so a concurrent cancel cannot release it twice
+            extra_items = []
+            expected_version = None
+            if self.inventory and order['status'] != 'CANCELLED':
+                extra_items = self.inventory.release_items(self._with_items(order)['items'])
+                expected_version = int(order.get('version', 0))
+            if self.customers:
+                # The aggregate change depends on the status read, so the delete is pinned too
+                extra_items.append(self.customers.order_deleted(order))
+                expected_version = int(order.get('version', 0))
+            if self.changes:
+                extra_items.append(self.changes.put_item(self.changes.order_deleted(order)))
+            if self.outbox:
+                extra_items.append(self.outbox.put_item(order_id, 'ORDER_DELETED', notification,
+                                                        document_action='delete'))
+            
+            # Delete from DynamoDB
+            self.db_handler.delete(order_id, extra_items=extra_items, expected_version=expected_version)
+            if 'line_pages' in order:
+                # Without the header no read reaches the pages; one left by a failure is only dead weight
+                self._line_store(order).delete_pages({order_id: int(order['line_pages'])})
+            if self.archive and 'archived_at' in order:
+                # Deleted while waiting for TTL: its archived copy must not answer reads
+                self.archive.forget(order_id)
+            
+            if not self.outbox:
+                # Delete S3 document and send notification concurrently
+                self._run_side_effects(order_id, {
+                    's3.delete': lambda: self.doc_handler.delete_document(order_id),
+                    'sns.publish': lambda: self.notification_service.send_notification('ORDER_DELETED', notification)
+                })
             
-            print(f"Successfully deleted order: {order_id}")
+            logger.info("Deleted order", order_id=order_id)
             
-        except OrderNotFoundError:
+        except (OrderNotFoundError, VersionConflictError):
             raise
         except Exception as e:
-            print(f"Error deleting order: {str(e)}")
+            logger.error("Error deleting order", order_id=order_id, error=str(e))
             raise
     
-    def list_orders(self) -> List[Dict[str, Any]]:
-        """List all orders"""
+    @timed('order.list')
+    def list_orders(self, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None,
+                    filters: Optional[Dict[str, str]] = None, scan: bool = False) -> Dict[str, Any]:
+        """List one page of orders"""
+        try:
+            logger.debug("Retrieving orders page", limit=limit, filters=filters, scan=scan)
+            page = self.db_handler.list_page(limit=limit, next_token=next_token, filters=filters, scan=scan)
+            logger.debug("Retrieved orders page", count=len(page['items']))
+            return {
+                'orders': page['items'],
+                'count': len(page['items']),
+                'next_token': page['next_token']
+            }
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error("Error listing orders", error=str(e))
+            raise
+    
+    @timed('order.changes')
+    def get_changes(self, since: Optional[str] = None, limit: Optional[int] = None,
+                    wait_seconds: float = 0) -> Dict[str, Any]:
+        """Order changes after a cursor; see ChangeLog.read"""
+        if not self.changes:
+            raise ValueError("The change feed requires CHANGES_TABLE")
+        return self.changes.read(since=since, limit=limit, wait_seconds=wait_seconds)
+    
+    def _require_customers(self) -> Any:
+        if not self.customers:
+            raise ValueError("Customer summaries require CUSTOMERS_TABLE")
+        return self.customers
+    
+    @timed('customer.list')
+    def list_customers(self, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None) -> Dict[str, Any]:
+        """One page of customer aggregates"""
+        page = self._require_customers().list_page(limit=limit, next_token=next_token)
+        return {
+            'customers': [self._customer_summary(item) for item in page['items']],
+            'count': len(page['items']),
+            'next_token': page['next_token']
+        }
+    
+    @timed('customer.summary')
+    def get_customer_summary(self, customer_id: str) -> Dict[str, Any]:
+        """Order count, lifetime value and last order time of one customer (one GetItem)"""
+        item = self._require_customers().get(customer_id)
+        if not item:
+            raise CustomerNotFoundError(f"Customer {customer_id} not found")
+        return self._customer_summary(item)
+    
+    @staticmethod
+    def _customer_summary(item: Dict[str, Any]) -> Dict[str, Any]:
+        from .customers import SUMMARY_FIELDS
+        
+        return dict({field: 0 for field in SUMMARY_FIELDS}, **item)
+    
+    @timed('customer.orders')
+    def list_customer_orders(self, customer_id: str, limit: int = DEFAULT_PAGE_SIZE, next_token: Optional[str] = None,
+                             filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """One page of a customer's orders, newest first, from the customer_id + created_at GSI"""
+        return self.list_orders(limit=limit, next_token=next_token,
+                                filters=dict(filters or {}, customer_id=customer_id))
+    
+    @timed('order.export')
+    def export_orders(self, export_id: Optional[str] = None, segments: int = 8, compress: bool = True,
+                      should_stop=None) -> Dict[str, Any]:
+        """Export every order to the documents bucket with a parallel Scan"""
+        from .export import OrderExporter
         try:
-            print("Retrieving all orders")
-            orders = self.db_handler.list_all()
-            print(f"Successfully retrieved {len(orders)} orders")
-            return orders
+            exporter = OrderExporter(self.table_name, self.bucket_name, segments=segments, compress=compress,
+                                     lines_table=self.lines.table_name if self.lines else None)
+            return exporter.run(export_id=export_id, should_stop=should_stop)
         except Exception as e:
-            print(f"Error listing orders: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error("Error exporting orders", error=str(e))
+            raise
+    
+    def _require_archive(self) -> Any:
+        if not self.archive:
+            raise ValueError("Archiving orders requires ARCHIVE_INDEX_TABLE")
+        return self.archive
+    
+    @timed('order.archive')
+    def archive_orders(self, older_than_days: float, max_orders: Optional[int] = None,
+                       should_stop=None, dry_run: bool = False) -> Dict[str, Any]:
+        """Move orders closed more than older_than_days ago to the S3 archive"""
+        from .archive import cutoff
+        return self._require_archive().sweep(cutoff(older_than_days), max_orders=max_orders,
+                                             should_stop=should_stop, dry_run=dry_run)
+    
+    @timed('order.restore')
+    def restore_orders(self, order_ids: Optional[List[str]] = None,
+                       partition: Optional[str] = None) -> Dict[str, int]:
+        """Bring archived orders back to the orders table"""
+        return self._require_archive().restore(order_ids=order_ids, partition=partition)
+    
+    def get_export(self, export_id: str) -> Optional[Dict[str, Any]]:
+        """Get manifest or progress of an export"""
+        from .export import OrderExporter
+        return OrderExporter(self.table_name, self.bucket_name).status(export_id)
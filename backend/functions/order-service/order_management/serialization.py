@@ -0,0 +1,55 @@
+# functions/order-service/order_management/serialization.py
+
+import json
+import os
+from dataclasses import is_dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+try:
+    import orjson  # optional fast backend
+except ImportError:  # pragma: no cover - depends on the deployment package
+    orjson = None
+
+# How Decimals (all money and quantity fields) are written:
+#   float  - JSON numbers, as the API has always returned them
+#   string - exact decimal strings, lossless for money
+FLOAT = 'float'
+STRING = 'string'
+DECIMAL_MODE = os.environ.get('DECIMAL_MODE', FLOAT)
+
+def _default_float(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        # Whole numbers (quantities, versions) stay integers
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, set):
+        return list(obj)
+    if is_dataclass(obj):
+        # Order models: orjson writes them natively; json gets a shallow field view
+        return {name: getattr(obj, name) for name in obj.__dataclass_fields__}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _default_string(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _default_float(obj)
+
+def dumps(obj: Any, decimal_mode: Optional[str] = None, indent: bool = False) -> str:
+    """Serialize in one pass, converting Decimal/datetime as they are reached"""
+    default = _default_string if (decimal_mode or DECIMAL_MODE) == STRING else _default_float
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+    if indent:
+        return json.dumps(obj, default=default, indent=2)
+    return json.dumps(obj, default=default, separators=(',', ':'))
+
+def dumps_bytes(obj: Any, decimal_mode: Optional[str] = None) -> bytes:
+    """Like dumps, but returns UTF-8 bytes (skips a decode/encode round trip with orjson)"""
+    if orjson is not None:
+        default = _default_string if (decimal_mode or DECIMAL_MODE) == STRING else _default_float
+        return orjson.dumps(obj, default=default)
+    return dumps(obj, decimal_mode).encode('utf-8')
@@ -0,0 +1,88 @@
+# functions/order-service/order_management/side_effects.py
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+# Side-effect policies:
+#   sequential - run one after another on the calling thread
+#   wait       - run concurrently and wait for all of them (default)
+#   background - run concurrently and return before they finish; lambda_handler's
+#                flush() still waits for them before the response is returned, so
+#                this only overlaps them with building the response
+SEQUENTIAL = 'sequential'
+WAIT = 'wait'
+BACKGROUND = 'background'
+POLICIES = (SEQUENTIAL, WAIT, BACKGROUND)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Container-wide thread pool shared by all side effects"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.environ.get('SIDE_EFFECT_WORKERS', '8')),
+                    thread_name_prefix='side-effect'
+                )
+    return _executor
+
+def submit(fn: Callable[..., Any], *args: Any) -> Future:
+    """Run fn on the shared pool with the caller's context variables"""
+    return get_executor().submit(contextvars.copy_context().run, fn, *args)
+
+class SideEffectRunner:
+    """Runs the independent side effects of an order write (S3 document, SNS message)"""
+
+    def __init__(self, policy: Optional[str] = None):
+        policy = policy or os.environ.get('SIDE_EFFECT_POLICY', WAIT)
+        if policy not in POLICIES:
+            raise ValueError(f"Invalid side effect policy: {policy}")
+        self.policy = policy
+        self._pending: List[Tuple[str, Future]] = []
+        self._lock = threading.Lock()
+
+    def run(self, effects: Dict[str, Callable[[], Any]]) -> Dict[str, BaseException]:
+        """Run named side effects according to the policy and return failures by name"""
+        failures: Dict[str, BaseException] = {}
+
+        if self.policy == SEQUENTIAL:
+            for name, effect in effects.items():
+                try:
+                    effect()
+                except Exception as e:
+                    failures[name] = e
+            return failures
+
+        futures = [(name, submit(effect)) for name, effect in effects.items()]
+        if self.policy == BACKGROUND:
+            with self._lock:
+                self._pending.extend(futures)
+            return failures
+
+        wait([future for _, future in futures])
+        for name, future in futures:
+            if future.exception() is not None:
+                failures[name] = future.exception()
+        return failures
+
+    def flush(self, timeout: Optional[float] = None) -> Dict[str, BaseException]:
+        """Wait for background side effects and return failures by name"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return {}
+
+        done, not_done = wait([future for _, future in pending], timeout=timeout)
+        failures: Dict[str, BaseException] = {}
+        for name, future in pending:
+            if future in not_done:
+                failures[name] = TimeoutError(f"Side effect {name} did not finish in {timeout}s")
+            elif future.exception() is not None:
+                failures[name] = future.exception()
+        return failures
@@ -1,5 +1,6 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { orderService, healthService } from './services/api';
+import { NotificationHandler } from './services/notification-handler';
 import Stats from './components/Dashboard/Stats';
 import OrderForm from './components/Orders/OrderForm';
 import OrderList from './components/Orders/OrderList';
@@ -11,6 +12,35 @@ import CustomerList from './components/Customers/CustomerList';
 import DetailedAnalytics from './components/Analytics/DetailedAnalytics';
 import ErrorBoundary from './components/ErrorBoundary';
 
+const CHANGES_WAIT_SECONDS = 20;
+const CHANGES_RETRY_MS = 5000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Archived orders leave the list like deleted ones; restored ones come back like new ones
+const ADDED_EVENTS = ['ORDER_CREATED', 'ORDER_RESTORED'];
+const REMOVED_EVENTS = ['ORDER_DELETED', 'ORDER_ARCHIVED'];
+
+// Apply change feed entries to the order list; entries may repeat local edits
+const applyChanges = (orders, changes, created) => {
+  let next = orders;
+  changes.forEach(change => {
+    if (ADDED_EVENTS.includes(change.event)) {
+      const order = created[change.order_id];
+      if (order && !next.some(o => o.order_id === order.order_id)) {
+        next = [order, ...next];
+      }
+    } else if (REMOVED_EVENTS.includes(change.event)) {
+      next = next.filter(o => o.order_id !== change.order_id);
+    } else {
+      next = next.map(o => o.order_id === change.order_id
+        ? { ...o, status: change.status, version: change.version ?? o.version, updated_at: change.at }
+        : o);
+    }
+  });
+  return next;
+};
+
 function App() {
   // State management
   const [activeView, setActiveView] = useState('dashboard');
@@ -20,6 +50,8 @@ function App() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [showNotifications, setShowNotifications] = useState(false);
+  // Change feed position of the loaded order list
+  const cursorRef = useRef(null);
 
   // Notification handlers
   const addNotification = useCallback((notification) => {
@@ -55,8 +87,11 @@ function App() {
     try {
       setLoading(true);
       setError(null);
+      // Take the cursor first, so changes made while the list loads are replayed
+      const { cursor } = await orderService.getChanges();
       const data = await orderService.getOrders();
       setOrders(data);
+      cursorRef.current = cursor;
     } catch (err) {
       console.error('Error fetching orders:', err);
       setError('Failed to fetch orders');
@@ -78,13 +113,8 @@ function App() {
       console.log('Order created:', createdOrder);
       
       setShowOrderForm(false);
-      await fetchOrders();
-
-      addNotification({
-        type: 'success',
-        message: `Order ${createdOrder.order_id} created successfully`,
-        order_id: createdOrder.order_id
-      });
+      setOrders(prev => applyChanges(prev, [{ event: 'ORDER_CREATED', order_id: createdOrder.order_id }],
+        { [createdOrder.order_id]: createdOrder }));
     } catch (err) {
       console.error('Error creating order:', err);
       addNotification({
@@ -98,14 +128,8 @@ function App() {
 
   const handleStatusChange = async (orderId, newStatus) => {
     try {
-      await orderService.updateOrderStatus(orderId, newStatus);
-      await fetchOrders();
-      
-      addNotification({
-        type: 'success',
-        message: `Order ${orderId} status updated to ${newStatus}`,
-        order_id: orderId
-      });
+      const updated = await orderService.updateOrderStatus(orderId, newStatus);
+      setOrders(prev => prev.map(o => o.order_id === orderId ? { ...o, ...updated } : o));
     } catch (err) {
       console.error('Error updating status:', err);
       addNotification({
@@ -120,13 +144,7 @@ function App() {
     try {
       setLoading(true);
       await orderService.deleteOrder(orderId);
-      await fetchOrders();
-      
-      addNotification({
-        type: 'success',
-        message: `Order ${orderId} deleted successfully`,
-        order_id: orderId
-      });
+      setOrders(prev => prev.filter(o => o.order_id !== orderId));
     } catch (err) {
       console.error('Error deleting order:', err);
       addNotification({
@@ -144,6 +162,56 @@ function App() {
     fetchOrders();
   }, [fetchOrders]);
 
+  // Follow the change feed instead of re-reading every order: each request
+  // returns what changed since the cursor, or waits for the next change
+  useEffect(() => {
+    let active = true;
+    const follow = async () => {
+      while (active) {
+        if (!cursorRef.current) {
+          await sleep(CHANGES_RETRY_MS);
+          continue;
+        }
+        try {
+          const page = await orderService.getChanges({ since: cursorRef.current, wait: CHANGES_WAIT_SECONDS });
+          if (!active) break;
+          if (page.reset) {
+            // The cursor is older than the feed keeps; start over from a full load
+            cursorRef.current = null;
+            await fetchOrders();
+            continue;
+          }
+          // Entries carry no line items, so new orders are fetched in full
+          const created = {};
+          await Promise.all(page.changes
+            .filter(change => ADDED_EVENTS.includes(change.event))
+            .map(async change => {
+              try {
+                created[change.order_id] = await orderService.getOrder(change.order_id);
+              } catch (err) {
+                // Deleted again since; its ORDER_DELETED entry follows
+              }
+            }));
+          setOrders(prev => applyChanges(prev, page.changes, created));
+          cursorRef.current = page.cursor;
+        } catch (err) {
+          console.error('Error following order changes:', err);
+          await sleep(CHANGES_RETRY_MS);
+        }
+      }
+    };
+
+    follow();
+    return () => { active = false; };
+  }, [fetchOrders]);
+
+  // Order events from every client, including this one, arrive through /notifications
+  useEffect(() => {
+    const handler = new NotificationHandler(addNotification);
+    handler.start();
+    return () => handler.stop();
+  }, [addNotification]);
+
   // Check system health
   useEffect(() => {
     const checkHealth = async () => {
@@ -1,5 +1,6 @@
 // src/components/Analytics/DetailedAnalytics.js
 import React, { useEffect, useState } from 'react';
+import { analyticsService } from '../../services/api';
 
 const DetailedAnalytics = ({ orders }) => {
   const [metrics, setMetrics] = useState({
@@ -9,10 +10,13 @@ const DetailedAnalytics = ({ orders }) => {
   });
 
   useEffect(() => {
-    // Calculate metrics whenever orders change
-    if (orders && orders.length > 0) {
+    let cancelled = false;
+
+    // Fallback when /analytics is unavailable: total the loaded orders
+    const calculateFromOrders = () => {
+      if (!orders || orders.length === 0) return;
       const totalOrders = orders.length;
-      
+
       // Total revenue from all orders
       const totalRevenue = orders.reduce((sum, order) => 
         sum + parseFloat(order.total_amount), 0).toFixed(2);
@@ -28,7 +32,22 @@ const DetailedAnalytics = ({ orders }) => {
         totalRevenue,
         completedRevenue
       });
-    }
+    };
+
+    // Read the pre-computed aggregates whenever orders change
+    analyticsService.getAnalytics({ days: 1, hours: 1 })
+      .then((summary) => {
+        if (cancelled) return;
+        setMetrics({
+          totalOrders: summary.totals.order_count,
+          totalRevenue: Number(summary.totals.revenue).toFixed(2),
+          completedRevenue: Number(summary.by_status.COMPLETED.revenue).toFixed(2)
+        });
+      })
+      .catch(() => {
+        if (!cancelled) calculateFromOrders();
+      });
+    return () => { cancelled = true; };
   }, [orders]);
 
   return (
@@ -1,79 +1,109 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
+import { customerService } from '../../services/api';
+
+// Shown when /customers cannot be reached
+const defaultCustomers = [
+  {
+    customer_id: "CUST-001",
+    name: "John Doe",
+    email: "john@example.com",
+    phone: "123-456-7890",
+    address: "123 Main St, City, Country"
+  },
+  {
+    customer_id: "CUST-002",
+    name: "Jane Smith",
+    email: "jane@example.com",
+    phone: "234-567-8901",
+    address: "456 Oak Ave, City, Country"
+  },
+  {
+    customer_id: "CUST-003",
+    name: "Robert Johnson",
+    email: "robert@example.com",
+    phone: "345-678-9012",
+    address: "789 Pine Rd, City, Country"
+  },
+  {
+    customer_id: "CUST-004",
+    name: "Emily Brown",
+    email: "emily@example.com",
+    phone: "456-789-0123",
+    address: "321 Elm St, City, Country"
+  },
+  {
+    customer_id: "CUST-005",
+    name: "Michael Wilson",
+    email: "michael@example.com",
+    phone: "567-890-1234",
+    address: "654 Maple Dr, City, Country"
+  },
+  {
+    customer_id: "CUST-006",
+    name: "Sarah Davis",
+    email: "sarah@example.com",
+    phone: "678-901-2345",
+    address: "987 Cedar Ln, City, Country"
+  },
+  {
+    customer_id: "CUST-007",
+    name: "David Miller",
+    email: "david@example.com",
+    phone: "789-012-3456",
+    address: "147 Birch Blvd, City, Country"
+  },
+  {
+    customer_id: "CUST-008",
+    name: "Lisa Anderson",
+    email: "lisa@example.com",
+    phone: "890-123-4567",
+    address: "258 Willow Way, City, Country"
+  },
+  {
+    customer_id: "CUST-009",
+    name: "James Taylor",
+    email: "james@example.com",
+    phone: "901-234-5678",
+    address: "369 Ash St, City, Country"
+  },
+  {
+    customer_id: "CUST-010",
+    name: "Jennifer Martin",
+    email: "jennifer@example.com",
+    phone: "012-345-6789",
+    address: "741 Palm Ct, City, Country"
+  }
+];
+
+const formatMoney = (value) => `$${Number(value || 0).toFixed(2)}`;
+
+const formatDate = (value) => (value ? new Date(value).toLocaleDateString() : '-');
 
 const CustomerList = () => {
-  // Default 10 customers
-  const defaultCustomers = [
-    {
-      customer_id: "CUST-001",
-      name: "John Doe",
-      email: "john@example.com",
-      phone: "123-456-7890",
-      address: "123 Main St, City, Country"
-    },
-    {
-      customer_id: "CUST-002",
-      name: "Jane Smith",
-      email: "jane@example.com",
-      phone: "234-567-8901",
-      address: "456 Oak Ave, City, Country"
-    },
-    {
-      customer_id: "CUST-003",
-      name: "Robert Johnson",
-      email: "robert@example.com",
-      phone: "345-678-9012",
-      address: "789 Pine Rd, City, Country"
-    },
-    {
-      customer_id: "CUST-004",
-      name: "Emily Brown",
-      email: "emily@example.com",
-      phone: "456-789-0123",
-      address: "321 Elm St, City, Country"
-    },
-    {
-      customer_id: "CUST-005",
-      name: "Michael Wilson",
-      email: "michael@example.com",
-      phone: "567-890-1234",
-      address: "654 Maple Dr, City, Country"
-    },
-    {
-      customer_id: "CUST-006",
-      name: "Sarah Davis",
-      email: "sarah@example.com",
-      phone: "678-901-2345",
-      address: "987 Cedar Ln, City, Country"
-    },
-    {
-      customer_id: "CUST-007",
-      name: "David Miller",
-      email: "david@example.com",
-      phone: "789-012-3456",
-      address: "147 Birch Blvd, City, Country"
-    },
-    {
-      customer_id: "CUST-008",
-      name: "Lisa Anderson",
-      email: "lisa@example.com",
-      phone: "890-123-4567",
-      address: "258 Willow Way, City, Country"
-    },
-    {
-      customer_id: "CUST-009",
-      name: "James Taylor",
-      email: "james@example.com",
-      phone: "901-234-5678",
-      address: "369 Ash St, City, Country"
-    },
-    {
-      customer_id: "CUST-010",
-      name: "Jennifer Martin",
-      email: "jennifer@example.com",
-      phone: "012-345-6789",
-      address: "741 Palm Ct, City, Country"
+  const [customers, setCustomers] = useState([]);
+  const [nextToken, setNextToken] = useState(null);
+  const [loading, setLoading] = useState(false);
+  const [fallback, setFallback] = useState(false);
+
+  // One page at a time from the per-customer aggregates
+  const loadPage = async (token) => {
+    setLoading(true);
+    try {
+      const page = await customerService.getCustomers({ limit: 50, ...(token ? { next_token: token } : {}) });
+      setCustomers((loaded) => (token ? [...loaded, ...page.customers] : page.customers));
+      setNextToken(page.next_token);
+    } catch (error) {
+      if (!token) setFallback(true);
+    } finally {
+      setLoading(false);
     }
-  ];
+  };
+
+  useEffect(() => {
+    loadPage(null);
+  }, []);
+
+  const rows = fallback ? defaultCustomers : customers;
 
   return (
     <div className="bg-white rounded-lg shadow">
@@ -86,37 +116,47 @@ const CustomerList = () => {
               <tr>
                 <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">ID</th>
                 <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Name</th>
-                <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Email</th>
-                <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Phone</th>
-                <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Address</th>
+                <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Orders</th>
+                <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Lifetime Value</th>
+                <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase">Last Order</th>
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
-              {defaultCustomers.map((customer) => (
+              {rows.map((customer) => (
                 <tr key={customer.customer_id} className="hover:bg-gray-50">
                   <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
                     {customer.customer_id}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                    {customer.name}
+                    {customer.customer_name || customer.name}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                    {customer.email}
+                    {customer.order_count ?? '-'}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                    {customer.phone}
+                    {customer.lifetime_value !== undefined ? formatMoney(customer.lifetime_value) : '-'}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                    {customer.address}
+                    {formatDate(customer.last_order_at)}
                   </td>
                 </tr>
               ))}
             </tbody>
           </table>
         </div>
+
+        {nextToken && !fallback && (
+          <button
+            onClick={() => loadPage(nextToken)}
+            disabled={loading}
+            className="mt-4 px-4 py-2 text-sm bg-blue-600 text-white rounded hover:bg-blue-700 disabled:opacity-50"
+          >
+            {loading ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </div>
     </div>
   );
 };
 
-export default CustomerList;
\ No newline at end of file
+export default CustomerList;
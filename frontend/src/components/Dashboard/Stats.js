@@ -1,9 +1,35 @@
 // src/components/Dashboard/Stats.js
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { TrendingUp, TrendingDown } from 'lucide-react';
+import { analyticsService } from '../../services/api';
+
+// Metrics from the pre-computed /analytics rows: totals, per-status counts
+// and the last 30 days of per-day counts
+const metricsFromSummary = (summary) => {
+  const total = summary.totals.order_count;
+  const recent = summary.by_day.reduce((sum, day) => sum + day.order_count, 0);
+  const previous = total - recent;
+  return {
+    total,
+    processing: summary.by_status.PROCESSING.order_count,
+    completed: summary.by_status.COMPLETED.order_count,
+    pending: summary.by_status.PENDING.order_count,
+    orderGrowth: previous ? ((recent - previous) / previous * 100).toFixed(1) : 100
+  };
+};
 
 export default function Stats({ orders }) {
+  const [summary, setSummary] = useState(null);
+
+  useEffect(() => {
+    analyticsService.getAnalytics({ days: 30 })
+      .then(setSummary)
+      .catch(() => setSummary(null)); // fall back to the loaded orders
+  }, [orders]);
+
   const calculateMetrics = () => {
+    if (summary) return metricsFromSummary(summary);
+
     const total = orders.length;
     const processing = orders.filter(o => o.status === 'PROCESSING').length;
     const completed = orders.filter(o => o.status === 'COMPLETED').length;
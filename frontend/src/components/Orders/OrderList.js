@@ -1,68 +1,110 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Eye, Trash2, XCircle } from 'lucide-react';
+import { orderService } from '../../services/api';
 
-const OrderDetailsModal = ({ order, onClose }) => (
-  <div className="fixed inset-0 bg-black bg-opacity-50 z-50 flex items-center justify-center">
-    <div className="bg-white rounded-lg shadow-xl max-w-2xl w-full m-4 max-h-[90vh] overflow-y-auto">
-      <div className="p-4 border-b flex justify-between items-center">
-        <h2 className="text-xl font-bold">Order Details: {order.order_id}</h2>
-        <button onClick={onClose} className="text-gray-500 hover:text-gray-700">
-          <XCircle />
-        </button>
-      </div>
-      <div className="p-4">
-        <div className="grid grid-cols-2 gap-4 mb-6">
-          <div>
-            <label className="block text-sm font-medium text-gray-700">Order ID</label>
-            <p className="mt-1">{order.order_id}</p>
-          </div>
-          <div>
-            <label className="block text-sm font-medium text-gray-700">Customer Name</label>
-            <p className="mt-1">{order.customer_name}</p>
-          </div>
-          <div>
-            <label className="block text-sm font-medium text-gray-700">Status</label>
-            <p className="mt-1">{order.status}</p>
-          </div>
-          <div>
-            <label className="block text-sm font-medium text-gray-700">Created At</label>
-            <p className="mt-1">{new Date(order.created_at).toLocaleString()}</p>
-          </div>
+// Listings carry order summaries only; the modal loads line items a page at a time
+const OrderDetailsModal = ({ order, onClose }) => {
+  const [items, setItems] = useState([]);
+  const [nextToken, setNextToken] = useState(null);
+  const [loadingItems, setLoadingItems] = useState(true);
+  const [itemsError, setItemsError] = useState(null);
+
+  const loadItems = async (token) => {
+    try {
+      setLoadingItems(true);
+      setItemsError(null);
+      const page = await orderService.getOrder(order.order_id, {
+        include: 'items',
+        ...(token ? { next_token: token } : {})
+      });
+      setItems(current => (token ? [...current, ...page.items] : page.items));
+      setNextToken(page.items_next_token);
+    } catch (err) {
+      setItemsError('Failed to load items');
+    } finally {
+      setLoadingItems(false);
+    }
+  };
+
+  useEffect(() => {
+    loadItems(null);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [order.order_id]);
+
+  return (
+    <div className="fixed inset-0 bg-black bg-opacity-50 z-50 flex items-center justify-center">
+      <div className="bg-white rounded-lg shadow-xl max-w-2xl w-full m-4 max-h-[90vh] overflow-y-auto">
+        <div className="p-4 border-b flex justify-between items-center">
+          <h2 className="text-xl font-bold">Order Details: {order.order_id}</h2>
+          <button onClick={onClose} className="text-gray-500 hover:text-gray-700">
+            <XCircle />
+          </button>
         </div>
+        <div className="p-4">
+          <div className="grid grid-cols-2 gap-4 mb-6">
+            <div>
+              <label className="block text-sm font-medium text-gray-700">Order ID</label>
+              <p className="mt-1">{order.order_id}</p>
+            </div>
+            <div>
+              <label className="block text-sm font-medium text-gray-700">Customer Name</label>
+              <p className="mt-1">{order.customer_name}</p>
+            </div>
+            <div>
+              <label className="block text-sm font-medium text-gray-700">Status</label>
+              <p className="mt-1">{order.status}</p>
+            </div>
+            <div>
+              <label className="block text-sm font-medium text-gray-700">Created At</label>
+              <p className="mt-1">{new Date(order.created_at).toLocaleString()}</p>
+            </div>
+          </div>
 
-        <div>
-          <h3 className="font-medium mb-2">Items</h3>
-          <table className="min-w-full divide-y divide-gray-200">
-            <thead className="bg-gray-50">
-              <tr>
-                <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Product</th>
-                <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Quantity</th>
-                <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Price</th>
-                <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Total</th>
-              </tr>
-            </thead>
-            <tbody>
-              {order.items.map((item, index) => (
-                <tr key={index}>
-                  <td className="px-4 py-2">{item.name}</td>
-                  <td className="px-4 py-2">{item.quantity}</td>
-                  <td className="px-4 py-2">${parseFloat(item.price).toFixed(2)}</td>
-                  <td className="px-4 py-2">${(item.quantity * item.price).toFixed(2)}</td>
+          <div>
+            <h3 className="font-medium mb-2">Items</h3>
+            <table className="min-w-full divide-y divide-gray-200">
+              <thead className="bg-gray-50">
+                <tr>
+                  <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Product</th>
+                  <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Quantity</th>
+                  <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Price</th>
+                  <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">Total</th>
                 </tr>
-              ))}
-            </tbody>
-          </table>
-        </div>
+              </thead>
+              <tbody>
+                {items.map((item, index) => (
+                  <tr key={index}>
+                    <td className="px-4 py-2">{item.name}</td>
+                    <td className="px-4 py-2">{item.quantity}</td>
+                    <td className="px-4 py-2">${parseFloat(item.price).toFixed(2)}</td>
+                    <td className="px-4 py-2">${(item.quantity * item.price).toFixed(2)}</td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+            {itemsError && <p className="mt-2 text-sm text-red-600">{itemsError}</p>}
+            {loadingItems ? (
+              <p className="mt-2 text-sm text-gray-500">Loading items...</p>
+            ) : nextToken && (
+              <button
+                onClick={() => loadItems(nextToken)}
+                className="mt-2 text-sm text-blue-600 hover:text-blue-800"
+              >
+                Load more items ({items.length} shown)
+              </button>
+            )}
+          </div>
 
-        <div className="mt-4 pt-4 border-t flex justify-between items-center">
-          <div className="text-lg font-bold">
-            Total: ${parseFloat(order.total_amount).toFixed(2)}
+          <div className="mt-4 pt-4 border-t flex justify-between items-center">
+            <div className="text-lg font-bold">
+              Total: ${parseFloat(order.total_amount).toFixed(2)}
+            </div>
           </div>
         </div>
       </div>
     </div>
-  </div>
-);
+  );
+};
 
 const OrderList = ({ 
   orders = [], 
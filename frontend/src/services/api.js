@@ -53,16 +53,60 @@ api.interceptors.response.use(
 
 // Core services
 const orderService = {
+  // Every order, following next_token across pages
   async getOrders() {
     try {
-      const response = await api.get('/orders');
-      return response.data;
+      const orders = [];
+      let nextToken = null;
+      do {
+        const page = await this.getOrdersPage({
+          mode: 'scan',
+          limit: 100,
+          ...(nextToken ? { next_token: nextToken } : {})
+        });
+        orders.push(...page.orders);
+        nextToken = page.next_token;
+      } while (nextToken);
+      return orders;
     } catch (error) {
       console.error('Get orders error:', error);
       throw error;
     }
   },
 
+  // params: limit, next_token, status, customer_id, created_from, created_to, mode
+  async getOrdersPage(params = {}) {
+    try {
+      const response = await api.get('/orders', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Get orders page error:', error);
+      throw error;
+    }
+  },
+
+  // params: include ('items' for a page of line items), limit, next_token
+  async getOrder(orderId, params = {}) {
+    try {
+      const response = await api.get(`/orders/${orderId}`, { params });
+      return response.data;
+    } catch (error) {
+      console.error('Get order error:', error);
+      throw error;
+    }
+  },
+
+  // params: since (cursor; omit to get the current one), limit, wait (seconds to long-poll)
+  async getChanges(params = {}) {
+    try {
+      const response = await api.get('/orders/changes', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Get order changes error:', error);
+      throw error;
+    }
+  },
+
   async createOrder(orderData) {
     try {
       console.log('Creating order with data:', JSON.stringify(orderData, null, 2));
@@ -100,6 +144,66 @@ const orderService = {
   }
 };
 
+const analyticsService = {
+  // params: days, hours (series lengths), or dimension, limit, next_token
+  async getAnalytics(params = {}) {
+    try {
+      const response = await api.get('/analytics', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Get analytics error:', error);
+      throw error;
+    }
+  }
+};
+
+const customerService = {
+  // params: limit, next_token
+  async getCustomers(params = {}) {
+    try {
+      const response = await api.get('/customers', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Get customers error:', error);
+      throw error;
+    }
+  },
+
+  async getCustomerSummary(customerId) {
+    try {
+      const response = await api.get(`/customers/${customerId}/summary`);
+      return response.data;
+    } catch (error) {
+      console.error('Get customer summary error:', error);
+      throw error;
+    }
+  },
+
+  // params: limit, next_token, status, created_from, created_to
+  async getCustomerOrders(customerId, params = {}) {
+    try {
+      const response = await api.get(`/customers/${customerId}/orders`, { params });
+      return response.data;
+    } catch (error) {
+      console.error('Get customer orders error:', error);
+      throw error;
+    }
+  }
+};
+
+const notificationService = {
+  // params: since (cursor; omit to get the current one), limit, wait (seconds to long-poll)
+  async getNotifications(params = {}) {
+    try {
+      const response = await api.get('/notifications', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Get notifications error:', error);
+      throw error;
+    }
+  }
+};
+
 const healthService = {
   async check() {
     try {
@@ -114,5 +218,8 @@ const healthService = {
 
 export {
   orderService,
+  analyticsService,
+  customerService,
+  notificationService,
   healthService
 };
\ No newline at end of file
@@ -1,39 +1,59 @@
 // src/services/notification-handler.js
+import { notificationService } from './api';
 
+// Follows /notifications from a cursor. A request returns as soon as there is
+// something new, or after waitSeconds when there isn't, so an idle panel holds
+// one open request instead of polling every few seconds.
 class NotificationHandler {
   constructor(onNotification) {
     this.onNotification = onNotification;
-    this.checkInterval = 5000; // 5 seconds
-    this.intervalId = null;
+    this.waitSeconds = 20;
+    this.retryInterval = 5000; // 5 seconds after a failed request
+    this.cursor = null;
+    this.running = false;
   }
 
   start() {
-    if (!this.intervalId) {
-      this.checkForNotifications();
-      this.intervalId = setInterval(() => this.checkForNotifications(), this.checkInterval);
+    if (!this.running) {
+      this.running = true;
+      this.follow();
     }
   }
 
   stop() {
-    if (this.intervalId) {
-      clearInterval(this.intervalId);
-      this.intervalId = null;
+    this.running = false;
+  }
+
+  async follow() {
+    while (this.running) {
+      try {
+        await this.checkForNotifications();
+      } catch (error) {
+        console.error('Error checking notifications:', error);
+        await new Promise(resolve => setTimeout(resolve, this.retryInterval));
+      }
     }
   }
 
   async checkForNotifications() {
-    try {
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/notifications`);
-      if (!response.ok) throw new Error('Failed to fetch notifications');
-      
-      const notifications = await response.json();
-      notifications.forEach(notification => {
-        this.onNotification(notification);
-      });
-    } catch (error) {
-      console.error('Error checking notifications:', error);
+    if (!this.cursor) {
+      // Start from now; earlier changes are already reflected in what the app loaded
+      const { cursor } = await notificationService.getNotifications();
+      this.cursor = cursor;
+      return;
     }
+
+    const page = await notificationService.getNotifications({
+      since: this.cursor,
+      wait: this.waitSeconds
+    });
+    if (!this.running) return;
+    // A reset page (cursor older than the feed keeps) is empty and carries a fresh cursor
+    page.notifications.forEach(notification => {
+      this.onNotification(notification);
+    });
+    this.cursor = page.cursor;
   }
 }
 
-export { NotificationHandler };
\ No newline at end of file
+export { NotificationHandler };
@@ -0,0 +1,29 @@
+# tests/conftest.py
+"""Shared fixtures: the order service runs in-process against moto, as in backend/benchmarks."""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(ROOT, 'backend', 'benchmarks')
+if BENCHMARKS_DIR not in sys.path:
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+import common  # noqa: E402  (puts the order service on sys.path)
+
+@pytest.fixture
+def aws():
+    """moto stand-ins for the stack's tables, bucket and topic; the environment is restored afterwards"""
+    pytest.importorskip('moto')
+    saved = dict(os.environ)
+    try:
+        with common.local_aws() as env:
+            import app
+            app.reset_processor()
+            yield env
+            app.reset_processor()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
@@ -0,0 +1,26 @@
+# tests/test_changes.py
+
+import os
+import time
+
+from common import CHANGES_TABLE
+
+def test_sharded_feed_pages_in_sequence_order(aws):
+    from order_management.changes import ChangeLog
+
+    os.environ['CHANGES_SETTLE_MS'] = '0'
+    log = ChangeLog(CHANGES_TABLE)
+    cursor = log.read()['cursor']
+    entries = [log.entry('ORDER_CREATED', {'order_id': f'ORD-{i}'}) for i in range(25)]
+    assert len({entry['feed'] for entry in entries}) > 1
+    assert log.append(entries) == {}
+    time.sleep(0.01)
+
+    seen = []
+    while True:
+        page = log.read(since=cursor, limit=7)
+        seen.extend(change['seq'] for change in page['changes'])
+        cursor = page['cursor']
+        if not page['has_more']:
+            break
+    assert seen == [entry['seq'] for entry in entries]
@@ -0,0 +1,36 @@
+# tests/test_cold_start.py
+"""The cold-start budget of backend/benchmarks/bench_cold_start.py as tests.
+
+The import budget defaults to the benchmark's 40 ms; COLD_START_BUDGET_MS
+raises it on slower runners.
+"""
+
+import os
+
+import pytest
+
+import bench_cold_start
+
+BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', '40'))
+RUNS = 7
+
+@pytest.fixture(scope='module')
+def probes():
+    return [bench_cold_start.import_probe() for _ in range(RUNS)]
+
+def test_import_is_within_budget(probes):
+    import_ms = sorted(probe['import_ms'] for probe in probes)[RUNS // 2]
+    assert import_ms <= BUDGET_MS, f"import of app took {import_ms:.1f} ms (budget {BUDGET_MS} ms)"
+
+def test_import_and_preflight_do_not_load_boto3(probes):
+    assert all(probe['status'] == 200 for probe in probes)
+    assert sorted({m for probe in probes for m in probe['heavy_modules']}) == []
+
+def test_routes_create_only_the_clients_they_use():
+    pytest.importorskip('moto')
+    saved = dict(os.environ)
+    try:
+        assert bench_cold_start.route_clients() == bench_cold_start.EXPECTED_CLIENTS
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
@@ -0,0 +1,48 @@
+# tests/test_documents.py
+
+import json
+import os
+
+from common import OUTBOX_TABLE, api_event, sample_order
+
+def call(method, path, order_id=None, **kwargs):
+    import app
+    path_parameters = {'orderId': order_id} if order_id else None
+    response = app.lambda_handler(api_event(method, path, path_parameters=path_parameters, **kwargs), None)
+    return response['statusCode'], json.loads(response['body']) if response['body'] else None
+
+def test_document_url_falls_back_to_the_newest_stored_version(aws):
+    import app
+
+    status, order = call('POST', '/orders', body=sample_order())
+    order_id = order['order_id']
+    status, document = call('GET', f'/orders/{order_id}/document', order_id)
+    assert status == 200 and not document['stale']
+
+    # With an outbox the new version is stored later, by the dispatcher
+    os.environ['OUTBOX_TABLE'] = OUTBOX_TABLE
+    app.reset_processor()
+    status, _ = call('PATCH', f'/orders/{order_id}/status', order_id, body={'status': 'PROCESSING'})
+    assert status == 200
+    status, stale = call('GET', f'/orders/{order_id}/document', order_id)
+    assert status == 200 and stale['stale'] and stale['key'] == document['key']
+
+def test_document_url_is_404_without_any_stored_version(aws):
+    import app
+
+    os.environ['OUTBOX_TABLE'] = OUTBOX_TABLE
+    app.reset_processor()
+    status, order = call('POST', '/orders', body=sample_order())
+    assert status == 201
+    status, _ = call('GET', f"/orders/{order['order_id']}/document", order['order_id'])
+    assert status == 404
+
+def test_stored_versions_are_not_overwritten_by_another_container(aws):
+    import boto3
+    from order_management.processor import S3DocumentHandler
+
+    key = S3DocumentHandler.document_key('ORD-1', 1, 'PENDING')
+    S3DocumentHandler(aws['DOCUMENTS_BUCKET']).store_document_json(key, '{"attempt": 1}')
+    S3DocumentHandler(aws['DOCUMENTS_BUCKET']).store_document_json(key, '{"attempt": 2}')
+    body = boto3.client('s3').get_object(Bucket=aws['DOCUMENTS_BUCKET'], Key=key)['Body'].read()
+    assert json.loads(body) == {'attempt': 1}
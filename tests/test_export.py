@@ -0,0 +1,52 @@
+# tests/test_export.py
+
+import json
+
+from common import api_event, sample_order
+
+def test_export_progress_uses_the_segment_count_it_was_started_with(aws):
+    import app
+    from order_management.export import OrderExporter
+
+    for _ in range(5):
+        app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)
+    exporter = OrderExporter(aws['ORDERS_TABLE'], aws['DOCUMENTS_BUCKET'], segments=3)
+    export_id = OrderExporter.new_export_id()
+    paused = exporter.run(export_id=export_id, should_stop=lambda: True)
+    assert not paused['complete']
+
+    event = api_event('GET', f'/orders/export/{export_id}', path_parameters={'exportId': export_id})
+    progress = json.loads(app.lambda_handler(event, None)['body'])
+    assert progress['segments'] == 3 and progress['segments_done'] == 0
+
+    exporter.run(export_id=export_id)
+    manifest = json.loads(app.lambda_handler(event, None)['body'])
+    assert manifest['complete'] and manifest['segments'] == 3 and manifest['rows'] == 5
+
+def test_export_segments_are_capped_by_the_function_memory(monkeypatch):
+    import app
+
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '256')
+    assert app.default_max_export_segments() == 8
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '4096')
+    assert app.default_max_export_segments() == 32
+
+def test_rebuild_aggregates_the_export_in_chunks(aws, monkeypatch):
+    import app
+    import rebuild
+    from common import ANALYTICS_TABLE
+    from order_management.export import OrderExporter
+
+    for index in range(7):
+        app.lambda_handler(api_event('POST', '/orders', body=sample_order(customer_id=f'CUST-{index % 3}')), None)
+    export_id = OrderExporter.new_export_id()
+    OrderExporter(aws['ORDERS_TABLE'], aws['DOCUMENTS_BUCKET'], segments=2).run(export_id=export_id)
+    expected = rebuild.aggregate_orders(list(rebuild.read_export(aws['DOCUMENTS_BUCKET'], export_id)))
+
+    chunks = []
+    aggregate_orders = rebuild.aggregate_orders
+    monkeypatch.setattr(rebuild, 'aggregate_orders', lambda orders: chunks.append(len(orders)) or aggregate_orders(orders))
+    rows = {}
+    assert rebuild.aggregate_chunked(rebuild.read_export(aws['DOCUMENTS_BUCKET'], export_id), rows, chunk_size=3) == 7
+    assert chunks == [3, 3, 1] and rows == expected
+    assert rebuild.rebuild(export_id, aws['DOCUMENTS_BUCKET'], ANALYTICS_TABLE)['orders'] == 7
@@ -0,0 +1,104 @@
+# tests/test_metrics.py
+
+import io
+import json
+from contextlib import redirect_stdout
+
+import pytest
+
+from common import api_event, sample_order
+from order_management import metrics
+
+@pytest.fixture
+def sink():
+    sink = metrics.MemorySink()
+    metrics.set_sink(sink)
+    yield sink
+    metrics.set_sink(None)
+
+def test_span_outside_a_request_records_nothing(sink):
+    with metrics.span('db.get'):
+        pass
+    metrics.count('cache.hit')
+    assert sink.records == []
+
+def test_request_emits_one_emf_record(sink):
+    token = metrics.start_request('GET /orders/{orderId}')
+    with metrics.span('db.get'):
+        pass
+    with metrics.span('db.get'):
+        pass
+    metrics.count('cache.miss')
+    record = metrics.end_request(token, status_code=200)
+
+    assert sink.records == [record]
+    directive = record['_aws']['CloudWatchMetrics'][0]
+    assert directive['Namespace'] == metrics.NAMESPACE
+    assert directive['Dimensions'] == [['Service', 'Operation', 'ColdStart']]
+    units = {metric['Name']: metric['Unit'] for metric in directive['Metrics']}
+    assert units['db.get'] == units['request'] == 'Milliseconds'
+    assert units['cache.miss'] == 'Count'
+    assert record['Operation'] == 'GET /orders/{orderId}'
+    assert record['status_code'] == 200
+    # Repeated spans keep every value, so CloudWatch computes percentiles over them
+    assert isinstance(record['db.get'], list) and len(record['db.get']) == 2
+    assert record['cache.miss'] == 1
+
+def test_span_values_are_capped_per_record(sink):
+    token = metrics.start_request('POST /orders/batch')
+    for _ in range(metrics.MAX_VALUES + 10):
+        with metrics.span('db.batch_save'):
+            pass
+    record = metrics.end_request(token)
+    assert len(record['db.batch_save']) == metrics.MAX_VALUES
+
+def test_disabled_metrics_emit_nothing(sink, monkeypatch):
+    monkeypatch.setenv('METRICS_ENABLED', 'false')
+    token = metrics.start_request('GET /health')
+    assert metrics.end_request(token) is None
+    assert sink.records == []
+
+def test_handler_records_stages_and_flags_only_the_first_request_cold(aws, sink, monkeypatch):
+    import app
+
+    monkeypatch.setenv('SIDE_EFFECT_POLICY', 'wait')
+    monkeypatch.setattr(metrics, '_cold_start', True)
+    requests = 5
+    with redirect_stdout(io.StringIO()):
+        for _ in range(requests):
+            response = app.lambda_handler(api_event('POST', '/orders', body=sample_order()), None)
+            order_id = json.loads(response['body'])['order_id']
+            app.lambda_handler(api_event('GET', f'/orders/{order_id}', path_parameters={'orderId': order_id}), None)
+
+    assert len(sink.records) == 2 * requests
+    assert [record['ColdStart'] for record in sink.records] == ['true'] + ['false'] * (2 * requests - 1)
+    assert 'init' in sink.records[0]
+    created = [record for record in sink.records if record['Operation'] == 'POST /orders']
+    for record in created:
+        for stage in ('db.save', 's3.store', 'sns.publish', 'encode', 'request'):
+            assert stage in record, stage
+        assert record['status_code'] == 201
+
+def test_stream_consumer_logs_json_lines(monkeypatch):
+    import log
+    import stream
+
+    class Store:
+        def apply(self, deltas, batch_id):
+            return 3
+
+    monkeypatch.setattr(stream, 'get_store', lambda: Store())
+    monkeypatch.setattr(stream, 'deltas_for', lambda records: {})
+    output = io.StringIO()
+    with redirect_stdout(output):
+        stream.lambda_handler({'Records': [{'eventID': '1'}, {'eventID': '2'}]}, None)
+        monkeypatch.setenv('LOG_LEVEL', 'ERROR')
+        log.configure()
+        stream.lambda_handler({'Records': [{'eventID': '3'}]}, None)
+    monkeypatch.delenv('LOG_LEVEL')
+    log.configure()
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['level'] == 'INFO' and record['logger'] == 'stream'
+    assert record['records'] == 2 and record['rows_updated'] == 3 and record['batch_id'] == '1:2'
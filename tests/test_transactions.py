@@ -0,0 +1,132 @@
+# tests/test_transactions.py
+
+import json
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+from common import INVENTORY_TABLE, api_event, sample_order
+from order_management import processor
+from order_management.processor import is_transaction_conflict, retry_conflicts
+
+def cancelled(*codes: str) -> ClientError:
+    return ClientError({
+        'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+        'CancellationReasons': [{'Code': code} for code in codes]
+    }, 'TransactWriteItems')
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(processor.time, 'sleep', lambda seconds: None)
+
+def test_conflict_only_when_every_reason_is_a_conflict_or_none():
+    assert is_transaction_conflict(cancelled('None', 'TransactionConflict'))
+    assert not is_transaction_conflict(cancelled('None', 'ConditionalCheckFailed'))
+    assert not is_transaction_conflict(cancelled('TransactionConflict', 'ConditionalCheckFailed'))
+    assert not is_transaction_conflict(cancelled('None', 'None'))
+    assert not is_transaction_conflict(ValueError('not a client error'))
+
+def test_conflicts_are_retried_until_the_write_commits():
+    calls = []
+
+    def write():
+        calls.append(1)
+        if len(calls) < 3:
+            raise cancelled('None', 'TransactionConflict')
+        return 'committed'
+
+    assert retry_conflicts(write) == 'committed'
+    assert len(calls) == 3
+
+def test_retries_are_bounded():
+    calls = []
+
+    def write():
+        calls.append(1)
+        raise cancelled('TransactionConflict')
+
+    with pytest.raises(ClientError):
+        retry_conflicts(write, max_attempts=4)
+    assert len(calls) == 4
+
+def test_failed_conditions_are_not_retried():
+    calls = []
+
+    def write():
+        calls.append(1)
+        raise cancelled('None', 'ConditionalCheckFailed')
+
+    with pytest.raises(ClientError):
+        retry_conflicts(write)
+    assert len(calls) == 1
+
+def test_seed_creates_only_missing_rows_and_finds_unknown_products(aws):
+    import app
+    from order_management.inventory import InventoryStore
+
+    store = InventoryStore(INVENTORY_TABLE)
+    store.table.put_item(Item={'product_id': 'PROD-0', 'stock_level': 7})
+    app.lambda_handler(api_event('POST', '/orders', body=sample_order(3)), None)
+    assert store.unknown_products(aws['ORDERS_TABLE']) == ['PROD-1', 'PROD-2']
+
+    result = store.seed({'PROD-0': 50, 'PROD-1': 50, 'PROD-2': 50})
+    assert sorted(result['created']) == ['PROD-1', 'PROD-2']
+    assert result['existing'] == ['PROD-0']
+    assert store.get_levels(['PROD-0'])['PROD-0']['stock_level'] == 7
+    assert store.unknown_products(aws['ORDERS_TABLE']) == []
+
+    # With the flag on, orders for seeded products reserve stock
+    os.environ.update(INVENTORY_TABLE=INVENTORY_TABLE, INVENTORY_RESERVATIONS_ENABLED='true')
+    app.reset_processor()
+    response = app.lambda_handler(api_event('POST', '/orders', body=sample_order(3)), None)
+    assert response['statusCode'] == 201, json.loads(response['body'])
+    assert store.get_levels(['PROD-1'])['PROD-1']['stock_level'] == 48
+
+def test_analytics_chunks_retry_conflicts(monkeypatch):
+    import aggregates
+    monkeypatch.setattr(aggregates.time, 'sleep', lambda seconds: None)
+    calls = []
+
+    class Client:
+        def transact_write_items(self, TransactItems):
+            calls.append(TransactItems)
+            if len(calls) == 1:
+                raise cancelled('None', 'TransactionConflict')
+
+    store = aggregates.AnalyticsStore.__new__(aggregates.AnalyticsStore)
+    store.table_name = 'analytics'
+    store.dynamodb = type('Resource', (), {'meta': type('Meta', (), {'client': Client()})})()
+    deltas = {('total', 'all'): {'order_count': aggregates.Decimal(1)}}
+    assert store.apply(deltas, 'batch') == 1
+    assert len(calls) == 2 and calls[0] == calls[1]
+
+def test_status_and_delete_transactions_retry_conflicts():
+    calls = []
+
+    class Client:
+        def transact_write_items(self, TransactItems):
+            calls.append(TransactItems)
+            if len(calls) == 1:
+                raise cancelled('None', 'TransactionConflict')
+
+    handler = processor.DynamoDBHandler('orders')
+    handler.dynamodb = type('Resource', (), {'meta': type('Meta', (), {'client': Client()})})()
+    items = [{'Update': {'TableName': 'customers', 'Key': {'customer_id': 'CUST-1'}}}]
+    handler.transact(items)
+    assert calls == [items, items]
+
+@pytest.mark.parametrize('path,body', [
+    ('/orders/status', None),
+    ('/orders/status', '[]'),
+    ('/orders/status', '{"status": "SHIPPED", "order_ids": [["ORD-1"]]}'),
+    ('/orders/status', '{"status": "SHIPPED", "order_ids": ["ORD-1", ""]}'),
+    ('/orders/ORD-1/status', None),
+    ('/orders/ORD-1/status', 'not json'),
+    ('/orders/ORD-1/status', '["PROCESSING"]'),
+])
+def test_status_updates_reject_malformed_bodies(aws, path, body):
+    import app
+    event = api_event('PATCH', path, path_parameters={'orderId': 'ORD-1'})
+    event['body'] = body
+    assert app.lambda_handler(event, None)['statusCode'] == 400